@@ -0,0 +1,385 @@
+"""
+Métriques applicatives au format d'exposition texte Prometheus.
+
+Chaque processus agrège ses métriques en mémoire, un agrégat par thread, sans
+verrou sur le chemin des requêtes. Lorsque `METRICS_DIR` est défini, chaque
+processus écrit périodiquement son agrégat dans son propre fichier
+(`metrics-<pid>.json`, remplacé atomiquement) ; la vue `/metrics` additionne les
+fichiers des workers en vie. Les agrégats des workers terminés sont cumulés dans
+`metrics-dead.json` avant la suppression de leur fichier, afin que les compteurs
+exposés ne décroissent pas. Sans `METRICS_DIR`, seule l'agrégation du processus
+courant est exposée.
+
+`METRICS_DIR` doit être local à l'hôte : les pids ne sont significatifs que sur
+la machine (ou le conteneur) qui les a attribués.
+
+Métriques exposées :
+    http_requests_total{route, method, status}
+    http_request_duration_seconds{route, method} (histogramme)
+    http_response_size_bytes{route} (histogramme)
+    db_queries_total{route}
+    db_query_duration_seconds_total{route}
+    cache_requests_total{cache, result}
+"""
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrou limité au processus courant
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+METRICS_HELP = {
+    'http_requests_total': ('counter', "Nombre de requêtes HTTP traitées"),
+    'http_request_duration_seconds': ('histogram', "Durée des requêtes HTTP"),
+    'http_response_size_bytes': ('histogram', "Taille des réponses HTTP"),
+    'db_queries_total': ('counter', "Nombre de requêtes SQL exécutées"),
+    'db_query_duration_seconds_total': ('counter', "Temps passé dans les requêtes SQL"),
+    'cache_requests_total': ('counter', "Accès aux caches applicatifs"),
+}
+
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEAD_WORKERS_FILE = 'metrics-dead.json'
+DEAD_WORKERS_LOCK = 'metrics-dead.lock'
+
+
+class MetricsShard:
+    """Compteurs et histogrammes d'un thread (écrits sans verrou par ce seul thread)."""
+
+    def __init__(self):
+        self.counters = {}  # {(nom, labels): valeur}
+        self.histograms = {}  # {(nom, labels): [bornes, comptes par borne, somme]}
+
+
+class MetricsRegistry:
+    """
+    Agrégation en mémoire des compteurs et histogrammes du processus courant.
+
+    Chaque thread écrit dans son propre agrégat, sans verrou sur le chemin des
+    requêtes ; les agrégats des threads sont fusionnés à la lecture (`snapshot`).
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()  # inscription des threads et écriture du fichier
+        self._last_flush = 0.0
+
+    def shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = MetricsShard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        counters = self.shard().counters
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, tuple(sorted(labels.items())))
+        histograms = self.shard().histograms
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = [list(buckets), [0] * (len(buckets) + 1), 0.0]
+        bounds, counts, _ = histogram
+        index = next((i for i, bound in enumerate(bounds) if value <= bound), len(bounds))
+        counts[index] += 1
+        histogram[2] += value
+
+    def snapshot(self):
+        """Retourne une copie sérialisable en JSON de l'agrégat courant (tous les threads)."""
+        with self._lock:
+            shards = list(self._shards)
+        counters, histograms = {}, {}
+        for shard in shards:
+            # Copies atomiques sous le GIL : le thread propriétaire peut continuer d'écrire
+            for key, value in list(shard.counters.items()):
+                counters[key] = counters.get(key, 0) + value
+            for key, (bounds, counts, total) in list(shard.histograms.items()):
+                merged = histograms.setdefault(key, [bounds, [0] * len(counts), 0.0])
+                merged[1] = [a + b for a, b in zip(merged[1], list(counts))]
+                merged[2] += total
+        return serialize(counters, histograms)
+
+    def flush(self, force=False):
+        """Écrit l'agrégat du processus dans `METRICS_DIR` (au plus une fois par intervalle)."""
+        directory = getattr(settings, 'METRICS_DIR', None)
+        if not directory:
+            return
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_flush < interval:
+                return
+            self._last_flush = now
+        write_json(os.path.join(directory, f'metrics-{os.getpid()}.json'), self.snapshot())
+
+    def reset(self):
+        with self._lock:
+            for shard in self._shards:
+                shard.counters.clear()
+                shard.histograms.clear()
+
+
+registry = MetricsRegistry()
+
+
+def record_cache_access(cache_name, hit):
+    """Comptabilise un accès à un cache applicatif (succès ou défaut)."""
+    registry.inc('cache_requests_total', {'cache': cache_name, 'result': 'hit' if hit else 'miss'})
+
+
+def serialize(counters, histograms):
+    """Forme sérialisable en JSON des dictionnaires `{(nom, labels): valeur}`."""
+    return {
+        'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+        'histograms': [
+            [name, list(labels), list(bounds), list(counts), total]
+            for (name, labels), (bounds, counts, total) in histograms.items()
+        ],
+    }
+
+
+def merge_snapshots(snapshots):
+    """Additionne des agrégats sérialisés ; retourne `(compteurs, histogrammes)`."""
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, bounds, counts, total in snapshot['histograms']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.setdefault(key, [bounds, [0] * len(counts), 0.0])
+            merged[1] = [a + b for a, b in zip(merged[1], counts)]
+            merged[2] += total
+    return counters, histograms
+
+
+def write_json(path, data):
+    """Remplace atomiquement `path` via un fichier temporaire propre à l'appel."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def process_alive(pid):
+    """
+    Indique si le processus `pid` existe sur cet hôte.
+
+    Les pids sont propres à l'hôte (et à l'espace de noms du conteneur) : un
+    `METRICS_DIR` partagé entre plusieurs machines ou conteneurs ferait
+    considérer comme terminés les workers des autres hôtes.
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge_dead_workers(directory, paths):
+    """
+    Cumule les agrégats des workers terminés dans `metrics-dead.json`, puis
+    supprime leurs fichiers.
+
+    Un verrou de fichier sérialise les fusions entre processus : un fichier déjà
+    fusionné par un autre processus a disparu et n'est pas compté deux fois.
+    """
+    with open(os.path.join(directory, DEAD_WORKERS_LOCK), 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        dead_path = os.path.join(directory, DEAD_WORKERS_FILE)
+        snapshots = [read_json(dead_path) or serialize({}, {})]
+        merged_paths = []
+        for path in paths:
+            # Absent s'il a déjà été fusionné par un autre processus
+            snapshot = read_json(path)
+            if snapshot is not None:
+                snapshots.append(snapshot)
+                merged_paths.append(path)
+        aggregate = serialize(*merge_snapshots(snapshots))
+        if merged_paths:
+            write_json(dead_path, aggregate)
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return aggregate
+
+
+def collect_snapshots():
+    """
+    Retourne les agrégats de tous les processus (processus courant inclus).
+
+    Les agrégats des workers terminés sont cumulés dans `metrics-dead.json` et
+    leurs fichiers supprimés : les compteurs exposés restent monotones.
+    """
+    snapshots = [registry.snapshot()]
+    directory = getattr(settings, 'METRICS_DIR', None)
+    if not directory:
+        return snapshots
+    dead = []
+    for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+        pid = os.path.basename(path)[len('metrics-'):-len('.json')]
+        if not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        if not process_alive(int(pid)):
+            dead.append(path)
+            continue
+        snapshot = read_json(path)
+        if snapshot is not None:
+            snapshots.append(snapshot)
+    if dead:
+        snapshots.append(merge_dead_workers(directory, dead))
+    else:
+        snapshot = read_json(os.path.join(directory, DEAD_WORKERS_FILE))
+        if snapshot is not None:
+            snapshots.append(snapshot)
+    return snapshots
+
+
+def format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in pairs
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def render_metrics(snapshots):
+    """Fusionne les agrégats et les formate au format d'exposition texte."""
+    counters, histograms = merge_snapshots(snapshots)
+
+    lines = []
+    for metric, (metric_type, help_text) in METRICS_HELP.items():
+        if metric_type == 'counter':
+            series = sorted((labels, value) for (name, labels), value in counters.items() if name == metric)
+        else:
+            series = sorted((labels, value) for (name, labels), value in histograms.items() if name == metric)
+        if not series:
+            continue
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} {metric_type}')
+        for labels, value in series:
+            if metric_type == 'counter':
+                lines.append(f'{metric}{format_labels(labels)} {value}')
+                continue
+            bounds, counts, total = value
+            cumulative = 0
+            for bound, count in zip(list(bounds) + ['+Inf'], counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{format_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{metric}_sum{format_labels(labels)} {total}')
+            lines.append(f'{metric}_count{format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def route_name(request, view_func):
+    """
+    Nom de route stable pour les labels : `ViewSet.action` pour les viewsets DRF,
+    nom de la vue sinon.
+    """
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if view_class is None:
+        return getattr(view_func, '__name__', 'unknown')
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(request.method.lower())
+    return f'{view_class.__name__}.{action}' if action else view_class.__name__
+
+
+class MetricsMiddleware:
+    """
+    Middleware mesurant la latence, la taille des réponses et les requêtes SQL
+    par route (action de viewset DRF).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._metrics_route = 'unmatched'
+        db_stats = {'count': 0, 'duration': 0.0}
+
+        def count_queries(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                db_stats['count'] += 1
+                db_stats['duration'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(count_queries):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        route = request._metrics_route
+        registry.inc('http_requests_total', {
+            'route': route, 'method': request.method, 'status': str(response.status_code)
+        })
+        registry.observe('http_request_duration_seconds', {
+            'route': route, 'method': request.method
+        }, duration, LATENCY_BUCKETS)
+        if not response.streaming:
+            registry.observe('http_response_size_bytes', {'route': route}, len(response.content), SIZE_BUCKETS)
+        registry.inc('db_queries_total', {'route': route}, db_stats['count'])
+        registry.inc('db_query_duration_seconds_total', {'route': route}, db_stats['duration'])
+        try:
+            registry.flush()
+        except OSError:
+            # Les métriques ne doivent pas faire échouer la requête
+            logger.exception("Écriture des métriques impossible dans METRICS_DIR")
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_route = route_name(request, view_func)
+
+
+def metrics_view(request):
+    """Expose les métriques agrégées de tous les workers au format texte Prometheus."""
+    allowed_ips = getattr(settings, 'METRICS_ALLOWED_IPS', None)
+    if allowed_ips is not None and request.META.get('REMOTE_ADDR') not in allowed_ips:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_metrics(collect_snapshots()),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -53,6 +53,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "SkillsMatchAI.metrics.MetricsMiddleware",  # Métriques par route (/metrics)
+    "SkillsMatchAI.timing.ServerTimingMiddleware",  # En-tête Server-Timing (si SERVER_TIMING_ENABLED)
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",  # CORS middleware
@@ -61,6 +63,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "jobs.recompute.RecomputeMiddleware",  # Recalculs regroupés en fin de requête
 ]
 
 # Configuration CORS pour permettre les requêtes depuis le frontend React
@@ -174,7 +177,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Configuration de Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -185,6 +188,7 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
+        'api.filters.CustomFieldFilter',
     ],
 }
 
@@ -215,4 +219,67 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
     'SLIDING_TOKEN_LIFETIME': timedelta(hours=1),
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
+
+    # Ajoute le profil de l'utilisateur aux claims (servi par /api/users/me/)
+    'TOKEN_OBTAIN_SERIALIZER': 'api.serializers.UserClaimsTokenObtainPairSerializer',
 }
+
+# Métriques Prometheus (/metrics)
+# Répertoire local partagé par les workers ; sans valeur, seules les métriques du processus sont exposées
+METRICS_DIR = os.environ.get('METRICS_DIR')
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# En-tête Server-Timing et journal des requêtes SQL lentes
+SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED') == '1'
+SLOW_QUERY_THRESHOLD_MS = 100
+
+# Durée de vie (secondes) du cache en mémoire des utilisateurs authentifiés par JWT
+JWT_USER_CACHE_TTL = 30
+
+# Tâches de fond (python manage.py run_worker)
+# Délai de base (secondes) avant une nouvelle tentative, doublé à chaque échec
+TASK_RETRY_DELAY = 30
+# Durée (secondes) au-delà de laquelle une tâche en cours est considérée comme abandonnée
+TASK_LOCK_TIMEOUT = 600
+# Intervalle (secondes) entre deux rafraîchissements de `locked_at` d'une tâche en cours
+TASK_HEARTBEAT_INTERVAL = 60
+# Sous SQLite, durée au-delà de laquelle une tâche atomique (sans battement) est considérée comme abandonnée
+TASK_SQLITE_ATOMIC_LOCK_TIMEOUT = 6 * 3600
+# Fenêtre (secondes) pendant laquelle les recalculs en tâche de fond sont regroupés
+RECOMPUTE_DEBOUNCE_SECONDS = 5
+
+# Flux des modifications en Server-Sent Events (/api/changes/stream/, serveur ASGI)
+# Intervalle (secondes) de lecture des événements émis par les autres processus
+CHANGE_FEED_POLL_INTERVAL = 0.5
+# Intervalle (secondes) des messages de maintien de connexion
+CHANGE_FEED_HEARTBEAT = 15
+# Durée de conservation (secondes) des événements (tâche jobs.prune_change_events)
+CHANGE_FEED_RETENTION = 24 * 60 * 60
+
+# Synchronisation incrémentale des listes (?updated_since=)
+# Durée de conservation (secondes) des traces de suppression (tâche jobs.prune_tombstones)
+DELTA_SYNC_RETENTION = 30 * 24 * 60 * 60
+# Marge (secondes) retranchée du filigrane : couvre les transactions en cours au moment de la lecture
+DELTA_SYNC_SAFETY_MARGIN = 5
+# Nombre maximal d'objets par page
+DELTA_SYNC_PAGE_SIZE = 500
+
+# Instantané binaire de la matrice des compétences (commande snapshot_skill_matrix)
+SKILL_MATRIX_PATH = os.path.join(BASE_DIR, 'var', 'skill_matrix.bin')
+# Intervalle (secondes) entre deux vérifications de l'empreinte de l'instantané par le filtre de couverture
+SKILL_COVERAGE_CHECK_INTERVAL = 5
+
+# Plan de succession (commande compute_successors) : successeurs retenus par position
+SUCCESSION_TOP_N = 5
+
+# Synonymes par mot pour la normalisation des noms de compétences (commande dedupe_skills),
+# en complément de jobs.skill_dedupe.DEFAULT_SYNONYMS, ex: {'reactjs': 'react'}
+SKILL_SYNONYMS = {}
+# Intervalle (secondes) entre deux vérifications du catalogue par l'automate d'extraction des compétences
+SKILL_EXTRACTION_CHECK_INTERVAL = 5
+
+# Intervalle (secondes) entre deux lectures des documents modifiés par l'index de similarité
+SIMILARITY_CHECK_INTERVAL = 2
+
+# Tentatives d'une affectation interrompue par des écritures concurrentes (jobs.assignment)
+ASSIGNMENT_MAX_ATTEMPTS = 5
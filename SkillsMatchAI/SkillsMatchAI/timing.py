@@ -0,0 +1,164 @@
+"""
+Décomposition du temps de traitement des requêtes (en-tête `Server-Timing`)
+et journal des requêtes SQL lentes.
+
+Middleware optionnel, activé par `SERVER_TIMING_ENABLED`. Les phases sont exclusives :
+    auth       authentification (hors SQL)
+    db         ensemble des requêtes SQL
+    serialize  vue et sérialisation (temps restant, hors SQL)
+    render     rendu de la réponse (hors SQL)
+    total      durée totale vue par le middleware
+
+Les requêtes plus longues que `SLOW_QUERY_THRESHOLD_MS` sont journalisées
+(logger `SkillsMatchAI.slow_queries`) avec la pile d'appels du code du projet
+(viewset, sérialiseur...) qui les a émises.
+"""
+import contextvars
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger('SkillsMatchAI.slow_queries')
+
+DEFAULT_SLOW_QUERY_THRESHOLD_MS = 100
+
+PHASE_DESCRIPTIONS = {
+    'auth': "Authentification",
+    'serialize': "Vue et sérialisation",
+    'render': "Rendu",
+    'total': "Total",
+}
+
+_current_timing = contextvars.ContextVar('server_timing', default=None)
+
+
+class RequestTiming:
+    """Durées cumulées des phases d'une requête."""
+
+    def __init__(self):
+        self.phases = {}
+        self.db_duration = 0.0
+        self.db_count = 0
+
+    def add(self, name, duration):
+        self.phases[name] = self.phases.get(name, 0.0) + duration
+
+
+@contextmanager
+def phase(name):
+    """Mesure une phase de la requête courante, hors temps SQL. Sans effet hors du middleware."""
+    timing = _current_timing.get()
+    if timing is None:
+        yield
+        return
+    db_before = timing.db_duration
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        timing.add(name, elapsed - (timing.db_duration - db_before))
+
+
+def project_stack():
+    """
+    Pile d'appels à l'origine d'une requête SQL : fichiers du projet (hors
+    bibliothèques et hors middlewares de ce package), suivis des viewsets et
+    sérialiseurs DRF actifs.
+    """
+    from rest_framework.serializers import BaseSerializer
+    from rest_framework.views import APIView
+
+    base_dir = str(settings.BASE_DIR)
+    package_dir = os.path.dirname(__file__)
+    frames = []
+    issuers = []
+    seen = set()
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(base_dir) and not filename.startswith(package_dir) and 'site-packages' not in filename:
+            frames.append(f"{os.path.relpath(filename, base_dir)}:{frame.f_lineno} in {frame.f_code.co_name}")
+        owner = frame.f_locals.get('self')
+        if isinstance(owner, (BaseSerializer, APIView)) and type(owner) not in seen:
+            # Méthode la plus interne de chaque viewset / sérialiseur
+            seen.add(type(owner))
+            issuers.append(f"{type(owner).__name__}.{frame.f_code.co_name}")
+        frame = frame.f_back
+    return list(reversed(frames)) + [f"via {issuer}" for issuer in reversed(issuers)]
+
+
+def format_server_timing(timing):
+    entries = []
+    for name in ('auth', 'db', 'serialize', 'render', 'total'):
+        duration_ms = max(timing.phases.get(name, 0.0), 0.0) * 1000
+        if name == 'db':
+            description = f"{timing.db_count} requêtes SQL"
+        else:
+            description = PHASE_DESCRIPTIONS[name]
+        entries.append(f'{name};dur={duration_ms:.1f};desc="{description}"')
+    return ', '.join(entries)
+
+
+class ServerTimingMiddleware:
+    """Ajoute l'en-tête `Server-Timing` et journalise les requêtes SQL lentes."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_query_threshold = getattr(
+            settings, 'SLOW_QUERY_THRESHOLD_MS', DEFAULT_SLOW_QUERY_THRESHOLD_MS
+        ) / 1000
+
+    def __call__(self, request):
+        timing = RequestTiming()
+        token = _current_timing.set(timing)
+
+        def time_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                duration = time.perf_counter() - start
+                timing.db_duration += duration
+                timing.db_count += 1
+                if duration >= self.slow_query_threshold:
+                    logger.warning(
+                        "Requête SQL lente (%.1f ms) sur %s %s : %s\n  %s",
+                        duration * 1000, request.method, request.path, sql,
+                        '\n  '.join(project_stack())
+                    )
+
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(time_query):
+                response = self.get_response(request)
+        finally:
+            _current_timing.reset(token)
+        total = time.perf_counter() - start
+
+        timing.phases['db'] = timing.db_duration
+        timing.phases['total'] = total
+        timing.phases['serialize'] = total - sum(
+            timing.phases.get(name, 0.0) for name in ('auth', 'db', 'render')
+        )
+        response['Server-Timing'] = format_server_timing(timing)
+        return response
+
+    def process_template_response(self, request, response):
+        """Mesure le rendu des réponses différées (ex: `Response` de DRF)."""
+        render = response.render
+
+        def timed_render():
+            with phase('render'):
+                return render()
+
+        response.render = timed_render
+        return response
@@ -0,0 +1,95 @@
+"""
+Authentification JWT avec cache en mémoire des utilisateurs.
+
+`JWTAuthentication` charge l'utilisateur en base à chaque requête authentifiée.
+`CachedJWTAuthentication` conserve l'utilisateur résolu pendant quelques secondes,
+par couple (user_id, jti), dans le processus courant. Le cache est invalidé
+lorsqu'un `User` est enregistré ou supprimé (voir `api/signals.py`) ; les autres
+processus s'appuient sur la durée de vie courte des entrées.
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from SkillsMatchAI.metrics import record_cache_access
+from SkillsMatchAI.timing import phase
+
+DEFAULT_JWT_USER_CACHE_TTL = 30
+JWT_USER_CACHE_MAX_ENTRIES = 10000
+
+
+class JWTUserCache:
+    """Cache en mémoire, thread-safe et à durée de vie courte, des utilisateurs authentifiés."""
+
+    def __init__(self, max_entries=JWT_USER_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = {}  # {str(user_id): {jti: (expire_at, user)}}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'JWT_USER_CACHE_TTL', DEFAULT_JWT_USER_CACHE_TTL)
+
+    def get(self, user_id, jti):
+        with self._lock:
+            entry = self._entries.get(str(user_id), {}).get(jti)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        # Copie superficielle : une requête ne doit pas modifier l'instance partagée
+        return copy.copy(entry[1])
+
+    def set(self, user_id, jti, user):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if self._size >= self.max_entries:
+                self._entries.clear()
+                self._size = 0
+            tokens = self._entries.setdefault(str(user_id), {})
+            if jti not in tokens:
+                self._size += 1
+            tokens[jti] = (time.monotonic() + self.ttl, user)
+
+    def invalidate(self, user_id):
+        """Supprime toutes les entrées d'un utilisateur, quel que soit le jeton."""
+        with self._lock:
+            self._size -= len(self._entries.pop(str(user_id), {}))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+user_cache = JWTUserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Authentification JWT résolvant l'utilisateur via `user_cache`.
+
+    Les contrôles de `JWTAuthentication.get_user` (utilisateur existant et actif)
+    sont effectués à chaque défaut de cache.
+    """
+
+    def authenticate(self, request):
+        with phase('auth'):
+            return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        if user_id is None or jti is None:
+            return super().get_user(validated_token)
+
+        user = user_cache.get(user_id, jti)
+        record_cache_access('jwt_user', user is not None)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, jti, user)
+        return user
@@ -0,0 +1,53 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from jobs.models import CustomField, CustomFieldValue
+
+# Préfixe des paramètres de filtrage sur les champs personnalisés (ex: `?cf.Service=RH`)
+CUSTOM_FIELD_PARAM_PREFIX = 'cf.'
+
+# Opérateurs acceptés après le nom du champ (ex: `?cf.Experience requise__gte=3`)
+CUSTOM_FIELD_LOOKUPS = {
+    CustomField.FieldType.TEXT: {'exact', 'icontains'},
+    CustomField.FieldType.SELECT: {'exact'},
+    CustomField.FieldType.NUMBER: {'exact', 'gt', 'gte', 'lt', 'lte'},
+    CustomField.FieldType.DATE: {'exact', 'gt', 'gte', 'lt', 'lte'},
+    CustomField.FieldType.BOOLEAN: {'exact'},
+}
+
+
+class CustomFieldFilter(BaseFilterBackend):
+    """
+    Filtre les objets sur la valeur de leurs champs personnalisés.
+
+    Paramètres : `cf.<nom>=<valeur>` ou `cf.<nom>__<opérateur>=<valeur>`
+    (opérateurs : gt, gte, lt, lte pour les nombres et dates, icontains pour le texte).
+    Chaque filtre est résolu par l'index (champ, valeur) de `CustomFieldValue`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        model_type = getattr(queryset.model, 'custom_field_model_type', None)
+        if model_type is None:
+            return queryset
+
+        for param, raw_values in request.query_params.lists():
+            if not param.startswith(CUSTOM_FIELD_PARAM_PREFIX):
+                continue
+            name, _, lookup = param[len(CUSTOM_FIELD_PARAM_PREFIX):].partition('__')
+            lookup = lookup or 'exact'
+            field = CustomField.objects.filter(model_type=model_type, name=name).first()
+            if field is None:
+                raise ValidationError({param: f"Champ personnalisé inconnu : {name}"})
+            if lookup not in CUSTOM_FIELD_LOOKUPS[field.field_type]:
+                raise ValidationError({param: f"Opérateur '{lookup}' non disponible pour un champ {field.field_type}"})
+
+            for raw_value in raw_values:
+                try:
+                    value = field.to_python(raw_value)
+                except ValueError as e:
+                    raise ValidationError({param: str(e)})
+                queryset = queryset.filter(pk__in=CustomFieldValue.objects.filter(
+                    custom_field=field,
+                    **{f'{field.value_column}__{lookup}': value}
+                ).values('object_id'))
+        return queryset
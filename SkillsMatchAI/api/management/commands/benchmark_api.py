@@ -0,0 +1,207 @@
+import json
+import time
+import tracemalloc
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.urls import router
+from jobs.fixtures import create_sample_data
+from jobs.models import Employee, Job, JobFamily, Position, Skill
+
+# Paramètres obligatoires des actions (par nom de route), construits à partir d'objets de référence
+ACTION_PARAMS = {
+    'employee-by-skill': lambda ref: {'skill_id': ref['skill']},
+    'employee-search-by-skills': lambda ref: {'require': f"{ref['skill']}:>=2", 'prefer': str(ref['other_skill'])},
+    'evaluation-by-employee': lambda ref: {'employee_id': ref['employee']},
+    'evaluation-by-skill': lambda ref: {'skill_id': ref['skill']},
+    'evaluation-history': lambda ref: {'employee_id': ref['employee']},
+    'evaluation-as-of': lambda ref: {'date': date.today().isoformat(), 'employee_id': ref['employee']},
+}
+
+
+def percentile(values, pct):
+    """Percentile par rang le plus proche d'une liste de valeurs."""
+    ordered = sorted(values)
+    index = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def benchmark_routes(references):
+    """Liste (nom, url, paramètres) de toutes les routes GET du routeur de l'API."""
+    routes = []
+    for prefix, viewset, basename in router.registry:
+        pk = references['objects'].get(basename)
+        routes.append((f'{basename}-list', reverse(f'{basename}-list'), {}))
+        if pk is not None:
+            routes.append((f'{basename}-detail', reverse(f'{basename}-detail', args=[pk]), {}))
+        for extra_action in viewset.get_extra_actions():
+            if 'get' not in extra_action.mapping:
+                continue
+            name = f'{basename}-{extra_action.url_name}'
+            if extra_action.detail:
+                if pk is None:
+                    continue
+                url = reverse(name, args=[pk])
+            else:
+                url = reverse(name)
+            params = ACTION_PARAMS.get(name, lambda ref: {})(references)
+            routes.append((name, url, params))
+    return routes
+
+
+class Command(BaseCommand):
+    help = 'Mesure la latence (p50/p95/p99), le nombre de requêtes SQL et la mémoire de chaque route de l\'API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=50000, help='Nombre d\'employés à créer')
+        parser.add_argument('--positions', type=int, default=5000, help='Nombre de positions à créer')
+        parser.add_argument('--skills', type=int, default=500, help='Nombre de compétences à créer')
+        parser.add_argument('--seed', type=int, default=42, help='Graine du générateur aléatoire')
+        parser.add_argument('--iterations', type=int, default=20, help='Nombre de mesures par route')
+        parser.add_argument('--warmup', type=int, default=2, help='Nombre d\'appels de chauffe par route')
+        parser.add_argument('--output', help='Fichier JSON où enregistrer les résultats')
+        parser.add_argument('--baseline', help='Fichier JSON de référence à comparer aux résultats')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Dégradation de latence (p95) tolérée par rapport à la référence (0.2 = 20%%)'
+        )
+        parser.add_argument(
+            '--in-place', action='store_true',
+            help='Crée le jeu de données dans la base courante, qui doit être vide (refusé sinon), '
+                 'au lieu d\'une base de test jetable'
+        )
+
+    def handle(self, *args, **options):
+        test_db_name = None
+        if options['in_place'] and any(model.objects.exists() for model in (JobFamily, Skill, Job, Position, Employee)):
+            # create_sample_data() commence par effacer les données existantes
+            raise CommandError("--in-place exige une base vide : la base courante contient déjà des données")
+        if not options['in_place']:
+            setup_test_environment()
+            test_db_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = self.run_benchmark(options)
+        finally:
+            if test_db_name is not None:
+                connection.creation.destroy_test_db(test_db_name, verbosity=0)
+                teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Résultats enregistrés dans {options['output']}"))
+
+        if options['baseline']:
+            self.compare_with_baseline(results, options['baseline'], options['tolerance'])
+
+    def run_benchmark(self, options):
+        self.stdout.write('Création du jeu de données...')
+        start = time.perf_counter()
+        create_sample_data(
+            num_job_families=max(options['positions'] // 250, 1),
+            num_skills=options['skills'],
+            num_jobs=max(options['positions'] // 10, 1),
+            num_positions=options['positions'],
+            num_employees=options['employees'],
+            seed=options['seed'],
+            log=lambda message: None
+        )
+        self.stdout.write(f"✓ Jeu de données créé en {time.perf_counter() - start:.1f} s")
+
+        user = (
+            User.objects.filter(username='benchmark').first()
+            or User.objects.create_superuser('benchmark', 'benchmark@example.com', 'benchmark')
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+
+        first_skills = list(Skill.objects.order_by('pk').values_list('pk', flat=True)[:2])
+        references = {
+            'skill': first_skills[0],
+            'other_skill': first_skills[-1],
+            'employee': Employee.objects.order_by('pk').values_list('pk', flat=True).first(),
+            'objects': {
+                basename: viewset.queryset.model.objects.order_by('pk').values_list('pk', flat=True).first()
+                for prefix, viewset, basename in router.registry
+            },
+        }
+
+        routes = {}
+        self.stdout.write(f"\n{'Route':45} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'SQL':>5} {'Mém. Ko':>9}")
+        for name, url, params in benchmark_routes(references):
+            for _ in range(options['warmup']):
+                client.get(url, params)
+
+            # Comptage via execute_wrapper : le signal request_started vide connection.queries
+            queries = []
+
+            def count_queries(execute, sql, sql_params, many, context):
+                queries.append(sql)
+                return execute(sql, sql_params, many, context)
+
+            with connection.execute_wrapper(count_queries):
+                response = client.get(url, params)
+            tracemalloc.start()
+            client.get(url, params)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            durations = []
+            for _ in range(options['iterations']):
+                start = time.perf_counter()
+                client.get(url, params)
+                durations.append((time.perf_counter() - start) * 1000)
+
+            routes[name] = {
+                'url': url,
+                'params': params,
+                'status': response.status_code,
+                'p50_ms': round(percentile(durations, 50), 3),
+                'p95_ms': round(percentile(durations, 95), 3),
+                'p99_ms': round(percentile(durations, 99), 3),
+                'queries': len(queries),
+                'peak_memory_kb': round(peak_memory / 1024, 1),
+            }
+            stats = routes[name]
+            if response.status_code != 200:
+                self.stdout.write(self.style.WARNING(f"{name}: statut HTTP {response.status_code}"))
+            self.stdout.write(
+                f"{name:45} {stats['p50_ms']:9.2f} {stats['p95_ms']:9.2f} {stats['p99_ms']:9.2f} "
+                f"{stats['queries']:5d} {stats['peak_memory_kb']:9.1f}"
+            )
+
+        return {
+            'dataset': {
+                'employees': options['employees'],
+                'positions': options['positions'],
+                'skills': options['skills'],
+                'seed': options['seed'],
+            },
+            'iterations': options['iterations'],
+            'routes': routes,
+        }
+
+    def compare_with_baseline(self, results, baseline_path, tolerance):
+        """Signale les routes plus lentes ou plus coûteuses en SQL que la référence."""
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+
+        regressions = []
+        for name, stats in results['routes'].items():
+            reference = baseline.get('routes', {}).get(name)
+            if reference is None:
+                continue
+            if stats['p95_ms'] > reference['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{name}: p95 {reference['p95_ms']} ms -> {stats['p95_ms']} ms")
+            if stats['queries'] > reference['queries']:
+                regressions.append(f"{name}: requêtes SQL {reference['queries']} -> {stats['queries']}")
+
+        if regressions:
+            raise CommandError("Régressions de performance détectées :\n" + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Aucune régression par rapport à la référence'))
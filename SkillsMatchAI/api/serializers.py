@@ -2,9 +2,14 @@ from rest_framework import serializers
 from jobs.models import (
     JobFamily, Skill, Job, Position, 
     Employee, EmployeeSkill, PositionSkill,
-    Evaluation
+    Evaluation, EvaluationHistory, Task, CustomField, CustomFieldValue, ChangeEvent, Successor
 )
+from jobs.skill_dedupe import normalize_skill_name
+from jobs.skill_hierarchy import check_parent
+from jobs.tasks import TASK_HANDLERS, enqueue
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.contrib.auth.models import User
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -16,6 +21,33 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
+# Champs de l'utilisateur copiés dans les claims du jeton
+USER_TOKEN_CLAIMS = ('username', 'email', 'first_name', 'last_name')
+
+
+class UserClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Sérialiseur d'obtention de jetons ajoutant le profil de l'utilisateur aux claims."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim in USER_TOKEN_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+def custom_field_value_representation(value):
+    """Représentation d'une valeur typée dans la liste `custom_fields`."""
+    return {
+        'id': value.id,
+        'custom_field': value.custom_field_id,
+        'custom_field_name': value.custom_field.name,
+        'field_type': value.custom_field.field_type,
+        'label': value.custom_field.name,
+        'value': value.value,
+    }
+
+
 class CustomFieldMixin:
     """Mixin pour ajouter les champs personnalisés fixes à n'importe quel sérialiseur."""
     
@@ -35,6 +67,11 @@ class CustomFieldMixin:
                             'label': field_label,
                             'value': field_value
                         })
+            # Valeurs typées, uniquement si le queryset les a préchargées (voir `prefetch_custom_field_values`)
+            if 'custom_field_values' in getattr(obj, '_prefetched_objects_cache', {}):
+                for value in obj.custom_field_values.all():
+                    if value.custom_field.visible:
+                        custom_fields.append(custom_field_value_representation(value))
             return custom_fields
         except Exception as e:
             print(f"Erreur lors de la récupération des champs personnalisés: {e}")
@@ -65,6 +102,28 @@ class SkillSerializer(CustomFieldMixin, serializers.ModelSerializer):
         model = Skill
         fields = '__all__'
 
+    def validate_name(self, value):
+        """Refuse un nom qui, normalisé, désigne une compétence existante (« JS » pour « JavaScript »)."""
+        normalized = normalize_skill_name(value)
+        if not normalized:
+            return value
+        existing = Skill.objects.filter(normalized_name=normalized)
+        if self.instance is not None:
+            existing = existing.exclude(pk=self.instance.pk)
+        duplicate = existing.first()
+        if duplicate is not None:
+            raise serializers.ValidationError(f"Compétence déjà existante : {duplicate.name} ({duplicate.pk})")
+        return value
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if self.instance is not None and attrs.get('parent') is not None:
+            try:
+                check_parent(self.instance.pk, attrs['parent'].pk)
+            except DjangoValidationError as e:
+                raise serializers.ValidationError(e.message_dict)
+        return attrs
+
 
 class JobSerializer(CustomFieldMixin, serializers.ModelSerializer):
     """Sérialiseur pour le modèle Job."""
@@ -91,7 +150,15 @@ class EmployeeListSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Employee
-        fields = ('id', 'first_name', 'last_name', 'email', 'employment_status')
+        fields = ('id', 'first_name', 'last_name', 'email', 'employment_status', 'last_updated')
+
+
+class EmployeeSkillSearchSerializer(EmployeeListSerializer):
+    """Sérialiseur des résultats de recherche multi-compétences."""
+    preferred_matches = serializers.IntegerField(read_only=True)
+
+    class Meta(EmployeeListSerializer.Meta):
+        fields = EmployeeListSerializer.Meta.fields + ('preferred_matches',)
 
 
 class EmployeeSkillSerializer(serializers.ModelSerializer):
@@ -113,6 +180,53 @@ class EmployeeDetailSerializer(CustomFieldMixin, serializers.ModelSerializer):
         fields = '__all__'
 
 
+class ProfilePositionSerializer(serializers.ModelSerializer):
+    """Sérialiseur compact d'une position pour le profil employé."""
+    job_title = serializers.ReadOnlyField(source='job.title')
+    job_level = serializers.ReadOnlyField(source='job.level')
+    job_family = serializers.ReadOnlyField(source='job.job_family_id')
+    job_family_name = serializers.ReadOnlyField(source='job.job_family.name')
+
+    class Meta:
+        model = Position
+        fields = ('id', 'job', 'job_title', 'job_level', 'job_family', 'job_family_name',
+                  'location', 'status', 'start_date')
+
+
+class ProfileEvaluationSerializer(serializers.ModelSerializer):
+    """Sérialiseur d'une évaluation pour le profil employé."""
+    skill_name = serializers.ReadOnlyField(source='skill.name')
+    qualitative_level = serializers.ReadOnlyField()
+    evaluated_by_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Evaluation
+        fields = ('id', 'skill', 'skill_name', 'quantitative_level', 'qualitative_level',
+                  'qualitative_description', 'evaluation_date', 'evaluated_by', 'evaluated_by_name')
+
+    def get_evaluated_by_name(self, obj):
+        if obj.evaluated_by is None:
+            return None
+        return f"{obj.evaluated_by.first_name} {obj.evaluated_by.last_name}"
+
+
+class EmployeeProfileSerializer(CustomFieldMixin, serializers.ModelSerializer):
+    """
+    Sérialiseur du profil complet d'un employé : position actuelle, compétences,
+    évaluations et positions occupées.
+
+    Le queryset doit précharger les relations (voir `EmployeeViewSet.profile`).
+    """
+    current_position = ProfilePositionSerializer(read_only=True)
+    skills = EmployeeSkillSerializer(many=True, read_only=True)
+    evaluations = ProfileEvaluationSerializer(many=True, read_only=True)
+    positions = ProfilePositionSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Employee
+        fields = '__all__'
+
+
 class PositionSkillSerializer(serializers.ModelSerializer):
     """Sérialiseur pour le modèle PositionSkill."""
     skill_name = serializers.ReadOnlyField(source='skill.name')
@@ -131,7 +245,7 @@ class PositionListSerializer(CustomFieldMixin, serializers.ModelSerializer):
     
     class Meta:
         model = Position
-        fields = ('id', 'job', 'job_title', 'job_level', 'location', 'status', 'employee_name',
+        fields = ('id', 'job', 'job_title', 'job_level', 'location', 'status', 'employee_name', 'last_updated', 'version',
                  'custom_field1', 'custom_field1_label', 'custom_field1_visible',
                  'custom_field2', 'custom_field2_label', 'custom_field2_visible',
                  'custom_field3', 'custom_field3_label', 'custom_field3_visible',
@@ -158,6 +272,15 @@ class PositionListSerializer(CustomFieldMixin, serializers.ModelSerializer):
             return "Unknown Employee"
 
 
+class SuccessorSerializer(serializers.ModelSerializer):
+    """Sérialiseur des successeurs d'une position (table calculée par `compute_successors`)."""
+    employee = EmployeeListSerializer(read_only=True)
+
+    class Meta:
+        model = Successor
+        fields = ('rank', 'employee', 'score', 'missing_required', 'computed_at')
+
+
 class PositionDetailSerializer(CustomFieldMixin, serializers.ModelSerializer):
     """Sérialiseur détaillé pour le modèle Position."""
     job = JobSerializer(read_only=True)
@@ -186,7 +309,7 @@ class EvaluationSerializer(serializers.ModelSerializer):
         model = Evaluation
         fields = ('id', 'employee', 'employee_name', 'skill', 'skill_name', 
                   'quantitative_level', 'qualitative_level', 'qualitative_description', 
-                  'evaluation_date', 'evaluated_by')
+                  'evaluation_date', 'evaluated_by', 'last_updated')
     
     def get_employee_name(self, obj):
         try:
@@ -199,4 +322,116 @@ class EvaluationSerializer(serializers.ModelSerializer):
 class EvaluationCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Evaluation
-        fields = ('employee', 'skill', 'quantitative_level', 'qualitative_description', 'evaluated_by') 
\ No newline at end of file
+        fields = ('employee', 'skill', 'quantitative_level', 'qualitative_description', 'evaluated_by') 
+
+class EvaluationHistorySerializer(serializers.ModelSerializer):
+    """Sérialiseur pour l'historique des évaluations."""
+    skill_name = serializers.ReadOnlyField(source='skill.name')
+
+    class Meta:
+        model = EvaluationHistory
+        fields = ('id', 'employee', 'skill', 'skill_name', 'quantitative_level',
+                  'qualitative_description', 'evaluated_by', 'evaluation_date', 'recorded_at')
+
+
+class TaskSerializer(serializers.ModelSerializer):
+    """Sérialiseur pour les tâches de fond (statut en lecture seule)."""
+    status_display = serializers.ReadOnlyField(source='get_status_display')
+
+    class Meta:
+        model = Task
+        fields = ('id', 'name', 'payload', 'status', 'status_display', 'result', 'error',
+                  'attempts', 'max_attempts', 'run_after', 'created_at', 'locked_at', 'finished_at')
+        read_only_fields = ('status', 'result', 'error', 'attempts', 'run_after',
+                            'created_at', 'locked_at', 'finished_at')
+
+    def validate_name(self, value):
+        if value not in TASK_HANDLERS:
+            raise serializers.ValidationError(f"Tâche inconnue : {value}")
+        return value
+
+    def create(self, validated_data):
+        return enqueue(validated_data['name'], validated_data.get('payload'),
+                       max_attempts=validated_data.get('max_attempts', 3))
+
+
+class ChangeEventSerializer(serializers.ModelSerializer):
+    """Sérialiseur des événements du flux des modifications (même format que le flux SSE)."""
+
+    class Meta:
+        model = ChangeEvent
+        fields = ('id', 'topic', 'action', 'object_id', 'employee_id', 'data', 'created_at')
+
+
+class CustomFieldSerializer(serializers.ModelSerializer):
+    """Sérialiseur pour les définitions de champs personnalisés."""
+
+    class Meta:
+        model = CustomField
+        fields = '__all__'
+
+
+class CustomFieldValueSerializer(serializers.ModelSerializer):
+    """
+    Sérialiseur pour les valeurs de champs personnalisés.
+
+    `value` est converti dans le type du champ et enregistré dans la colonne typée correspondante.
+    """
+    custom_field_name = serializers.ReadOnlyField(source='custom_field.name')
+    field_type = serializers.ReadOnlyField(source='custom_field.field_type')
+    value = serializers.JSONField(allow_null=True)
+
+    class Meta:
+        model = CustomFieldValue
+        fields = ('id', 'custom_field', 'custom_field_name', 'field_type', 'content_type', 'object_id', 'value')
+
+    def validate(self, attrs):
+        custom_field = attrs.get('custom_field', getattr(self.instance, 'custom_field', None))
+        content_type = attrs.get('content_type', getattr(self.instance, 'content_type', None))
+        object_id = attrs.get('object_id', getattr(self.instance, 'object_id', None))
+        model = custom_field.target_model()
+        if model is None or content_type.model_class() is not model:
+            raise serializers.ValidationError({'content_type': f"Le champ {custom_field.name} ne s'applique pas à ce type d'objet"})
+        if not model.objects.filter(pk=object_id).exists():
+            raise serializers.ValidationError({'object_id': "Objet introuvable"})
+        value = attrs.pop('value', getattr(self.instance, 'value', None))
+        try:
+            attrs.update(custom_field.value_columns(value))
+        except ValueError as e:
+            raise serializers.ValidationError({'value': str(e)})
+        return attrs
+
+
+class CustomFieldSetValueSerializer(serializers.Serializer):
+    """Paramètres de `POST /api/custom-field/set-value/`."""
+    model_name = serializers.ChoiceField(choices=CustomField.ModelType.choices)
+    object_id = serializers.IntegerField(min_value=1)
+    field_name = serializers.CharField()
+    value = serializers.JSONField(allow_null=True)
+
+
+class SkillNeedSerializer(serializers.Serializer):
+    """Besoin en compétence d'une équipe : compétence et niveau minimal."""
+    skill = serializers.IntegerField(min_value=1)
+    min_level = serializers.IntegerField(min_value=1, max_value=5)
+
+
+class TeamSuggestionSerializer(serializers.Serializer):
+    """Paramètres de `POST /api/teams/suggest/`."""
+    MAX_NEEDS = 100
+
+    needs = SkillNeedSerializer(many=True, allow_empty=False)
+    location = serializers.CharField(required=False, allow_blank=True)
+    available = serializers.BooleanField(default=False)
+    include_descendants = serializers.BooleanField(default=False)
+    exclude = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list)
+    max_size = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_needs(self, needs):
+        if len(needs) > self.MAX_NEEDS:
+            raise serializers.ValidationError(f"{self.MAX_NEEDS} besoins au maximum")
+        skill_ids = {need['skill'] for need in needs}
+        unknown = skill_ids - set(Skill.objects.filter(pk__in=skill_ids).values_list('pk', flat=True))
+        if unknown:
+            raise serializers.ValidationError(f"Compétences inconnues : {', '.join(map(str, sorted(unknown)))}")
+        return needs
@@ -0,0 +1,92 @@
+"""
+Flux Server-Sent Events des modifications (`GET /api/changes/stream/`).
+
+La vue est asynchrone : servie par un serveur ASGI (`SkillsMatchAI.asgi:application`),
+chaque connexion ouverte ne mobilise pas de thread. Les événements proviennent de
+l'outbox `ChangeEvent` via le hub du processus (voir `jobs.changefeed`).
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from jobs.changefeed import Subscription, stream_messages
+
+from .authentication import CachedJWTAuthentication
+
+DEFAULT_HEARTBEAT = 15
+
+# Délai de reconnexion conseillé au client (millisecondes)
+RETRY_MS = 1000
+
+
+def authenticate_stream(request):
+    """
+    Authentifie la connexion par l'en-tête `Authorization: Bearer` ou, à défaut,
+    par le paramètre `token` (l'API EventSource des navigateurs ne permet pas d'envoyer d'en-tête).
+    """
+    authentication = CachedJWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else request.GET.get('token')
+    if not raw_token:
+        return None
+    try:
+        user = authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+    return user
+
+
+def format_event(message):
+    """Sérialise un message au format Server-Sent Events."""
+    if message is None:
+        return ': keepalive\n\n'
+    data = json.dumps(message, separators=(',', ':'))
+    return f"id: {message['id']}\nevent: {message['topic']}\ndata: {data}\n\n"
+
+
+async def sse_events(subscription, last_id, heartbeat):
+    yield f"retry: {RETRY_MS}\n\n"
+    async for message in stream_messages(subscription, last_id, heartbeat):
+        yield format_event(message)
+
+
+@require_GET
+async def change_stream(request):
+    """
+    Diffuse les modifications en Server-Sent Events.
+
+    Paramètres :
+        topics: types d'objets suivis, ex. `evaluation,position` (tous par défaut)
+        employee: employés suivis, ex. `12,15` (tous par défaut)
+        token: jeton JWT d'accès, si l'en-tête Authorization ne peut pas être envoyé
+
+    L'en-tête `Last-Event-ID` (envoyé automatiquement par EventSource à la
+    reconnexion) ou le paramètre `last_event_id` reprend le flux après cet événement.
+    """
+    user = await sync_to_async(authenticate_stream)(request)
+    if user is None:
+        return JsonResponse({"detail": "Authentification requise"}, status=401)
+
+    try:
+        subscription = Subscription.from_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    last_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    if last_id and not last_id.isdigit():
+        return JsonResponse({"error": "last_event_id doit être un identifiant d'événement"}, status=400)
+    last_id = int(last_id) if last_id else None
+
+    heartbeat = getattr(settings, 'CHANGE_FEED_HEARTBEAT', DEFAULT_HEARTBEAT)
+    response = StreamingHttpResponse(
+        sse_events(subscription, last_id, heartbeat),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Désactive la mise en tampon des proxys (nginx)
+    response['X-Accel-Buffering'] = 'no'
+    return response
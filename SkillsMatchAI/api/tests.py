@@ -1,3 +1,1298 @@
-from django.test import TestCase
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, transaction
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from SkillsMatchAI import metrics
+from api import streams
+from api.authentication import user_cache
+from api.views import PositionViewSet
+from jobs.models import (
+    JobFamily, Skill, Job, Position, Employee, EmployeeSkill, PositionSkill,
+    Evaluation, EvaluationHistory, Task, DirtyKey, CustomField, CustomFieldValue, ChangeEvent, SkillInventory
+)
+from jobs import changefeed, recompute, tasks
+from jobs.assignment import AssignmentConflict, assign_employee
+from jobs.fixtures import clear_sample_data
+from jobs.skill_inventory import rebuild_skill_inventory
+from jobs.skill_matrix import write_skill_matrix
+from jobs.skill_stats import skill_level_count_at_least
+from jobs.succession import compute_successors
+
+
+class SkillsMatchAPITestCase(TestCase):
+    """Jeu de données commun aux tests de l'API"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="recruteur", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.job_family = JobFamily.objects.create(
+            name="Développement",
+            description="Famille de métiers de développement informatique"
+        )
+        self.python = Skill.objects.create(name="Python", description="Langage Python")
+        self.django = Skill.objects.create(name="Django", description="Framework web")
+        self.sql = Skill.objects.create(name="SQL", description="Bases de données")
+        self.job = Job.objects.create(
+            title="Développeur Backend",
+            description="Développement d'API",
+            level="Senior",
+            job_family=self.job_family
+        )
+        self.position = Position.objects.create(job=self.job, location="Paris")
+
+        self.alice = self.create_employee("Alice", "Martin", {self.python: 5, self.django: 4, self.sql: 2})
+        self.bob = self.create_employee("Bob", "Durand", {self.python: 3, self.django: 4})
+        self.carol = self.create_employee("Carol", "Petit", {self.python: 4, self.django: 2, self.sql: 5})
+
+    def create_employee(self, first_name, last_name, levels):
+        employee = Employee.objects.create(
+            first_name=first_name,
+            last_name=last_name,
+            email=f"{first_name.lower()}@example.com",
+            hire_date=date(2020, 1, 1),
+            date_of_birth=date(1990, 1, 1)
+        )
+        for skill, level in levels.items():
+            EmployeeSkill.objects.create(
+                employee=employee,
+                skill=skill,
+                proficiency_level=level,
+                date_acquired=date(2021, 1, 1)
+            )
+        return employee
+
+
+class SearchBySkillsTestCase(SkillsMatchAPITestCase):
+    """Tests pour la recherche multi-compétences"""
+
+    url = '/api/employees/search_by_skills/'
+
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_all_thresholds_must_match(self):
+        ids = self.search(require=f"{self.python.id}:>=3,{self.django.id}:>=4")
+        self.assertEqual(ids, [self.bob.id, self.alice.id])
+
+    def test_strict_and_exact_operators(self):
+        self.assertEqual(self.search(require=f"{self.python.id}:>4"), [self.alice.id])
+        self.assertEqual(self.search(require=f"{self.python.id}:=4"), [self.carol.id])
+
+    def test_preferred_skills_rank_first(self):
+        ids = self.search(require=f"{self.python.id}:>=3", prefer=f"{self.sql.id}:>=4")
+        self.assertEqual(ids[0], self.carol.id)
+
+    def test_single_query(self):
+        # Les comptes de sélectivité sont mis en cache au premier appel
+        self.search(require=f"{self.python.id}:>=3,{self.django.id}:>=4")
+        with self.assertNumQueries(2):  # comptage de pagination + résultats
+            self.search(require=f"{self.python.id}:>=3,{self.django.id}:>=4")
+
+    def test_counts_invalidated_on_change(self):
+        self.search(require=f"{self.python.id}:>=1")
+        self.assertEqual(skill_level_count_at_least(self.python.id, 1), 3)
+        # L'invalidation est différée au commit de la transaction
+        with self.captureOnCommitCallbacks(execute=True):
+            EmployeeSkill.objects.get(employee=self.bob, skill=self.python).delete()
+        self.assertEqual(skill_level_count_at_least(self.python.id, 1), 2)
+        self.assertEqual(self.search(require=f"{self.python.id}:>=1"), [self.alice.id, self.carol.id])
+
+    def test_invalid_threshold(self):
+        response = self.client.get(self.url, {'require': 'abc:>=2'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 400)
+
+
+class EvaluationHistoryTestCase(SkillsMatchAPITestCase):
+    """Tests pour l'historique des évaluations"""
+
+    def test_reevaluation_appends_history(self):
+        evaluation = Evaluation.objects.create(employee=self.alice, skill=self.python, quantitative_level=2)
+        evaluation.quantitative_level = 4
+        evaluation.save()
+
+        self.assertEqual(Evaluation.objects.get().quantitative_level, 4)
+        self.assertEqual(
+            list(EvaluationHistory.objects.order_by('id').values_list('quantitative_level', flat=True)),
+            [2, 4]
+        )
+
+    def test_as_of_returns_latest_level_at_date(self):
+        for level, day in ((1, date(2024, 1, 10)), (3, date(2024, 3, 1)), (5, date(2024, 6, 1))):
+            EvaluationHistory.objects.create(
+                employee=self.alice, skill=self.python, quantitative_level=level, evaluation_date=day
+            )
+
+        response = self.client.get('/api/evaluations/as_of/', {'date': '2024-03-31', 'employee_id': self.alice.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['quantitative_level'] for row in response.data['results']], [3])
+
+        response = self.client.get('/api/evaluations/history/', {'skill_id': self.python.id, 'since': '2024-02-01'})
+        self.assertEqual([row['quantitative_level'] for row in response.data['results']], [3, 5])
+
+    def test_as_of_requires_date(self):
+        response = self.client.get('/api/evaluations/as_of/')
+        self.assertEqual(response.status_code, 400)
+
+
+class BatchTestCase(SkillsMatchAPITestCase):
+    """Tests pour l'endpoint de requêtes groupées"""
+
+    def test_batch_runs_sub_requests(self):
+        response = self.client.post('/api/batch/', {'requests': [
+            f'/api/employees/{self.alice.id}/',
+            {'method': 'GET', 'url': f'/api/evaluations/by_employee/?employee_id={self.alice.id}'},
+            '/api/skills/?ordering=name',
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        statuses = [item['status'] for item in response.data['responses']]
+        self.assertEqual(statuses, [200, 200, 200])
+        self.assertEqual(response.data['responses'][0]['body']['email'], 'alice@example.com')
+        self.assertEqual(response.data['responses'][2]['body']['count'], 3)
+
+    def test_batch_rejects_invalid_sub_requests(self):
+        response = self.client.post('/api/batch/', {'requests': [
+            {'method': 'DELETE', 'url': f'/api/employees/{self.alice.id}/'},
+            '/api/unknown/',
+            '/api/batch/',
+        ]}, format='json')
+        self.assertEqual([item['status'] for item in response.data['responses']], [405, 404, 400])
+        self.assertTrue(Employee.objects.filter(pk=self.alice.id).exists())
+
+    def test_batch_isolates_unsupported_and_failing_routes(self):
+        with mock.patch('api.views.SkillViewSet.list', side_effect=RuntimeError("panne")), \
+                self.assertLogs('api.views', level='ERROR'):
+            response = self.client.post('/api/batch/', {'requests': [
+                '/admin/',
+                '/api/changes/stream/',
+                '/api/skills/',
+                f'/api/employees/{self.alice.id}/',
+            ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['status'] for item in response.data['responses']], [400, 400, 500, 200])
+
+    def test_batch_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.post('/api/batch/', {'requests': ['/api/skills/']}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+
+class EmployeeProfileTestCase(SkillsMatchAPITestCase):
+    """Tests pour le profil complet d'un employé"""
+
+    def test_profile_payload(self):
+        self.position.employee = self.alice
+        self.position.status = Position.Status.OCCUPIED
+        self.position.save()
+        self.alice.current_position = self.position
+        self.alice.save()
+        Evaluation.objects.create(employee=self.alice, skill=self.python, quantitative_level=4, evaluated_by=self.bob)
+
+        # Employé + position/job/famille, compétences, évaluations, positions occupées
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/employees/{self.alice.id}/profile/')
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        self.assertEqual(data['current_position']['job_family_name'], "Développement")
+        self.assertEqual(len(data['skills']), 3)
+        self.assertEqual(data['evaluations'][0]['evaluated_by_name'], "Bob Durand")
+        self.assertEqual([p['id'] for p in data['positions']], [self.position.id])
+
+
+class CachedJWTAuthenticationTestCase(TestCase):
+    """Tests pour l'authentification JWT avec cache des utilisateurs"""
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(
+            username="manager", password="secret123", email="manager@example.com", first_name="Marie"
+        )
+        self.client = APIClient()
+        response = self.client.post('/api/token/', {'username': 'manager', 'password': 'secret123'}, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def test_me_served_from_token_claims(self):
+        with self.assertNumQueries(1):  # chargement initial de l'utilisateur
+            response = self.client.get('/api/users/me/')
+        self.assertEqual(response.data['username'], "manager")
+        self.assertEqual(response.data['first_name'], "Marie")
+        with self.assertNumQueries(0):
+            self.client.get('/api/users/me/')
+
+    def test_deactivated_user_is_rejected(self):
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+
+class MetricsTestCase(SkillsMatchAPITestCase):
+    """Tests pour l'endpoint /metrics"""
+
+    def setUp(self):
+        super().setUp()
+        metrics.registry.reset()
+
+    def test_metrics_per_viewset_action(self):
+        self.client.post(f'/api/positions/{self.position.id}/assign_employee/', {'employee_id': self.bob.id})
+        self.client.get('/api/employees/search_by_skills/', {'require': f'{self.python.id}:>=3'})
+
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn(
+            'http_requests_total{method="POST",route="PositionViewSet.assign_employee",status="200"} 1', body
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{method="GET",route="EmployeeViewSet.search_by_skills"} 1', body
+        )
+        self.assertIn('db_queries_total{route="PositionViewSet.assign_employee"}', body)
+        self.assertIn('cache_requests_total{cache="skill_level_counts",result="miss"} 1', body)
+
+    def write_worker_metrics(self, directory, pid, value):
+        with open(os.path.join(directory, f'metrics-{pid}.json'), 'w') as f:
+            json.dump({
+                'counters': [['db_queries_total', [['route', 'SkillViewSet.list']], value]],
+                'histograms': [],
+            }, f)
+
+    def test_metrics_merged_across_workers(self):
+        finished = subprocess.Popen([sys.executable, '-c', 'pass'])
+        finished.wait()
+        with tempfile.TemporaryDirectory() as directory, self.settings(METRICS_DIR=directory):
+            self.write_worker_metrics(directory, os.getppid(), 5)
+            self.write_worker_metrics(directory, finished.pid, 100)
+            metrics.registry.inc('db_queries_total', {'route': 'SkillViewSet.list'}, 2)
+            worker = threading.Thread(
+                target=metrics.registry.inc, args=('db_queries_total', {'route': 'SkillViewSet.list'}, 1)
+            )
+            worker.start()
+            worker.join()
+            body = self.client.get('/metrics').content.decode()
+            # Le fichier du worker terminé est supprimé, ses compteurs restent exposés
+            self.assertFalse(os.path.exists(os.path.join(directory, f'metrics-{finished.pid}.json')))
+            self.assertIn('db_queries_total{route="SkillViewSet.list"} 108', body)
+            body = self.client.get('/metrics').content.decode()
+        self.assertIn('db_queries_total{route="SkillViewSet.list"} 108', body)
+
+    def test_concurrent_flushes(self):
+        with tempfile.TemporaryDirectory() as directory, self.settings(
+            METRICS_DIR=directory, METRICS_FLUSH_INTERVAL=0
+        ):
+            metrics.registry.inc('db_queries_total', {'route': 'SkillViewSet.list'}, 3)
+            errors = []
+
+            def flush():
+                try:
+                    for _ in range(50):
+                        metrics.registry.flush()
+                except Exception as exc:
+                    errors.append(exc)
+
+            workers = [threading.Thread(target=flush) for _ in range(4)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            self.assertEqual(errors, [])
+            self.assertEqual(os.listdir(directory), [f'metrics-{os.getpid()}.json'])
+            with open(os.path.join(directory, f'metrics-{os.getpid()}.json')) as f:
+                self.assertEqual(json.load(f)['counters'], [['db_queries_total', [['route', 'SkillViewSet.list']], 3]])
+
+    def test_flush_failure_does_not_fail_request(self):
+        with mock.patch.object(metrics.registry, 'flush', side_effect=OSError('disk full')), \
+                self.assertLogs('SkillsMatchAI.metrics', 'ERROR'):
+            response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+
+    def test_metrics_restricted_to_allowed_ips(self):
+        response = self.client.get('/metrics', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 403)
+
+
+class ServerTimingTestCase(SkillsMatchAPITestCase):
+    """Tests pour l'en-tête Server-Timing et le journal des requêtes lentes"""
+
+    def test_disabled_by_default(self):
+        response = self.client.get(f'/api/jobs/{self.job.id}/')
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(SERVER_TIMING_ENABLED=True, SLOW_QUERY_THRESHOLD_MS=0)
+    def test_server_timing_and_slow_queries(self):
+        client = APIClient()
+        # Toutes les requêtes sont lentes au seuil 0 : celles de l'obtention du jeton sont aussi capturées
+        with self.assertLogs('SkillsMatchAI.slow_queries', level='WARNING') as logs:
+            token = client.post('/api/token/', {'username': 'recruteur', 'password': 'secret123'}, format='json')
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.data['access']}")
+            response = client.get(f'/api/jobs/{self.job.id}/')
+        self.assertEqual(response.status_code, 200)
+        phases = [entry.split(';')[0].strip() for entry in response['Server-Timing'].split(',')]
+        self.assertEqual(phases, ['auth', 'db', 'serialize', 'render', 'total'])
+        self.assertTrue(any('via JobDetailSerializer.' in line for line in logs.output))
+
+
+class BenchmarkCommandTestCase(TestCase):
+    """Tests pour la commande benchmark_api"""
+
+    def test_benchmark_reports_every_route(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'benchmark.json')
+            call_command(
+                'benchmark_api', employees=30, positions=10, skills=12, iterations=2, warmup=0,
+                in_place=True, output=output, stdout=StringIO()
+            )
+            with open(output) as f:
+                results = json.load(f)
+
+            routes = results['routes']
+            self.assertIn('employee-search-by-skills', routes)
+            self.assertIn('position-required-skills', routes)
+            self.assertNotIn('position-assign-employee', routes)
+            self.assertTrue(all(stats['status'] == 200 for stats in routes.values()))
+            self.assertGreater(routes['employee-list']['queries'], 0)
+
+            # Une référence plus rapide et moins coûteuse fait échouer la comparaison
+            for stats in routes.values():
+                stats['queries'] = 0
+            with open(output, 'w') as f:
+                json.dump(results, f)
+            clear_sample_data()
+            with self.assertRaisesMessage(CommandError, "Régressions de performance"):
+                call_command(
+                    'benchmark_api', employees=30, positions=10, skills=12, iterations=1, warmup=0,
+                    in_place=True, baseline=output, stdout=StringIO()
+                )
+
+    def test_in_place_refuses_existing_data(self):
+        Skill.objects.create(name="Python", description="Langage Python")
+        with self.assertRaisesMessage(CommandError, "--in-place exige une base vide"):
+            call_command('benchmark_api', in_place=True, stdout=StringIO())
+        self.assertTrue(Skill.objects.filter(name="Python").exists())
+
+
+class TaskQueueTestCase(SkillsMatchAPITestCase):
+    """Tests pour la file de tâches de fond et l'API de suivi"""
+
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+
+        def count_employees(location=None):
+            self.calls.append(location)
+            return {'employees': Employee.objects.count()}
+
+        def flaky():
+            self.calls.append('flaky')
+            raise RuntimeError("échec")
+
+        self.handlers = {'test.count_employees': count_employees, 'test.flaky': flaky}
+        tasks.TASK_HANDLERS.update(self.handlers)
+
+    def tearDown(self):
+        for name in self.handlers:
+            tasks.TASK_HANDLERS.pop(name, None)
+
+    def test_worker_runs_pending_tasks(self):
+        task = tasks.enqueue('test.count_employees', {'location': 'Paris'})
+        later = tasks.enqueue('test.count_employees', delay=timedelta(hours=1))
+        with self.assertRaises(ValueError):
+            tasks.enqueue('test.unknown')
+
+        call_command('run_worker', once=True, stdout=StringIO())
+
+        task.refresh_from_db()
+        later.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.SUCCEEDED)
+        self.assertEqual(task.result, {'employees': 3})
+        self.assertEqual(task.attempts, 1)
+        self.assertEqual(later.status, Task.Status.PENDING)
+        self.assertEqual(self.calls, ['Paris'])
+
+    def test_claim_is_exclusive(self):
+        task = tasks.enqueue('test.count_employees')
+        claimed = tasks.claim_next_task('worker-1')
+        self.assertEqual(claimed.pk, task.pk)
+        self.assertEqual(claimed.status, Task.Status.RUNNING)
+        self.assertEqual(claimed.locked_by, 'worker-1')
+        self.assertIsNone(tasks.claim_next_task('worker-2'))
+
+        # Un worker disparu libère la tâche après TASK_LOCK_TIMEOUT (TASK_SQLITE_ATOMIC_LOCK_TIMEOUT
+        # sous SQLite pour une tâche atomique, sans battement)
+        Task.objects.filter(pk=task.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(tasks.requeue_stale_tasks(), 0 if connection.vendor == 'sqlite' else 1)
+        Task.objects.filter(pk=task.pk).update(locked_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(tasks.requeue_stale_tasks(), 1 if connection.vendor == 'sqlite' else 0)
+        self.assertEqual(tasks.claim_next_task('worker-2').locked_by, 'worker-2')
+
+    def test_requeued_run_is_not_overwritten(self):
+        task = tasks.enqueue('test.count_employees')
+        stale = tasks.claim_next_task('worker-1')
+        Task.objects.filter(pk=task.pk).update(locked_at=timezone.now() - timedelta(days=1))
+        tasks.requeue_stale_tasks()
+        tasks.claim_next_task('worker-2')
+
+        # worker-1 termine après la reprise par worker-2 : son résultat est ignoré
+        with self.assertLogs('jobs.tasks', 'ERROR'):
+            tasks.run_task(stale)
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.locked_by, task.result), (Task.Status.RUNNING, 'worker-2', None))
+
+    def test_stale_task_counts_as_an_attempt(self):
+        task = tasks.enqueue('test.count_employees', max_attempts=2)
+        for attempt, worker in enumerate(('worker-1', 'worker-2'), start=1):
+            self.assertEqual(tasks.claim_next_task(worker).attempts, attempt)
+            Task.objects.filter(pk=task.pk).update(locked_at=timezone.now() - timedelta(days=1))
+            if attempt == 1:
+                self.assertEqual(tasks.requeue_stale_tasks(), 1)
+        # Le worker disparaît à la dernière tentative : échec définitif au lieu d'une boucle infinie
+        with self.assertLogs('jobs.tasks', 'ERROR'):
+            self.assertEqual(tasks.requeue_stale_tasks(), 0)
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (Task.Status.FAILED, 2))
+        self.assertIsNone(tasks.claim_next_task('worker-3'))
+
+    def test_failed_task_is_retried_then_marked_failed(self):
+        task = tasks.enqueue('test.flaky', max_attempts=2)
+        with self.assertLogs('jobs.tasks', 'WARNING'):
+            tasks.run_pending_tasks('worker-1')
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.PENDING)
+        # Message court dans la tâche (visible par l'API), trace complète dans le journal
+        self.assertEqual(task.error, "RuntimeError: échec")
+        self.assertGreater(task.run_after, timezone.now())
+
+        Task.objects.filter(pk=task.pk).update(run_after=timezone.now())
+        with self.assertLogs('jobs.tasks', 'ERROR'):
+            tasks.run_pending_tasks('worker-1')
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.FAILED)
+        self.assertEqual(task.attempts, 2)
+        self.assertEqual(self.calls, ['flaky', 'flaky'])
+
+    def test_task_status_api(self):
+        task = tasks.enqueue('test.count_employees')
+        response = self.client.get(f'/api/tasks/{task.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'PENDING')
+
+        # Mise en file réservée aux administrateurs
+        response = self.client.post('/api/tasks/', {'name': 'test.count_employees'}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.post('/api/tasks/', {'name': 'test.unknown'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            '/api/tasks/', {'name': 'test.count_employees', 'payload': {'location': 'Lyon'}}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+
+        tasks.run_pending_tasks('worker-1')
+        response = self.client.get('/api/tasks/', {'status': 'SUCCEEDED'})
+        self.assertEqual(response.data['count'], 2)
+
+
+class CustomFieldFilterTestCase(SkillsMatchAPITestCase):
+    """Tests pour les champs personnalisés typés et les filtres `?cf.<nom>=`"""
+
+    def setUp(self):
+        super().setUp()
+        self.experience = CustomField.objects.create(name="Experience", field_type="number", model_type="employee")
+        self.mobile = CustomField.objects.create(name="Mobilité", field_type="boolean", model_type="employee")
+        self.site = CustomField.objects.create(
+            name="Site", field_type="select", model_type="employee", options="Paris,Lyon"
+        )
+        for employee, experience, mobile in ((self.alice, 8, True), (self.bob, 3, False), (self.carol, 12, True)):
+            employee.set_custom_field_value("Experience", experience)
+            employee.set_custom_field_value("Mobilité", mobile)
+        self.alice.set_custom_field_value("Site", "Lyon")
+
+    def employee_ids(self, params):
+        response = self.client.get('/api/employees/', params)
+        self.assertEqual(response.status_code, 200)
+        return {row['id'] for row in response.data['results']}
+
+    def test_typed_filters(self):
+        self.assertEqual(self.employee_ids({'cf.Experience__gte': '8'}), {self.alice.id, self.carol.id})
+        self.assertEqual(self.employee_ids({'cf.Experience__lt': '10', 'cf.Mobilité': 'true'}), {self.alice.id})
+        self.assertEqual(self.employee_ids({'cf.Site': 'Lyon'}), {self.alice.id})
+        # Comparaison numérique, pas lexicographique
+        self.assertEqual(self.employee_ids({'cf.Experience__gt': '9'}), {self.carol.id})
+
+    def test_invalid_filters(self):
+        self.assertEqual(self.client.get('/api/employees/', {'cf.Inconnu': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/employees/', {'cf.Experience': 'beaucoup'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/employees/', {'cf.Mobilité__gte': 'true'}).status_code, 400)
+
+    def test_values_in_representation(self):
+        response = self.client.get(f'/api/employees/{self.alice.id}/')
+        values = {item['custom_field_name']: item['value'] for item in response.data['custom_fields']}
+        self.assertEqual(values, {"Experience": 8.0, "Mobilité": True, "Site": "Lyon"})
+
+        self.site.visible = False
+        self.site.save()
+        response = self.client.get(f'/api/employees/{self.alice.id}/')
+        self.assertNotIn("Site", [item['custom_field_name'] for item in response.data['custom_fields']])
+
+    def test_set_value(self):
+        url = '/api/custom-field/set-value/'
+        response = self.client.post(url, {
+            'model_name': 'employee', 'object_id': self.bob.id, 'field_name': 'Site', 'value': 'Paris'
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['value'], 'Paris')
+        self.assertEqual(self.bob.get_custom_field_value("Site"), 'Paris')
+
+        response = self.client.post(url, {
+            'model_name': 'employee', 'object_id': self.bob.id, 'field_name': 'Site', 'value': 'Marseille'
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(url, {
+            'model_name': 'job', 'object_id': self.job.id, 'field_name': 'Site', 'value': 'Paris'
+        }, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(CustomFieldValue.objects.filter(custom_field=self.site).count(), 2)
+
+    def test_definitions_are_admin_only(self):
+        response = self.client.get('/api/custom-fields/', {'model_type': 'employee'})
+        self.assertEqual(response.data['count'], 3)
+        response = self.client.post('/api/custom-fields/', {
+            'name': 'Service', 'field_type': 'text', 'model_type': 'position'
+        }, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class SkillHeatmapTestCase(SkillsMatchAPITestCase):
+    """Tests pour la carte de chaleur des compétences"""
+
+    def setUp(self):
+        super().setUp()
+        self.alice.current_position = self.position
+        self.alice.save()
+        PositionSkill.objects.create(position=self.position, skill=self.sql, importance_level=4, is_required=True)
+
+    def test_heatmap_by_skill_and_level(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/analytics/skill_heatmap/', {'skill': self.python.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(cell['level'], cell['supply']) for cell in response.data['cells']],
+            [(3, 1), (4, 1), (5, 1)]
+        )
+        self.assertEqual(response.data['cells'][0]['skill_name'], "Python")
+
+    def test_heatmap_by_location(self):
+        response = self.client.get('/api/analytics/skill_heatmap/', {
+            'group_by': 'skill,location', 'skill': f'{self.sql.id}'
+        })
+        cells = {cell['location']: cell for cell in response.data['cells']}
+        self.assertEqual(cells['Paris']['supply'], 1)
+        self.assertEqual(cells['Paris']['demand'], 1)
+        self.assertEqual(cells['Paris']['demand_weight'], 4)
+        self.assertEqual(cells['']['supply'], 1)  # Carol, sans position
+
+    def test_invalid_group_by(self):
+        response = self.client.get('/api/analytics/skill_heatmap/', {'group_by': 'skill,salary'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ChangeFeedTestCase(SkillsMatchAPITestCase):
+    """Tests pour le flux des modifications (outbox et Server-Sent Events)"""
+
+    def evaluate(self, employee, skill, level):
+        return Evaluation.objects.create(employee=employee, skill=skill, quantitative_level=level)
+
+    def test_writes_publish_events(self):
+        evaluation = self.evaluate(self.alice, self.python, 4)
+        evaluation.quantitative_level = 5
+        evaluation.save()
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.evaluate(self.bob, self.sql, 2)
+                raise RuntimeError
+        response = self.client.post(
+            f'/api/positions/{self.position.id}/assign_employee/', {'employee_id': self.bob.id}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(
+            list(ChangeEvent.objects.exclude(topic='employee_skill').values_list('topic', 'action', 'employee_id')),
+            [('evaluation', 'created', self.alice.id), ('evaluation', 'updated', self.alice.id),
+             ('position', 'assigned', self.bob.id)]
+        )
+        self.assertEqual(ChangeEvent.objects.get(action='updated').data, {'skill': self.python.id, 'level': 5})
+
+    def test_polling_endpoint(self):
+        first = self.evaluate(self.alice, self.python, 4)
+        cursor = ChangeEvent.objects.latest('id').id
+        self.evaluate(self.bob, self.python, 2)
+        response = self.client.get('/api/changes/', {'after': cursor, 'topic': 'evaluation'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([event['employee_id'] for event in response.data['results']], [self.bob.id])
+        self.assertNotEqual(response.data['results'][0]['object_id'], first.id)
+        self.assertEqual(self.client.get('/api/changes/', {'after': 'x'}).status_code, 400)
+
+    @override_settings(CHANGE_FEED_POLL_INTERVAL=0.05)
+    async def test_stream_resumes_and_filters(self):
+        await sync_to_async(self.evaluate)(self.alice, self.python, 4)
+        await sync_to_async(self.evaluate)(self.bob, self.python, 3)
+        subscription = changefeed.Subscription(topics={'evaluation'}, employee_ids={self.bob.id, self.carol.id})
+        messages = changefeed.stream_messages(subscription, last_id=0, heartbeat=0.05)
+        try:
+            # Rattrapage depuis le curseur de reprise, filtré par abonnement
+            message = await messages.__anext__()
+            self.assertEqual((message['topic'], message['employee']), ('evaluation', self.bob.id))
+            self.assertIsNone(await messages.__anext__())  # maintien de la connexion
+
+            # Nouvel événement reçu par le hub
+            await sync_to_async(self.evaluate)(self.carol, self.python, 5)
+            message = await messages.__anext__()
+            while message is None:
+                message = await messages.__anext__()
+            self.assertEqual(message['employee'], self.carol.id)
+            self.assertIn(f"id: {message['id']}\nevent: evaluation\n", streams.format_event(message))
+        finally:
+            await messages.aclose()
+
+    async def test_stream_requires_token(self):
+        client = AsyncClient()
+        response = await client.get('/api/changes/stream/')
+        self.assertEqual(response.status_code, 401)
+
+        token = str(AccessToken.for_user(self.user))
+        response = await client.get('/api/changes/stream/', {'token': token, 'topics': 'salary'})
+        self.assertEqual(response.status_code, 400)
+        response = await client.get('/api/changes/stream/', {'token': token, 'topics': 'evaluation'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+
+class PositionCandidatesTestCase(SkillsMatchAPITestCase):
+    """Tests pour le filtre des candidats possédant les compétences obligatoires d'une position"""
+
+    def setUp(self):
+        super().setUp()
+        PositionSkill.objects.create(position=self.position, skill=self.python, importance_level=4, is_required=True)
+        PositionSkill.objects.create(position=self.position, skill=self.django, importance_level=3, is_required=True)
+        PositionSkill.objects.create(position=self.position, skill=self.sql, importance_level=5, is_required=False)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'skill_matrix.bin')
+        self.url = f'/api/positions/{self.position.id}/candidates/'
+
+    def candidates(self, **params):
+        with override_settings(SKILL_MATRIX_PATH=self.path):
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['engine'], [row['id'] for row in response.data['results']]
+
+    def test_bitset_and_sql_agree(self):
+        self.assertEqual(self.candidates(), ('sql', [self.alice.id]))
+        write_skill_matrix(self.path)
+        self.assertEqual(self.candidates(), ('bitset', [self.alice.id]))
+
+        # Instantané périmé : retour à la requête SQL
+        carol_django = EmployeeSkill.objects.get(employee=self.carol, skill=self.django)
+        carol_django.proficiency_level = 3
+        carol_django.save()
+        with override_settings(SKILL_COVERAGE_CHECK_INTERVAL=0):
+            self.assertEqual(self.candidates(), ('sql', [self.alice.id, self.carol.id]))
+
+    def test_evaluated_source(self):
+        Evaluation.objects.create(employee=self.bob, skill=self.python, quantitative_level=4)
+        Evaluation.objects.create(employee=self.bob, skill=self.django, quantitative_level=5)
+        self.assertEqual(self.candidates(source='evaluated'), ('sql', [self.bob.id]))
+        write_skill_matrix(self.path)
+        self.assertEqual(self.candidates(source='evaluated'), ('bitset', [self.bob.id]))
+        with override_settings(SKILL_MATRIX_PATH=self.path):
+            self.assertEqual(self.client.get(self.url, {'source': 'x'}).status_code, 400)
+
+
+class PositionSuccessorsTestCase(SkillsMatchAPITestCase):
+    """Tests pour la lecture des successeurs calculés d'une position"""
+
+    def test_successors_are_read_from_table(self):
+        PositionSkill.objects.create(position=self.position, skill=self.python, importance_level=4, is_required=True)
+        PositionSkill.objects.create(position=self.position, skill=self.sql, importance_level=3, is_required=False)
+        self.client.post(f'/api/positions/{self.position.id}/assign_employee/', {'employee_id': self.alice.id},
+                         format='json')
+        compute_successors(top=5)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/positions/{self.position.id}/successors/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(row['rank'], row['employee']['id']) for row in response.data],
+                         [(1, self.carol.id), (2, self.bob.id)])
+        self.assertEqual(response.data[0]['score'], 100.0)
+        self.assertEqual(response.data[1]['missing_required'], 1)
+        self.assertEqual(self.client.get('/api/positions/999/successors/').status_code, 404)
+
+
+class TeamSuggestionTestCase(SkillsMatchAPITestCase):
+    """Tests pour la constitution d'équipe (couverture gloutonne des besoins)"""
+
+    url = '/api/teams/suggest/'
+
+    def suggest(self, needs, **params):
+        response = self.client.post(self.url, {
+            'needs': [{'skill': skill.id, 'min_level': level} for skill, level in needs], **params
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_minimal_team_covers_all_needs(self):
+        data = self.suggest([(self.python, 4), (self.django, 4), (self.sql, 5)])
+        self.assertEqual([member['employee']['id'] for member in data['team']], [self.alice.id, self.carol.id])
+        self.assertEqual(data['team'][1]['covers'], [{'skill': self.python.id, 'min_level': 4},
+                                                     {'skill': self.sql.id, 'min_level': 5}])
+        self.assertTrue(data['complete'])
+
+        # Un seul employé suffit
+        data = self.suggest([(self.python, 3), (self.django, 4)])
+        self.assertEqual(len(data['team']), 1)
+
+    def test_filters_and_uncovered_needs(self):
+        Employee.objects.filter(pk=self.alice.pk).update(employment_status=Employee.EmploymentStatus.ON_LEAVE)
+        data = self.suggest([(self.python, 5), (self.django, 4)])
+        self.assertEqual([member['employee']['id'] for member in data['team']], [self.bob.id])
+        self.assertEqual(data['uncovered'], [{'skill': self.python.id, 'min_level': 5}])
+        self.assertFalse(data['complete'])
+
+        self.carol.current_position = self.position
+        self.carol.save()
+        data = self.suggest([(self.python, 3)], location="Paris")
+        self.assertEqual([member['employee']['id'] for member in data['team']], [self.carol.id])
+        data = self.suggest([(self.python, 3)], available=True, exclude=[self.bob.id])
+        self.assertEqual(data['team'], [])
+
+        self.assertEqual(self.suggest([(self.django, 4), (self.sql, 5)], max_size=1)['uncovered'],
+                         [{'skill': self.django.id, 'min_level': 4}])
+
+    def test_invalid_needs(self):
+        for needs in ([], [{'skill': 999, 'min_level': 3}], [{'skill': self.python.id, 'min_level': 6}]):
+            self.assertEqual(self.client.post(self.url, {'needs': needs}, format='json').status_code, 400)
+
+
+class DeltaSyncTestCase(SkillsMatchAPITestCase):
+    """Tests pour la synchronisation incrémentale (?updated_since=)"""
+
+    def sync(self, url, since, **params):
+        response = self.client.get(url, {'updated_since': since.isoformat(), **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_changes_and_tombstones_since_watermark(self):
+        watermark = self.sync('/api/employees/', timezone.now() - timedelta(days=1))['watermark']
+        Employee.objects.filter(pk=self.alice.pk).update(last_updated=watermark - timedelta(hours=1))
+        Employee.objects.filter(pk=self.carol.pk).update(last_updated=watermark - timedelta(hours=1))
+        self.alice.first_name = "Alicia"
+        self.alice.save()
+        employee_skill = EmployeeSkill.objects.get(employee=self.bob, skill=self.python)
+        bob_id = self.bob.id
+        self.bob.delete()
+
+        data = self.sync('/api/employees/', watermark)
+        self.assertEqual([row['id'] for row in data['results']], [self.alice.id])
+        self.assertEqual(data['deleted'], [bob_id])
+        # Les suppressions en cascade sont tracées
+        self.assertIn(employee_skill.id, self.sync('/api/employee-skills/', watermark)['deleted'])
+
+    def test_new_timestamp_columns(self):
+        since = timezone.now() - timedelta(seconds=1)
+        evaluation = Evaluation.objects.create(employee=self.alice, skill=self.python, quantitative_level=3)
+        self.assertEqual([row['id'] for row in self.sync('/api/evaluations/', since)['results']], [evaluation.id])
+        position_id = self.position.id
+        self.position.delete()
+        data = self.sync('/api/positions/', since)
+        self.assertEqual((data['results'], data['deleted']), ([], [position_id]))
+
+    @override_settings(DELTA_SYNC_PAGE_SIZE=2)
+    def test_cursor_pagination(self):
+        since = timezone.now() - timedelta(days=1)
+        data = self.sync('/api/employee-skills/', since)
+        ids = [row['id'] for row in data['results']]
+        while data['next']:
+            response = self.client.get(data['next'])
+            self.assertEqual(response.data['watermark'], data['watermark'])
+            self.assertEqual(response.data['deleted'], [])
+            data = response.data
+            ids += [row['id'] for row in data['results']]
+        self.assertEqual(sorted(ids), sorted(EmployeeSkill.objects.values_list('id', flat=True)))
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_invalid_and_expired_timestamps(self):
+        self.assertEqual(self.client.get('/api/employees/', {'updated_since': 'hier'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/employees/', {'updated_since': '2025-03-01 08:00:00 00:00'}).status_code, 410)
+        recent = (timezone.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+        self.assertEqual(self.client.get('/api/employees/', {'updated_since': recent}).status_code, 200)
+
+
+class TaskHeartbeatTestCase(TransactionTestCase):
+    """Tests pour le battement des tâches longues (transactions réelles)"""
+
+    def setUp(self):
+        def slow():
+            time.sleep(0.3)
+            return {'done': True}
+
+        # Sans transaction englobante : le battement s'exécute aussi sous SQLite
+        tasks.register_task('test.slow', atomic=False)(slow)
+
+    def tearDown(self):
+        tasks.TASK_HANDLERS.pop('test.slow', None)
+        tasks.NON_ATOMIC_TASKS.discard('test.slow')
+
+    @override_settings(TASK_HEARTBEAT_INTERVAL=0.05, TASK_LOCK_TIMEOUT=0.2)
+    def test_heartbeat_keeps_long_task_locked(self):
+        task = tasks.enqueue('test.slow')
+        claimed = tasks.claim_next_task('worker-1')
+        requeued = []
+        watcher = threading.Timer(0.25, lambda: (requeued.append(tasks.requeue_stale_tasks()), connection.close()))
+        beat = tasks.Heartbeat.beat
+        beats = []
+
+        def flaky_beat(heartbeat):
+            # Premier battement en échec (base verrouillée) : le suivant est tout de même envoyé
+            beats.append(heartbeat)
+            if len(beats) == 1:
+                raise OperationalError("database is locked")
+            beat(heartbeat)
+
+        watcher.start()
+        with mock.patch.object(tasks.Heartbeat, 'beat', flaky_beat), self.assertLogs('jobs.tasks', 'WARNING'):
+            tasks.run_task(claimed)
+        watcher.join()
+        task.refresh_from_db()
+        self.assertEqual(requeued, [0])
+        self.assertGreater(len(beats), 1)
+        self.assertEqual((task.status, task.attempts), (Task.Status.SUCCEEDED, 1))
+
+    def test_worker_survives_database_errors(self):
+        task = tasks.enqueue('test.slow')
+        with mock.patch('jobs.management.commands.run_worker.requeue_stale_tasks',
+                        side_effect=[OperationalError("database is locked"), 0]), \
+                self.assertLogs('jobs.management.commands.run_worker', 'ERROR'):
+            call_command('run_worker', max_tasks=1, sleep=0, stdout=StringIO())
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.SUCCEEDED)
+
+
+class RecomputeCoalescingTestCase(TransactionTestCase):
+    """Tests pour le regroupement des recalculs déclenchés par les signaux (transactions réelles)"""
+
+    def setUp(self):
+        self.calls = []
+        self.background_calls = []
+
+        def on_skills(keys):
+            self.calls.append(set(keys))
+
+        def on_employees(keys):
+            self.background_calls.append(set(keys))
+
+        self.handlers = {
+            'skill': ('test.on_skills', on_skills, False),
+            'employee': ('test.on_employees', on_employees, True),
+        }
+        for kind, (name, func, background) in self.handlers.items():
+            recompute.RECOMPUTE_HANDLERS.setdefault(kind, {})[name] = (func, background)
+
+        self.python = Skill.objects.create(name="Python", description="Langage Python")
+        self.sql = Skill.objects.create(name="SQL", description="Bases de données")
+        self.employees = [
+            Employee.objects.create(
+                first_name=name, last_name="Test", email=f"{name.lower()}@example.com",
+                hire_date=date(2020, 1, 1), date_of_birth=date(1990, 1, 1)
+            )
+            for name in ("Alice", "Bob", "Carol")
+        ]
+
+    def tearDown(self):
+        for kind, (name, _, _) in self.handlers.items():
+            recompute.RECOMPUTE_HANDLERS[kind].pop(name, None)
+
+    def add_skill(self, employee, skill, level=3):
+        return EmployeeSkill.objects.create(
+            employee=employee, skill=skill, proficiency_level=level, date_acquired=date(2021, 1, 1)
+        )
+
+    def test_transaction_flushes_once_on_commit(self):
+        with transaction.atomic():
+            for employee in self.employees:
+                for skill in (self.python, self.sql):
+                    self.add_skill(employee, skill)
+            self.assertEqual(self.calls, [])
+        self.assertEqual(self.calls, [{self.python.pk, self.sql.pk}])
+
+    def test_rollback_discards_dirty_keys(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.add_skill(self.employees[0], self.sql)
+                raise RuntimeError
+        with transaction.atomic():
+            self.add_skill(self.employees[0], self.python)
+        self.assertEqual(self.calls, [{self.python.pk}])
+
+    def test_savepoint_rollback_discards_its_keys_only(self):
+        with transaction.atomic():
+            self.add_skill(self.employees[0], self.python)
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    self.add_skill(self.employees[1], self.sql)
+                    raise RuntimeError
+            with transaction.atomic():
+                self.add_skill(self.employees[2], self.python)
+        self.assertEqual(self.calls, [{self.python.pk}])
+
+    def test_savepoint_rollback_does_not_depend_on_garbage_collection(self):
+        # Les rappels annulés restent référencés : seul l'état de la transaction compte
+        callbacks = []
+        on_commit = transaction.on_commit
+
+        def record(func, *args, **kwargs):
+            callbacks.append(func)
+            return on_commit(func, *args, **kwargs)
+
+        with mock.patch.object(recompute.transaction, 'on_commit', side_effect=record):
+            with transaction.atomic():
+                self.add_skill(self.employees[0], self.python)
+                with self.assertRaises(RuntimeError):
+                    with transaction.atomic():
+                        self.add_skill(self.employees[1], self.sql)
+                        raise RuntimeError
+        self.assertTrue(callbacks)
+        self.assertEqual(self.calls, [{self.python.pk}])
+
+    def test_request_scope_and_background_debounce(self):
+        with recompute.coalesce():
+            self.add_skill(self.employees[0], self.sql)
+            with transaction.atomic():
+                self.add_skill(self.employees[1], self.sql)
+            self.assertEqual(self.calls, [])
+        self.assertEqual(self.calls, [{self.sql.pk}])
+
+        # Les clés des traitements de fond sont regroupées dans une seule tâche différée
+        self.add_skill(self.employees[2], self.python)
+        pending = Task.objects.filter(name=recompute.RECOMPUTE_TASK, status=Task.Status.PENDING)
+        self.assertEqual(pending.count(), 1)
+        self.assertGreater(pending.get().run_after, timezone.now())
+
+        tasks.run_pending_tasks('worker-1')
+        self.assertEqual(self.background_calls, [])
+        pending.update(run_after=timezone.now())
+        tasks.run_pending_tasks('worker-1')
+        self.assertEqual(self.background_calls, [{employee.pk for employee in self.employees}])
+        self.assertFalse(DirtyKey.objects.exists())
+
+
+class SkillHierarchyAPITestCase(SkillsMatchAPITestCase):
+    """Tests pour la taxonomie des compétences dans l'API"""
+
+    def setUp(self):
+        super().setUp()
+        self.backend = Skill.objects.create(name="Backend", description="Développement serveur")
+        self.python.parent = self.backend
+        self.python.save()
+        self.django.parent = self.python
+        self.django.save()
+
+    def test_ancestors_and_descendants(self):
+        response = self.client.get(f'/api/skills/{self.backend.id}/descendants/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(skill['id'], skill['depth']) for skill in response.data],
+                         [(self.python.id, 1), (self.django.id, 2)])
+        response = self.client.get(f'/api/skills/{self.django.id}/ancestors/')
+        self.assertEqual([skill['name'] for skill in response.data], ["Python", "Backend"])
+
+    def test_cycle_rejected(self):
+        response = self.client.patch(f'/api/skills/{self.backend.id}/', {'parent': self.django.id}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('parent', response.data)
+
+    def test_search_includes_descendants(self):
+        # Dave ne déclare que Django
+        dave = self.create_employee("Dave", "Roux", {self.django: 5})
+        url = '/api/employees/search_by_skills/'
+        response = self.client.get(url, {'require': f'{self.python.id}:>=5'})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.alice.id])
+        response = self.client.get(url, {'require': f'{self.python.id}:>=5', 'include_descendants': 'true'})
+        self.assertEqual({row['id'] for row in response.data['results']}, {self.alice.id, dave.id})
+
+        # Alice possède Python et Django à 4 ou plus : elle n'apparaît qu'une fois
+        response = self.client.get(url, {'require': f'{self.backend.id}:>=4', 'include_descendants': 'true'})
+        self.assertEqual(sorted(row['id'] for row in response.data['results']),
+                         sorted([self.alice.id, self.bob.id, self.carol.id, dave.id]))
+
+    def test_team_suggestion_includes_descendants(self):
+        data = self.client.post('/api/teams/suggest/', {
+            'needs': [{'skill': self.backend.id, 'min_level': 4}], 'include_descendants': True
+        }, format='json').data
+        self.assertTrue(data['complete'])
+
+    def test_heatmap_rollup(self):
+        response = self.client.get('/api/analytics/skill_heatmap/', {
+            'group_by': 'skill', 'skill': self.backend.id, 'rollup': 'true'
+        })
+        self.assertEqual(response.status_code, 200)
+        # Alice, Bob et Carol déclarent Python et Django : comptés une fois chacun
+        self.assertEqual([(cell['skill_name'], cell['supply']) for cell in response.data['cells']], [("Backend", 3)])
+
+        self.create_employee("Dave", "Roux", {self.django: 5})
+        response = self.client.get('/api/analytics/skill_heatmap/', {
+            'group_by': 'skill,location', 'skill': self.backend.id, 'location': '', 'rollup': 'true'
+        })
+        self.assertEqual(response.data['cells'], [{
+            'skill': self.backend.id, 'skill_name': "Backend", 'location': '',
+            'supply': 4, 'evaluated': 0, 'demand': 0, 'demand_weight': 0,
+        }])
+
+        # Une position exigeant Python et Django compte une fois, avec l'importance la plus élevée
+        PositionSkill.objects.create(position=self.position, skill=self.python, importance_level=3, is_required=True)
+        PositionSkill.objects.create(position=self.position, skill=self.django, importance_level=5, is_required=True)
+        response = self.client.get('/api/analytics/skill_heatmap/', {
+            'group_by': 'skill', 'skill': self.backend.id, 'rollup': 'true'
+        })
+        self.assertEqual([(cell['demand'], cell['demand_weight']) for cell in response.data['cells']], [(1, 5)])
+        response = self.client.get('/api/analytics/skill_heatmap/', {'group_by': 'level', 'rollup': 'true'})
+        self.assertEqual(response.status_code, 400)
+
+
+class SkillExtractionAPITestCase(SkillsMatchAPITestCase):
+    """Tests pour l'extraction des compétences d'un texte libre"""
+
+    def test_extract(self):
+        response = self.client.post('/api/skills/extract/', {'text': "Django, Python, python et SQL"}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(skill['name'], skill['occurrences']) for skill in response.data],
+                         [("Python", 2), ("Django", 1), ("SQL", 1)])
+        self.assertEqual(self.client.post('/api/skills/extract/', {}, format='json').status_code, 400)
+
+    def test_job_suggested_skills(self):
+        self.job.description = "API Django en Python, bases SQL"
+        self.job.save()
+        self.job.required_skills.add(self.python)
+        response = self.client.get(f'/api/jobs/{self.job.id}/suggested_skills/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({skill['skill'] for skill in response.data}, {self.django.id, self.sql.id})
+
+
+class SimilarityAPITestCase(SkillsMatchAPITestCase):
+    """Tests pour les emplois similaires et la recherche en texte libre"""
+
+    def setUp(self):
+        super().setUp()
+        self.job.description = "Conception d'API REST en Python avec Django"
+        self.job.save()
+        self.frontend = Job.objects.create(title="Développeur Frontend", description="Interfaces React et TypeScript",
+                                           level="Senior", job_family=self.job_family)
+        self.django_dev = Job.objects.create(title="Développeur Django", description="API Python et Django REST",
+                                             level="Junior", job_family=self.job_family)
+
+    def test_similar_jobs(self):
+        response = self.client.get(f'/api/jobs/{self.job.id}/similar/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['id'], self.django_dev.id)
+        self.assertNotIn(self.job.id, [job['id'] for job in response.data])
+        self.assertGreater(response.data[0]['score'], response.data[-1]['score'])
+        self.assertEqual(self.client.get(f'/api/jobs/{self.job.id}/similar/', {'limit': 0}).status_code, 400)
+
+    def test_semantic_search(self):
+        response = self.client.get('/api/search/semantic/', {'q': "framework web django"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0], {
+            'type': 'skill', 'id': self.django.id, 'label': "Django", 'score': response.data['results'][0]['score']
+        })
+        response = self.client.get('/api/search/semantic/', {'q': "django", 'type': 'job'})
+        self.assertEqual({result['type'] for result in response.data['results']}, {'job'})
+        self.assertEqual(self.client.get('/api/search/semantic/', {'q': "django", 'type': 'salary'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/search/semantic/').status_code, 400)
+
+
+def inventory():
+    return sorted(SkillInventory.objects.values_list(
+        'kind', 'skill_id', 'level', 'location', 'job_family_id', 'count', 'weight'
+    ))
+
+
+class PositionAssignmentTestCase(SkillsMatchAPITestCase):
+    """Tests pour l'affectation d'un employé à une position"""
+
+    def assign(self, position, employee):
+        return self.client.post(f'/api/positions/{position.id}/assign_employee/', {'employee_id': employee.id},
+                                format='json')
+
+    def test_assignment_keeps_both_sides_consistent(self):
+        lyon = Position.objects.create(job=self.job, location="Lyon")
+        self.assertEqual(self.assign(self.position, self.alice).status_code, 200)
+
+        # Alice change de position : l'ancienne est libérée
+        response = self.assign(lyon, self.alice)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['status'], response.data['employee']['id']), ('OCCUPIED', self.alice.id))
+        self.position.refresh_from_db()
+        self.assertEqual((self.position.status, self.position.employee_id), ('VACANT', None))
+
+        # Bob remplace Alice : elle n'a plus de position actuelle
+        self.assign(lyon, self.bob)
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        self.assertIsNone(self.alice.current_position_id)
+        self.assertEqual(self.bob.current_position_id, lyon.id)
+
+        maintained = inventory()
+        rebuild_skill_inventory()
+        self.assertEqual(maintained, inventory())
+        self.assertEqual(
+            list(ChangeEvent.objects.filter(topic='position').values_list('action', 'object_id', 'employee_id')),
+            [('assigned', self.position.id, self.alice.id), ('updated', self.position.id, self.alice.id),
+             ('assigned', lyon.id, self.alice.id), ('assigned', lyon.id, self.bob.id)]
+        )
+        self.assertEqual(self.assign(lyon, Employee(pk=999)).status_code, 404)
+
+    def test_writes_only_changed_columns(self):
+        self.position.custom_field1 = "Télétravail"
+        self.position.save()
+        stale = Position.objects.get(pk=self.position.pk)
+        Position.objects.filter(pk=self.position.pk).update(custom_field1="Sur site")
+        assign_employee(self.position.id, self.alice.id)
+        self.position.refresh_from_db()
+        self.assertEqual(self.position.custom_field1, "Sur site")
+        self.assertEqual(self.position.version, stale.version + 1)
+
+        # Réaffectation identique : deux lectures, aucune écriture (et le point de sauvegarde)
+        with self.assertNumQueries(4):
+            assign_employee(self.position.id, self.alice.id)
+
+    def test_stale_version_is_a_conflict_inside_a_transaction(self):
+        original = Position.objects.filter
+        position = Position.objects.get(pk=self.position.pk)
+
+        def concurrent_filter(*args, **kwargs):
+            # Une autre affectation modifie la position entre la lecture et l'écriture
+            if 'version' in kwargs:
+                original(pk=position.pk).update(version=position.version + 5)
+            return original(*args, **kwargs)
+
+        with mock.patch.object(Position.objects, 'filter', side_effect=concurrent_filter):
+            with self.assertRaises(AssignmentConflict):
+                assign_employee(self.position.id, self.alice.id)
+        self.alice.refresh_from_db()
+        self.assertIsNone(self.alice.current_position_id)
+
+    def test_patch_does_not_overwrite_concurrent_assignment(self):
+        url = f'/api/positions/{self.position.id}/'
+        get_object = PositionViewSet.get_object
+
+        def concurrent_get_object(viewset):
+            # Bob est affecté entre la lecture de la position par le PATCH et son enregistrement
+            position = get_object(viewset)
+            assign_employee(position.pk, self.bob.id)
+            return position
+
+        with mock.patch.object(PositionViewSet, 'get_object', concurrent_get_object):
+            response = self.client.patch(url, {'location': "Lyon"}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.position.refresh_from_db()
+        self.assertEqual((self.position.status, self.position.employee_id, self.position.location),
+                         ('OCCUPIED', self.bob.id, "Paris"))
+
+        # Version lue par le client périmée, puis version courante
+        version = self.client.get(url).data['version']
+        response = self.client.patch(url, {'location': "Lyon", 'version': version - 1}, format='json')
+        self.assertEqual(response.status_code, 409)
+        response = self.client.patch(url, {'location': "Lyon", 'version': version}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['version'], version + 1)
+        self.position.refresh_from_db()
+        self.assertEqual((self.position.employee_id, self.position.location), (self.bob.id, "Lyon"))
+
+
+@override_settings(ASSIGNMENT_MAX_ATTEMPTS=50)
+class ConcurrentAssignmentTestCase(TransactionTestCase):
+    """Affectations parallèles (transactions réelles, un thread par gestionnaire)"""
+
+    THREADS = 8
+    ASSIGNMENTS = 25
+
+    def setUp(self):
+        family = JobFamily.objects.create(name="Développement", description="Développement")
+        job = Job.objects.create(title="Développeur", description="Développement", level="Senior", job_family=family)
+        python = Skill.objects.create(name="Python", description="Langage Python")
+        self.positions = [Position.objects.create(job=job, location=f"Site {i}") for i in range(4)]
+        self.employees = []
+        for i in range(6):
+            employee = Employee.objects.create(
+                first_name=f"Employé {i}", last_name="Test", email=f"employe{i}@example.com",
+                hire_date=date(2020, 1, 1), date_of_birth=date(1990, 1, 1)
+            )
+            EmployeeSkill.objects.create(employee=employee, skill=python, proficiency_level=i % 5 + 1,
+                                         date_acquired=date(2021, 1, 1))
+            self.employees.append(employee)
+
+    def manager(self, seed, results, errors):
+        rng = random.Random(seed)
+        try:
+            for _ in range(self.ASSIGNMENTS):
+                position, employee = rng.choice(self.positions), rng.choice(self.employees)
+                try:
+                    assign_employee(position.id, employee.id)
+                    results.append((position.id, employee.id))
+                except AssignmentConflict:
+                    pass
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    def test_no_lost_updates(self):
+        results, errors = [], []
+        threads = [threading.Thread(target=self.manager, args=(seed, results, errors)) for seed in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertGreater(len(results), self.THREADS * self.ASSIGNMENTS // 2)
+
+        # Chaque affectation validée a publié un événement : les rejouer dans l'ordre de validation
+        # donne exactement l'état final (aucune écriture perdue ni entrelacée)
+        holders, current = {}, {}
+        for position_id, employee_id in ChangeEvent.objects.filter(action='assigned').order_by('id').values_list(
+            'object_id', 'employee_id'
+        ):
+            if holders.get(position_id) != employee_id:
+                holders.pop(current.get(employee_id), None)
+                current.pop(holders.get(position_id), None)
+                holders[position_id], current[employee_id] = employee_id, position_id
+        self.assertEqual(dict(Position.objects.exclude(employee=None).values_list('id', 'employee_id')), holders)
+        self.assertEqual(dict(Employee.objects.exclude(current_position=None).values_list('id', 'current_position_id')),
+                         current)
+        self.assertEqual(set(Position.objects.exclude(employee=None).values_list('status', flat=True)) - {'OCCUPIED'},
+                         set())
+
+        maintained = inventory()
+        rebuild_skill_inventory()
+        self.assertEqual(maintained, inventory())
 
-# Create your tests here.
@@ -8,11 +8,13 @@ from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
 
+from .streams import change_stream
 from .views import (
     UserViewSet, JobFamilyViewSet, SkillViewSet, JobViewSet,
     PositionViewSet, EmployeeViewSet,
     EmployeeSkillViewSet, PositionSkillViewSet,
-    EvaluationViewSet
+    EvaluationViewSet, TaskViewSet, ChangeEventViewSet, CustomFieldViewSet, CustomFieldValueViewSet,
+    CustomFieldSetValueView, SkillHeatmapView, TeamSuggestionView, SemanticSearchView, BatchView
 )
 
 # Configuration de Swagger/OpenAPI
@@ -40,10 +42,20 @@ router.register(r'employees', EmployeeViewSet)
 router.register(r'employee-skills', EmployeeSkillViewSet)
 router.register(r'position-skills', PositionSkillViewSet)
 router.register(r'evaluations', EvaluationViewSet)
+router.register(r'tasks', TaskViewSet)
+router.register(r'changes', ChangeEventViewSet)
+router.register(r'custom-fields', CustomFieldViewSet)
+router.register(r'custom-field-values', CustomFieldValueViewSet)
 
 urlpatterns = [
-    # API routes
+    # API routes (le flux SSE est déclaré avant la route de détail `changes/{id}/`)
+    path('changes/stream/', change_stream, name='changes-stream'),
     path('', include(router.urls)),
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('custom-field/set-value/', CustomFieldSetValueView.as_view(), name='custom-field-set-value'),
+    path('analytics/skill_heatmap/', SkillHeatmapView.as_view(), name='analytics-skill-heatmap'),
+    path('teams/suggest/', TeamSuggestionView.as_view(), name='teams-suggest'),
+    path('search/semantic/', SemanticSearchView.as_view(), name='search-semantic'),
     
     # Authentication
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
@@ -1,23 +1,222 @@
+import asyncio
+import json
+import logging
+import re
+from datetime import datetime, time, timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+from django.http import HttpRequest, QueryDict
 from django.shortcuts import render
-from rest_framework import viewsets, permissions, filters, status
+from django.urls import resolve, Resolver404
+from rest_framework import viewsets, mixins, permissions, filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Count, Q
+from django.db import transaction
+from django.db.models import Count, F, Q, OuterRef, Subquery, IntegerField, Prefetch, Sum, Max
+from django.db.models.functions import Coalesce
 from rest_framework.decorators import api_view, permission_classes
 
 from jobs.models import (
     JobFamily, Skill, Job, Position, 
-    Employee, EmployeeSkill, PositionSkill, Evaluation
+    Employee, EmployeeSkill, PositionSkill, Evaluation, EvaluationHistory, Task,
+    CustomField, CustomFieldValue, SkillInventory, ChangeEvent, Successor
 )
 from .serializers import (
     JobFamilySerializer, SkillSerializer, JobSerializer, JobDetailSerializer,
     PositionListSerializer, PositionDetailSerializer,
     EmployeeListSerializer, EmployeeDetailSerializer, EmployeeSkillSerializer,
-    PositionSkillSerializer, UserSerializer,
-    EvaluationSerializer, EvaluationCreateUpdateSerializer
+    EmployeeSkillSearchSerializer, EmployeeProfileSerializer,
+    PositionSkillSerializer, UserSerializer, USER_TOKEN_CLAIMS,
+    EvaluationSerializer, EvaluationCreateUpdateSerializer, EvaluationHistorySerializer,
+    TaskSerializer, ChangeEventSerializer, CustomFieldSerializer, CustomFieldValueSerializer, CustomFieldSetValueSerializer,
+    TeamSuggestionSerializer, SuccessorSerializer
 )
+from .filters import CustomFieldFilter
 from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from jobs.assignment import AssignmentConflict, StaleRow, assign_employee, locked
+from jobs.similarity import SOURCES as SIMILARITY_SOURCES, similarity_index
+from jobs.skill_extraction import extract_skills, suggest_skills
+from jobs.skill_inventory import INVENTORY_SOURCES
+from jobs.skill_coverage import SOURCES as COVERAGE_SOURCES, position_requirements, required_skill_candidates
+from jobs.skill_stats import skill_level_count_at_least
+from jobs.team_builder import suggest_team
+from jobs.tombstones import deleted_since, is_expired
+
+logger = logging.getLogger(__name__)
+
+# Opérateurs acceptés dans `search_by_skills` (ex: `12:>=3`)
+SKILL_THRESHOLD_OPERATORS = {
+    '>=': 'gte',
+    '>': 'gt',
+    '=': 'exact',
+    '==': 'exact',
+}
+
+
+def parse_skill_thresholds(value):
+    """
+    Analyse une liste de seuils de compétences au format `12:>=3,7:>=4`.
+
+    Un identifiant seul (`9`) équivaut à `9:>=1`.
+
+    Returns:
+        list: Liste de tuples (skill_id, lookup, level)
+
+    Raises:
+        ValueError: Si un seuil est mal formé
+    """
+    thresholds = []
+    for raw in value.split(','):
+        raw = raw.strip()
+        if not raw:
+            continue
+        skill_part, _, condition = raw.partition(':')
+        condition = condition.strip() or '>=1'
+        operator = next(
+            (op for op in sorted(SKILL_THRESHOLD_OPERATORS, key=len, reverse=True)
+             if condition.startswith(op)),
+            None
+        )
+        if operator is None:
+            raise ValueError(f"Opérateur invalide dans '{raw}'")
+        try:
+            skill_id = int(skill_part)
+            level = int(condition[len(operator):])
+        except ValueError:
+            raise ValueError(f"Seuil invalide : '{raw}'")
+        thresholds.append((skill_id, SKILL_THRESHOLD_OPERATORS[operator], level))
+    return thresholds
+
+
+def threshold_selectivity(skill_id, lookup, level):
+    """Estime le nombre d'employés satisfaisant un seuil, à partir des comptes en cache."""
+    if lookup == 'gte':
+        return skill_level_count_at_least(skill_id, level)
+    if lookup == 'gt':
+        return skill_level_count_at_least(skill_id, level + 1)
+    return skill_level_count_at_least(skill_id, level) - skill_level_count_at_least(skill_id, level + 1)
+
+
+def prefetch_custom_field_values(queryset):
+    """Précharge les valeurs typées des champs personnalisés (liste `custom_fields` des sérialiseurs)."""
+    return queryset.prefetch_related(
+        Prefetch('custom_field_values', queryset=CustomFieldValue.objects.select_related('custom_field'))
+    )
+
+
+def parse_sync_timestamp(value, param):
+    """
+    Analyse une date ISO 8601 (`2025-03-01T08:00:00+00:00` ou `2025-03-01`).
+
+    Un décalage horaire dont le `+` n'a pas été encodé dans l'URL est accepté ;
+    une date sans fuseau est interprétée dans le fuseau du projet.
+
+    Raises:
+        ValidationError: Si la date est invalide
+    """
+    value = re.sub(r' (\d{2}:?\d{2})$', r'+\1', value.strip())
+    try:
+        moment = parse_datetime(value)
+        if moment is None and parse_date(value) is not None:
+            moment = datetime.combine(parse_date(value), time.min)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValidationError({param: "Date ISO 8601 attendue (ex: 2025-03-01T08:00:00+00:00)"})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def parse_limit(value, default=10, maximum=100):
+    """
+    Nombre de résultats demandé (`limit`).
+
+    Raises:
+        ValidationError: Si la valeur n'est pas un entier entre 1 et `maximum`
+    """
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= maximum:
+        raise ValidationError({'limit': f"Entier entre 1 et {maximum} attendu"})
+    return limit
+
+
+def parse_flag(value):
+    """Paramètre booléen de requête (`true`, `1`, `yes`, `on`)."""
+    return (value or '').strip().lower() in ('true', '1', 'yes', 'on')
+
+
+class DeltaSyncMixin:
+    """
+    Synchronisation incrémentale d'une liste : `?updated_since=<date ISO 8601>`.
+
+    Retourne les objets modifiés depuis la date (index sur `last_updated`), du plus
+    ancien au plus récent, et dans `deleted` les identifiants des objets supprimés
+    depuis cette date. Les pages suivantes sont obtenues en suivant `next`
+    (pagination par curseur : une modification pendant la lecture ne décale pas les pages).
+
+    Le client conserve `watermark` et le transmet comme `updated_since` à la
+    synchronisation suivante. Une date antérieure à la conservation des traces
+    de suppression (`DELTA_SYNC_RETENTION`) retourne 410 : il faut tout recharger.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if 'updated_since' not in request.query_params:
+            return super().list(request, *args, **kwargs)
+
+        since = parse_sync_timestamp(request.query_params['updated_since'], 'updated_since')
+        if is_expired(since):
+            return Response(
+                {"error": "updated_since est antérieure à la conservation des suppressions : synchronisation complète requise"},
+                status=status.HTTP_410_GONE
+            )
+        after_id = request.query_params.get('after_id')
+        if after_id is not None and not after_id.isdigit():
+            raise ValidationError({'after_id': "Identifiant attendu"})
+        if 'watermark' in request.query_params:
+            watermark = parse_sync_timestamp(request.query_params['watermark'], 'watermark')
+        else:
+            watermark = timezone.now() - timedelta(seconds=settings.DELTA_SYNC_SAFETY_MARGIN)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if after_id is None:
+            queryset = queryset.filter(last_updated__gte=since)
+        else:
+            queryset = queryset.filter(Q(last_updated__gt=since) | Q(last_updated=since, id__gt=int(after_id)))
+        page_size = settings.DELTA_SYNC_PAGE_SIZE
+        objects = list(queryset.order_by('last_updated', 'id')[:page_size + 1])
+
+        next_url = None
+        if len(objects) > page_size:
+            objects = objects[:page_size]
+            next_url = request.build_absolute_uri()
+            for param, value in (('updated_since', objects[-1].last_updated.isoformat()),
+                                 ('after_id', objects[-1].id),
+                                 ('watermark', watermark.isoformat())):
+                next_url = replace_query_param(next_url, param, value)
+
+        return Response({
+            'watermark': watermark,
+            'next': next_url,
+            # Les suppressions ne sont transmises qu'avec la première page
+            'deleted': deleted_since(queryset.model, since) if after_id is None else [],
+            'results': self.get_serializer(objects, many=True).data,
+        })
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -28,7 +227,16 @@ class UserViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def me(self, request):
-        """Récupère les informations de l'utilisateur connecté."""
+        """
+        Récupère les informations de l'utilisateur connecté.
+
+        Les informations sont lues dans les claims du jeton JWT lorsqu'elles y figurent.
+        """
+        token = request.auth
+        if token is not None and all(claim in token for claim in USER_TOKEN_CLAIMS):
+            data = {'id': token[jwt_settings.USER_ID_CLAIM]}
+            data.update({claim: token[claim] for claim in USER_TOKEN_CLAIMS})
+            return Response(data)
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
 
@@ -37,7 +245,7 @@ class JobFamilyViewSet(viewsets.ModelViewSet):
     """API endpoint pour les familles de métiers."""
     queryset = JobFamily.objects.all()
     serializer_class = JobFamilySerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter, CustomFieldFilter]
     search_fields = ['name', 'description']
     ordering_fields = ['name']
     ordering = ['name']
@@ -47,22 +255,67 @@ class SkillViewSet(viewsets.ModelViewSet):
     """API endpoint pour les compétences."""
     queryset = Skill.objects.all()
     serializer_class = SkillSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['category']
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, CustomFieldFilter]
+    filterset_fields = ['category', 'parent']
     search_fields = ['name', 'description', 'category']
     ordering_fields = ['name', 'category']
     ordering = ['name']
+    # Longueur maximale du texte analysé par `extract`
+    MAX_EXTRACT_LENGTH = 200000
+
+    def get_queryset(self):
+        if self.action in ('list', 'retrieve'):
+            return prefetch_custom_field_values(super().get_queryset())
+        return super().get_queryset()
+
+    def related_skills(self, relation, end):
+        """Compétences liées par la table de fermeture, de la plus proche à la plus éloignée."""
+        skill = self.get_object()
+        skills = Skill.objects.filter(**{
+            f'{relation}__{end}': skill, f'{relation}__depth__gt': 0
+        }).annotate(depth=F(f'{relation}__depth')).order_by('depth', 'name')
+        return Response([{**SkillSerializer(related).data, 'depth': related.depth} for related in skills])
+
+    @action(detail=True, methods=['get'])
+    def ancestors(self, request, pk=None):
+        """Ancêtres de la compétence, du parent direct à la racine."""
+        return self.related_skills('descendant_links', 'descendant')
+
+    @action(detail=True, methods=['get'])
+    def descendants(self, request, pk=None):
+        """Sous-compétences (tous niveaux), des enfants directs aux plus profondes."""
+        return self.related_skills('ancestor_links', 'ancestor')
+
+    @action(detail=False, methods=['post'])
+    def extract(self, request):
+        """
+        Compétences citées dans un texte libre (CV, annonce...).
+
+        Corps attendu : {"text": "..."} ; réponse : compétences et nombre d'occurrences.
+        """
+        text = request.data.get('text')
+        if not isinstance(text, str) or not text.strip():
+            return Response({"error": "text est requis"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(text) > self.MAX_EXTRACT_LENGTH:
+            return Response({"error": f"text est limité à {self.MAX_EXTRACT_LENGTH} caractères"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(suggest_skills(extract_skills(text)))
 
 
 class JobViewSet(viewsets.ModelViewSet):
     """API endpoint pour les emplois."""
     queryset = Job.objects.all()
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, CustomFieldFilter]
     filterset_fields = ['level', 'job_family']
     search_fields = ['title', 'description']
     ordering_fields = ['title', 'level']
     ordering = ['title']
 
+    def get_queryset(self):
+        if self.action in ('list', 'retrieve'):
+            return prefetch_custom_field_values(super().get_queryset())
+        return super().get_queryset()
+
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return JobDetailSerializer
@@ -84,20 +337,79 @@ class JobViewSet(viewsets.ModelViewSet):
         serializer = SkillSerializer(skills, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def suggested_skills(self, request, pk=None):
+        """Compétences citées dans la description de l'emploi et absentes de ses compétences requises."""
+        job = self.get_object()
+        required = job.required_skills.values_list('id', flat=True)
+        return Response(suggest_skills(extract_skills(job.description), required))
 
-class PositionViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """Emplois les plus proches (cosinus TF-IDF sur le titre et la description), avec leur score."""
+        job = self.get_object()
+        try:
+            limit = parse_limit(request.query_params.get('limit'))
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+        matches = similarity_index().similar('job', job.pk, limit, kinds=['job'])
+        jobs = Job.objects.select_related('job_family').prefetch_related('required_skills').in_bulk(
+            [object_id for _, object_id, _ in matches]
+        )
+        return Response([
+            {**JobSerializer(jobs[object_id]).data, 'score': score}
+            for _, object_id, score in matches if object_id in jobs
+        ])
+
+
+class PositionViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
     """API endpoint pour les positions."""
     queryset = Position.objects.all()
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, CustomFieldFilter]
     filterset_fields = ['status', 'location', 'job__job_family']
     search_fields = ['job__title', 'location']
     ordering_fields = ['start_date', 'job__title']
     ordering = ['-start_date']
 
+    def get_queryset(self):
+        if self.action in ('list', 'retrieve'):
+            return prefetch_custom_field_values(super().get_queryset())
+        return super().get_queryset()
+
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return PositionDetailSerializer
         return PositionListSerializer
+
+    def update(self, request, *args, **kwargs):
+        try:
+            return super().update(request, *args, **kwargs)
+        except StaleRow:
+            return Response(
+                {"error": "Position modifiée depuis sa lecture (affectation concurrente) : relisez-la avant de la modifier"},
+                status=status.HTTP_409_CONFLICT
+            )
+
+    def perform_update(self, serializer):
+        """
+        Enregistre la position si sa version n'a pas changé depuis sa lecture.
+
+        L'enregistrement écrit toute la ligne, employé et statut compris : une
+        affectation validée entre la lecture et l'écriture serait écrasée. La
+        version envoyée par le client (`version`), ou à défaut celle lue par la
+        requête, doit être la version courante de la ligne verrouillée.
+        """
+        position = serializer.instance
+        expected = self.request.data.get('version', position.version)
+        try:
+            expected = int(expected)
+        except (TypeError, ValueError):
+            raise ValidationError({'version': "Version invalide"})
+        with transaction.atomic():
+            current = locked(Position.objects.filter(pk=position.pk)).values_list('version', flat=True).first()
+            if current != expected or current != position.version:
+                raise StaleRow(position)
+            serializer.save()
     
     @action(detail=True, methods=['get'])
     def required_skills(self, request, pk=None):
@@ -107,9 +419,57 @@ class PositionViewSet(viewsets.ModelViewSet):
         serializer = PositionSkillSerializer(position_skills, many=True)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def successors(self, request, pk=None):
+        """
+        Meilleurs successeurs internes de la position, lus dans la table calculée
+        chaque nuit par `python manage.py compute_successors`.
+        """
+        successors = Successor.objects.filter(position_id=pk).select_related('employee').order_by('rank')
+        if not successors and not Position.objects.filter(pk=pk).exists():
+            return Response({"error": "Position non trouvée"}, status=status.HTTP_404_NOT_FOUND)
+        serializer = SuccessorSerializer(successors, many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def candidates(self, request, pk=None):
+        """
+        Employés possédant toutes les compétences obligatoires de la position,
+        chacune au moins au niveau d'importance demandé.
+
+        Paramètres : source (`declared` : compétences déclarées, défaut ; `evaluated` : évaluations).
+        Le filtre utilise les ensembles de bits de l'instantané de la matrice des
+        compétences s'il est à jour (`engine: bitset`), sinon une requête SQL.
+        """
+        position = self.get_object()
+        source = request.query_params.get('source', 'declared')
+        if source not in COVERAGE_SOURCES:
+            return Response({"error": f"source doit valoir {' ou '.join(COVERAGE_SOURCES)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        requirements = position_requirements(position)
+        employee_ids, engine = required_skill_candidates(requirements, source)
+
+        page = self.paginate_queryset(employee_ids)
+        ids = page if page is not None else employee_ids
+        # L'instantané peut citer un employé supprimé depuis la dernière vérification
+        employees = Employee.objects.in_bulk(ids)
+        serializer = EmployeeListSerializer([employees[pk] for pk in ids if pk in employees], many=True)
+        if page is not None:
+            response = self.get_paginated_response(serializer.data)
+        else:
+            response = Response({'results': serializer.data})
+        response.data['required'] = [{'skill': skill_id, 'min_level': level} for skill_id, level in requirements]
+        response.data['engine'] = engine
+        return response
+    
     @action(detail=True, methods=['post'])
     def assign_employee(self, request, pk=None):
-        """Assigne un employé à une position."""
+        """
+        Assigne un employé à une position (libère son ancienne position).
+
+        Transaction avec verrouillage optimiste, rejouée en cas d'affectations
+        concurrentes (voir `jobs.assignment`).
+        """
         position = self.get_object()
         employee_id = request.data.get('employee_id')
         
@@ -117,34 +477,43 @@ class PositionViewSet(viewsets.ModelViewSet):
             return Response({"error": "employee_id est requis"}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            employee = Employee.objects.get(pk=employee_id)
+            position = assign_employee(position.pk, employee_id)
         except Employee.DoesNotExist:
             return Response({"error": "Employé non trouvé"}, status=status.HTTP_404_NOT_FOUND)
-        
-        position.employee = employee
-        position.status = Position.Status.OCCUPIED
-        position.save()
-        
-        # Mettre à jour la position actuelle de l'employé
-        employee.current_position = position
-        employee.save()
+        except AssignmentConflict as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_409_CONFLICT)
         
         serializer = PositionDetailSerializer(position)
         return Response(serializer.data)
 
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
     """API endpoint pour les employés."""
     queryset = Employee.objects.all()
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, CustomFieldFilter]
     filterset_fields = ['employment_status']
     search_fields = ['first_name', 'last_name', 'email']
     ordering_fields = ['last_name', 'first_name', 'hire_date']
     ordering = ['last_name', 'first_name']
 
+    def get_queryset(self):
+        if self.action == 'profile':
+            return Employee.objects.select_related(
+                'current_position__job__job_family'
+            ).prefetch_related(
+                Prefetch('skills', queryset=EmployeeSkill.objects.select_related('skill')),
+                Prefetch('evaluations', queryset=Evaluation.objects.select_related('skill', 'evaluated_by')),
+                Prefetch('positions', queryset=Position.objects.select_related('job__job_family')),
+            )
+        if self.action == 'retrieve':
+            return prefetch_custom_field_values(super().get_queryset())
+        return super().get_queryset()
+
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return EmployeeDetailSerializer
+        if self.action == 'profile':
+            return EmployeeProfileSerializer
         return EmployeeListSerializer
     
     @action(detail=True, methods=['get'])
@@ -155,6 +524,15 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         serializer = EmployeeSkillSerializer(employee_skills, many=True)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def profile(self, request, pk=None):
+        """
+        Récupère le profil complet d'un employé : position actuelle (avec job et
+        famille de métiers), compétences, évaluations et positions occupées.
+        """
+        serializer = self.get_serializer(self.get_object())
+        return Response(serializer.data)
+    
     @action(detail=False, methods=['get'])
     def by_skill(self, request):
         """Filtre les employés par compétence."""
@@ -166,8 +544,67 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         serializer = EmployeeListSerializer(employees, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def search_by_skills(self, request):
+        """
+        Recherche les employés satisfaisant tous les seuils de compétences demandés.
+
+        Paramètres :
+            require: seuils obligatoires, ex. `12:>=3,7:>=4`
+            prefer: compétences souhaitées, utilisées pour le classement, ex. `9,4`
+            include_descendants: une sous-compétence satisfait le seuil de sa
+                compétence parente (ex. Django pour Python)
+
+        La requête SQL unique commence par le seuil le plus sélectif
+        (d'après les comptes par compétence/niveau mis en cache).
+        """
+        try:
+            required = parse_skill_thresholds(request.query_params.get('require', ''))
+            preferred = parse_skill_thresholds(request.query_params.get('prefer', ''))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-class EmployeeSkillViewSet(viewsets.ModelViewSet):
+        if not required:
+            return Response({"error": "require est requis"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Une jointure par seuil, de la plus sélective à la moins sélective.
+        # (employee, skill) étant unique, aucune jointure ne duplique de ligne.
+        include_descendants = parse_flag(request.query_params.get('include_descendants'))
+        employees = Employee.objects.all()
+        for skill_id, lookup, level in sorted(required, key=lambda t: threshold_selectivity(*t)):
+            if include_descendants:
+                # Plusieurs sous-compétences peuvent correspondre : sous-requête plutôt que jointure
+                employees = employees.filter(pk__in=EmployeeSkill.objects.filter(**{
+                    'skill__ancestor_links__ancestor_id': skill_id,
+                    f'proficiency_level__{lookup}': level,
+                }).values('employee_id'))
+                continue
+            employees = employees.filter(**{
+                'skills__skill_id': skill_id,
+                f'skills__proficiency_level__{lookup}': level,
+            })
+
+        preferred_q = Q(pk__in=[])
+        skill_lookup = 'skill__ancestor_links__ancestor_id' if include_descendants else 'skill_id'
+        for skill_id, lookup, level in preferred:
+            preferred_q |= Q(**{skill_lookup: skill_id, f'proficiency_level__{lookup}': level})
+        preferred_matches = EmployeeSkill.objects.filter(
+            preferred_q,
+            employee=OuterRef('pk')
+        ).values('employee').annotate(matches=Count('id', distinct=True)).values('matches')
+        employees = employees.annotate(
+            preferred_matches=Coalesce(Subquery(preferred_matches, output_field=IntegerField()), 0)
+        ).order_by('-preferred_matches', 'last_name', 'first_name')
+
+        page = self.paginate_queryset(employees)
+        if page is not None:
+            serializer = EmployeeSkillSearchSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = EmployeeSkillSearchSerializer(employees, many=True)
+        return Response(serializer.data)
+
+
+class EmployeeSkillViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
     """API endpoint pour les compétences des employés."""
     queryset = EmployeeSkill.objects.all()
     serializer_class = EmployeeSkillSerializer
@@ -187,7 +624,7 @@ class PositionSkillViewSet(viewsets.ModelViewSet):
     ordering = ['position__job__title', 'skill__name']
 
 
-class EvaluationViewSet(viewsets.ModelViewSet):
+class EvaluationViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
     """
     API endpoint pour gérer les évaluations de compétences.
     """
@@ -228,3 +665,464 @@ class EvaluationViewSet(viewsets.ModelViewSet):
         evaluations = self.queryset.filter(skill_id=skill_id)
         serializer = self.get_serializer(evaluations, many=True)
         return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        """
+        Récupère l'historique des évaluations.
+
+        Paramètres : employee_id, skill_id, since et until (dates AAAA-MM-JJ).
+        """
+        history = EvaluationHistory.objects.select_related('skill')
+        for param, lookup in (('employee_id', 'employee_id'), ('skill_id', 'skill_id')):
+            if request.query_params.get(param):
+                history = history.filter(**{lookup: request.query_params[param]})
+        for param, lookup in (('since', 'evaluation_date__gte'), ('until', 'evaluation_date__lte')):
+            if request.query_params.get(param):
+                value = parse_date(request.query_params[param])
+                if value is None:
+                    return Response({"error": f"{param} doit être une date AAAA-MM-JJ"}, status=400)
+                history = history.filter(**{lookup: value})
+        history = history.order_by('employee_id', 'skill_id', 'evaluation_date', 'id')
+
+        page = self.paginate_queryset(history)
+        if page is not None:
+            serializer = EvaluationHistorySerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = EvaluationHistorySerializer(history, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def as_of(self, request):
+        """
+        Récupère les niveaux de compétences tels qu'ils étaient à une date donnée.
+
+        Paramètres : date (obligatoire, AAAA-MM-JJ), employee_id, skill_id.
+        """
+        date = parse_date(request.query_params.get('date', ''))
+        if date is None:
+            return Response({"error": "date parameter is required (AAAA-MM-JJ)"}, status=400)
+
+        history = EvaluationHistory.objects.all()
+        for param in ('employee_id', 'skill_id'):
+            if request.query_params.get(param):
+                history = history.filter(**{param: request.query_params[param]})
+        history = history.as_of(date).select_related('skill').order_by('employee_id', 'skill_id')
+
+        page = self.paginate_queryset(history)
+        if page is not None:
+            serializer = EvaluationHistorySerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = EvaluationHistorySerializer(history, many=True)
+        return Response(serializer.data)
+
+
+class TaskViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint pour suivre les tâches de fond.
+
+    La mise en file d'une tâche (POST) est réservée aux administrateurs ;
+    les tâches sont exécutées par `python manage.py run_worker`.
+    """
+    queryset = Task.objects.all()
+    serializer_class = TaskSerializer
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['name', 'status']
+    ordering_fields = ['created_at', 'run_after', 'finished_at']
+    ordering = ['-created_at']
+
+    def get_permissions(self):
+        if self.action == 'create':
+            return [permissions.IsAdminUser()]
+        return super().get_permissions()
+
+
+class ChangeEventViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint du flux des modifications, pour les clients qui ne peuvent pas
+    utiliser le flux Server-Sent Events (`/api/changes/stream/`).
+
+    Paramètres : `after` (dernier identifiant reçu), `topic`, `employee_id`.
+    """
+    queryset = ChangeEvent.objects.all()
+    serializer_class = ChangeEventSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['topic', 'employee_id']
+
+    def get_queryset(self):
+        queryset = super().get_queryset().order_by('id')
+        after = self.request.query_params.get('after')
+        if after:
+            if not after.isdigit():
+                raise ValidationError({'after': "Identifiant d'événement attendu"})
+            queryset = queryset.filter(id__gt=int(after))
+        return queryset
+
+
+class CustomFieldViewSet(viewsets.ModelViewSet):
+    """
+    API endpoint pour les définitions de champs personnalisés.
+
+    La création et la modification des définitions sont réservées aux administrateurs.
+    """
+    queryset = CustomField.objects.all()
+    serializer_class = CustomFieldSerializer
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = ['model_type', 'field_type', 'visible']
+    search_fields = ['name', 'description']
+    ordering_fields = ['model_type', 'name']
+    ordering = ['model_type', 'name']
+
+    def get_permissions(self):
+        if self.action not in ('list', 'retrieve'):
+            return [permissions.IsAdminUser()]
+        return super().get_permissions()
+
+
+class CustomFieldValueViewSet(viewsets.ModelViewSet):
+    """API endpoint pour les valeurs typées des champs personnalisés."""
+    queryset = CustomFieldValue.objects.select_related('custom_field')
+    serializer_class = CustomFieldValueSerializer
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['custom_field', 'content_type', 'object_id']
+    ordering_fields = ['id', 'object_id']
+    ordering = ['id']
+
+
+class CustomFieldSetValueView(APIView):
+    """
+    API endpoint définissant la valeur d'un champ personnalisé à partir de son nom.
+
+    Corps attendu :
+        {"model_name": "job", "object_id": 1, "field_name": "Niveau de responsabilité", "value": "Niveau 3"}
+    """
+
+    def post(self, request):
+        params = CustomFieldSetValueSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        field = CustomField.objects.filter(model_type=data['model_name'], name=data['field_name']).first()
+        if field is None:
+            return Response({"error": "Champ personnalisé non trouvé"}, status=status.HTTP_404_NOT_FOUND)
+        model = field.target_model()
+        if not model.objects.filter(pk=data['object_id']).exists():
+            return Response({"error": "Objet non trouvé"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            columns = field.value_columns(data['value'])
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        value, _ = CustomFieldValue.objects.update_or_create(
+            custom_field=field,
+            content_type=ContentType.objects.get_for_model(model),
+            object_id=data['object_id'],
+            defaults=columns
+        )
+        return Response(CustomFieldValueSerializer(value).data)
+
+
+class TeamSuggestionView(APIView):
+    """
+    API endpoint proposant une équipe minimale d'employés actifs couvrant des besoins en compétences.
+
+    Corps attendu :
+        {"needs": [{"skill": 12, "min_level": 3}, {"skill": 7, "min_level": 4}],
+         "location": "Paris", "available": false, "exclude": [5], "max_size": 4}
+
+    `location` restreint aux employés dont la position actuelle est sur ce site,
+    `available` aux employés sans position actuelle. La réponse indique pour
+    chaque membre les besoins qu'il couvre, et les besoins qu'aucun candidat ne couvre.
+    """
+
+    def post(self, request):
+        params = TeamSuggestionSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        needs = [(need['skill'], need['min_level']) for need in data['needs']]
+
+        suggestion = suggest_team(
+            needs, location=data.get('location'), available=data['available'],
+            exclude=data['exclude'], max_size=data.get('max_size'),
+            include_descendants=data['include_descendants']
+        )
+        need_data = [{'skill': skill_id, 'min_level': level} for skill_id, level in needs]
+        return Response({
+            'team': [
+                {'employee': EmployeeListSerializer(employee).data, 'covers': [need_data[i] for i in covered]}
+                for employee, covered in suggestion['team']
+            ],
+            'uncovered': [need_data[i] for i in suggestion['uncovered']],
+            'complete': not suggestion['uncovered'],
+            'candidates': suggestion['candidates'],
+        })
+
+
+class SkillHeatmapView(APIView):
+    """
+    API endpoint de la carte de chaleur des compétences (offre et demande), lue dans `SkillInventory`.
+
+    Paramètres :
+        group_by: dimensions des cellules parmi skill, level, location, job_family (défaut: `skill,level`)
+        skill, location, job_family: filtres (listes séparées par des virgules)
+        category: catégorie de compétence
+        rollup: avec `group_by=skill`, chaque compétence cumule ses
+            sous-compétences (les filtres skill et category portent alors sur
+            la compétence de regroupement)
+
+    Chaque cellule indique `supply` (employés déclarant la compétence), `evaluated`
+    (employés évalués), `demand` (positions la requérant) et `demand_weight`
+    (somme des niveaux d'importance). Avec `rollup`, un employé ou une position
+    n'est compté qu'une fois par cellule, même s'il cumule plusieurs
+    sous-compétences : les cellules sont alors calculées sur les tables sources
+    (jointure sur `SkillClosure`) et non lues dans l'inventaire.
+    """
+    # {dimension: {clé de la réponse: colonne}}
+    DIMENSIONS = {
+        'skill': {'skill': 'skill_id', 'skill_name': 'skill__name'},
+        'level': {'level': 'level'},
+        'location': {'location': 'location'},
+        'job_family': {'job_family': 'job_family_id', 'job_family_name': 'job_family__name'},
+    }
+    TOTALS = ('supply', 'evaluated', 'demand', 'demand_weight')
+    DEFAULT_GROUP_BY = 'skill,level'
+
+    def get(self, request):
+        group_by = [dimension.strip() for dimension in
+                    request.query_params.get('group_by', self.DEFAULT_GROUP_BY).split(',') if dimension.strip()]
+        unknown = [dimension for dimension in group_by if dimension not in self.DIMENSIONS]
+        if not group_by or unknown:
+            return Response(
+                {"error": f"group_by doit combiner {', '.join(self.DIMENSIONS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rollup = parse_flag(request.query_params.get('rollup'))
+        if rollup and 'skill' not in group_by:
+            return Response({"error": "rollup nécessite la dimension skill"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            skill_ids, job_family_ids = (
+                [int(pk) for pk in request.query_params[param].split(',')] if request.query_params.get(param) else None
+                for param in ('skill', 'job_family')
+            )
+        except ValueError:
+            return Response({"error": "skill et job_family doivent être des identifiants"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        locations = request.query_params['location'].split(',') if request.query_params.get('location') else None
+        category = request.query_params.get('category')
+
+        if rollup:
+            cells = self.rollup_cells(group_by, skill_ids, job_family_ids, locations, category)
+            return Response({'group_by': group_by, 'cells': cells})
+
+        cells = SkillInventory.objects.all()
+        if skill_ids:
+            cells = cells.filter(skill_id__in=skill_ids)
+        if job_family_ids:
+            cells = cells.filter(job_family_id__in=job_family_ids)
+        if locations:
+            cells = cells.filter(location__in=locations)
+        if category:
+            cells = cells.filter(skill__category=category)
+
+        columns = {key: column for dimension in group_by for key, column in self.DIMENSIONS[dimension].items()}
+        Kind = SkillInventory.Kind
+        cells = cells.values(*columns.values()).annotate(
+            supply=Coalesce(Sum('count', filter=Q(kind=Kind.SUPPLY)), 0),
+            evaluated=Coalesce(Sum('count', filter=Q(kind=Kind.EVALUATED)), 0),
+            demand=Coalesce(Sum('count', filter=Q(kind=Kind.DEMAND)), 0),
+            demand_weight=Coalesce(Sum('weight', filter=Q(kind=Kind.DEMAND)), 0),
+        ).order_by(*columns.values())
+        return Response({
+            'group_by': group_by,
+            'cells': [
+                {**{key: cell[column] for key, column in columns.items()}, **{total: cell[total] for total in self.TOTALS}}
+                for cell in cells
+            ],
+        })
+
+    def rollup_cells(self, group_by, skill_ids, job_family_ids, locations, category):
+        """
+        Cellules cumulées sur les sous-compétences, calculées sur les tables sources.
+
+        La compétence de chaque ligne source est remplacée par chacun de ses
+        ancêtres (elle comprise) ; chaque cellule compte les employés ou
+        positions distincts, une fois quel que soit le nombre de leurs
+        sous-compétences. De même, `demand_weight` additionne une importance par
+        position : la plus élevée parmi ses exigences cumulées dans la cellule.
+        """
+        Kind = SkillInventory.Kind
+        totals = {Kind.SUPPLY: 'supply', Kind.EVALUATED: 'evaluated', Kind.DEMAND: 'demand'}
+        ancestor = 'skill__ancestor_links__ancestor'
+        cells = {}
+        for kind, (model, level_field, position, weighted) in INVENTORY_SOURCES.items():
+            # Employé (compétences, évaluations) ou position (exigences) compté par la cellule
+            owner = position.split('__')[0]
+            dimensions = {
+                'skill': {'skill': f'{ancestor}_id', 'skill_name': f'{ancestor}__name'},
+                'level': {'level': level_field},
+                'location': {'location': f'{position}__location'},
+                'job_family': {'job_family': f'{position}__job__job_family_id',
+                               'job_family_name': f'{position}__job__job_family__name'},
+            }
+            columns = {key: column for dimension in group_by for key, column in dimensions[dimension].items()}
+            rows = model.objects.all()
+            if skill_ids:
+                rows = rows.filter(**{f'{ancestor}_id__in': skill_ids})
+            if category:
+                rows = rows.filter(**{f'{ancestor}__category': category})
+            if job_family_ids:
+                rows = rows.filter(**{f'{position}__job__job_family_id__in': job_family_ids})
+            if locations:
+                # L'inventaire range sous '' les employés sans position actuelle
+                located = Q(**{f'{position}__location__in': locations})
+                if '' in locations:
+                    located |= Q(**{f'{position}__isnull': True})
+                rows = rows.filter(located)
+            if weighted:
+                # Une ligne par position et par cellule, pondérée par son importance maximale
+                rows = rows.values(*columns.values(), owner).annotate(weight=Max(level_field))
+            else:
+                rows = rows.values(*columns.values()).annotate(total=Count(owner, distinct=True))
+            for row in rows.order_by():
+                values = {key: row[column] for key, column in columns.items()}
+                if 'location' in values:
+                    values['location'] = values['location'] or ''
+                cell = cells.setdefault(tuple(values.values()), {**values, **dict.fromkeys(self.TOTALS, 0)})
+                if weighted:
+                    cell[totals[kind]] += 1
+                    cell['demand_weight'] += row['weight']
+                else:
+                    cell[totals[kind]] = row['total']
+        return [cells[key] for key in sorted(cells, key=lambda key: [(value is not None, value) for value in key])]
+
+
+class SemanticSearchView(APIView):
+    """
+    API endpoint de recherche en texte libre dans les emplois, familles de métiers et compétences.
+
+    Paramètres :
+        q: texte recherché
+        type: types de résultats parmi job, job_family, skill (défaut: tous)
+        limit: nombre de résultats (défaut: 10, 100 au plus)
+
+    Les résultats sont classés par cosinus entre les vecteurs TF-IDF de la
+    requête et des documents (index `jobs.similarity`, en mémoire).
+    """
+    # {type: champ affiché}
+    LABELS = {'job': 'title', 'job_family': 'name', 'skill': 'name'}
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "q est requis"}, status=status.HTTP_400_BAD_REQUEST)
+        kinds = [kind.strip() for kind in request.query_params.get('type', '').split(',') if kind.strip()]
+        if any(kind not in self.LABELS for kind in kinds):
+            return Response({"error": f"type doit combiner {', '.join(self.LABELS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = parse_limit(request.query_params.get('limit'))
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+
+        matches = similarity_index().query(query, limit, kinds or None)
+        labels = {}
+        for kind, field in self.LABELS.items():
+            ids = [object_id for match_kind, object_id, _ in matches if match_kind == kind]
+            if ids:
+                model = SIMILARITY_SOURCES[kind][0]
+                labels.update(((kind, pk), label) for pk, label in model.objects.filter(pk__in=ids).values_list('pk', field))
+        return Response({
+            'query': query,
+            'results': [
+                {'type': kind, 'id': object_id, 'label': labels[(kind, object_id)], 'score': score}
+                for kind, object_id, score in matches if (kind, object_id) in labels
+            ],
+        })
+
+
+class BatchView(APIView):
+    """
+    API endpoint exécutant plusieurs requêtes GET internes en un seul aller-retour.
+
+    Corps attendu :
+        {"requests": ["/api/employees/1/", {"method": "GET", "url": "/api/skills/?page=2"}]}
+
+    Chaque sous-requête est résolue par le routeur et exécutée dans le processus,
+    avec l'utilisateur déjà authentifié par la requête principale. Seules les
+    vues synchrones de l'API (DRF) sont acceptées ; l'échec d'une sous-requête
+    n'affecte que sa propre réponse.
+    """
+    MAX_REQUESTS = 20
+    URL_PREFIX = '/api/'
+
+    def post(self, request):
+        sub_requests = request.data.get('requests')
+        if not isinstance(sub_requests, list) or not sub_requests:
+            return Response({"error": "requests doit être une liste non vide"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(sub_requests) > self.MAX_REQUESTS:
+            return Response(
+                {"error": f"Au plus {self.MAX_REQUESTS} requêtes par lot"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({'responses': [self.run_sub_request(request, item) for item in sub_requests]})
+
+    def run_sub_request(self, request, item):
+        """Exécute une sous-requête et retourne son statut et son contenu."""
+        if isinstance(item, str):
+            item = {'url': item}
+        if not isinstance(item, dict) or not isinstance(item.get('url'), str):
+            return {'url': None, 'status': 400, 'body': {"error": "url est requis"}}
+
+        url = item['url']
+        if item.get('method', 'GET').upper() != 'GET':
+            return {'url': url, 'status': 405, 'body': {"error": "Seules les requêtes GET sont autorisées"}}
+
+        parts = urlsplit(url)
+        if not parts.path.startswith(self.URL_PREFIX):
+            return {'url': url, 'status': 400, 'body': {"error": f"Seules les routes {self.URL_PREFIX} sont autorisées"}}
+        try:
+            match = resolve(parts.path)
+        except Resolver404:
+            return {'url': url, 'status': 404, 'body': {"error": "Route introuvable"}}
+        view_class = getattr(match.func, 'cls', None)
+        if not isinstance(view_class, type) or not issubclass(view_class, APIView) \
+                or getattr(view_class, 'view_is_async', False) or asyncio.iscoroutinefunction(match.func):
+            return {'url': url, 'status': 400, 'body': {"error": "Route non disponible dans un lot"}}
+        if issubclass(view_class, type(self)):
+            return {'url': url, 'status': 400, 'body': {"error": "Les lots imbriqués ne sont pas autorisés"}}
+
+        sub_request = HttpRequest()
+        sub_request.method = 'GET'
+        sub_request.path = sub_request.path_info = parts.path
+        sub_request.META = {
+            **request._request.META,
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': parts.path,
+            'QUERY_STRING': parts.query,
+        }
+        sub_request.GET = QueryDict(parts.query)
+        sub_request.COOKIES = request._request.COOKIES
+        sub_request.resolver_match = match
+        sub_request.user = request.user
+        # Réutilise l'authentification de la requête principale (pas de nouveau décodage JWT)
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+
+        try:
+            response = match.func(sub_request, *match.args, **match.kwargs)
+            if getattr(response, 'streaming', False):
+                return {'url': url, 'status': 400, 'body': {"error": "Les réponses en flux ne sont pas disponibles dans un lot"}}
+            if isinstance(response, Response):
+                body = response.data
+            else:
+                content = response.content.decode(response.charset or 'utf-8')
+                try:
+                    body = json.loads(content)
+                except ValueError:
+                    body = content
+        except Exception:
+            logger.exception("Échec de la sous-requête %s", url)
+            return {'url': url, 'status': 500, 'body': {"error": "Erreur interne"}}
+        return {'url': url, 'status': response.status_code, 'body': body}
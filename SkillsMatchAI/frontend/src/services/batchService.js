@@ -0,0 +1,25 @@
+import api from './axiosConfig';
+
+/**
+ * Service pour regrouper plusieurs requêtes GET en un seul appel API
+ */
+const batchService = {
+  /**
+   * Exécute plusieurs requêtes GET en un seul aller-retour
+   * @param {Array<string>} urls - URLs relatives à l'API (ex: '/employees/1/')
+   * @returns {Promise<Array<Object>>} - Réponses dans l'ordre des URLs ({ url, status, body })
+   */
+  getMany: async (urls) => {
+    try {
+      const response = await api.post('/batch/', {
+        requests: urls.map((url) => `/api${url}`),
+      });
+      return response.data.responses;
+    } catch (error) {
+      console.error('Erreur lors de l\'exécution des requêtes groupées:', error);
+      throw error;
+    }
+  },
+};
+
+export default batchService;
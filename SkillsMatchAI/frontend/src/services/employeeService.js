@@ -34,6 +34,21 @@ const employeeService = {
     }
   },
 
+  /**
+   * Récupère le profil complet d'un employé (position, compétences, évaluations, positions occupées)
+   * @param {number} id - ID de l'employé
+   * @returns {Promise<Object>} - Profil de l'employé
+   */
+  getEmployeeProfile: async (id) => {
+    try {
+      const response = await api.get(`/employees/${id}/profile/`);
+      return response.data;
+    } catch (error) {
+      console.error(`Erreur lors de la récupération du profil de l'employé ${id}:`, error);
+      throw error;
+    }
+  },
+
   /**
    * Crée un nouvel employé
    * @param {Object} employeeData - Données de l'employé
@@ -1,4 +1,9 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connection
+from django.utils.functional import cached_property
 from .models import (
     JobFamily, 
     Skill, 
@@ -7,9 +12,106 @@ from .models import (
     Employee, 
     EmployeeSkill,
     PositionSkill,
-    Evaluation
+    Evaluation,
+    EvaluationHistory,
+    Task,
+    CustomField,
+    CustomFieldValue,
+    SkillInventory,
+    ChangeEvent,
+    Tombstone,
+    Successor,
+    BatchCheckpoint
 )
 
+# Au-delà de ce nombre de lignes, le nombre total d'une liste non filtrée est estimé
+ESTIMATED_COUNT_THRESHOLD = 100000
+
+
+def estimate_row_count(model):
+    """
+    Nombre de lignes estimé d'une table, lu dans les statistiques de la base
+    (sans parcourir la table). Retourne None si aucune estimation n'est disponible.
+    """
+    table = model._meta.db_table
+    queries = {
+        'postgresql': ("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table]),
+        'mysql': ("SELECT table_rows FROM information_schema.tables "
+                  "WHERE table_schema = DATABASE() AND table_name = %s", [table]),
+        # Statistiques produites par ANALYZE
+        'sqlite': ("SELECT CAST(stat AS INTEGER) FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table]),
+    }
+    if connection.vendor not in queries:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(*queries[connection.vendor])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    return row[0] if row and row[0] and row[0] > 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginateur évitant le COUNT(*) complet des grandes tables non filtrées."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, 'query') and not queryset.query.where:
+            estimate = estimate_row_count(queryset.model)
+            if estimate is not None and estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Filtre de liste sur une clé étrangère avec un champ à autocomplétion,
+    au lieu de la liste de toutes les valeurs possibles.
+
+    Le modèle lié doit avoir un admin avec `search_fields`.
+    """
+    template = 'admin/jobs/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f"{field_path}__{field.target_field.name}__exact"
+        value = params.get(self.lookup_kwarg)
+        self.lookup_val = value[-1] if isinstance(value, list) else value
+        super().__init__(field, request, params, model, model_admin, field_path)
+        form_field = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+            required=False
+        )
+        self.widget = form_field.widget.render(self.lookup_kwarg, self.lookup_val)
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        yield {
+            'base_query_string': changelist.get_query_string(remove=[self.lookup_kwarg, 'p']),
+            'lookup_kwarg': self.lookup_kwarg,
+            'widget': self.widget,
+        }
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Admin des tables volumineuses : pas de second COUNT(*) du total, nombre
+    total estimé pour les listes non filtrées et filtres à autocomplétion.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        return super().media + AutocompleteSelect(None, self.admin_site).media + forms.Media(
+            js=['jobs/admin/autocomplete_filter.js']
+        )
+
+
 @admin.register(JobFamily)
 class JobFamilyAdmin(admin.ModelAdmin):
     """Interface d'administration pour le modèle JobFamily."""
@@ -20,14 +122,15 @@ class JobFamilyAdmin(admin.ModelAdmin):
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
     """Interface d'administration pour le modèle Skill."""
-    list_display = ('name', 'category', 'description')
+    list_display = ('name', 'category', 'parent', 'description')
     list_filter = ('category',)
     search_fields = ('name', 'description', 'category')
     ordering = ('name',)
+    autocomplete_fields = ('parent',)
     
     fieldsets = (
         (None, {
-            'fields': ('name', 'description', 'category')
+            'fields': ('name', 'description', 'category', 'parent')
         }),
         ('Champs personnalisés', {
             'fields': (
@@ -51,6 +154,7 @@ class JobSkillInline(admin.TabularInline):
 class JobAdmin(admin.ModelAdmin):
     """Interface d'administration pour le modèle Job."""
     list_display = ('title', 'level', 'job_family')
+    list_select_related = ('job_family',)
     search_fields = ('title', 'description')
     list_filter = ('level', 'job_family')
     
@@ -73,15 +177,17 @@ class PositionSkillInline(admin.TabularInline):
     """Affichage en ligne des compétences requises pour une Position."""
     model = PositionSkill
     extra = 1
+    autocomplete_fields = ('skill',)
     verbose_name = "Compétence requise"
     verbose_name_plural = "Compétences requises"
 
 @admin.register(Position)
-class PositionAdmin(admin.ModelAdmin):
+class PositionAdmin(LargeTableAdmin):
     """Interface d'administration pour le modèle Position."""
     list_display = ('job', 'location', 'status', 'start_date', 'get_employee')
     list_filter = ('status', 'location', 'job__job_family')
     search_fields = ('job__title', 'location')
+    autocomplete_fields = ('job', 'employee')
     inlines = [PositionSkillInline]
     date_hierarchy = 'start_date'
     ordering = ('-start_date',)
@@ -101,6 +207,11 @@ class PositionAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        # __str__ affiche le titre du job (liste, autocomplétion) ; list_select_related
+        # n'est pas appliqué lorsque le queryset a déjà un select_related
+        return super().get_queryset(request).select_related('job', 'employee')
+
     def get_employee(self, obj):
         """Retourne le nom de l'employé ou 'Non assigné' si aucun employé n'est assigné."""
         return obj.employee if obj.employee else "Non assigné"
@@ -110,15 +221,17 @@ class EmployeeSkillInline(admin.TabularInline):
     """Affichage en ligne des compétences d'un employé."""
     model = EmployeeSkill
     extra = 1
+    autocomplete_fields = ('skill',)
     verbose_name = "Compétence"
     verbose_name_plural = "Compétences"
 
 @admin.register(Employee)
-class EmployeeAdmin(admin.ModelAdmin):
+class EmployeeAdmin(LargeTableAdmin):
     """Interface d'administration pour le modèle Employee."""
     list_display = ('last_name', 'first_name', 'email', 'employment_status', 'hire_date')
     list_filter = ('employment_status', 'hire_date')
     search_fields = ('last_name', 'first_name', 'email')
+    autocomplete_fields = ('current_position',)
     inlines = [EmployeeSkillInline]
     date_hierarchy = 'hire_date'
     fieldsets = (
@@ -145,25 +258,141 @@ class EmployeeAdmin(admin.ModelAdmin):
     ordering = ('last_name', 'first_name')
 
 @admin.register(EmployeeSkill)
-class EmployeeSkillAdmin(admin.ModelAdmin):
-    """Interface d'administration pour le modèle EmployeeSkill."""
+class EmployeeSkillAdmin(LargeTableAdmin):
+    """
+    Interface d'administration pour le modèle EmployeeSkill.
+
+    Tri par identifiant (index de clé primaire) : un tri sur les tables liées
+    imposerait de trier toute la table à chaque page.
+    """
     list_display = ('employee', 'skill', 'proficiency_level', 'date_acquired', 'last_updated')
-    list_filter = ('proficiency_level', 'skill', 'date_acquired')
+    list_filter = ('proficiency_level', ('skill', AutocompleteFilter), ('employee', AutocompleteFilter), 'date_acquired')
+    list_select_related = ('employee', 'skill')
     search_fields = ('employee__first_name', 'employee__last_name', 'skill__name')
-    date_hierarchy = 'date_acquired'
-    ordering = ('employee__last_name', 'skill__name')
+    autocomplete_fields = ('employee', 'skill')
+    ordering = ('-id',)
 
 @admin.register(PositionSkill)
-class PositionSkillAdmin(admin.ModelAdmin):
+class PositionSkillAdmin(LargeTableAdmin):
     """Interface d'administration pour le modèle PositionSkill."""
     list_display = ('position', 'skill', 'importance_level', 'is_required')
-    list_filter = ('importance_level', 'is_required', 'skill')
-    search_fields = ('position__job__title', 'skill__name', 'description')
-    ordering = ('position__job__title', 'skill__name')
+    list_filter = ('importance_level', 'is_required', ('skill', AutocompleteFilter))
+    list_select_related = ('position__job', 'skill')
+    search_fields = ('position__job__title', 'skill__name')
+    autocomplete_fields = ('position', 'skill')
+    ordering = ('-id',)
 
 @admin.register(Evaluation)
-class EvaluationAdmin(admin.ModelAdmin):
+class EvaluationAdmin(LargeTableAdmin):
     list_display = ('employee', 'skill', 'quantitative_level', 'qualitative_level', 'evaluation_date')
-    list_filter = ('quantitative_level', 'evaluation_date')
+    list_filter = ('quantitative_level', ('skill', AutocompleteFilter), ('employee', AutocompleteFilter), 'evaluation_date')
+    list_select_related = ('employee', 'skill')
     search_fields = ('employee__first_name', 'employee__last_name', 'skill__name')
     autocomplete_fields = ('employee', 'skill', 'evaluated_by')
+    ordering = ('-id',)
+
+@admin.register(EvaluationHistory)
+class EvaluationHistoryAdmin(LargeTableAdmin):
+    """Interface d'administration (lecture seule) pour l'historique des évaluations."""
+    list_display = ('employee', 'skill', 'quantitative_level', 'evaluation_date', 'recorded_at')
+    list_filter = ('quantitative_level', ('skill', AutocompleteFilter), ('employee', AutocompleteFilter), 'evaluation_date')
+    list_select_related = ('employee', 'skill')
+    search_fields = ('employee__first_name', 'employee__last_name', 'skill__name')
+    ordering = ('-id',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(Task)
+class TaskAdmin(LargeTableAdmin):
+    """Interface d'administration pour les tâches de fond."""
+    list_display = ('name', 'status', 'attempts', 'max_attempts', 'run_after', 'created_at', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'error')
+    readonly_fields = ('result', 'error', 'attempts', 'locked_by', 'locked_at', 'created_at', 'finished_at')
+
+@admin.register(CustomField)
+class CustomFieldAdmin(admin.ModelAdmin):
+    """Interface d'administration pour les définitions de champs personnalisés."""
+    list_display = ('name', 'model_type', 'field_type', 'required', 'visible')
+    list_filter = ('model_type', 'field_type', 'visible')
+    search_fields = ('name', 'description')
+
+@admin.register(CustomFieldValue)
+class CustomFieldValueAdmin(LargeTableAdmin):
+    """Interface d'administration pour les valeurs typées des champs personnalisés."""
+    list_display = ('custom_field', 'content_type', 'object_id', 'value')
+    list_filter = (('custom_field', AutocompleteFilter), 'content_type')
+    list_select_related = ('custom_field', 'content_type')
+    autocomplete_fields = ('custom_field',)
+    ordering = ('-id',)
+
+@admin.register(SkillInventory)
+class SkillInventoryAdmin(LargeTableAdmin):
+    """
+    Interface d'administration (lecture seule) pour l'inventaire des compétences.
+
+    La table est maintenue par les signaux ; `python manage.py rebuild_skill_inventory` la reconstruit.
+    """
+    list_display = ('skill', 'kind', 'level', 'location', 'job_family', 'count', 'weight')
+    list_filter = ('kind', 'level', ('skill', AutocompleteFilter), 'job_family')
+    list_select_related = ('skill', 'job_family')
+    search_fields = ('skill__name', 'location')
+    ordering = ('-id',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(ChangeEvent)
+class ChangeEventAdmin(LargeTableAdmin):
+    """Interface d'administration (lecture seule) pour le flux des modifications."""
+    list_display = ('id', 'topic', 'action', 'object_id', 'employee_id', 'created_at')
+    list_filter = ('topic', 'action')
+    ordering = ('-id',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(LargeTableAdmin):
+    """Interface d'administration (lecture seule) pour les traces de suppression."""
+    list_display = ('id', 'model', 'object_id', 'deleted_at')
+    list_filter = ('model',)
+    ordering = ('-id',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Successor)
+class SuccessorAdmin(LargeTableAdmin):
+    """Interface d'administration (lecture seule) pour le plan de succession."""
+    list_display = ('position', 'rank', 'employee', 'score', 'missing_required', 'computed_at')
+    list_select_related = ('position__job', 'employee')
+    ordering = ('-id',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(BatchCheckpoint)
+class BatchCheckpointAdmin(admin.ModelAdmin):
+    """Interface d'administration pour les points de reprise des traitements par lots."""
+    list_display = ('name', 'cursor', 'processed', 'rows', 'started_at', 'updated_at', 'completed_at')
+    readonly_fields = ('updated_at',)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class JobsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jobs'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from . import skill_dedupe, skill_matrix, succession  # noqa: F401  (enregistrent les tâches jobs.dedupe_skills, jobs.snapshot_skill_matrix et jobs.compute_successors)
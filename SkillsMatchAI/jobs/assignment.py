@@ -0,0 +1,130 @@
+"""
+Affectation d'un employé à une position, sûre en cas d'écritures concurrentes.
+
+Une affectation touche jusqu'à quatre lignes : la position visée, l'employé,
+son ancienne position (libérée) et l'ancien titulaire de la position visée
+(qui n'a plus de position actuelle). `assign_employee()` les modifie dans une
+seule transaction :
+
+- les lignes sont verrouillées (`select_for_update`) quand la base le permet ;
+- chaque position est écrite par un `UPDATE` conditionné à la version lue
+  (`Position.version`), chaque employé est réservé par un `UPDATE` conditionné
+  à la position actuelle lue : une écriture concurrente intercalée annule la
+  transaction, qui est rejouée avec les valeurs à jour ;
+- les erreurs de verrou de la base (`database is locked` de SQLite, interblocage)
+  sont rejouées de la même façon, au plus `ASSIGNMENT_MAX_ATTEMPTS` fois.
+
+Seules les colonnes modifiées sont écrites. Les employés sont enregistrés par
+`save(update_fields=...)` : les signaux de l'inventaire des compétences et de
+la synchronisation incrémentale s'appliquent. Les positions ne changent ni de
+site ni d'emploi, leurs lignes d'inventaire ne bougent pas.
+"""
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .changefeed import publish
+from .models import ChangeEvent, Employee, Position
+
+DEFAULT_MAX_ATTEMPTS = 5
+
+# Attente (secondes) avant de rejouer une affectation, doublée à chaque tentative
+RETRY_DELAY = 0.01
+
+
+class AssignmentConflict(Exception):
+    """Affectation rejouée sans succès : les lignes ont été modifiées à chaque tentative."""
+
+
+class StaleRow(Exception):
+    """Ligne modifiée depuis sa lecture (annule la tentative en cours)."""
+
+
+def locked(queryset):
+    if connection.features.has_select_for_update:
+        return queryset.select_for_update()
+    return queryset
+
+
+def update_position(position, **values):
+    """Écrit les colonnes d'une position si sa version n'a pas changé depuis la lecture."""
+    values['last_updated'] = timezone.now()
+    updated = Position.objects.filter(pk=position.pk, version=position.version).update(
+        version=F('version') + 1, **values
+    )
+    if not updated:
+        raise StaleRow(position)
+    for field, value in values.items():
+        setattr(position, field, value)
+    position.version += 1
+
+
+def update_employee(employee, position):
+    """Change la position actuelle d'un employé si elle n'a pas changé depuis la lecture."""
+    # Réserve la ligne ; l'enregistrement qui suit déclenche les signaux (inventaire)
+    claimed = Employee.objects.filter(pk=employee.pk, current_position_id=employee.current_position_id).update(
+        last_updated=timezone.now()
+    )
+    if not claimed:
+        raise StaleRow(employee)
+    employee.current_position = position
+    employee.save(update_fields=['current_position', 'last_updated'])
+
+
+def try_assign(position_id, employee_id):
+    with transaction.atomic():
+        position = locked(Position.objects.filter(pk=position_id)).get()
+        employee = locked(Employee.objects.filter(pk=employee_id)).get()
+        if position.employee_id == employee.pk and employee.current_position_id == position.pk:
+            return position
+
+        previous = None
+        if employee.current_position_id not in (None, position.pk):
+            previous = locked(Position.objects.filter(pk=employee.current_position_id, employee=employee)).first()
+        incumbent = None
+        if position.employee_id not in (None, employee.pk):
+            incumbent = locked(Employee.objects.filter(pk=position.employee_id, current_position=position)).first()
+
+        if previous is not None:
+            update_position(previous, employee=None, status=Position.Status.VACANT)
+            publish(ChangeEvent.Topic.POSITION, ChangeEvent.Action.UPDATED, previous.id, employee.id,
+                    status=previous.status, location=previous.location)
+        if incumbent is not None:
+            update_employee(incumbent, None)
+        update_position(position, employee=employee, status=Position.Status.OCCUPIED)
+        update_employee(employee, position)
+
+        publish(ChangeEvent.Topic.POSITION, ChangeEvent.Action.ASSIGNED, position.id, employee.id,
+                status=position.status, location=position.location)
+        return position
+
+
+def assign_employee(position_id, employee_id):
+    """
+    Affecte un employé à une position.
+
+    L'ancienne position de l'employé est libérée et l'ancien titulaire de la
+    position n'a plus de position actuelle. Réaffecter un employé à sa
+    position n'écrit rien.
+
+    Returns:
+        Position: La position affectée
+
+    Raises:
+        Position.DoesNotExist, Employee.DoesNotExist: Si la position ou l'employé n'existe pas
+        AssignmentConflict: Si toutes les tentatives ont été interrompues par des écritures concurrentes
+    """
+    attempts = getattr(settings, 'ASSIGNMENT_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+    for attempt in range(attempts):
+        try:
+            return try_assign(position_id, employee_id)
+        except (StaleRow, OperationalError) as exc:
+            if connection.in_atomic_block:
+                # La transaction englobante ne peut pas relire un état plus récent
+                raise AssignmentConflict(f"Position {position_id} modifiée pendant l'affectation") from exc
+            time.sleep(RETRY_DELAY * 2 ** attempt * random.uniform(0.5, 1.5))
+    raise AssignmentConflict(f"Position {position_id} modifiée à chaque tentative ({attempts})")
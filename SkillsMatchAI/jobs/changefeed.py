@@ -0,0 +1,273 @@
+"""
+Flux des modifications (évaluations, compétences des employés, affectations),
+diffusé aux clients en Server-Sent Events (`/api/changes/stream/`).
+
+Les écritures suivies enregistrent un `ChangeEvent` dans leur transaction
+(`publish`) : un rollback n'émet aucun événement, et l'identifiant croissant
+de l'événement sert de curseur de reprise (`Last-Event-ID`).
+
+Dans chaque processus ASGI, un `ChangeFeedHub` par boucle d'événements lit les
+nouveaux événements toutes les `CHANGE_FEED_POLL_INTERVAL` secondes (une seule
+requête quel que soit le nombre de clients connectés) et les distribue aux
+abonnements dont les filtres correspondent. Un commit dans le même processus
+réveille immédiatement les hubs ; les événements des autres processus sont lus
+au plus tard après un intervalle.
+"""
+import asyncio
+import contextvars
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ChangeEvent, Task
+from .tasks import enqueue, register_task
+
+DEFAULT_POLL_INTERVAL = 0.5
+
+# Durée de conservation des événements (secondes)
+DEFAULT_RETENTION = 24 * 60 * 60
+
+# Nombre maximal d'événements lus par requête
+FETCH_BATCH_SIZE = 500
+
+# Événements en attente par abonné ; au-delà, l'abonné relit son retard en base
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+PRUNE_TASK = 'jobs.prune_change_events'
+PRUNE_INTERVAL = timedelta(hours=1)
+
+_suspended = contextvars.ContextVar('change_feed_suspended', default=False)
+
+# {boucle d'événements: hub}, tant que le hub a des abonnés
+_hubs = {}
+_hubs_lock = threading.Lock()
+
+
+@contextmanager
+def suspend_change_feed():
+    """Désactive l'émission d'événements (opérations de masse)."""
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def publish(topic, action, object_id, employee_id=None, **data):
+    """
+    Enregistre un événement dans la transaction en cours et réveille les hubs au commit.
+
+    Returns:
+        ChangeEvent: L'événement créé, ou None si le flux est suspendu
+    """
+    if _suspended.get():
+        return None
+    event = ChangeEvent.objects.create(
+        topic=topic, action=action, object_id=object_id, employee_id=employee_id, data=data
+    )
+    transaction.on_commit(wake_hubs)
+    return event
+
+
+def fetch_events(after_id, limit=FETCH_BATCH_SIZE):
+    """Événements postérieurs au curseur `after_id`, sous forme de messages."""
+    return [event.as_message() for event in ChangeEvent.objects.filter(id__gt=after_id).order_by('id')[:limit]]
+
+
+def latest_event_id():
+    return ChangeEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def wake_hubs():
+    """Signale de nouveaux événements aux hubs du processus (appelable depuis n'importe quel thread)."""
+    with _hubs_lock:
+        hubs = list(_hubs.values())
+    for hub in hubs:
+        hub.wake()
+
+
+class Subscription:
+    """
+    Abonnement d'un client au flux, filtré par type d'objet et par employé.
+
+    Args:
+        topics (set, optional): Types d'objets suivis (tous si vide)
+        employee_ids (set, optional): Employés suivis (tous si vide)
+    """
+
+    def __init__(self, topics=None, employee_ids=None):
+        self.topics = set(topics or ())
+        self.employee_ids = set(employee_ids or ())
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    @classmethod
+    def from_params(cls, params):
+        """
+        Construit un abonnement à partir des paramètres `topics` et `employee`.
+
+        Raises:
+            ValueError: si un type d'objet ou un identifiant est invalide
+        """
+        topics = {topic.strip() for topic in params.get('topics', '').split(',') if topic.strip()}
+        unknown = topics - set(ChangeEvent.Topic.values)
+        if unknown:
+            raise ValueError(f"Types d'objets inconnus : {', '.join(sorted(unknown))}")
+        try:
+            employee_ids = {int(pk) for pk in params.get('employee', '').split(',') if pk.strip()}
+        except ValueError:
+            raise ValueError("employee doit être une liste d'identifiants")
+        return cls(topics, employee_ids)
+
+    def matches(self, message):
+        if self.topics and message['topic'] not in self.topics:
+            return False
+        return not self.employee_ids or message['employee'] in self.employee_ids
+
+    def push(self, message):
+        if self.overflowed or not self.matches(message):
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Client trop lent : il relira son retard en base
+            self.overflowed = True
+
+
+class ChangeFeedHub:
+    """Lecture partagée des nouveaux événements pour tous les abonnés d'une boucle d'événements."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.subscriptions = set()
+        self.cursor = None
+        self.task = None
+        self.event = asyncio.Event()
+
+    @property
+    def poll_interval(self):
+        return getattr(settings, 'CHANGE_FEED_POLL_INTERVAL', DEFAULT_POLL_INTERVAL)
+
+    async def subscribe(self, subscription):
+        """Inscrit un abonné et retourne le curseur à partir duquel il recevra les événements."""
+        if self.cursor is None:
+            self.cursor = await sync_to_async(latest_event_id)()
+        with _hubs_lock:
+            _hubs[self.loop] = self
+        self.subscriptions.add(subscription)
+        if self.task is None:
+            self.task = self.loop.create_task(self.run())
+        return self.cursor
+
+    def unsubscribe(self, subscription):
+        self.subscriptions.discard(subscription)
+        if not self.subscriptions:
+            self.wake()
+
+    def wake(self):
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            # Boucle fermée : le hub n'a plus de client
+            pass
+
+    async def run(self):
+        try:
+            while self.subscriptions:
+                try:
+                    await asyncio.wait_for(self.event.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.event.clear()
+                if not self.subscriptions:
+                    break
+                messages = await sync_to_async(fetch_events)(self.cursor)
+                for message in messages:
+                    self.cursor = message['id']
+                    for subscription in list(self.subscriptions):
+                        subscription.push(message)
+                if len(messages) == FETCH_BATCH_SIZE:
+                    self.event.set()
+        finally:
+            # Arrêt (plus d'abonné ou erreur de lecture) : les abonnés restants relisent leur retard en base
+            for subscription in self.subscriptions:
+                subscription.overflowed = True
+            self.subscriptions.clear()
+            self.task = None
+            self.cursor = None
+            with _hubs_lock:
+                if _hubs.get(self.loop) is self:
+                    del _hubs[self.loop]
+
+
+def get_hub():
+    """Hub de la boucle d'événements courante."""
+    loop = asyncio.get_running_loop()
+    with _hubs_lock:
+        hub = _hubs.get(loop)
+    return hub or ChangeFeedHub(loop)
+
+
+def fetch_matching_events(subscription, after_id, until_id):
+    """Événements d'un abonnement compris entre deux curseurs (rattrapage d'un client)."""
+    messages = []
+    while after_id < until_id:
+        batch = fetch_events(after_id)
+        if not batch:
+            break
+        messages.extend(
+            message for message in batch if message['id'] <= until_id and subscription.matches(message)
+        )
+        after_id = batch[-1]['id']
+    return messages
+
+
+async def stream_messages(subscription, last_id=None, heartbeat=15):
+    """
+    Générateur asynchrone des événements d'un abonnement.
+
+    Les événements postérieurs à `last_id` (reprise après déconnexion) sont relus
+    en base, puis les nouveaux événements sont reçus du hub. Produit None toutes
+    les `heartbeat` secondes sans événement (maintien de la connexion).
+    """
+    hub = get_hub()
+    try:
+        while True:
+            subscription.overflowed = False
+            while not subscription.queue.empty():
+                subscription.queue.get_nowait()
+            cursor = await hub.subscribe(subscription)
+            if last_id is None:
+                last_id = cursor
+            for message in await sync_to_async(fetch_matching_events)(subscription, last_id, cursor):
+                last_id = message['id']
+                yield message
+            last_id = max(last_id, cursor)
+
+            while not subscription.overflowed:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if message['id'] > last_id:
+                    last_id = message['id']
+                    yield message
+            hub = get_hub()
+    finally:
+        hub.unsubscribe(subscription)
+
+
+@register_task(PRUNE_TASK)
+def prune_change_events():
+    """Supprime les événements plus anciens que `CHANGE_FEED_RETENTION` puis se replanifie."""
+    retention = getattr(settings, 'CHANGE_FEED_RETENTION', DEFAULT_RETENTION)
+    deleted, _ = ChangeEvent.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=retention)).delete()
+    if not Task.objects.filter(name=PRUNE_TASK, status=Task.Status.PENDING).exists():
+        enqueue(PRUNE_TASK, delay=PRUNE_INTERVAL)
+    return {'deleted': deleted}
@@ -1,263 +1,400 @@
+import itertools
 import random
-from datetime import datetime, timedelta
-from django.utils import timezone
+import unicodedata
+from datetime import date, datetime, timedelta
+from multiprocessing import Pool
+
 from faker import Faker
+
 from .models import (
-    JobFamily, Skill, Job, Department, Position, 
-    Employee, EmployeeSkill, PositionSkill
+    JobFamily, Skill, Job, Position,
+    Employee, EmployeeSkill, PositionSkill, Evaluation, EvaluationHistory, SkillInventory, SearchDocument
 )
+from .changefeed import suspend_change_feed
+from .skill_dedupe import normalize_skill_name, synonyms
+from .similarity import rebuild_search_documents, suspend_search_index
+from .skill_hierarchy import rebuild_skill_closure
+from .skill_inventory import rebuild_skill_inventory, suspend_inventory
+from .skill_stats import invalidate_skill_level_counts
+from .tombstones import suspend_tombstones
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Taille des lots de noms générés par Faker (un lot = une graine = une tâche du pool)
+FAKER_CHUNK_SIZE = 10000
+
+JOB_FAMILY_NAMES = [
+    "Développement informatique",
+    "Marketing digital",
+    "Ressources humaines",
+    "Finance et comptabilité",
+    "Ventes",
+    "Support client",
+    "Design et UX",
+    "Gestion de projet"
+]
+
+SKILL_NAMES = {
+    "Technique": [
+        "Python", "JavaScript", "React", "Django", "SQL", "AWS", "Docker",
+        "Machine Learning", "Data Analysis", "UX Design", "UI Design",
+        "SEO", "SEM", "Content Marketing", "Social Media Marketing"
+    ],
+    "Soft skill": [
+        "Communication", "Travail d'équipe", "Résolution de problèmes",
+        "Adaptabilité", "Leadership", "Gestion du temps", "Créativité"
+    ],
+    "Langue": ["Anglais", "Français", "Espagnol", "Allemand", "Chinois"],
+    "Management": ["Gestion d'équipe", "Gestion de projet", "Recrutement", "Budgétisation"],
+}
+
+# Déclinaisons utilisées lorsque le nombre de compétences dépasse la liste de base
+SKILL_VARIANTS = ["", " avancé", " appliqué", " en production", " pour la data", " à l'international"]
+
+JOB_LEVELS = ["Junior", "Intermédiaire", "Senior", "Lead", "Manager"]
+JOB_TITLES = [
+    "Développeur Full Stack", "Développeur Frontend", "Développeur Backend",
+    "Data Scientist", "DevOps Engineer", "UX Designer", "UI Designer",
+    "Chef de projet digital", "Responsable marketing", "Spécialiste SEO",
+    "Responsable RH", "Comptable", "Analyste financier", "Commercial",
+    "Support client", "Responsable produit", "Responsable communication"
+]
+
+# Répartitions pondérées (valeur, poids)
+LOCATIONS = [
+    ("Paris", 35), ("Lyon", 15), ("Marseille", 10), ("Bordeaux", 8),
+    ("Lille", 8), ("Toulouse", 10), ("Nantes", 8), ("Strasbourg", 6)
+]
+EMPLOYMENT_STATUSES = [
+    (Employee.EmploymentStatus.ACTIVE, 85),
+    (Employee.EmploymentStatus.ON_LEAVE, 6),
+    (Employee.EmploymentStatus.SUSPENDED, 2),
+    (Employee.EmploymentStatus.TERMINATED, 7),
+]
+PROFICIENCY_LEVELS = [(1, 15), (2, 25), (3, 30), (4, 20), (5, 10)]
+
+# Les évaluateurs sont choisis parmi les premiers employés créés
+EVALUATOR_POOL_SIZE = 1000
+
+# Part des employés occupant une position, des compétences évaluées, des compétences requises
+OCCUPANCY_RATE = 0.7
+EVALUATION_RATE = 0.4
+REQUIRED_SKILL_RATE = 0.75
+
+
+def weighted_sampler(rng, choices):
+    """Retourne une fonction tirant une valeur selon les poids donnés."""
+    values = [value for value, _ in choices]
+    cum_weights = list(itertools.accumulate(weight for _, weight in choices))
+    return lambda: rng.choices(values, cum_weights=cum_weights)[0]
+
+
+def skill_popularity(num_skills):
+    """Poids de popularité des compétences (loi de Zipf) : quelques compétences très répandues."""
+    return list(itertools.accumulate(1 / (rank + 1) ** 0.8 for rank in range(num_skills)))
 
-fake = Faker(['fr_FR'])
 
-def create_sample_data(num_job_families=5, num_skills=30, num_jobs=15, 
-                      num_departments=4, num_positions=25, num_employees=20):
+def sample_skills(rng, skill_ids, cum_weights, count):
+    """Tire `count` compétences distinctes selon leur popularité, dans l'ordre du tirage."""
+    count = min(count, len(skill_ids))
+    selected = {}
+    while len(selected) < count:
+        selected.update(dict.fromkeys(rng.choices(skill_ids, cum_weights=cum_weights, k=count - len(selected))))
+    return list(selected)
+
+
+def skill_names(num_skills):
+    """Génère `num_skills` noms de compétences uniques avec leur catégorie."""
+    base = [(name, category) for category, names in SKILL_NAMES.items() for name in names]
+    names = [(f"{name}{variant}", category) for variant in SKILL_VARIANTS for name, category in base]
+    generated = itertools.chain(
+        names,
+        ((f"{name} {n}", category) for n in itertools.count(2) for name, category in names)
+    )
+    return list(itertools.islice(generated, num_skills))
+
+
+def ascii_slug(value):
+    """Convertit un nom en identifiant ASCII pour les adresses email."""
+    value = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode()
+    return ''.join(c for c in value.lower() if c.isalnum())
+
+
+def generate_people_chunk(args):
+    """
+    Génère un lot de (prénom, nom, téléphone) avec Faker.
+
+    Chaque lot a sa propre graine : le résultat ne dépend pas du nombre de processus.
+    """
+    seed, chunk_index, count = args
+    fake = Faker(['fr_FR'])
+    fake.seed_instance(seed * 1000003 + chunk_index)
+    return [(fake.first_name(), fake.last_name(), fake.phone_number()) for _ in range(count)]
+
+
+def generate_people(seed, count, workers=1):
+    """Itère sur `count` personnes générées par lots, éventuellement dans un pool de processus."""
+    chunks = [
+        (seed, index, min(FAKER_CHUNK_SIZE, count - start))
+        for index, start in enumerate(range(0, count, FAKER_CHUNK_SIZE))
+    ]
+    if workers > 1 and len(chunks) > 1:
+        with Pool(workers) as pool:
+            for people in pool.imap(generate_people_chunk, chunks):
+                yield from people
+    else:
+        for chunk in chunks:
+            yield from generate_people_chunk(chunk)
+
+
+def clear_sample_data():
+    """Supprime les données existantes, des tables dépendantes vers les tables de référence."""
+    with suspend_inventory(), suspend_change_feed(), suspend_tombstones(), suspend_search_index():
+        SkillInventory.objects.all().delete()
+        SearchDocument.objects.all().delete()
+        EvaluationHistory.objects.all().delete()
+        Evaluation.objects.all().delete()
+        EmployeeSkill.objects.all().delete()
+        PositionSkill.objects.all().delete()
+        Employee.objects.update(current_position=None)
+        Position.objects.update(employee=None)
+        Employee.objects.all().delete()
+        Position.objects.all().delete()
+        Job.required_skills.through.objects.all().delete()
+        Job.objects.all().delete()
+        Skill.objects.all().delete()
+        JobFamily.objects.all().delete()
+
+
+def create_sample_data(num_job_families=5, num_skills=30, num_jobs=15,
+                      num_positions=25, num_employees=20, seed=None,
+                      batch_size=DEFAULT_BATCH_SIZE, workers=1, log=print):
     """
     Crée un jeu de données fictives pour tous les modèles de l'application jobs.
-    
+
+    Les lignes sont insérées par lots avec `bulk_create`, ce qui permet de générer
+    des millions de lignes. Avec une graine (`seed`), le jeu de données est
+    entièrement déterministe.
+
     Args:
         num_job_families (int): Nombre de familles de métiers à créer
         num_skills (int): Nombre de compétences à créer
         num_jobs (int): Nombre de jobs à créer
-        num_departments (int): Nombre de départements à créer
         num_positions (int): Nombre de positions à créer
         num_employees (int): Nombre d'employés à créer
-        
+        seed (int, optional): Graine du générateur aléatoire
+        batch_size (int): Nombre de lignes insérées par requête
+        workers (int): Nombre de processus utilisés pour générer les noms avec Faker
+        log (callable): Fonction d'affichage de la progression
+
     Returns:
         dict: Statistiques sur les données créées
     """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    rng = random.Random(seed)
+    fake = Faker(['fr_FR'])
+    fake.seed_instance(seed)
+    today = date.today()
+
     # Nettoyer les données existantes
-    EmployeeSkill.objects.all().delete()
-    PositionSkill.objects.all().delete()
-    Employee.objects.all().delete()
-    Position.objects.all().delete()
-    Department.objects.all().delete()
-    Job.objects.all().delete()
-    Skill.objects.all().delete()
-    JobFamily.objects.all().delete()
-    
-    print("Création des données fictives...")
-    
+    clear_sample_data()
+
+    log(f"Création des données fictives (graine {seed})...")
+
     # 1. Création des familles de métiers
-    job_families = []
-    job_family_names = [
-        "Développement informatique", 
-        "Marketing digital", 
-        "Ressources humaines", 
-        "Finance et comptabilité", 
-        "Ventes", 
-        "Support client", 
-        "Design et UX", 
-        "Gestion de projet"
-    ]
-    
-    for i in range(min(num_job_families, len(job_family_names))):
-        job_family = JobFamily.objects.create(
-            name=job_family_names[i],
+    job_families = JobFamily.objects.bulk_create([
+        JobFamily(
+            name=JOB_FAMILY_NAMES[i % len(JOB_FAMILY_NAMES)] + (f" {i // len(JOB_FAMILY_NAMES) + 1}" if i >= len(JOB_FAMILY_NAMES) else ""),
             description=fake.paragraph(nb_sentences=3)
         )
-        job_families.append(job_family)
-    
-    print(f"✓ {len(job_families)} familles de métiers créées")
-    
+        for i in range(num_job_families)
+    ])
+    log(f"✓ {len(job_families)} familles de métiers créées")
+
     # 2. Création des compétences
-    skills = []
-    skill_categories = ["Technique", "Soft skill", "Langue", "Management"]
-    skill_names = [
-        # Compétences techniques
-        "Python", "JavaScript", "React", "Django", "SQL", "AWS", "Docker", 
-        "Machine Learning", "Data Analysis", "UX Design", "UI Design", 
-        "SEO", "SEM", "Content Marketing", "Social Media Marketing",
-        # Soft skills
-        "Communication", "Travail d'équipe", "Résolution de problèmes", 
-        "Adaptabilité", "Leadership", "Gestion du temps", "Créativité",
-        # Langues
-        "Anglais", "Français", "Espagnol", "Allemand", "Chinois",
-        # Management
-        "Gestion d'équipe", "Gestion de projet", "Recrutement", "Budgétisation"
-    ]
-    
-    for i in range(min(num_skills, len(skill_names))):
-        category = random.choice(skill_categories)
-        skill = Skill.objects.create(
-            name=skill_names[i],
-            description=fake.paragraph(nb_sentences=2),
-            category=category
-        )
-        skills.append(skill)
-    
-    print(f"✓ {len(skills)} compétences créées")
-    
-    # 3. Création des jobs
-    jobs = []
-    job_levels = ["Junior", "Intermédiaire", "Senior", "Lead", "Manager"]
-    job_titles = [
-        "Développeur Full Stack", "Développeur Frontend", "Développeur Backend",
-        "Data Scientist", "DevOps Engineer", "UX Designer", "UI Designer",
-        "Chef de projet digital", "Responsable marketing", "Spécialiste SEO",
-        "Responsable RH", "Comptable", "Analyste financier", "Commercial",
-        "Support client", "Responsable produit", "Responsable communication"
-    ]
-    
-    for i in range(min(num_jobs, len(job_titles))):
-        job_family = random.choice(job_families)
-        level = random.choice(job_levels)
-        
-        job = Job.objects.create(
-            title=job_titles[i],
+    aliases = synonyms()
+    skills = Skill.objects.bulk_create([
+        Skill(name=name, normalized_name=normalize_skill_name(name, aliases),
+              description=fake.paragraph(nb_sentences=2), category=category)
+        for name, category in skill_names(num_skills)
+    ], batch_size=batch_size)
+    skill_ids = [skill.id for skill in skills]
+    skill_weights = skill_popularity(len(skill_ids))
+    log(f"✓ {len(skills)} compétences créées")
+
+    # 3. Création des jobs et de leurs compétences requises
+    jobs = Job.objects.bulk_create([
+        Job(
+            title=JOB_TITLES[i % len(JOB_TITLES)] + (f" {i // len(JOB_TITLES) + 1}" if i >= len(JOB_TITLES) else ""),
             description=fake.paragraph(nb_sentences=4),
-            level=level,
-            job_family=job_family
-        )
-        
-        # Ajouter des compétences requises pour ce job
-        num_required_skills = random.randint(3, 8)
-        job_skills = random.sample(skills, num_required_skills)
-        job.required_skills.set(job_skills)
-        
-        jobs.append(job)
-    
-    print(f"✓ {len(jobs)} jobs créés")
-    
-    # 4. Création des départements
-    departments = []
-    department_names = [
-        "Technologie", "Marketing", "Ressources Humaines", 
-        "Finance", "Ventes", "Opérations", "Produit"
-    ]
-    
-    for i in range(min(num_departments, len(department_names))):
-        department = Department.objects.create(
-            name=department_names[i],
-            description=fake.paragraph(nb_sentences=2)
+            level=rng.choice(JOB_LEVELS),
+            job_family=rng.choice(job_families)
         )
-        departments.append(department)
-    
-    print(f"✓ {len(departments)} départements créés")
-    
-    # 5. Création des positions
-    positions = []
-    locations = ["Paris", "Lyon", "Marseille", "Bordeaux", "Lille", "Toulouse", "Nantes", "Strasbourg"]
-    
-    for i in range(num_positions):
-        job = random.choice(jobs)
-        location = random.choice(locations)
-        status = random.choice([s[0] for s in Position.Status.choices])
-        
-        start_date = fake.date_between(start_date='-3y', end_date='today')
-        
-        position = Position.objects.create(
-            job=job,
-            location=location,
-            status=status,
-            start_date=start_date
-        )
-        
-        # Ajouter des compétences requises pour cette position
-        num_position_skills = random.randint(2, 6)
-        position_skills = random.sample(list(job.required_skills.all()), 
-                                        min(num_position_skills, job.required_skills.count()))
-        
-        for skill in position_skills:
-            importance_level = random.randint(1, 5)
-            is_required = random.choice([True, True, True, False])  # 75% de chance d'être requis
-            
-            PositionSkill.objects.create(
-                position=position,
-                skill=skill,
+        for i in range(num_jobs if job_families else 0)
+    ], batch_size=batch_size)
+    job_skill_ids = {
+        job.id: sample_skills(rng, skill_ids, skill_weights, rng.randint(3, 8))
+        for job in jobs
+    }
+    Job.required_skills.through.objects.bulk_create([
+        Job.required_skills.through(job_id=job_id, skill_id=skill_id)
+        for job_id, ids in job_skill_ids.items()
+        for skill_id in ids
+    ], batch_size=batch_size)
+    log(f"✓ {len(jobs)} jobs créés")
+
+    # 4. Création des positions et de leurs compétences requises (dérivées du job)
+    # Chaque entité tire toutes ses valeurs d'un coup : le résultat ne dépend pas de la taille des lots
+    next_location = weighted_sampler(rng, LOCATIONS)
+    position_ids = []
+    position_skills_count = 0
+    for start in range(0, num_positions if jobs else 0, batch_size):
+        positions = []
+        required_skills = []
+        for _ in range(min(batch_size, num_positions - start)):
+            job = rng.choice(jobs)
+            positions.append(Position(
+                job=job,
+                location=next_location(),
+                start_date=today - timedelta(days=rng.randrange(3 * 365))
+            ))
+            ids = job_skill_ids[job.id]
+            required_skills.append([
+                (skill_id, rng.randint(1, 5), rng.random() < REQUIRED_SKILL_RATE)
+                for skill_id in rng.sample(ids, min(rng.randint(2, 6), len(ids)))
+            ])
+        Position.objects.bulk_create(positions)
+        position_skills = [
+            PositionSkill(
+                position_id=position.id,
+                skill_id=skill_id,
                 importance_level=importance_level,
-                is_required=is_required,
-                description=fake.paragraph(nb_sentences=1) if random.random() > 0.5 else None
+                is_required=is_required
             )
-        
-        positions.append(position)
-    
-    print(f"✓ {len(positions)} positions créées")
-    
-    # 6. Création des employés
-    employees = []
-    
-    for i in range(num_employees):
-        first_name = fake.first_name()
-        last_name = fake.last_name()
-        email = f"{first_name.lower()}.{last_name.lower()}@example.com"
-        
-        hire_date = fake.date_between(start_date='-5y', end_date='today')
-        date_of_birth = fake.date_of_birth(minimum_age=22, maximum_age=60)
-        
-        department = random.choice(departments)
-        employment_status = random.choice([s[0] for s in Employee.EmploymentStatus.choices])
-        
-        # 80% des employés ont une position
-        has_position = random.random() < 0.8
-        
-        employee = Employee.objects.create(
-            first_name=first_name,
-            last_name=last_name,
-            email=email,
-            phone_number=fake.phone_number(),
-            hire_date=hire_date,
-            date_of_birth=date_of_birth,
-            department=department,
-            employment_status=employment_status,
-            profile_picture=f"https://randomuser.me/api/portraits/{'men' if random.random() > 0.5 else 'women'}/{i % 100}.jpg" if random.random() > 0.3 else None,
-            resume=f"https://example.com/resumes/{first_name.lower()}_{last_name.lower()}.pdf" if random.random() > 0.7 else None
-        )
-        
-        # Assigner une position à l'employé si nécessaire
-        if has_position:
-            # Filtrer les positions vacantes
-            vacant_positions = [p for p in positions if p.status == Position.Status.VACANT]
-            
-            if vacant_positions:
-                position = random.choice(vacant_positions)
-                position.status = Position.Status.OCCUPIED
-                position.employee = employee
-                position.save()
-                
-                employee.current_position = position
-                employee.save()
-        
-        employees.append(employee)
-    
-    print(f"✓ {len(employees)} employés créés")
-    
-    # 7. Création des compétences des employés
+            for position, skills_spec in zip(positions, required_skills)
+            for skill_id, importance_level, is_required in skills_spec
+        ]
+        PositionSkill.objects.bulk_create(position_skills, batch_size=batch_size)
+        position_skills_count += len(position_skills)
+        position_ids.extend(position.id for position in positions)
+    log(f"✓ {len(position_ids)} positions créées")
+
+    # 5. Création des employés, de leurs compétences et évaluations, par lots
+    next_status = weighted_sampler(rng, EMPLOYMENT_STATUSES)
+    next_level = weighted_sampler(rng, PROFICIENCY_LEVELS)
+    vacant_positions = rng.sample(position_ids, int(len(position_ids) * OCCUPANCY_RATE))
     employee_skills_count = 0
-    
-    for employee in employees:
-        # Déterminer le nombre de compétences pour cet employé
-        num_employee_skills = random.randint(3, 10)
-        
-        # Sélectionner des compétences aléatoires
-        employee_skills = random.sample(skills, num_employee_skills)
-        
-        for skill in employee_skills:
-            proficiency_level = random.randint(1, 5)
-            
-            # Date d'acquisition entre la date d'embauche et aujourd'hui
-            date_acquired = fake.date_between(start_date=employee.hire_date, end_date='today')
-            
-            EmployeeSkill.objects.create(
-                employee=employee,
-                skill=skill,
-                proficiency_level=proficiency_level,
-                date_acquired=date_acquired
+    evaluations_count = 0
+    evaluator_ids = []
+    people = generate_people(seed, num_employees, workers)
+
+    for start in range(0, num_employees, batch_size):
+        employees = []
+        owned_skills = []
+        for i in range(start, min(start + batch_size, num_employees)):
+            first_name, last_name, phone_number = next(people)
+            employment_status = next_status()
+            position_id = None
+            if (vacant_positions and employment_status != Employee.EmploymentStatus.TERMINATED
+                    and rng.random() < OCCUPANCY_RATE):
+                position_id = vacant_positions.pop()
+            hire_date = today - timedelta(days=rng.randrange(15 * 365))
+            employees.append(Employee(
+                first_name=first_name,
+                last_name=last_name,
+                email=f"{ascii_slug(first_name)}.{ascii_slug(last_name)}.{i}@example.com",
+                phone_number=phone_number,
+                hire_date=hire_date,
+                date_of_birth=today - timedelta(days=rng.randrange(22 * 365, 60 * 365)),
+                current_position_id=position_id,
+                employment_status=employment_status,
+                profile_picture=f"https://randomuser.me/api/portraits/{'men' if rng.random() > 0.5 else 'women'}/{i % 100}.jpg" if rng.random() > 0.3 else None,
+                resume=f"https://example.com/resumes/{i}.pdf" if rng.random() > 0.7 else None
+            ))
+
+            # Nombre de compétences : la plupart des employés en ont entre 4 et 10
+            skills_spec = []
+            for skill_id in sample_skills(rng, skill_ids, skill_weights, int(rng.triangular(3, 15, 6))):
+                level = next_level()
+                date_acquired = hire_date + timedelta(days=rng.randrange(max((today - hire_date).days, 1)))
+                evaluation = None
+                if rng.random() < EVALUATION_RATE:
+                    # Évaluateur parmi les employés créés avant l'employé évalué
+                    evaluator_index = rng.randrange(EVALUATOR_POOL_SIZE)
+                    evaluation = (
+                        min(max(level + rng.choice((-1, 0, 0, 1)), 1), 5),
+                        evaluator_index if evaluator_index < i else None
+                    )
+                skills_spec.append((skill_id, level, date_acquired, evaluation))
+            owned_skills.append(skills_spec)
+        Employee.objects.bulk_create(employees)
+        if len(evaluator_ids) < EVALUATOR_POOL_SIZE:
+            evaluator_ids.extend(employee.id for employee in employees[:EVALUATOR_POOL_SIZE - len(evaluator_ids)])
+
+        employee_skills = []
+        evaluations = []
+        for employee, skills_spec in zip(employees, owned_skills):
+            for skill_id, level, date_acquired, evaluation in skills_spec:
+                employee_skills.append(EmployeeSkill(
+                    employee_id=employee.id,
+                    skill_id=skill_id,
+                    proficiency_level=level,
+                    date_acquired=date_acquired
+                ))
+                if evaluation is not None:
+                    quantitative_level, evaluator_index = evaluation
+                    evaluations.append(Evaluation(
+                        employee_id=employee.id,
+                        skill_id=skill_id,
+                        quantitative_level=quantitative_level,
+                        evaluated_by_id=evaluator_ids[evaluator_index] if evaluator_index is not None else None
+                    ))
+        EmployeeSkill.objects.bulk_create(employee_skills, batch_size=batch_size)
+        # bulk_create contourne Evaluation.save() : l'historique est créé explicitement
+        Evaluation.objects.bulk_create(evaluations, batch_size=batch_size)
+        EvaluationHistory.objects.bulk_create([
+            EvaluationHistory(
+                employee_id=evaluation.employee_id,
+                skill_id=evaluation.skill_id,
+                quantitative_level=evaluation.quantitative_level,
+                evaluated_by_id=evaluation.evaluated_by_id,
+                evaluation_date=today
             )
-            
-            employee_skills_count += 1
-    
-    print(f"✓ {employee_skills_count} compétences d'employés créées")
-    
+            for evaluation in evaluations
+        ], batch_size=batch_size)
+        Position.objects.bulk_update([
+            Position(id=employee.current_position_id, employee_id=employee.id, status=Position.Status.OCCUPIED)
+            for employee in employees
+            if employee.current_position_id
+        ], ['employee', 'status'], batch_size=batch_size)
+
+        employee_skills_count += len(employee_skills)
+        evaluations_count += len(evaluations)
+        log(f"  {min(start + batch_size, num_employees)}/{num_employees} employés")
+
+    log(f"✓ {num_employees} employés créés")
+    log(f"✓ {employee_skills_count} compétences d'employés créées")
+
+    invalidate_skill_level_counts(skill_ids)
+    # bulk_create contourne la maintenance par deltas de l'inventaire des compétences
+    # et de la table de fermeture de la taxonomie
+    rebuild_skill_inventory()
+    rebuild_skill_closure()
+    log("✓ Inventaire et taxonomie des compétences reconstruits")
+    rebuild_search_documents()
+    log("✓ Index de similarité reconstruit")
+
     # Retourner des statistiques sur les données créées
     return {
         "job_families": len(job_families),
         "skills": len(skills),
         "jobs": len(jobs),
-        "departments": len(departments),
-        "positions": len(positions),
-        "employees": len(employees),
+        "positions": len(position_ids),
+        "employees": num_employees,
         "employee_skills": employee_skills_count,
-        "position_skills": PositionSkill.objects.count()
+        "position_skills": position_skills_count,
+        "evaluations": evaluations_count
     }
 
 def run_fixtures():
@@ -268,16 +405,16 @@ def run_fixtures():
     start_time = datetime.now()
     stats = create_sample_data()
     end_time = datetime.now()
-    
+
     print("\nCréation des données fictives terminée!")
     print(f"Temps d'exécution: {end_time - start_time}")
     print("\nStatistiques:")
     for key, value in stats.items():
         print(f"- {key}: {value}")
-    
+
     return stats
 
 if __name__ == "__main__":
     # Ce bloc s'exécute si le fichier est lancé directement
     print("Génération des données fictives pour l'application jobs...")
-    run_fixtures() 
\ No newline at end of file
+    run_fixtures()
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from jobs.succession import DEFAULT_CHUNK_SIZE, compute_successors
+
+
+class Command(BaseCommand):
+    help = 'Calcule les meilleurs successeurs internes de chaque position occupée (reprend un traitement interrompu)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top',
+            type=int,
+            help='Nombre de successeurs par position (défaut: SUCCESSION_TOP_N)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Nombre de positions par lot, validé avec son point de reprise (défaut: {DEFAULT_CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore le point de reprise d\'un traitement interrompu'
+        )
+
+    def handle(self, *args, **options):
+        result = compute_successors(
+            top=options['top'],
+            chunk_size=options['chunk_size'],
+            restart=options['restart'],
+            log=self.stdout.write
+        )
+        rate = f"{result['rows_per_second']:.0f}" if result['rows_per_second'] is not None else '-'
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['positions']} position(s), {result['rows']} successeur(s) en {result['seconds']:.1f} s "
+            f"({rate} lignes/s)"
+        ))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from jobs.skill_dedupe import DEFAULT_MAX_RATIO, dedupe_skills
+
+
+class Command(BaseCommand):
+    help = 'Détecte et fusionne les compétences en double (noms normalisés, synonymes, fautes de frappe)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Affiche les groupes de doublons sans rien fusionner'
+        )
+        parser.add_argument(
+            '--max-ratio',
+            type=float,
+            default=DEFAULT_MAX_RATIO,
+            help=f'Distance d\'édition maximale rapportée à la longueur du nom (défaut: {DEFAULT_MAX_RATIO})'
+        )
+
+    def handle(self, *args, **options):
+        result = dedupe_skills(max_ratio=options['max_ratio'], dry_run=options['dry_run'], log=self.stdout.write)
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"{result['groups']} groupe(s), {result['merged']} compétence(s) à fusionner (simulation)"
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['groups']} groupe(s), {result['merged']} compétence(s) fusionnée(s), "
+            f"{result['refreshed']} nom(s) normalisé(s) recalculé(s)"
+        ))
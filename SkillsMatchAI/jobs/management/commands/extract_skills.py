@@ -0,0 +1,63 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.skill_extraction import scan_jobs, scan_resumes
+
+
+class Command(BaseCommand):
+    help = 'Suggère des compétences à partir des CV (fichiers texte) et des descriptions des emplois'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--resumes',
+            help='Répertoire des CV en texte, nommés <identifiant>.txt ou <email>.txt'
+        )
+        parser.add_argument(
+            '--jobs',
+            action='store_true',
+            help='Analyse les descriptions des emplois'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Nombre de processus analysant les CV'
+        )
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='Fichier JSON Lines des suggestions (défaut: sortie standard)'
+        )
+
+    def handle(self, *args, **options):
+        if not options['resumes'] and not options['jobs']:
+            raise CommandError('Préciser --resumes et/ou --jobs')
+
+        output = sys.stdout if options['output'] == '-' else open(options['output'], 'w', encoding='utf-8')
+        # Avec la sortie standard, le bilan est écrit sur la sortie d'erreur
+        report = self.stderr if output is sys.stdout else self.stdout
+
+        def write(suggestion):
+            output.write(json.dumps(suggestion, ensure_ascii=False) + '\n')
+
+        try:
+            if options['jobs']:
+                stats = scan_jobs(write)
+                report.write(
+                    f"{stats['jobs']} emploi(s) analysé(s), {stats['suggestions']} compétence(s) suggérée(s)",
+                    style_func=self.style.SUCCESS
+                )
+            if options['resumes']:
+                stats = scan_resumes(options['resumes'], write, workers=options['workers'])
+                rate = f"{stats['files_per_second']:.0f}" if stats['files_per_second'] is not None else '-'
+                report.write(
+                    f"{stats['files']} CV analysé(s) en {stats['seconds']:.1f} s ({rate} fichiers/s), "
+                    f"{stats['suggestions']} compétence(s) suggérée(s), {stats['unmatched']} sans employé, "
+                    f"{stats['unreadable']} illisible(s)",
+                    style_func=self.style.SUCCESS
+                )
+        finally:
+            if output is not sys.stdout:
+                output.close()
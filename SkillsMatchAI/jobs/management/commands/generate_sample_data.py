@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand
-from jobs.fixtures import create_sample_data
+from jobs.fixtures import create_sample_data, DEFAULT_BATCH_SIZE
 
 class Command(BaseCommand):
     help = 'Génère des données fictives pour l\'application jobs'
@@ -23,12 +23,6 @@ class Command(BaseCommand):
             default=15,
             help='Nombre de jobs à créer'
         )
-        parser.add_argument(
-            '--departments',
-            type=int,
-            default=4,
-            help='Nombre de départements à créer'
-        )
         parser.add_argument(
             '--positions',
             type=int,
@@ -41,6 +35,24 @@ class Command(BaseCommand):
             default=20,
             help='Nombre d\'employés à créer'
         )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=None,
+            help='Graine du générateur aléatoire (données reproductibles)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Nombre de lignes insérées par requête'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Nombre de processus utilisés pour générer les noms avec Faker'
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('Début de la génération des données fictives...'))
@@ -49,12 +61,15 @@ class Command(BaseCommand):
             num_job_families=options['job_families'],
             num_skills=options['skills'],
             num_jobs=options['jobs'],
-            num_departments=options['departments'],
             num_positions=options['positions'],
-            num_employees=options['employees']
+            num_employees=options['employees'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            log=self.stdout.write
         )
         
         self.stdout.write(self.style.SUCCESS('\nGénération des données fictives terminée!'))
         self.stdout.write('\nStatistiques:')
         for key, value in stats.items():
-            self.stdout.write(f'- {key}: {value}') 
\ No newline at end of file
+            self.stdout.write(f'- {key}: {value}') 
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from jobs.skill_inventory import rebuild_skill_inventory
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit entièrement l\'inventaire des compétences (offre et demande) à partir des tables sources'
+
+    def handle(self, *args, **options):
+        created = rebuild_skill_inventory()
+        for kind, count in created.items():
+            self.stdout.write(f"- {kind}: {count} cellule(s)")
+        self.stdout.write(self.style.SUCCESS('Inventaire des compétences reconstruit'))
@@ -0,0 +1,67 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from jobs.tasks import default_worker_id, requeue_stale_tasks, run_pending_tasks
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Exécute les tâches de fond mises en file (jobs.tasks)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1.0,
+            help='Intervalle (secondes) entre deux interrogations de la file vide'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Traite les tâches prêtes puis s\'arrête'
+        )
+        parser.add_argument(
+            '--max-tasks',
+            type=int,
+            help='Nombre de tâches à traiter avant de s\'arrêter'
+        )
+        parser.add_argument(
+            '--worker-id',
+            help='Identifiant du worker (défaut: hôte:pid)'
+        )
+
+    def handle(self, *args, **options):
+        worker_id = options['worker_id'] or default_worker_id()
+        max_tasks = options['max_tasks']
+        processed = 0
+        self.stdout.write(f"Worker {worker_id} démarré")
+
+        try:
+            while max_tasks is None or processed < max_tasks:
+                try:
+                    requeued = requeue_stale_tasks()
+                    if requeued:
+                        self.stdout.write(self.style.WARNING(f"{requeued} tâche(s) abandonnée(s) remise(s) en file"))
+                    remaining = None if max_tasks is None else max_tasks - processed
+                    count = run_pending_tasks(worker_id, max_tasks=remaining)
+                except DatabaseError:
+                    # Erreur passagère (base verrouillée, connexion perdue) : le worker continue
+                    logger.exception("Worker %s : erreur de base de données, nouvel essai", worker_id)
+                    connection.close()
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+                processed += count
+                if options['once']:
+                    break
+                if not count:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Worker {worker_id} arrêté ({processed} tâche(s) traitée(s))"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.skill_matrix import SnapshotError, default_path, load_skill_matrix, write_skill_matrix
+
+
+class Command(BaseCommand):
+    help = 'Écrit l\'instantané binaire de la matrice des compétences, projeté en mémoire par les workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Chemin du fichier (défaut: SKILL_MATRIX_PATH)'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Vérifie l\'instantané existant sans le réécrire (erreur s\'il est absent ou périmé)'
+        )
+
+    def handle(self, *args, **options):
+        path = options['output'] or default_path()
+        if options['check']:
+            try:
+                matrix = load_skill_matrix(path)
+            except SnapshotError as e:
+                raise CommandError(str(e))
+            if matrix.is_stale():
+                raise CommandError(f"Instantané périmé : {path} (écrit le {matrix.created_at:%Y-%m-%d %H:%M:%S})")
+            self.stdout.write(self.style.SUCCESS(f"Instantané à jour : {path}"))
+            return
+
+        result = write_skill_matrix(path)
+        for name, count in result['sections'].items():
+            self.stdout.write(f"- {name}: {count} élément(s)")
+        self.stdout.write(self.style.SUCCESS(f"Instantané écrit : {result['path']} ({result['size']} octets)"))
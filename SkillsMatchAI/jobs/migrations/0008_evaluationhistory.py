@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_history(apps, schema_editor):
+    """Initialise l'historique avec les évaluations courantes."""
+    Evaluation = apps.get_model('jobs', 'Evaluation')
+    EvaluationHistory = apps.get_model('jobs', 'EvaluationHistory')
+    EvaluationHistory.objects.bulk_create(
+        (
+            EvaluationHistory(
+                employee_id=evaluation.employee_id,
+                skill_id=evaluation.skill_id,
+                quantitative_level=evaluation.quantitative_level,
+                qualitative_description=evaluation.qualitative_description,
+                evaluated_by_id=evaluation.evaluated_by_id,
+                evaluation_date=evaluation.evaluation_date
+            )
+            for evaluation in Evaluation.objects.iterator()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_evaluation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='evaluation',
+            name='evaluation_date',
+            field=models.DateField(auto_now=True),
+        ),
+        migrations.CreateModel(
+            name='EvaluationHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantitative_level', models.IntegerField(choices=[(1, 'Débutant'), (2, 'Intermédiaire'), (3, 'Confirmé'), (4, 'Avancé'), (5, 'Expert')])),
+                ('qualitative_description', models.TextField(blank=True, null=True)),
+                ('evaluation_date', models.DateField(default=django.utils.timezone.localdate)),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='evaluation_history', to='jobs.employee')),
+                ('evaluated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='evaluation_history_given', to='jobs.employee')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='evaluation_history', to='jobs.skill')),
+            ],
+            options={
+                'verbose_name': "Historique d'évaluation",
+                'verbose_name_plural': 'Historique des évaluations',
+                'indexes': [models.Index(fields=['employee', 'skill', 'evaluation_date'], name='evalhist_emp_skill_date_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_history, migrations.RunPython.noop),
+    ]
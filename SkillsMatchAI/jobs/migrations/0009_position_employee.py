@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_position_employee(apps, schema_editor):
+    """Renseigne l'occupant des positions à partir de la position actuelle des employés."""
+    Employee = apps.get_model('jobs', 'Employee')
+    Position = apps.get_model('jobs', 'Position')
+    for employee_id, position_id in Employee.objects.filter(
+        current_position__isnull=False
+    ).values_list('id', 'current_position_id'):
+        Position.objects.filter(pk=position_id).update(employee_id=employee_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0008_evaluationhistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='position',
+            name='employee',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='positions', to='jobs.employee'),
+        ),
+        migrations.RunPython(backfill_position_employee, migrations.RunPython.noop),
+    ]
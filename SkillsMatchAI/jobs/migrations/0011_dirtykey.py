@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0010_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('handler', models.CharField(max_length=150)),
+                ('key', models.BigIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Clé à recalculer',
+                'verbose_name_plural': 'Clés à recalculer',
+                'constraints': [models.UniqueConstraint(fields=('handler', 'key'), name='dirtykey_handler_key_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('jobs', '0011_dirtykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomField',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Nom')),
+                ('field_type', models.CharField(choices=[('text', 'Texte'), ('number', 'Nombre'), ('date', 'Date'), ('boolean', 'Booléen'), ('select', 'Sélection')], max_length=20, verbose_name='Type de champ')),
+                ('model_type', models.CharField(choices=[('job', 'Emploi'), ('position', 'Poste'), ('employee', 'Employé'), ('skill', 'Compétence'), ('job_family', 'Famille de métiers')], max_length=50, verbose_name='Type de modèle')),
+                ('description', models.TextField(blank=True, verbose_name='Description')),
+                ('required', models.BooleanField(default=False, verbose_name='Obligatoire')),
+                ('options', models.TextField(blank=True, help_text="Options séparées par des virgules (pour type 'select')", verbose_name='Options')),
+                ('visible', models.BooleanField(default=True, verbose_name='Visible')),
+            ],
+            options={
+                'verbose_name': 'Champ personnalisé',
+                'verbose_name_plural': 'Champs personnalisés',
+                'ordering': ['model_type', 'name'],
+                'constraints': [models.UniqueConstraint(fields=('model_type', 'name'), name='customfield_model_type_name_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CustomFieldValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('value_text', models.CharField(blank=True, max_length=255, null=True)),
+                ('value_number', models.FloatField(blank=True, null=True)),
+                ('value_date', models.DateField(blank=True, null=True)),
+                ('value_boolean', models.BooleanField(blank=True, null=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('custom_field', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='values', to='jobs.customfield', verbose_name='Champ personnalisé')),
+            ],
+            options={
+                'verbose_name': 'Valeur de champ personnalisé',
+                'verbose_name_plural': 'Valeurs de champs personnalisés',
+                'indexes': [models.Index(fields=['custom_field', 'value_text'], name='cfvalue_field_text_idx'), models.Index(fields=['custom_field', 'value_number'], name='cfvalue_field_number_idx'), models.Index(fields=['custom_field', 'value_date'], name='cfvalue_field_date_idx'), models.Index(fields=['custom_field', 'value_boolean'], name='cfvalue_field_boolean_idx'), models.Index(fields=['content_type', 'object_id'], name='cfvalue_object_idx')],
+                'constraints': [models.UniqueConstraint(fields=('custom_field', 'content_type', 'object_id'), name='customfieldvalue_field_object_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0012_customfield_typed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillInventory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('SUPPLY', 'Compétences déclarées'), ('EVALUATED', 'Compétences évaluées'), ('DEMAND', 'Besoins des positions')], max_length=10)),
+                ('level', models.PositiveSmallIntegerField()),
+                ('location', models.CharField(blank=True, max_length=100)),
+                ('count', models.IntegerField(default=0)),
+                ('weight', models.IntegerField(default=0)),
+                ('job_family', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='skill_inventory', to='jobs.jobfamily')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory', to='jobs.skill')),
+            ],
+            options={
+                'verbose_name': 'Inventaire des compétences',
+                'verbose_name_plural': 'Inventaire des compétences',
+                'indexes': [models.Index(fields=['skill', 'level'], name='skillinventory_skill_idx'), models.Index(fields=['location', 'skill'], name='skillinventory_location_idx'), models.Index(fields=['job_family', 'skill'], name='skillinventory_family_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'skill', 'level', 'location', 'job_family'), name='skillinventory_cell_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0013_skillinventory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(choices=[('evaluation', 'Évaluation'), ('employee_skill', "Compétence d'employé"), ('position', 'Position')], max_length=20)),
+                ('action', models.CharField(choices=[('created', 'Création'), ('updated', 'Modification'), ('deleted', 'Suppression'), ('assigned', 'Affectation')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('employee_id', models.BigIntegerField(blank=True, null=True)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Événement du flux des modifications',
+                'verbose_name_plural': 'Événements du flux des modifications',
+                'ordering': ['id'],
+            },
+        ),
+    ]
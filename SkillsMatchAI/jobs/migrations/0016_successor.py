@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0015_delta_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('cursor', models.BigIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('started_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Point de reprise',
+                'verbose_name_plural': 'Points de reprise',
+            },
+        ),
+        migrations.CreateModel(
+            name='Successor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('missing_required', models.PositiveSmallIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(db_index=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='succession_candidacies', to='jobs.employee')),
+                ('position', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='successors', to='jobs.position')),
+            ],
+            options={
+                'verbose_name': 'Successeur',
+                'verbose_name_plural': 'Successeurs',
+                'ordering': ['position', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('position', 'rank'), name='successor_position_rank_unique'), models.UniqueConstraint(fields=('position', 'employee'), name='successor_position_employee_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_closure(apps, schema_editor):
+    """Initialise la table de fermeture : chaque compétence existante est sa propre racine."""
+    Skill = apps.get_model('jobs', 'Skill')
+    SkillClosure = apps.get_model('jobs', 'SkillClosure')
+    SkillClosure.objects.bulk_create(
+        (SkillClosure(ancestor_id=skill_id, descendant_id=skill_id, depth=0)
+         for skill_id in Skill.objects.values_list('id', flat=True).iterator()),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0016_successor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='skill',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='jobs.skill'),
+        ),
+        migrations.CreateModel(
+            name='SkillClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='jobs.skill')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='jobs.skill')),
+            ],
+            options={
+                'verbose_name': 'Lien de la taxonomie des compétences',
+                'verbose_name_plural': 'Liens de la taxonomie des compétences',
+                'indexes': [models.Index(fields=['descendant', 'ancestor'], name='skillclosure_descendant')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='skillclosure_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:14
+
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Copie figée de jobs.skill_dedupe à la date de la migration
+STOP_WORDS = frozenset({
+    'a', 'au', 'aux', 'd', 'de', 'des', 'du', 'en', 'et', 'l', 'la', 'le', 'les', 'pour',
+    'and', 'for', 'of', 'the',
+})
+
+DEFAULT_SYNONYMS = {
+    'js': 'javascript',
+    'ts': 'typescript',
+    'py': 'python',
+    'golang': 'go',
+    'postgres': 'postgresql',
+    'k8s': 'kubernetes',
+    'ml': 'machine learning',
+}
+
+
+def synonyms():
+    return {**DEFAULT_SYNONYMS, **getattr(settings, 'SKILL_SYNONYMS', {})}
+
+
+def normalize_skill_name(name, aliases):
+    text = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode().lower()
+    text = re.sub(r'(?<=[a-z0-9])\.(?=[a-z0-9])', '', text)
+    tokens = []
+    for token in re.findall(r'[a-z0-9]+[+#]*', text):
+        if token not in STOP_WORDS:
+            tokens.extend(aliases.get(token, token).split())
+    return ' '.join(tokens)
+
+
+def backfill_normalized_names(apps, schema_editor):
+    """Calcule le nom normalisé des compétences existantes."""
+    Skill = apps.get_model('jobs', 'Skill')
+    aliases = synonyms()
+    skills = list(Skill.objects.only('id', 'name'))
+    for skill in skills:
+        skill.normalized_name = normalize_skill_name(skill.name, aliases)
+    Skill.objects.bulk_update(skills, ['normalized_name'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0017_skill_hierarchy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='skill',
+            name='normalized_name',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_normalized_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0018_skill_normalized_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='skill',
+            name='last_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:20
+
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import migrations, models
+
+# Copie figée de jobs.similarity à la date de la migration
+STOP_WORDS = frozenset({
+    'a', 'au', 'aux', 'd', 'de', 'des', 'du', 'en', 'et', 'l', 'la', 'le', 'les', 'pour',
+    'and', 'for', 'of', 'the',
+    'un', 'une', 'dans', 'sur', 'par', 'avec', 'sans', 'sous', 'entre', 'vers', 'chez', 'plus', 'moins',
+    'est', 'sont', 'etre', 'avoir', 'qui', 'que', 'quoi', 'dont', 'ou', 'ne', 'pas', 'ce', 'cet', 'cette',
+    'ces', 'son', 'sa', 'ses', 'leur', 'leurs', 'nous', 'vous', 'ils', 'elles', 'il', 'elle', 'on', 'se',
+    'tout', 'tous', 'toute', 'toutes', 'aussi', 'tres', 'bien', 'comme', 'mais', 'si', 'y',
+    'an', 'in', 'on', 'to', 'with', 'by', 'is', 'are', 'be', 'or', 'as', 'at', 'from', 'this', 'that',
+})
+
+# {type de document: (modèle source, champs indexés avec leur poids)}
+SOURCES = {
+    'job': ('Job', (('title', 2), ('description', 1))),
+    'job_family': ('JobFamily', (('name', 2), ('description', 1))),
+    'skill': ('Skill', (('name', 2), ('description', 1))),
+}
+
+
+def tokenize(text):
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode().lower()
+    terms = []
+    for term in re.findall(r'[a-z0-9]+[+#]*', text):
+        if term in STOP_WORDS or len(term) < 2:
+            continue
+        if len(term) > 4 and term.endswith('s') and not term.endswith('ss'):
+            term = term[:-1]
+        terms.append(term)
+    return terms
+
+
+def document_terms(obj, fields):
+    counts = Counter()
+    for field, weight in fields:
+        for term in tokenize(getattr(obj, field)):
+            counts[term] += weight
+    return dict(counts)
+
+
+def backfill_documents(apps, schema_editor):
+    """Indexe les emplois, familles de métiers et compétences existants."""
+    SearchDocument = apps.get_model('jobs', 'SearchDocument')
+    for kind, (model_name, fields) in SOURCES.items():
+        SearchDocument.objects.bulk_create(
+            (SearchDocument(kind=kind, object_id=obj.pk, terms=document_terms(obj, fields))
+             for obj in apps.get_model('jobs', model_name).objects.iterator()),
+            batch_size=1000
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0019_skill_last_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('job', 'Emploi'), ('job_family', 'Famille de métiers'), ('skill', 'Compétence')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('terms', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Document de recherche',
+                'verbose_name_plural': 'Documents de recherche',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='searchdocument_object_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
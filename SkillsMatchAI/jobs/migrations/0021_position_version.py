@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0020_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='position',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
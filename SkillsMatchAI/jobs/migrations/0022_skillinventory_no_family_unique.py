@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:47
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_cells(apps, schema_editor):
+    """Fusionne les cellules sans famille de métiers créées en double avant la contrainte."""
+    SkillInventory = apps.get_model('jobs', 'SkillInventory')
+    duplicates = (
+        SkillInventory.objects.filter(job_family__isnull=True)
+        .values('kind', 'skill_id', 'level', 'location')
+        .annotate(rows=Count('id'), keep=Min('id'), total_count=Sum('count'), total_weight=Sum('weight'))
+        .filter(rows__gt=1)
+    )
+    for cell in duplicates:
+        rows = SkillInventory.objects.filter(
+            job_family__isnull=True, kind=cell['kind'], skill_id=cell['skill_id'],
+            level=cell['level'], location=cell['location']
+        )
+        rows.exclude(pk=cell['keep']).delete()
+        rows.update(count=cell['total_count'], weight=cell['total_weight'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0021_position_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_cells, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='skillinventory',
+            constraint=models.UniqueConstraint(condition=models.Q(('job_family__isnull', True)), fields=('kind', 'skill', 'level', 'location'), name='skillinventory_cell_no_family_unique'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:02
+
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+# Copie figée de jobs.skill_dedupe à la date de la migration
+STOP_WORDS = frozenset({
+    'a', 'au', 'aux', 'd', 'de', 'des', 'du', 'en', 'et', 'l', 'la', 'le', 'les', 'pour',
+    'and', 'for', 'of', 'the',
+})
+
+DEFAULT_SYNONYMS = {
+    'js': 'javascript',
+    'ts': 'typescript',
+    'py': 'python',
+    'golang': 'go',
+    'postgres': 'postgresql',
+    'k8s': 'kubernetes',
+    'ml': 'machine learning',
+}
+
+
+def synonyms():
+    return {**DEFAULT_SYNONYMS, **getattr(settings, 'SKILL_SYNONYMS', {})}
+
+
+def strip_accents(text):
+    chars = []
+    for c in unicodedata.normalize('NFKD', text):
+        if unicodedata.combining(c) and chars and chars[-1].isascii():
+            continue
+        chars.append(c)
+    return unicodedata.normalize('NFC', ''.join(chars))
+
+
+def normalize_skill_name(name, aliases):
+    text = strip_accents(name or '').lower()
+    text = re.sub(r'(?<=[^\W_])\.(?=[^\W_])', '', text)
+    tokens = []
+    for token in re.findall(r'[^\W_]+[+#]*', text):
+        if token not in STOP_WORDS:
+            tokens.extend(aliases.get(token, token).split())
+    return ' '.join(tokens)
+
+
+def refresh_normalized_names(apps, schema_editor):
+    """Recalcule les noms normalisés : les noms non latins étaient réduits à une chaîne vide."""
+    Skill = apps.get_model('jobs', 'Skill')
+    aliases = synonyms()
+    now = timezone.now()
+    stale = []
+    for skill in Skill.objects.only('id', 'name', 'normalized_name').iterator(5000):
+        normalized = normalize_skill_name(skill.name, aliases)
+        if skill.normalized_name != normalized:
+            skill.normalized_name = normalized
+            skill.last_updated = now
+            stale.append(skill)
+    Skill.objects.bulk_update(stale, ['normalized_name', 'last_updated'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0022_skillinventory_no_family_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(refresh_normalized_names, migrations.RunPython.noop),
+    ]
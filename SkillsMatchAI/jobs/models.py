@@ -1,10 +1,70 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import OuterRef, Subquery
 from django.utils import timezone
-from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
-from datetime import datetime
+from django.utils.dateparse import parse_date
+from datetime import date, datetime
 
-class JobFamily(models.Model):
+class CustomFieldsModel(models.Model):
+    """
+    Modèle abstrait des entités portant des champs personnalisés typés
+    (définitions `CustomField`, valeurs `CustomFieldValue`).
+
+    Les sous-classes définissent `custom_field_model_type` (valeur de `CustomField.ModelType`).
+    """
+    custom_field_model_type = None
+
+    custom_field_values = GenericRelation('CustomFieldValue')
+
+    class Meta:
+        abstract = True
+
+    def get_custom_field_value(self, field_name):
+        """Retourne la valeur typée d'un champ personnalisé, ou None si elle n'est pas définie."""
+        value = CustomFieldValue.objects.filter(
+            custom_field__model_type=self.custom_field_model_type,
+            custom_field__name=field_name,
+            object_id=self.pk
+        ).select_related('custom_field').first()
+        return value.value if value else None
+
+    def set_custom_field_value(self, field_name, value):
+        """
+        Définit la valeur d'un champ personnalisé.
+
+        Returns:
+            bool: False si le champ n'existe pas pour ce type de modèle
+
+        Raises:
+            ValueError: si la valeur ne correspond pas au type du champ
+        """
+        field = CustomField.objects.filter(model_type=self.custom_field_model_type, name=field_name).first()
+        if field is None:
+            return False
+        CustomFieldValue.objects.update_or_create(
+            custom_field=field,
+            content_type=ContentType.objects.get_for_model(self),
+            object_id=self.pk,
+            defaults=field.value_columns(value)
+        )
+        return True
+
+    def get_custom_fields(self):
+        """Retourne toutes les valeurs de champs personnalisés de l'objet ({nom: valeur})."""
+        return {
+            value.custom_field.name: value.value
+            for value in CustomFieldValue.objects.filter(
+                custom_field__model_type=self.custom_field_model_type,
+                object_id=self.pk
+            ).select_related('custom_field')
+        }
+
+def custom_fields_models():
+    """Modèles portant des champs personnalisés, par `custom_field_model_type`."""
+    return {model.custom_field_model_type: model for model in CustomFieldsModel.__subclasses__()}
+
+class JobFamily(CustomFieldsModel):
     """
     Représente une famille de métiers regroupant des emplois aux caractéristiques communes.
     
@@ -15,6 +75,8 @@ class JobFamily(models.Model):
         name (str): Le nom de la famille de métiers
         description (text): Description détaillée de la famille de métiers et de ses caractéristiques
     """
+    custom_field_model_type = 'job_family'
+
     name = models.CharField(max_length=100)
     description = models.TextField()
 
@@ -24,7 +86,7 @@ class JobFamily(models.Model):
     def __str__(self):
         return self.name
 
-class Skill(models.Model):
+class Skill(CustomFieldsModel):
     """
     Représente une compétence pouvant être requise pour un emploi ou détenue par un employé.
     
@@ -35,10 +97,25 @@ class Skill(models.Model):
         name (str): Le nom de la compétence
         description (text): Description détaillée de la compétence
         category (str, optional): Catégorie de la compétence (technique, soft skill, etc.)
+        parent (Skill, optional): Compétence parente dans la taxonomie (ex: Django → Python → Backend)
+        normalized_name (str): Nom normalisé (minuscules, sans accents ni ponctuation, synonymes
+            remplacés), calculé à l'enregistrement ; sert à repérer les doublons
+        last_updated (datetime): Date de dernière modification
     """
+    custom_field_model_type = 'skill'
+
     name = models.CharField(max_length=100)
     description = models.TextField()
     category = models.CharField(max_length=100, blank=True, null=True)
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='children'
+    )
+    normalized_name = models.CharField(max_length=255, blank=True, default='', editable=False, db_index=True)
+    last_updated = models.DateTimeField(auto_now=True)
     
     # Champs personnalisés fixes
     custom_field1 = models.CharField(max_length=255, blank=True, null=True)
@@ -60,8 +137,17 @@ class Skill(models.Model):
     def __str__(self):
         return self.name
 
-class Job(models.Model):
+    def clean(self):
+        super().clean()
+        # Import local : jobs.skill_hierarchy importe les modèles
+        from .skill_hierarchy import check_parent
+        check_parent(self.pk, self.parent_id)
+
+
+class Job(CustomFieldsModel):
     """Définit le profil type d'un emploi"""
+    custom_field_model_type = 'job'
+
     title = models.CharField(max_length=100)
     description = models.TextField()
     level = models.CharField(max_length=50)
@@ -88,7 +174,7 @@ class Job(models.Model):
     def __str__(self):
         return f"{self.title} - Level {self.level}"
 
-class Position(models.Model):
+class Position(CustomFieldsModel):
     """
     Représente une instance concrète d'un poste au sein de l'organisation, dérivée d'un Job.
     
@@ -101,7 +187,11 @@ class Position(models.Model):
         status (str): État actuel du poste (vacant, occupé, en transition)
         start_date (date): Date de prise de poste ou date de début de la vacance
         employee (Employee, optional): L'employé occupant actuellement le poste, si la position est occupée
+        last_updated (datetime): Date de dernière modification (synchronisation incrémentale)
+        version (int): Incrémentée à chaque enregistrement (verrouillage optimiste des affectations)
     """
+    custom_field_model_type = 'position'
+
     class Status(models.TextChoices):
         VACANT = 'VACANT', 'Vacant' 
         OCCUPIED = 'OCCUPIED', 'Occupied'
@@ -115,6 +205,15 @@ class Position(models.Model):
         default=Status.VACANT
     )
     start_date = models.DateField(default=timezone.now)
+    employee = models.ForeignKey(
+        'Employee',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='positions'
+    )
+    last_updated = models.DateTimeField(auto_now=True, db_index=True)
+    version = models.PositiveIntegerField(default=0, editable=False)
     
     # Champs personnalisés fixes
     custom_field1 = models.CharField(max_length=255, blank=True, null=True)
@@ -133,14 +232,19 @@ class Position(models.Model):
     custom_field4_label = models.CharField(max_length=100, default="Champ personnalisé 4")
     custom_field4_visible = models.BooleanField(default=False)
     
-    # La référence à Employee sera ajoutée après la définition de la classe Employee
-    # pour éviter les références circulaires
-
     def __str__(self):
         status_display = f"({self.get_status_display()})"
         return f"{self.job.title} at {self.location} {status_display}"
 
-class Employee(models.Model):
+    def save(self, *args, **kwargs):
+        """Enregistre la position en incrémentant sa version (voir `jobs.assignment`)."""
+        self.version += 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'version' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'version']
+        super().save(*args, **kwargs)
+
+class Employee(CustomFieldsModel):
     """
     Représente un employé de l'organisation avec ses informations personnelles et professionnelles.
     
@@ -160,6 +264,8 @@ class Employee(models.Model):
         resume (str, optional): Lien vers le document du CV ou un résumé des compétences
         last_updated (datetime): Date de la dernière mise à jour des informations du profil
     """
+    custom_field_model_type = 'employee'
+
     class EmploymentStatus(models.TextChoices):
         ACTIVE = 'ACTIVE', 'Actif'
         ON_LEAVE = 'ON_LEAVE', 'En congé'
@@ -180,7 +286,7 @@ class Employee(models.Model):
     )
     profile_picture = models.URLField(blank=True, null=True)
     resume = models.URLField(blank=True, null=True)
-    last_updated = models.DateTimeField(auto_now=True)
+    last_updated = models.DateTimeField(auto_now=True, db_index=True)
     
     # Champs personnalisés fixes
     custom_field1 = models.CharField(max_length=255, blank=True, null=True)
@@ -218,15 +324,6 @@ class Employee(models.Model):
         evaluation = self.get_evaluation_for_skill(skill_id)
         return evaluation.quantitative_level if evaluation else 0
 
-# Maintenant que Employee est défini, nous pouvons ajouter la référence à Employee dans Position
-Position.employee = models.ForeignKey(
-    Employee,
-    on_delete=models.SET_NULL,
-    null=True,
-    blank=True,
-    related_name='positions'
-)
-
 class EmployeeSkill(models.Model):
     """
     Représente l'association entre un employé et une compétence qu'il possède.
@@ -253,7 +350,7 @@ class EmployeeSkill(models.Model):
     skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='employees')
     proficiency_level = models.IntegerField(choices=PROFICIENCY_CHOICES)
     date_acquired = models.DateField()
-    last_updated = models.DateTimeField(auto_now=True)
+    last_updated = models.DateTimeField(auto_now=True, db_index=True)
     
     class Meta:
         unique_together = ('employee', 'skill')
@@ -302,6 +399,12 @@ class PositionSkill(models.Model):
         return f"{self.position} - {self.skill} (Importance: {importance}, {required})"
 
 class Evaluation(models.Model):
+    """
+    Évaluation courante d'une compétence pour un employé.
+
+    Chaque enregistrement ajoute une ligne à `EvaluationHistory` dans la même
+    transaction : ce modèle ne conserve que la dernière valeur.
+    """
     LEVEL_CHOICES = [
         (1, 'Débutant'),
         (2, 'Intermédiaire'),
@@ -315,7 +418,8 @@ class Evaluation(models.Model):
     quantitative_level = models.IntegerField(choices=LEVEL_CHOICES, default=1)
     qualitative_description = models.TextField(blank=True, null=True)
     evaluated_by = models.ForeignKey('Employee', on_delete=models.SET_NULL, null=True, related_name='evaluations_given')
-    evaluation_date = models.DateField(auto_now_add=True)
+    evaluation_date = models.DateField(auto_now=True)
+    last_updated = models.DateTimeField(auto_now=True, db_index=True)
     
     class Meta:
         unique_together = ('employee', 'skill')
@@ -324,6 +428,19 @@ class Evaluation(models.Model):
     
     def __str__(self):
         return f"{self.employee} - {self.skill} - Niveau {self.quantitative_level}"
+
+    def save(self, *args, **kwargs):
+        """Enregistre l'évaluation courante et l'ajoute à l'historique."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            EvaluationHistory.objects.create(
+                employee_id=self.employee_id,
+                skill_id=self.skill_id,
+                quantitative_level=self.quantitative_level,
+                qualitative_description=self.qualitative_description,
+                evaluated_by_id=self.evaluated_by_id,
+                evaluation_date=self.evaluation_date
+            )
     
     @property
     def qualitative_level(self):
@@ -332,3 +449,583 @@ class Evaluation(models.Model):
             if level == self.quantitative_level:
                 return description
         return None
+
+
+class EvaluationHistoryQuerySet(models.QuerySet):
+    def as_of(self, date):
+        """
+        Retourne, pour chaque couple (employé, compétence), la dernière
+        évaluation connue à la date donnée.
+        """
+        latest = self.model.objects.filter(
+            employee_id=OuterRef('employee_id'),
+            skill_id=OuterRef('skill_id'),
+            evaluation_date__lte=date
+        ).order_by('-evaluation_date', '-id').values('id')[:1]
+        return self.filter(evaluation_date__lte=date, id=Subquery(latest))
+
+
+class EvaluationHistory(models.Model):
+    """
+    Historique append-only des évaluations de compétences.
+
+    Une ligne est ajoutée à chaque enregistrement d'une `Evaluation` ; les lignes
+    ne sont jamais modifiées. L'index (employé, compétence, date) permet de
+    répondre aux requêtes de tendance et "à date" par simple parcours d'index.
+
+    Attributes:
+        employee (Employee): L'employé évalué
+        skill (Skill): La compétence évaluée
+        quantitative_level (int): Niveau attribué (1-5)
+        qualitative_description (text): Commentaire de l'évaluateur
+        evaluated_by (Employee, optional): L'évaluateur
+        evaluation_date (date): Date de l'évaluation
+        recorded_at (datetime): Date d'insertion dans l'historique
+    """
+    employee = models.ForeignKey('Employee', on_delete=models.CASCADE, related_name='evaluation_history')
+    skill = models.ForeignKey('Skill', on_delete=models.CASCADE, related_name='evaluation_history')
+    quantitative_level = models.IntegerField(choices=Evaluation.LEVEL_CHOICES)
+    qualitative_description = models.TextField(blank=True, null=True)
+    evaluated_by = models.ForeignKey('Employee', on_delete=models.SET_NULL, null=True, related_name='evaluation_history_given')
+    evaluation_date = models.DateField(default=timezone.localdate)
+    recorded_at = models.DateTimeField(auto_now_add=True)
+
+    objects = EvaluationHistoryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['employee', 'skill', 'evaluation_date'], name='evalhist_emp_skill_date_idx'),
+        ]
+        verbose_name = 'Historique d\'évaluation'
+        verbose_name_plural = 'Historique des évaluations'
+
+    def __str__(self):
+        return f"{self.employee} - {self.skill} - Niveau {self.quantitative_level} ({self.evaluation_date})"
+
+
+class Task(models.Model):
+    """
+    Tâche de fond exécutée par le worker (`python manage.py run_worker`).
+
+    La file d'attente est stockée en base : aucune dépendance à Redis ou Celery.
+    Les traitements longs (recalculs, reconstructions d'index, exports) sont
+    mis en file par `jobs.tasks.enqueue` et ne pèsent plus sur la latence des requêtes.
+
+    Attributes:
+        name (str): Nom du traitement enregistré (voir `jobs.tasks.register_task`)
+        payload (dict): Arguments passés au traitement
+        status (str): Statut de la tâche (en attente, en cours, terminée, en échec)
+        result (json, optional): Valeur renvoyée par le traitement
+        error (text): Dernière erreur rencontrée
+        attempts (int): Nombre de tentatives déjà effectuées
+        max_attempts (int): Nombre maximal de tentatives avant l'échec définitif
+        run_after (datetime): Date avant laquelle la tâche ne doit pas être exécutée
+        locked_by (str): Identifiant du worker qui exécute la tâche
+        locked_at (datetime, optional): Date de prise en charge par le worker
+        created_at (datetime): Date de mise en file
+        finished_at (datetime, optional): Date de fin d'exécution
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'En attente'
+        RUNNING = 'RUNNING', 'En cours'
+        SUCCEEDED = 'SUCCEEDED', 'Terminée'
+        FAILED = 'FAILED', 'En échec'
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Sélection des tâches prêtes par le worker
+            models.Index(fields=['status', 'run_after'], name='task_status_run_after_idx'),
+        ]
+        ordering = ['-created_at']
+        verbose_name = 'Tâche de fond'
+        verbose_name_plural = 'Tâches de fond'
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.get_status_display()})"
+
+
+class DirtyKey(models.Model):
+    """
+    Clé (identifiant d'employé, de position, de compétence...) en attente d'un
+    recalcul en tâche de fond (voir `jobs.recompute`).
+
+    Une clé n'est enregistrée qu'une fois par traitement : les modifications
+    successives d'un même objet sont fusionnées en un seul recalcul.
+
+    Attributes:
+        handler (str): Nom du traitement de recalcul
+        key (int): Identifiant de l'objet à recalculer
+    """
+    handler = models.CharField(max_length=150)
+    key = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['handler', 'key'], name='dirtykey_handler_key_unique'),
+        ]
+        verbose_name = 'Clé à recalculer'
+        verbose_name_plural = 'Clés à recalculer'
+
+    def __str__(self):
+        return f"{self.handler}: {self.key}"
+
+
+class CustomField(models.Model):
+    """
+    Définition d'un champ personnalisé pour un type de modèle.
+
+    Le libellé, le type et les options sont stockés une seule fois par champ ;
+    les valeurs sont stockées typées dans `CustomFieldValue`.
+
+    Attributes:
+        name (str): Nom du champ (ex: "Niveau de responsabilité")
+        field_type (str): Type de champ (texte, nombre, date, booléen, sélection)
+        model_type (str): Type de modèle auquel le champ s'applique
+        description (text): Description du champ
+        required (bool): Indique si le champ est obligatoire
+        options (text): Options séparées par des virgules (pour le type sélection)
+        visible (bool): Indique si le champ est renvoyé par l'API
+    """
+    class FieldType(models.TextChoices):
+        TEXT = 'text', 'Texte'
+        NUMBER = 'number', 'Nombre'
+        DATE = 'date', 'Date'
+        BOOLEAN = 'boolean', 'Booléen'
+        SELECT = 'select', 'Sélection'
+
+    class ModelType(models.TextChoices):
+        JOB = 'job', 'Emploi'
+        POSITION = 'position', 'Poste'
+        EMPLOYEE = 'employee', 'Employé'
+        SKILL = 'skill', 'Compétence'
+        JOB_FAMILY = 'job_family', 'Famille de métiers'
+
+    # Colonne typée de CustomFieldValue utilisée par chaque type de champ
+    VALUE_COLUMNS = {
+        FieldType.TEXT: 'value_text',
+        FieldType.SELECT: 'value_text',
+        FieldType.NUMBER: 'value_number',
+        FieldType.DATE: 'value_date',
+        FieldType.BOOLEAN: 'value_boolean',
+    }
+    TRUE_VALUES = {'true', '1', 'oui', 'yes'}
+    FALSE_VALUES = {'false', '0', 'non', 'no'}
+
+    name = models.CharField(max_length=100, verbose_name='Nom')
+    field_type = models.CharField(max_length=20, choices=FieldType.choices, verbose_name='Type de champ')
+    model_type = models.CharField(max_length=50, choices=ModelType.choices, verbose_name='Type de modèle')
+    description = models.TextField(blank=True, verbose_name='Description')
+    required = models.BooleanField(default=False, verbose_name='Obligatoire')
+    options = models.TextField(blank=True, verbose_name='Options',
+                               help_text="Options séparées par des virgules (pour type 'select')")
+    visible = models.BooleanField(default=True, verbose_name='Visible')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['model_type', 'name'], name='customfield_model_type_name_unique'),
+        ]
+        ordering = ['model_type', 'name']
+        verbose_name = 'Champ personnalisé'
+        verbose_name_plural = 'Champs personnalisés'
+
+    def __str__(self):
+        return f"{self.name} ({self.get_model_type_display()})"
+
+    @property
+    def value_column(self):
+        return self.VALUE_COLUMNS[self.field_type]
+
+    def target_model(self):
+        """Modèle auquel s'applique le champ (sous-classe de `CustomFieldsModel`)."""
+        return custom_fields_models().get(self.model_type)
+
+    @property
+    def option_list(self):
+        return [option.strip() for option in self.options.split(',') if option.strip()]
+
+    def to_python(self, value):
+        """
+        Convertit une valeur (éventuellement textuelle, ex: paramètre d'URL) dans le type du champ.
+
+        Raises:
+            ValueError: si la valeur ne correspond pas au type du champ
+        """
+        if value is None:
+            return None
+        if self.field_type == self.FieldType.NUMBER:
+            if isinstance(value, bool):
+                raise ValueError(f"{self.name} : nombre attendu")
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{self.name} : nombre attendu")
+        if self.field_type == self.FieldType.DATE:
+            if isinstance(value, datetime):
+                return value.date()
+            if isinstance(value, date):
+                return value
+            parsed = parse_date(str(value))
+            if parsed is None:
+                raise ValueError(f"{self.name} : date AAAA-MM-JJ attendue")
+            return parsed
+        if self.field_type == self.FieldType.BOOLEAN:
+            if isinstance(value, bool):
+                return value
+            if str(value).lower() in self.TRUE_VALUES:
+                return True
+            if str(value).lower() in self.FALSE_VALUES:
+                return False
+            raise ValueError(f"{self.name} : booléen attendu")
+        value = str(value)
+        if len(value) > 255:
+            raise ValueError(f"{self.name} : 255 caractères au maximum")
+        return value
+
+    def value_columns(self, value):
+        """Colonnes de `CustomFieldValue` à enregistrer pour une valeur (les autres sont vidées)."""
+        value = self.to_python(value)
+        if self.field_type == self.FieldType.SELECT and value is not None and value not in self.option_list:
+            raise ValueError(f"{self.name} : valeur hors des options ({self.options})")
+        columns = dict.fromkeys(set(self.VALUE_COLUMNS.values()))
+        columns[self.value_column] = value
+        return columns
+
+
+class CustomFieldValue(models.Model):
+    """
+    Valeur typée d'un champ personnalisé pour un objet.
+
+    Chaque type est stocké dans sa propre colonne, indexée avec le champ :
+    un filtre `?cf.<nom>=` est résolu par un parcours d'index (champ, valeur).
+
+    Attributes:
+        custom_field (CustomField): Définition du champ
+        content_type / object_id: Objet auquel appartient la valeur
+        value_text (str, optional): Valeur des champs texte et sélection
+        value_number (float, optional): Valeur des champs nombre
+        value_date (date, optional): Valeur des champs date
+        value_boolean (bool, optional): Valeur des champs booléens
+    """
+    custom_field = models.ForeignKey(CustomField, on_delete=models.CASCADE, related_name='values',
+                                     verbose_name='Champ personnalisé')
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    value_text = models.CharField(max_length=255, null=True, blank=True)
+    value_number = models.FloatField(null=True, blank=True)
+    value_date = models.DateField(null=True, blank=True)
+    value_boolean = models.BooleanField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['custom_field', 'content_type', 'object_id'],
+                                    name='customfieldvalue_field_object_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['custom_field', 'value_text'], name='cfvalue_field_text_idx'),
+            models.Index(fields=['custom_field', 'value_number'], name='cfvalue_field_number_idx'),
+            models.Index(fields=['custom_field', 'value_date'], name='cfvalue_field_date_idx'),
+            models.Index(fields=['custom_field', 'value_boolean'], name='cfvalue_field_boolean_idx'),
+            models.Index(fields=['content_type', 'object_id'], name='cfvalue_object_idx'),
+        ]
+        verbose_name = 'Valeur de champ personnalisé'
+        verbose_name_plural = 'Valeurs de champs personnalisés'
+
+    def __str__(self):
+        return f"{self.custom_field.name}: {self.value}"
+
+    @property
+    def value(self):
+        return getattr(self, self.custom_field.value_column)
+
+
+class SkillInventory(models.Model):
+    """
+    Agrégat de l'offre et de la demande de compétences, par compétence, niveau,
+    site et famille de métiers (voir `jobs.skill_inventory`).
+
+    - `SUPPLY` : employés déclarant la compétence (`EmployeeSkill`, niveau de maîtrise)
+    - `EVALUATED` : employés évalués sur la compétence (`Evaluation`, niveau quantitatif)
+    - `DEMAND` : positions requérant la compétence (`PositionSkill`, niveau d'importance)
+
+    Le site et la famille de métiers sont ceux de la position (position actuelle
+    pour les employés) ; un employé sans position est compté sans site ni famille.
+
+    Attributes:
+        kind (str): Offre déclarée, offre évaluée ou demande
+        skill (Skill): Compétence
+        level (int): Niveau (maîtrise, évaluation ou importance selon `kind`)
+        location (str): Site (vide si inconnu)
+        job_family (JobFamily, optional): Famille de métiers
+        count (int): Nombre d'employés (offre) ou de positions (demande)
+        weight (int): Somme des niveaux d'importance (demande), égal à `count` pour l'offre
+    """
+    class Kind(models.TextChoices):
+        SUPPLY = 'SUPPLY', 'Compétences déclarées'
+        EVALUATED = 'EVALUATED', 'Compétences évaluées'
+        DEMAND = 'DEMAND', 'Besoins des positions'
+
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='inventory')
+    level = models.PositiveSmallIntegerField()
+    location = models.CharField(max_length=100, blank=True)
+    job_family = models.ForeignKey(JobFamily, on_delete=models.CASCADE, null=True, blank=True,
+                                   related_name='skill_inventory')
+    count = models.IntegerField(default=0)
+    weight = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'skill', 'level', 'location', 'job_family'],
+                                    name='skillinventory_cell_unique'),
+            # Les NULL sont distincts dans la contrainte précédente : cellules sans famille de métiers
+            models.UniqueConstraint(fields=['kind', 'skill', 'level', 'location'],
+                                    condition=models.Q(job_family__isnull=True),
+                                    name='skillinventory_cell_no_family_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['skill', 'level'], name='skillinventory_skill_idx'),
+            models.Index(fields=['location', 'skill'], name='skillinventory_location_idx'),
+            models.Index(fields=['job_family', 'skill'], name='skillinventory_family_idx'),
+        ]
+        verbose_name = 'Inventaire des compétences'
+        verbose_name_plural = 'Inventaire des compétences'
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.skill} niveau {self.level} ({self.location or '-'}): {self.count}"
+
+
+class ChangeEvent(models.Model):
+    """
+    Événement du flux des modifications (outbox), diffusé aux clients en
+    Server-Sent Events (voir `jobs.changefeed`).
+
+    L'événement est enregistré dans la transaction de la modification : il n'est
+    visible qu'après son commit. L'identifiant croissant sert de curseur de reprise.
+
+    Attributes:
+        topic (str): Type d'objet modifié
+        action (str): Création, modification, suppression ou affectation
+        object_id (int): Identifiant de l'objet modifié
+        employee_id (int, optional): Employé concerné (filtrage des abonnements)
+        data (dict): Champs utiles au client (compétence, niveau, statut...)
+        created_at (datetime): Date de l'événement
+    """
+    class Topic(models.TextChoices):
+        EVALUATION = 'evaluation', 'Évaluation'
+        EMPLOYEE_SKILL = 'employee_skill', 'Compétence d\'employé'
+        POSITION = 'position', 'Position'
+
+    class Action(models.TextChoices):
+        CREATED = 'created', 'Création'
+        UPDATED = 'updated', 'Modification'
+        DELETED = 'deleted', 'Suppression'
+        ASSIGNED = 'assigned', 'Affectation'
+
+    topic = models.CharField(max_length=20, choices=Topic.choices)
+    action = models.CharField(max_length=10, choices=Action.choices)
+    object_id = models.BigIntegerField()
+    employee_id = models.BigIntegerField(null=True, blank=True)
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Événement du flux des modifications'
+        verbose_name_plural = 'Événements du flux des modifications'
+
+    def __str__(self):
+        return f"#{self.id} {self.topic} {self.object_id} {self.action}"
+
+    def as_message(self):
+        """Représentation compacte envoyée aux clients."""
+        return {
+            'id': self.id,
+            'topic': self.topic,
+            'action': self.action,
+            'object_id': self.object_id,
+            'employee': self.employee_id,
+            'data': self.data,
+            'created_at': self.created_at.isoformat(),
+        }
+
+
+class Tombstone(models.Model):
+    """
+    Trace de la suppression d'un objet, pour la synchronisation incrémentale
+    (`?updated_since=` des listes de l'API, voir `jobs.tombstones`).
+
+    Les traces plus anciennes que `DELTA_SYNC_RETENTION` sont supprimées : au-delà,
+    un client doit se resynchroniser entièrement.
+
+    Attributes:
+        model (str): Type de l'objet supprimé
+        object_id (int): Identifiant de l'objet supprimé
+        deleted_at (datetime): Date de la suppression
+    """
+    class Model(models.TextChoices):
+        EMPLOYEE = 'employee', 'Employé'
+        EMPLOYEE_SKILL = 'employee_skill', 'Compétence d\'employé'
+        EVALUATION = 'evaluation', 'Évaluation'
+        POSITION = 'position', 'Position'
+
+    model = models.CharField(max_length=20, choices=Model.choices)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['model', 'deleted_at'], name='tombstone_model_deleted'),
+        ]
+        verbose_name = 'Trace de suppression'
+        verbose_name_plural = 'Traces de suppression'
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} supprimé le {self.deleted_at}"
+
+
+class Successor(models.Model):
+    """
+    Successeur interne d'une position occupée, calculé par le traitement de nuit
+    `compute_successors` (voir `jobs.succession`).
+
+    Attributes:
+        position (Position): Position occupée
+        employee (Employee): Employé successeur (hors titulaire)
+        rank (int): Rang du successeur (1 = meilleur)
+        score (float): Adéquation aux compétences de la position (0 à 100)
+        missing_required (int): Nombre de compétences obligatoires sous le niveau demandé
+        computed_at (datetime): Date du calcul
+    """
+    position = models.ForeignKey(Position, on_delete=models.CASCADE, related_name='successors')
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='succession_candidacies')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    missing_required = models.PositiveSmallIntegerField(default=0)
+    computed_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['position', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['position', 'rank'], name='successor_position_rank_unique'),
+            models.UniqueConstraint(fields=['position', 'employee'], name='successor_position_employee_unique'),
+        ]
+        verbose_name = 'Successeur'
+        verbose_name_plural = 'Successeurs'
+
+    def __str__(self):
+        return f"{self.position} - {self.rank}. {self.employee}"
+
+
+class BatchCheckpoint(models.Model):
+    """
+    Point de reprise d'un traitement par lots : un traitement interrompu reprend
+    après le dernier lot validé.
+
+    Attributes:
+        name (str): Nom du traitement
+        cursor (int): Dernier identifiant traité
+        processed (int): Nombre d'objets traités
+        rows (int): Nombre de lignes écrites
+        params (dict): Paramètres du traitement (une reprise exige les mêmes)
+        started_at (datetime): Début du traitement
+        updated_at (datetime): Date du dernier lot validé
+        completed_at (datetime, optional): Fin du traitement
+    """
+    name = models.CharField(max_length=100, unique=True)
+    cursor = models.BigIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    rows = models.PositiveIntegerField(default=0)
+    params = models.JSONField(default=dict, blank=True)
+    started_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Point de reprise'
+        verbose_name_plural = 'Points de reprise'
+
+    def __str__(self):
+        state = 'terminé' if self.completed_at else f"repris après {self.cursor}"
+        return f"{self.name} ({state})"
+
+
+class SkillClosure(models.Model):
+    """
+    Table de fermeture de la taxonomie des compétences : une ligne par couple
+    (ancêtre, descendant), y compris chaque compétence avec elle-même (profondeur 0).
+
+    Les sous-compétences d'une compétence ou ses ancêtres se lisent en une seule
+    jointure indexée, sans requête récursive. La table est maintenue à chaque
+    création, déplacement ou suppression de compétence (voir `jobs.skill_hierarchy`).
+
+    Attributes:
+        ancestor (Skill): Compétence ancêtre
+        descendant (Skill): Compétence descendante
+        depth (int): Distance entre les deux compétences (0 = même compétence)
+    """
+    ancestor = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='skillclosure_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'ancestor'], name='skillclosure_descendant'),
+        ]
+        verbose_name = 'Lien de la taxonomie des compétences'
+        verbose_name_plural = 'Liens de la taxonomie des compétences'
+
+    def __str__(self):
+        return f"{self.ancestor} > {self.descendant} ({self.depth})"
+
+
+class SearchDocument(models.Model):
+    """
+    Document de l'index de similarité : emploi (titre et description), famille
+    de métiers ou compétence (nom et description), réduit à ses fréquences de termes.
+
+    Mis à jour à chaque enregistrement de l'objet source ; les vecteurs TF-IDF
+    normalisés sont calculés en mémoire par `jobs.similarity`.
+
+    Attributes:
+        kind (str): Type d'objet source
+        object_id (int): Identifiant de l'objet source
+        terms (dict): Nombre d'occurrences de chaque terme
+        updated_at (datetime): Date de dernière mise à jour
+    """
+    class Kind(models.TextChoices):
+        JOB = 'job', 'Emploi'
+        JOB_FAMILY = 'job_family', 'Famille de métiers'
+        SKILL = 'skill', 'Compétence'
+
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    object_id = models.BigIntegerField()
+    terms = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='searchdocument_object_unique'),
+        ]
+        verbose_name = 'Document de recherche'
+        verbose_name_plural = 'Documents de recherche'
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.object_id}"
@@ -0,0 +1,196 @@
+"""
+Déclenchement groupé des recalculs de données dérivées (scores, agrégats, caches).
+
+Les signaux ne recalculent plus à chaque enregistrement : ils marquent des clés
+"sales" avec `mark_dirty(kind, keys)` (kind = 'employee', 'position', 'skill').
+Les clés sont fusionnées puis transmises en une seule fois aux traitements
+enregistrés pour ce type de clé :
+
+- dans une transaction, au commit (`transaction.on_commit`) ; un rollback les abandonne ;
+- dans une portée `coalesce()` (chaque requête HTTP via `RecomputeMiddleware`),
+  à la sortie de la portée ;
+- sinon, immédiatement.
+
+Un traitement enregistré avec `background=True` n'est pas exécuté dans la
+requête : ses clés sont stockées dans `DirtyKey` et une tâche de fond unique
+est planifiée après `RECOMPUTE_DEBOUNCE_SECONDS` ; toutes les clés marquées
+pendant cette fenêtre sont traitées par un seul appel.
+"""
+import contextvars
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import DirtyKey, Task
+from .tasks import enqueue, register_task
+
+DEFAULT_DEBOUNCE_SECONDS = 5
+
+RECOMPUTE_TASK = 'jobs.recompute'
+
+# {kind: {nom du traitement: (fonction, en tâche de fond)}}
+RECOMPUTE_HANDLERS = {}
+
+_scope = contextvars.ContextVar('recompute_scope', default=None)
+
+
+def register_recompute(kind, background=False):
+    """
+    Décorateur enregistrant un traitement de recalcul pour un type de clé.
+
+    Le traitement reçoit l'ensemble des clés modifiées.
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__name__}"
+        RECOMPUTE_HANDLERS.setdefault(kind, {})[name] = (func, background)
+        return func
+    return decorator
+
+
+class DirtyKeys:
+    """Clés sales accumulées, par type de clé."""
+
+    def __init__(self):
+        self.keys = {}
+
+    def add(self, kind, keys):
+        self.keys.setdefault(kind, set()).update(keys)
+
+    def merge(self, other):
+        for kind, keys in other.items():
+            self.add(kind, keys)
+
+    def flush(self):
+        keys, self.keys = self.keys, {}
+        dispatch(keys)
+
+
+class TransactionKeys(DirtyKeys):
+    """
+    Clés marquées dans la transaction en cours d'une connexion.
+
+    Chaque appel à `mark_dirty` enregistre son propre `transaction.on_commit`,
+    que Django abandonne si son point de sauvegarde ou la transaction est annulé ;
+    les rappels conservés ajoutent leurs clés à cet objet. Un `TransactionFlush`
+    enregistré après eux, sans point de sauvegarde, transmet ensuite toutes les
+    clés en une seule fois.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.flusher = None
+
+    def flush_on_commit(self, connection):
+        self.flusher = TransactionFlush(self)
+        # Entrée de `run_on_commit` : (points de sauvegarde, rappel, robuste)
+        connection.run_on_commit.append((set(), self.flusher, False))
+
+
+class TransactionFlush:
+    """Rappel de commit transmettant les clés d'une transaction ; seul le dernier enregistré agit."""
+
+    def __init__(self, pending):
+        self.pending = pending
+
+    def __call__(self):
+        if self.pending.flusher is self:
+            self.pending.flush()
+
+
+def transaction_keys(connection):
+    """Clés de la transaction en cours de la connexion (retrouvées depuis ses rappels de commit)."""
+    for _, func, _ in reversed(connection.run_on_commit):
+        if isinstance(func, TransactionFlush):
+            return func.pending
+    return TransactionKeys()
+
+
+def mark_dirty(kind, keys):
+    """Signale que les données dérivées des clés données doivent être recalculées."""
+    if kind not in RECOMPUTE_HANDLERS:
+        return
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        pending = transaction_keys(connection)
+        transaction.on_commit(partial(pending.add, kind, set(keys)))
+        pending.flush_on_commit(connection)
+        return
+
+    scope = _scope.get()
+    if scope is not None:
+        scope.add(kind, keys)
+    else:
+        dispatch({kind: set(keys)})
+
+
+def dispatch(dirty):
+    """Transmet les clés aux traitements (ou à la portée `coalesce()` en cours)."""
+    scope = _scope.get()
+    if scope is not None:
+        scope.merge(dirty)
+        return
+    for kind, keys in dirty.items():
+        if not keys:
+            continue
+        for name, (func, background) in RECOMPUTE_HANDLERS.get(kind, {}).items():
+            if background:
+                schedule(name, keys)
+            else:
+                func(keys)
+
+
+@contextmanager
+def coalesce():
+    """Regroupe les recalculs déclenchés dans le bloc en un seul appel par traitement."""
+    if _scope.get() is not None:
+        yield
+        return
+    scope = DirtyKeys()
+    token = _scope.set(scope)
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+        scope.flush()
+
+
+def schedule(name, keys):
+    """Enregistre les clés d'un traitement de fond et planifie son exécution (une tâche en attente au plus)."""
+    DirtyKey.objects.bulk_create(
+        [DirtyKey(handler=name, key=key) for key in keys],
+        ignore_conflicts=True
+    )
+    if not Task.objects.filter(name=RECOMPUTE_TASK, status=Task.Status.PENDING, payload__handler=name).exists():
+        debounce = getattr(settings, 'RECOMPUTE_DEBOUNCE_SECONDS', DEFAULT_DEBOUNCE_SECONDS)
+        enqueue(RECOMPUTE_TASK, {'handler': name}, delay=timedelta(seconds=debounce))
+
+
+@register_task(RECOMPUTE_TASK)
+def run_recompute(handler):
+    """Tâche de fond : recalcule toutes les clés en attente d'un traitement."""
+    handlers = {name: func for kind_handlers in RECOMPUTE_HANDLERS.values()
+                for name, (func, _) in kind_handlers.items()}
+    if handler not in handlers:
+        raise LookupError(f"Traitement de recalcul inconnu : {handler}")
+    rows = list(DirtyKey.objects.filter(handler=handler).values_list('id', 'key'))
+    if not rows:
+        return {'keys': 0}
+    # La tâche s'exécute dans une transaction : en cas d'échec, les clés sont restaurées.
+    # Les clés marquées pendant le recalcul ont un identifiant supérieur et restent en attente.
+    DirtyKey.objects.filter(handler=handler, id__lte=max(row_id for row_id, _ in rows)).delete()
+    handlers[handler]({key for _, key in rows})
+    return {'keys': len(rows)}
+
+
+class RecomputeMiddleware:
+    """Regroupe les recalculs déclenchés pendant une requête HTTP."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with coalesce():
+            return self.get_response(request)
@@ -0,0 +1,234 @@
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import EmployeeSkill, Evaluation, PositionSkill, Employee, Position, Job, JobFamily, Skill, SkillInventory, ChangeEvent
+from .changefeed import publish
+from .recompute import mark_dirty
+from .similarity import index_object, invalidate_similarity_index, search_index_enabled, unindex_object
+from .skill_dedupe import normalize_skill_name
+from .skill_extraction import invalidate_skill_automaton
+from .skill_hierarchy import check_parent, skill_created, skill_deleted, skill_moved
+from .skill_inventory import SOURCE_KINDS, apply_tracked, inventory_enabled, track
+from .tombstones import record_deletion
+from . import skill_stats  # noqa: F401  (enregistre les recalculs par compétence)
+
+
+@receiver([post_save, post_delete], sender=EmployeeSkill)
+def employee_skill_changed(sender, instance, **kwargs):
+    """Marque la compétence modifiée (comptes par niveau) et l'employé à recalculer."""
+    mark_dirty('skill', [instance.skill_id])
+    mark_dirty('employee', [instance.employee_id])
+
+
+@receiver([post_save, post_delete], sender=Evaluation)
+def evaluation_changed(sender, instance, **kwargs):
+    """Marque l'employé évalué à recalculer (une seule fois par transaction)."""
+    mark_dirty('employee', [instance.employee_id])
+
+
+# Champs déterminant le site et la famille de métiers des lignes de l'inventaire des compétences
+INVENTORY_DIMENSIONS = {
+    Employee: ['current_position'],
+    Position: ['location', 'job'],
+    Job: ['job_family'],
+}
+
+
+@receiver([post_save, post_delete], sender=EmployeeSkill)
+def publish_employee_skill_change(sender, instance, created=False, **kwargs):
+    """Publie la modification dans le flux des modifications."""
+    if kwargs.get('raw'):
+        return
+    action = ChangeEvent.Action.CREATED if created else ChangeEvent.Action.UPDATED
+    if kwargs['signal'] is post_delete:
+        action = ChangeEvent.Action.DELETED
+    publish(ChangeEvent.Topic.EMPLOYEE_SKILL, action, instance.pk, instance.employee_id,
+            skill=instance.skill_id, level=instance.proficiency_level)
+
+
+@receiver([post_save, post_delete], sender=Evaluation)
+def publish_evaluation_change(sender, instance, created=False, **kwargs):
+    """Publie la modification dans le flux des modifications."""
+    if kwargs.get('raw'):
+        return
+    action = ChangeEvent.Action.CREATED if created else ChangeEvent.Action.UPDATED
+    if kwargs['signal'] is post_delete:
+        action = ChangeEvent.Action.DELETED
+    publish(ChangeEvent.Topic.EVALUATION, action, instance.pk, instance.employee_id,
+            skill=instance.skill_id, level=instance.quantitative_level)
+
+
+def changed_fields(instance, fields):
+    """Champs dont la valeur enregistrée en base diffère de celle de l'instance."""
+    if instance._state.adding or instance.pk is None:
+        return set()
+    stored = type(instance).objects.filter(pk=instance.pk).values(*fields).first()
+    if stored is None:
+        return set()
+    return {field for field in fields if stored[field] != getattr(instance, instance._meta.get_field(field).attname)}
+
+
+def inventory_scopes_for_save(instance, update_fields):
+    """Lignes de l'inventaire des compétences affectées par l'enregistrement d'un objet."""
+    if type(instance) in SOURCE_KINDS:
+        return [(SOURCE_KINDS[type(instance)], None)]
+
+    # Changement de site ou de famille de métiers de lignes existantes
+    dimensions = INVENTORY_DIMENSIONS[type(instance)]
+    if update_fields is not None:
+        dimensions = [field for field in dimensions
+                      if field in update_fields or instance._meta.get_field(field).attname in update_fields]
+    if not dimensions or not changed_fields(instance, dimensions):
+        return []
+    if isinstance(instance, Employee):
+        filters = {'employee': instance.pk}
+        return [(SkillInventory.Kind.SUPPLY, filters), (SkillInventory.Kind.EVALUATED, filters)]
+    position = 'position' if isinstance(instance, Position) else 'position__job'
+    current_position = 'employee__current_position' if isinstance(instance, Position) else 'employee__current_position__job'
+    return [
+        (SkillInventory.Kind.DEMAND, {position: instance.pk}),
+        (SkillInventory.Kind.SUPPLY, {current_position: instance.pk}),
+        (SkillInventory.Kind.EVALUATED, {current_position: instance.pk}),
+    ]
+
+
+@receiver(pre_save, sender=EmployeeSkill)
+@receiver(pre_save, sender=Evaluation)
+@receiver(pre_save, sender=PositionSkill)
+@receiver(pre_save, sender=Employee)
+@receiver(pre_save, sender=Position)
+@receiver(pre_save, sender=Job)
+def inventory_before_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Relève la contribution à l'inventaire des compétences avant l'enregistrement."""
+    if raw or not inventory_enabled():
+        return
+    scopes = inventory_scopes_for_save(instance, update_fields)
+    if scopes:
+        track(instance, scopes)
+
+
+@receiver(post_save, sender=EmployeeSkill)
+@receiver(post_save, sender=Evaluation)
+@receiver(post_save, sender=PositionSkill)
+@receiver(post_save, sender=Employee)
+@receiver(post_save, sender=Position)
+@receiver(post_save, sender=Job)
+def inventory_after_save(sender, instance, raw=False, **kwargs):
+    """Met à jour l'inventaire des compétences par deltas."""
+    if raw or not inventory_enabled():
+        return
+    apply_tracked(instance)
+
+
+@receiver(pre_delete, sender=EmployeeSkill)
+@receiver(pre_delete, sender=Evaluation)
+@receiver(pre_delete, sender=PositionSkill)
+@receiver(pre_delete, sender=Position)
+def inventory_before_delete(sender, instance, **kwargs):
+    """
+    Relève la contribution à l'inventaire des compétences avant une suppression.
+
+    La suppression d'une position détache ses employés (SET_NULL, sans signal) :
+    leurs lignes passent sans site ni famille de métiers.
+    """
+    if not inventory_enabled():
+        return
+    if sender in SOURCE_KINDS:
+        track(instance, [(SOURCE_KINDS[sender], None)])
+        return
+    employee_ids = list(instance.current_employees.values_list('id', flat=True))
+    if employee_ids:
+        filters = {'employee__in': employee_ids}
+        track(instance, [(SkillInventory.Kind.SUPPLY, filters), (SkillInventory.Kind.EVALUATED, filters)])
+
+
+@receiver(post_delete, sender=EmployeeSkill)
+@receiver(post_delete, sender=Evaluation)
+@receiver(post_delete, sender=PositionSkill)
+@receiver(post_delete, sender=Position)
+def inventory_after_delete(sender, instance, **kwargs):
+    """Met à jour l'inventaire des compétences après une suppression."""
+    if not inventory_enabled():
+        return
+    apply_tracked(instance, deleted=True)
+
+
+@receiver(post_delete, sender=Employee)
+@receiver(post_delete, sender=EmployeeSkill)
+@receiver(post_delete, sender=Evaluation)
+@receiver(post_delete, sender=Position)
+def record_tombstone(sender, instance, **kwargs):
+    """Trace la suppression pour les clients synchronisés par `?updated_since=`."""
+    record_deletion(instance)
+
+
+@receiver(pre_delete, sender=Employee)
+@receiver(pre_delete, sender=Position)
+def touch_detached(sender, instance, **kwargs):
+    """
+    Date de modification des objets détachés par une suppression.
+
+    Le détachement (SET_NULL) se fait par `QuerySet.update`, qui ne met pas à jour `last_updated`.
+    """
+    if isinstance(instance, Employee):
+        Position.objects.filter(employee=instance).update(last_updated=timezone.now())
+    else:
+        Employee.objects.filter(current_position=instance).update(last_updated=timezone.now())
+
+
+@receiver(pre_save, sender=Skill)
+def skill_before_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Normalise le nom, refuse les cycles et relève un changement de compétence parente."""
+    if update_fields is None or 'name' in update_fields:
+        instance.normalized_name = normalize_skill_name(instance.name)
+    if raw or (update_fields is not None and 'parent' not in update_fields and 'parent_id' not in update_fields):
+        return
+    check_parent(instance.pk, instance.parent_id)
+    instance._skill_parent_changed = bool(changed_fields(instance, ['parent']))
+
+
+@receiver(post_save, sender=Skill)
+def skill_after_save(sender, instance, created, raw=False, **kwargs):
+    """Maintient la table de fermeture de la taxonomie des compétences et l'automate d'extraction."""
+    if raw:
+        return
+    invalidate_skill_automaton()
+    if created:
+        skill_created(instance)
+    elif instance.__dict__.pop('_skill_parent_changed', False):
+        skill_moved(instance)
+
+
+@receiver(pre_delete, sender=Skill)
+def skill_before_delete(sender, instance, **kwargs):
+    """Détache les sous-compétences de la compétence supprimée (elles deviennent des racines)."""
+    skill_deleted(instance)
+
+
+@receiver(post_delete, sender=Skill)
+def skill_after_delete(sender, instance, **kwargs):
+    """Retire la compétence supprimée de l'automate d'extraction."""
+    invalidate_skill_automaton()
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_save, sender=JobFamily)
+@receiver(post_save, sender=Skill)
+def update_search_document(sender, instance, raw=False, **kwargs):
+    """Met à jour le document de l'index de similarité."""
+    if raw or not search_index_enabled():
+        return
+    index_object(instance)
+    invalidate_similarity_index()
+
+
+@receiver(post_delete, sender=Job)
+@receiver(post_delete, sender=JobFamily)
+@receiver(post_delete, sender=Skill)
+def delete_search_document(sender, instance, **kwargs):
+    """Retire l'objet supprimé de l'index de similarité."""
+    if not search_index_enabled():
+        return
+    unindex_object(instance)
+    invalidate_similarity_index()
@@ -0,0 +1,318 @@
+"""
+Index de similarité TF-IDF sur les emplois, familles de métiers et compétences.
+
+Chaque objet source est réduit à ses fréquences de termes dans la table
+`SearchDocument`, mise à jour par les signaux à chaque enregistrement ou
+suppression. Chaque processus charge ces documents dans `SimilarityIndex` :
+vecteurs TF-IDF normalisés (norme L2) précalculés et listes inverses
+(terme → documents, poids) en tableaux compacts. Un cosinus se réduit alors
+au produit scalaire des vecteurs, accumulé sur les seules listes des termes
+de la requête, puis les k meilleurs scores sont extraits par un tas.
+
+L'index du processus est actualisé incrémentalement : au plus une fois par
+`SIMILARITY_CHECK_INTERVAL` secondes, les documents modifiés depuis la
+dernière lecture sont rechargés dans une couche de surcharge (avec l'IDF du
+dernier chargement complet). L'index est reconstruit quand un document a été
+supprimé ou quand la surcharge dépasse `MAX_OVERLAY` documents.
+
+Après un import de masse (`bulk_create`), `rebuild_search_documents()`
+(tâche `jobs.rebuild_search_documents`) recalcule la table.
+"""
+import contextvars
+import heapq
+import math
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+
+from .models import Job, JobFamily, SearchDocument, Skill
+from .skill_dedupe import STOP_WORDS as SKILL_STOP_WORDS
+from .tasks import register_task
+
+REBUILD_TASK = 'jobs.rebuild_search_documents'
+
+# Intervalle (secondes) entre deux vérifications des documents modifiés
+DEFAULT_CHECK_INTERVAL = 2
+
+# Documents modifiés au-delà desquels l'index du processus est reconstruit
+MAX_OVERLAY = 2000
+
+# Termes les plus pondérés d'un document utilisés pour chercher ses voisins
+SIMILAR_QUERY_TERMS = 30
+
+# Part maximale des documents contenant un terme pour qu'il serve à chercher des voisins
+# (les termes très fréquents ont un IDF faible mais les listes inverses les plus longues)
+SIMILAR_MAX_DF_RATIO = 0.05
+SIMILAR_MIN_DF = 1000
+
+# Marge de relecture des documents modifiés (transactions validées dans le désordre)
+REFRESH_MARGIN = timedelta(seconds=5)
+
+STOP_WORDS = SKILL_STOP_WORDS | frozenset({
+    'un', 'une', 'dans', 'sur', 'par', 'avec', 'sans', 'sous', 'entre', 'vers', 'chez', 'plus', 'moins',
+    'est', 'sont', 'etre', 'avoir', 'qui', 'que', 'quoi', 'dont', 'ou', 'ne', 'pas', 'ce', 'cet', 'cette',
+    'ces', 'son', 'sa', 'ses', 'leur', 'leurs', 'nous', 'vous', 'ils', 'elles', 'il', 'elle', 'on', 'se',
+    'tout', 'tous', 'toute', 'toutes', 'aussi', 'tres', 'bien', 'comme', 'mais', 'si', 'y',
+    'an', 'in', 'on', 'to', 'with', 'by', 'is', 'are', 'be', 'or', 'as', 'at', 'from', 'this', 'that',
+})
+
+# {type de document: (modèle source, champs indexés avec leur poids)}
+SOURCES = {
+    SearchDocument.Kind.JOB: (Job, (('title', 2), ('description', 1))),
+    SearchDocument.Kind.JOB_FAMILY: (JobFamily, (('name', 2), ('description', 1))),
+    SearchDocument.Kind.SKILL: (Skill, (('name', 2), ('description', 1))),
+}
+SOURCE_KINDS = {model: kind for kind, (model, _) in SOURCES.items()}
+
+_suspended = contextvars.ContextVar('search_index_suspended', default=False)
+
+_index = {'index': None, 'checked_at': None}
+_index_lock = threading.Lock()
+
+
+@contextmanager
+def suspend_search_index():
+    """Désactive la mise à jour des documents (opérations de masse suivies d'une reconstruction)."""
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def search_index_enabled():
+    return not _suspended.get()
+
+
+def tokenize(text):
+    """Termes d'un texte : minuscules sans accents, mots vides retirés, pluriels simples réduits."""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode().lower()
+    terms = []
+    for term in re.findall(r'[a-z0-9]+[+#]*', text):
+        if term in STOP_WORDS or len(term) < 2:
+            continue
+        if len(term) > 4 and term.endswith('s') and not term.endswith('ss'):
+            term = term[:-1]
+        terms.append(term)
+    return terms
+
+
+def document_terms(kind, obj):
+    """Fréquences pondérées des termes d'un objet source."""
+    _, fields = SOURCES[kind]
+    counts = Counter()
+    for field, weight in fields:
+        for term in tokenize(getattr(obj, field)):
+            counts[term] += weight
+    return dict(counts)
+
+
+def index_object(obj):
+    """Met à jour le document d'un objet source (signal `post_save`)."""
+    kind = SOURCE_KINDS[type(obj)]
+    SearchDocument.objects.update_or_create(kind=kind, object_id=obj.pk, defaults={'terms': document_terms(kind, obj)})
+
+
+def unindex_object(obj):
+    """Supprime le document d'un objet source (signal `post_delete`)."""
+    SearchDocument.objects.filter(kind=SOURCE_KINDS[type(obj)], object_id=obj.pk).delete()
+
+
+@register_task(REBUILD_TASK)
+def rebuild_search_documents():
+    """Recalcule tous les documents à partir des objets sources. Retourne le nombre de documents."""
+    documents = []
+    for kind, (model, fields) in SOURCES.items():
+        columns = ['pk'] + [field for field, _ in fields]
+        for obj in model.objects.only(*columns).iterator(5000):
+            documents.append(SearchDocument(kind=kind, object_id=obj.pk, terms=document_terms(kind, obj)))
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        SearchDocument.objects.bulk_create(documents, batch_size=2000)
+    invalidate_similarity_index()
+    return len(documents)
+
+
+class SimilarityIndex:
+    """
+    Vecteurs TF-IDF normalisés et listes inverses.
+
+    Args:
+        documents (iterable): Triplets (type, identifiant, {terme: fréquence})
+    """
+
+    def __init__(self, documents):
+        self.keys = []
+        raw = []
+        df = Counter()
+        for kind, object_id, terms in documents:
+            self.keys.append((kind, object_id))
+            raw.append(terms)
+            df.update(terms.keys())
+        self.size = len(self.keys)
+        self.position = {key: i for i, key in enumerate(self.keys)}
+        self.idf = {term: math.log((1 + self.size) / (1 + count)) + 1 for term, count in df.items()}
+
+        postings = {}
+        self.vectors = []
+        for i, terms in enumerate(raw):
+            vector = self.vectorize(terms)
+            self.vectors.append(vector)
+            for term, weight in vector.items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(i)
+                postings[term][1].append(weight)
+        self.postings = {term: (array('l', docs), array('f', weights)) for term, (docs, weights) in postings.items()}
+
+        # Surcharge : documents modifiés depuis le chargement complet
+        self.overlay = {}
+        self.refreshed_at = None
+        self.fingerprint = None
+
+    def vectorize(self, terms):
+        """Vecteur TF-IDF (tf logarithmique) normalisé : {terme: poids}."""
+        # Un terme inconnu de l'index a l'IDF d'un terme présent dans un seul document
+        rare = math.log((1 + self.size) / 2) + 1
+        vector = {term: (1 + math.log(count)) * self.idf.get(term, rare) for term, count in terms.items() if count > 0}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {term: weight / norm for term, weight in vector.items()} if norm else {}
+
+    def update(self, kind, object_id, terms):
+        """Remplace le vecteur d'un document (surcharge, avec l'IDF du chargement complet)."""
+        self.overlay[(kind, object_id)] = self.vectorize(terms)
+
+    def vector(self, kind, object_id):
+        key = (kind, object_id)
+        if key in self.overlay:
+            return self.overlay[key]
+        i = self.position.get(key)
+        return self.vectors[i] if i is not None else None
+
+    def search(self, query, limit=10, kinds=None, exclude=()):
+        """
+        Documents les plus proches d'un vecteur normalisé (cosinus).
+
+        Args:
+            query (dict): {terme: poids}
+            limit (int): Nombre de résultats
+            kinds (iterable, optional): Types de documents retenus
+            exclude (iterable): Documents (type, identifiant) à écarter
+
+        Returns:
+            list: Triplets (type, identifiant, score), du plus proche au moins proche
+        """
+        scores = {}
+        for term, query_weight in query.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            for i, weight in zip(*posting):
+                scores[i] = scores.get(i, 0.0) + query_weight * weight
+
+        keys = self.keys
+        kinds = set(kinds) if kinds else None
+        excluded = set(exclude) | self.overlay.keys()
+        candidates = (
+            (score, keys[i]) for i, score in scores.items()
+            if keys[i] not in excluded and (kinds is None or keys[i][0] in kinds)
+        )
+        overlay = (
+            (sum(query.get(term, 0.0) * weight for term, weight in vector.items()), key)
+            for key, vector in self.overlay.items()
+            if vector and key not in exclude and (kinds is None or key[0] in kinds)
+        )
+        best = heapq.nlargest(limit, (item for item in (*candidates, *overlay) if item[0] > 0),
+                              key=lambda item: (item[0], -item[1][1]))
+        return [(kind, object_id, round(score, 4)) for score, (kind, object_id) in best]
+
+    def similar(self, kind, object_id, limit=10, kinds=None):
+        """
+        Documents les plus proches d'un document de l'index.
+
+        La requête est réduite aux `SIMILAR_QUERY_TERMS` termes les plus pondérés
+        du document, hors termes très fréquents (plus de `SIMILAR_MAX_DF_RATIO`
+        des documents et plus de `SIMILAR_MIN_DF`) : les scores sont des cosinus
+        approchés, dominés par les termes rares que les documents partagent.
+        """
+        vector = self.vector(kind, object_id)
+        if not vector:
+            return []
+        max_df = max(SIMILAR_MAX_DF_RATIO * self.size, SIMILAR_MIN_DF)
+        common = {term for term in vector if term in self.postings and len(self.postings[term][0]) > max_df}
+        if common and len(common) < len(vector):
+            vector = {term: weight for term, weight in vector.items() if term not in common}
+        if len(vector) > SIMILAR_QUERY_TERMS:
+            vector = dict(heapq.nlargest(SIMILAR_QUERY_TERMS, vector.items(), key=lambda item: item[1]))
+        return self.search(vector, limit, kinds, exclude=[(kind, object_id)])
+
+    def query(self, text, limit=10, kinds=None):
+        """Documents les plus proches d'un texte libre."""
+        return self.search(self.vectorize(Counter(tokenize(text))), limit, kinds)
+
+
+def check_interval():
+    return getattr(settings, 'SIMILARITY_CHECK_INTERVAL', DEFAULT_CHECK_INTERVAL)
+
+
+def documents_fingerprint():
+    return tuple(SearchDocument.objects.aggregate(count=Count('id'), updated=Max('updated_at')).values())
+
+
+def load_similarity_index():
+    """Charge tous les documents dans un nouvel index."""
+    fingerprint = documents_fingerprint()
+    index = SimilarityIndex(SearchDocument.objects.values_list('kind', 'object_id', 'terms').iterator(5000))
+    index.fingerprint = fingerprint
+    index.refreshed_at = fingerprint[1]
+    return index
+
+
+def refresh(index):
+    """
+    Applique à l'index les documents modifiés depuis sa dernière lecture.
+
+    Returns:
+        bool: False si l'index doit être reconstruit (document supprimé, surcharge trop grande)
+    """
+    fingerprint = documents_fingerprint()
+    if fingerprint == index.fingerprint:
+        return True
+    if index.refreshed_at is not None:
+        changed = SearchDocument.objects.filter(updated_at__gte=index.refreshed_at - REFRESH_MARGIN)
+        for kind, object_id, terms in changed.values_list('kind', 'object_id', 'terms')[:MAX_OVERLAY + 1]:
+            index.update(kind, object_id, terms)
+    known = len(index.position) + sum(1 for key in index.overlay if key not in index.position)
+    if len(index.overlay) > MAX_OVERLAY or known != fingerprint[0]:
+        return False
+    index.fingerprint = fingerprint
+    index.refreshed_at = fingerprint[1]
+    return True
+
+
+def similarity_index():
+    """Index du processus, actualisé au plus une fois par `SIMILARITY_CHECK_INTERVAL` secondes."""
+    with _index_lock:
+        now = time.monotonic()
+        if _index['index'] is None:
+            _index['index'] = load_similarity_index()
+        elif _index['checked_at'] is None or now - _index['checked_at'] > check_interval():
+            if not refresh(_index['index']):
+                _index['index'] = load_similarity_index()
+        else:
+            return _index['index']
+        _index['checked_at'] = now
+        return _index['index']
+
+
+def invalidate_similarity_index():
+    """Force l'actualisation au prochain appel (document modifié dans ce processus)."""
+    _index['checked_at'] = None
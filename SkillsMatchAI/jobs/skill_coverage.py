@@ -0,0 +1,166 @@
+"""
+Filtre « possède toutes les compétences obligatoires » par ensembles de bits.
+
+Pour chaque compétence du catalogue et chaque seuil de niveau (1 à 5),
+`SkillCoverageIndex` conserve un ensemble de bits sur l'ensemble des employés
+(bit i = l'employé d'indice i possède la compétence à ce niveau ou plus).
+Vérifier les compétences obligatoires d'une position pour tout l'effectif
+revient à un ET binaire par compétence requise, au lieu d'une division
+relationnelle en SQL (une jointure par compétence).
+
+L'index est construit à partir de l'instantané projeté en mémoire
+(`jobs.skill_matrix`) et reconstruit quand l'instantané est remplacé ; s'il
+est absent ou périmé, `required_skill_candidates()` utilise la requête SQL.
+Un instantané périmé est signalé à la file de tâches (`request_snapshot()`) :
+l'index est reconstruit dès que le worker a réécrit le fichier.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from .models import Employee, PositionSkill
+from .skill_matrix import SnapshotError, load_skill_matrix, request_snapshot
+
+MAX_LEVEL = 5
+
+# Intervalle (secondes) entre deux vérifications de l'empreinte de l'instantané
+DEFAULT_CHECK_INTERVAL = 5
+
+# {source: (matrice de l'instantané, relation vers les niveaux de l'employé, colonne du niveau)}
+SOURCES = {
+    'declared': ('declared', 'skills', 'proficiency_level'),
+    'evaluated': ('evaluated', 'evaluations', 'quantitative_level'),
+}
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+class SkillCoverageIndex:
+    """
+    Ensembles de bits (entiers Python) par compétence et seuil de niveau.
+
+    Args:
+        employee_ids (sequence): Identifiants triés des employés (indice = position du bit)
+        skill_ids (sequence): Identifiants triés des compétences
+        indptr, skills, levels (sequence): Matrice CSR des niveaux (une ligne par employé)
+    """
+
+    def __init__(self, employee_ids, skill_ids, indptr, skills, levels):
+        self.employee_ids = employee_ids
+        self.skill_index = {skill_id: j for j, skill_id in enumerate(skill_ids)}
+        self.all_employees = (1 << len(employee_ids)) - 1
+
+        size = (len(employee_ids) + 7) // 8
+        buffers = [[None] * MAX_LEVEL for _ in skill_ids]
+        for i in range(len(employee_ids)):
+            byte, bit = i >> 3, 1 << (i & 7)
+            for k in range(indptr[i], indptr[i + 1]):
+                row = buffers[skills[k]]
+                for level in range(min(levels[k], MAX_LEVEL)):
+                    if row[level] is None:
+                        row[level] = bytearray(size)
+                    row[level][byte] |= bit
+        # bits[j][l] : employés possédant la compétence d'indice j au niveau l + 1 ou plus
+        self.bits = [
+            [int.from_bytes(buffer, 'little') if buffer is not None else 0 for buffer in row]
+            for row in buffers
+        ]
+
+    @classmethod
+    def from_matrix(cls, matrix, source='declared'):
+        name = SOURCES[source][0]
+        return cls(
+            matrix.employee_ids, matrix.skill_ids, matrix.sections[f'{name}_indptr'],
+            matrix.sections[f'{name}_skills'], matrix.sections[f'{name}_levels']
+        )
+
+    def coverage(self, requirements):
+        """
+        Ensemble de bits des employés satisfaisant toutes les exigences.
+
+        Args:
+            requirements (iterable): Couples (skill_id, niveau minimal)
+        """
+        covered = self.all_employees
+        for skill_id, level in requirements:
+            j = self.skill_index.get(skill_id)
+            if j is None or level > MAX_LEVEL:
+                return 0
+            if level >= 1:
+                covered &= self.bits[j][level - 1]
+            if not covered:
+                return 0
+        return covered
+
+    def employees(self, requirements):
+        """Identifiants (triés) des employés satisfaisant toutes les exigences."""
+        covered = self.coverage(requirements)
+        ids = []
+        for byte_index, byte in enumerate(covered.to_bytes((len(self.employee_ids) + 7) // 8, 'little')):
+            while byte:
+                low = byte & -byte
+                ids.append(self.employee_ids[(byte_index << 3) + low.bit_length() - 1])
+                byte ^= low
+        return ids
+
+
+def check_interval():
+    return getattr(settings, 'SKILL_COVERAGE_CHECK_INTERVAL', DEFAULT_CHECK_INTERVAL)
+
+
+def coverage_index(source='declared'):
+    """
+    Index du processus construit à partir de l'instantané, ou None s'il est absent ou périmé.
+
+    L'empreinte de l'instantané est comparée à la base au plus une fois par
+    `SKILL_COVERAGE_CHECK_INTERVAL` secondes ; un instantané périmé planifie
+    sa réécriture (`jobs.snapshot_skill_matrix`).
+    """
+    try:
+        matrix = load_skill_matrix()
+    except SnapshotError:
+        return None
+    with _indexes_lock:
+        entry = _indexes.get(source)
+        if entry is None or entry['matrix'] is not matrix:
+            entry = _indexes[source] = {
+                'matrix': matrix, 'index': SkillCoverageIndex.from_matrix(matrix, source), 'checked_at': None, 'stale': True
+            }
+    if entry['checked_at'] is None or time.monotonic() - entry['checked_at'] > check_interval():
+        entry['stale'] = matrix.is_stale()
+        entry['checked_at'] = time.monotonic()
+        if entry['stale']:
+            request_snapshot()
+    return None if entry['stale'] else entry['index']
+
+
+def position_requirements(position):
+    """Compétences obligatoires d'une position : [(skill_id, niveau minimal = niveau d'importance)]."""
+    return list(
+        PositionSkill.objects.filter(position=position, is_required=True)
+        .order_by('skill_id').values_list('skill_id', 'importance_level')
+    )
+
+
+def required_skill_candidates_sql(requirements, source='declared'):
+    """Même filtre par division relationnelle en SQL (une jointure par compétence requise)."""
+    _, relation, level_column = SOURCES[source]
+    employees = Employee.objects.all()
+    for skill_id, level in requirements:
+        employees = employees.filter(**{f'{relation}__skill_id': skill_id, f'{relation}__{level_column}__gte': level})
+    return list(employees.order_by('id').values_list('id', flat=True))
+
+
+def required_skill_candidates(requirements, source='declared'):
+    """
+    Employés possédant toutes les compétences requises au niveau demandé.
+
+    Returns:
+        tuple: (identifiants triés, moteur utilisé : 'bitset' ou 'sql')
+    """
+    index = coverage_index(source)
+    if index is None:
+        return required_skill_candidates_sql(requirements, source), 'sql'
+    return index.employees(requirements), 'bitset'
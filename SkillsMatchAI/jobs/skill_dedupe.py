@@ -0,0 +1,379 @@
+"""
+Normalisation des noms de compétences et fusion des doublons.
+
+`normalize_skill_name()` ramène un nom à une forme comparable : minuscules
+sans accents, ponctuation retirée (« Node.js » → « nodejs »), mots vides
+supprimés et synonymes remplacés (« JS » → « javascript », voir
+`SKILL_SYNONYMS`). Seuls les accents des lettres latines sont retirés : les
+noms en cyrillique, en arabe ou en caractères chinois sont conservés. Un nom
+dont la forme normalisée est vide (ponctuation, mots vides) n'est jamais
+considéré comme un doublon. La forme normalisée est enregistrée dans
+`Skill.normalized_name` à chaque enregistrement.
+
+`dedupe_skills()` (commande `python manage.py dedupe_skills`, tâche
+`jobs.dedupe_skills`) détecte les quasi-doublons sans comparer tous les
+couples : les compétences sont réparties en blocs par clé (mots normalisés
+triés, puis clé phonétique de type Soundex), seuls les membres d'un même bloc
+sont comparés, puis la distance d'édition confirme le doublon. Les mots courts
+(sigles) et les mots contenant des chiffres doivent être identiques : « UX
+Design » et « UI Design », « Python 2 » et « Python 3 » restent distincts.
+
+Chaque groupe de doublons est fusionné dans la compétence la plus utilisée :
+les compétences d'employés, de positions, les évaluations, l'historique et les
+compétences requises des emplois sont rattachées à la compétence conservée
+(`bulk_update`) ; quand un employé, une position ou un emploi possédait déjà
+les deux, les lignes sont fusionnées (niveau le plus élevé, évaluation la plus
+récente). L'inventaire et la taxonomie sont ensuite reconstruits.
+"""
+import re
+import unicodedata
+from itertools import combinations
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import EmployeeSkill, Evaluation, EvaluationHistory, Job, PositionSkill, Skill
+from .skill_hierarchy import rebuild_skill_closure
+from .skill_inventory import rebuild_skill_inventory, suspend_inventory
+from .skill_stats import invalidate_skill_level_counts
+from .tasks import register_task
+
+DEDUPE_TASK = 'jobs.dedupe_skills'
+
+# Distance d'édition maximale, rapportée à la longueur du nom le plus long
+DEFAULT_MAX_RATIO = 0.15
+
+# Au-delà, un bloc n'est comparé qu'entre voisins dans l'ordre alphabétique
+MAX_BLOCK_SIZE = 50
+BLOCK_WINDOW = 10
+
+# Mots plus courts ou égaux : sigles, qui ne tolèrent aucune faute
+RIGID_TOKEN_LENGTH = 3
+
+BATCH_SIZE = 500
+
+STOP_WORDS = frozenset({
+    'a', 'au', 'aux', 'd', 'de', 'des', 'du', 'en', 'et', 'l', 'la', 'le', 'les', 'pour',
+    'and', 'for', 'of', 'the',
+})
+
+DEFAULT_SYNONYMS = {
+    'js': 'javascript',
+    'ts': 'typescript',
+    'py': 'python',
+    'golang': 'go',
+    'postgres': 'postgresql',
+    'k8s': 'kubernetes',
+    'ml': 'machine learning',
+}
+
+# Codes Soundex : consonnes de prononciation voisine, voyelles et h, w, y ignorées
+SOUNDEX = str.maketrans('bfpvcgjkqsxzdtlmnr', '111122222222334556')
+
+
+def synonyms():
+    """Synonymes par mot (`DEFAULT_SYNONYMS` complétés par le réglage `SKILL_SYNONYMS`)."""
+    return {**DEFAULT_SYNONYMS, **getattr(settings, 'SKILL_SYNONYMS', {})}
+
+
+def strip_accents(text):
+    """Retire les accents des lettres latines (« é » → « e ») ; les autres écritures sont conservées."""
+    if text.isascii():
+        return text
+    chars = []
+    for c in unicodedata.normalize('NFKD', text):
+        if unicodedata.combining(c) and chars and chars[-1].isascii():
+            continue
+        chars.append(c)
+    return unicodedata.normalize('NFC', ''.join(chars))
+
+
+def normalize_skill_name(name, aliases=None):
+    """
+    Forme normalisée d'un nom de compétence (« Node.JS avancé » → « nodejs avance »).
+
+    Args:
+        name (str): Nom de la compétence
+        aliases (dict, optional): Synonymes par mot (défaut: `synonyms()`)
+    """
+    aliases = synonyms() if aliases is None else aliases
+    text = strip_accents(name or '').lower()
+    text = re.sub(r'(?<=[^\W_])\.(?=[^\W_])', '', text)
+    tokens = []
+    for token in re.findall(r'[^\W_]+[+#]*', text):
+        if token not in STOP_WORDS:
+            tokens.extend(aliases.get(token, token).split())
+    return ' '.join(tokens)
+
+
+def is_rigid(token):
+    return len(token) <= RIGID_TOKEN_LENGTH or any(c.isdigit() for c in token)
+
+
+def phonetic_token(token):
+    """Clé phonétique d'un mot : première lettre puis codes Soundex (sigles, nombres et mots non latins inchangés)."""
+    if is_rigid(token) or not token.isascii():
+        return token
+    codes = [c for c in token[1:].translate(SOUNDEX) if c.isdigit()]
+    return token[0] + ''.join(c for i, c in enumerate(codes) if not i or codes[i - 1] != c)
+
+
+def blocking_keys(normalized):
+    """Clés de blocage d'un nom normalisé : mots triés et clé phonétique."""
+    tokens = sorted(normalized.split())
+    return ('t:' + ' '.join(tokens), 'p:' + ' '.join(sorted(map(phonetic_token, tokens))))
+
+
+def edit_distance(a, b, limit):
+    """Distance de Levenshtein bornée : `limit + 1` dès que la distance dépasse `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, start=1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def is_duplicate(a, b, max_ratio=DEFAULT_MAX_RATIO):
+    """Deux noms normalisés désignent-ils la même compétence ? (jamais pour un nom vide)"""
+    tokens_a, tokens_b = sorted(a.split()), sorted(b.split())
+    if not tokens_a or not tokens_b:
+        return False
+    if tokens_a == tokens_b:
+        return True
+    if [t for t in tokens_a if is_rigid(t)] != [t for t in tokens_b if is_rigid(t)]:
+        return False
+    a, b = ' '.join(tokens_a), ' '.join(tokens_b)
+    limit = int(max(len(a), len(b)) * max_ratio)
+    return limit > 0 and edit_distance(a, b, limit) <= limit
+
+
+def candidate_pairs(names):
+    """
+    Couples à comparer, issus des blocs.
+
+    Args:
+        names (dict): {skill_id: nom normalisé} ; les noms vides sont ignorés
+    """
+    blocks = {}
+    for skill_id, normalized in names.items():
+        if not normalized.strip():
+            continue
+        for key in blocking_keys(normalized):
+            blocks.setdefault(key, []).append(skill_id)
+    pairs = set()
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda skill_id: (names[skill_id], skill_id))
+        if len(members) <= MAX_BLOCK_SIZE:
+            pairs.update(combinations(members, 2))
+        else:
+            for i, skill_id in enumerate(members):
+                pairs.update((skill_id, other) for other in members[i + 1:i + 1 + BLOCK_WINDOW])
+    return pairs
+
+
+def duplicate_groups(names, max_ratio=DEFAULT_MAX_RATIO):
+    """
+    Groupes de compétences en double (union des couples confirmés).
+
+    Returns:
+        list: Listes triées d'identifiants (au moins deux par groupe)
+    """
+    parent = {}
+
+    def find(skill_id):
+        parent.setdefault(skill_id, skill_id)
+        while parent[skill_id] != skill_id:
+            parent[skill_id] = parent[parent[skill_id]]
+            skill_id = parent[skill_id]
+        return skill_id
+
+    for a, b in candidate_pairs(names):
+        if find(a) != find(b) and is_duplicate(names[a], names[b], max_ratio):
+            parent[find(a)] = find(b)
+    groups = {}
+    for skill_id in parent:
+        groups.setdefault(find(skill_id), []).append(skill_id)
+    return sorted(sorted(group) for group in groups.values() if len(group) > 1)
+
+
+def refresh_normalized_names():
+    """Recalcule `normalized_name` (compétences importées par `bulk_create`, synonymes modifiés)."""
+    aliases = synonyms()
+    now = timezone.now()
+    stale = []
+    for skill in Skill.objects.only('id', 'name', 'normalized_name').iterator(BATCH_SIZE * 10):
+        normalized = normalize_skill_name(skill.name, aliases)
+        if skill.normalized_name != normalized:
+            skill.normalized_name = normalized
+            skill.last_updated = now
+            stale.append(skill)
+    Skill.objects.bulk_update(stale, ['normalized_name', 'last_updated'], batch_size=BATCH_SIZE)
+    return len(stale)
+
+
+def chunks(values, size=BATCH_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def canonical_skills(groups):
+    """
+    Compétence conservée de chaque groupe : la plus utilisée, puis la plus ancienne.
+
+    Returns:
+        dict: {compétence en double: compétence conservée}
+    """
+    usage = {}
+    for batch in chunks(skill_id for group in groups for skill_id in group):
+        for model in (EmployeeSkill, PositionSkill):
+            counts = model.objects.filter(skill_id__in=batch).values_list('skill_id').annotate(n=Count('id')).order_by()
+            for skill_id, count in counts:
+                usage[skill_id] = usage.get(skill_id, 0) + count
+    canonical_of = {}
+    for group in groups:
+        canonical = min(group, key=lambda skill_id: (-usage.get(skill_id, 0), skill_id))
+        canonical_of.update((skill_id, canonical) for skill_id in group if skill_id != canonical)
+    return canonical_of
+
+
+def merge_employee_skills(rows):
+    return {'proficiency_level': max(row['proficiency_level'] for row in rows),
+            'date_acquired': min(row['date_acquired'] for row in rows)}
+
+
+def merge_position_skills(rows):
+    return {'importance_level': max(row['importance_level'] for row in rows),
+            'is_required': any(row['is_required'] for row in rows)}
+
+
+def merge_evaluations(rows):
+    latest = max(rows, key=lambda row: (row['last_updated'], row['id']))
+    return {field: latest[field] for field in
+            ('quantitative_level', 'qualitative_description', 'evaluated_by_id', 'evaluation_date')}
+
+
+# (modèle, propriétaire unique avec la compétence, fusion des lignes d'un même propriétaire, champs fusionnés)
+MERGES = [
+    (EmployeeSkill, 'employee_id', merge_employee_skills, ['proficiency_level', 'date_acquired', 'last_updated']),
+    (PositionSkill, 'position_id', merge_position_skills, ['importance_level', 'is_required']),
+    (Evaluation, 'employee_id', merge_evaluations,
+     ['quantitative_level', 'qualitative_description', 'evaluated_by', 'evaluation_date', 'last_updated']),
+    (Job.required_skills.through, 'job_id', lambda rows: {}, []),
+]
+
+
+def repoint(model, owner, merge, fields, canonical_of):
+    """
+    Rattache les lignes d'un modèle à la compétence conservée.
+
+    Les lignes d'un même propriétaire (employé, position, emploi) sont fusionnées
+    dans la ligne de la compétence conservée, ou à défaut dans la plus ancienne.
+
+    Returns:
+        tuple: (lignes rattachées ou fusionnées, lignes supprimées)
+    """
+    groups = {}
+    for batch in chunks([*canonical_of, *set(canonical_of.values())]):
+        for row in model.objects.filter(skill_id__in=batch).values():
+            skill_id = canonical_of.get(row['skill_id'], row['skill_id'])
+            groups.setdefault((row[owner], skill_id), []).append(row)
+
+    now = timezone.now()
+    updated, deleted = [], []
+    for (_, skill_id), rows in groups.items():
+        if all(row['skill_id'] == skill_id for row in rows):
+            continue
+        winner = next((row for row in rows if row['skill_id'] == skill_id), min(rows, key=lambda row: row['id']))
+        obj = model(**{**winner, **merge(rows), 'skill_id': skill_id})
+        if 'last_updated' in fields:
+            obj.last_updated = now
+        updated.append(obj)
+        deleted.extend(row['id'] for row in rows if row is not winner)
+
+    # Suppression d'abord : la ligne rattachée prend la place unique (propriétaire, compétence)
+    for batch in chunks(deleted):
+        model.objects.filter(id__in=batch).delete()
+    model.objects.bulk_update(updated, ['skill', *fields], batch_size=BATCH_SIZE)
+    return len(updated), len(deleted)
+
+
+def merge_skills(canonical_of):
+    """
+    Fusionne des compétences dans leur compétence conservée.
+
+    Args:
+        canonical_of (dict): {compétence en double: compétence conservée}
+
+    Returns:
+        dict: Lignes rattachées et supprimées par modèle, compétences supprimées
+    """
+    result = {}
+    with transaction.atomic(), suspend_inventory():
+        for model, owner, merge, fields in MERGES:
+            result[model._meta.model_name] = repoint(model, owner, merge, fields, canonical_of)
+
+        history, children = [], []
+        for batch in chunks(canonical_of):
+            history.extend(EvaluationHistory.objects.filter(skill_id__in=batch).only('id', 'skill_id'))
+            children.extend(child for child in Skill.objects.filter(parent_id__in=batch).only('id', 'parent_id')
+                            if child.id not in canonical_of)
+        for entry in history:
+            entry.skill_id = canonical_of[entry.skill_id]
+        now = timezone.now()
+        for child in children:
+            child.parent_id = canonical_of[child.parent_id] if canonical_of[child.parent_id] != child.id else None
+            child.last_updated = now
+        EvaluationHistory.objects.bulk_update(history, ['skill'], batch_size=BATCH_SIZE)
+        Skill.objects.bulk_update(children, ['parent', 'last_updated'], batch_size=BATCH_SIZE)
+
+        for batch in chunks(canonical_of):
+            Skill.objects.filter(id__in=batch).delete()
+        result['skills'] = len(canonical_of)
+
+        rebuild_skill_closure()
+        rebuild_skill_inventory()
+    invalidate_skill_level_counts(set(canonical_of.values()))
+    return result
+
+
+@register_task(DEDUPE_TASK)
+def dedupe_skills(max_ratio=DEFAULT_MAX_RATIO, dry_run=False, log=None):
+    """
+    Détecte et fusionne les compétences en double.
+
+    Args:
+        max_ratio (float): Distance d'édition maximale rapportée à la longueur du nom
+        dry_run (bool): Affiche les groupes sans rien fusionner
+        log (callable, optional): Reçoit un message par groupe
+
+    Returns:
+        dict: Nombre de noms normalisés recalculés, de groupes, de compétences fusionnées
+    """
+    log = log or (lambda message: None)
+    refreshed = 0 if dry_run else refresh_normalized_names()
+    aliases = synonyms()
+    skills = dict(Skill.objects.values_list('id', 'name').iterator(BATCH_SIZE * 10))
+    groups = duplicate_groups({skill_id: normalize_skill_name(name, aliases) for skill_id, name in skills.items()},
+                              max_ratio)
+    canonical_of = canonical_skills(groups)
+
+    for group in groups:
+        canonical = next(skill_id for skill_id in group if skill_id not in canonical_of)
+        duplicates = ', '.join(f"{skills[skill_id]} ({skill_id})" for skill_id in group if skill_id != canonical)
+        log(f"{skills[canonical]} ({canonical}) ← {duplicates}")
+
+    result = {'refreshed': refreshed, 'groups': len(groups), 'merged': len(canonical_of)}
+    if canonical_of and not dry_run:
+        result['rows'] = merge_skills(canonical_of)
+    return result
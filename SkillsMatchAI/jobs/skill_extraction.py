@@ -0,0 +1,360 @@
+"""
+Extraction des compétences citées dans un texte libre (CV, description d'emploi).
+
+Tous les noms de compétences, normalisés comme `Skill.normalized_name`
+(synonymes compris, voir `jobs.skill_dedupe`), sont compilés en un automate
+d'Aho–Corasick sur les mots : un document normalisé est parcouru une seule
+fois, quel que soit le nombre de compétences du catalogue, et chaque mot ne
+coûte que quelques accès à des dictionnaires.
+
+Avant l'analyse, les élisions sont retirées (« c'est » → « est ») et chaque
+mot garde sa forme d'origine : une compétence au nom d'une ou deux lettres
+(« C », « R », « Go ») n'est reconnue que sous la casse de son nom, dans un mot
+isolé (« go-kart », « R&D » ne la citent pas).
+
+L'automate est construit une fois par processus par `skill_automaton()` et
+reconstruit quand le catalogue change : l'empreinte des compétences (nombre,
+identifiant maximal, dernière modification) est vérifiée au plus une fois par
+`SKILL_EXTRACTION_CHECK_INTERVAL` secondes, et immédiatement après une
+modification de compétence dans le processus.
+
+La commande `python manage.py extract_skills` analyse les descriptions des
+emplois et des répertoires de CV en texte, répartis sur un pool de processus.
+"""
+import os
+import re
+import threading
+import time
+from collections import deque
+from multiprocessing import Pool
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import Employee, EmployeeSkill, Job, Skill
+from .skill_dedupe import STOP_WORDS, normalize_skill_name, synonyms
+
+# Intervalle (secondes) entre deux vérifications de l'empreinte du catalogue
+DEFAULT_CHECK_INTERVAL = 5
+
+# Extensions des CV analysés (texte brut)
+TEXT_EXTENSIONS = ('.txt', '.text', '.md')
+
+# Documents dont les suggestions sont calculées ensemble (une requête par lot)
+CHUNK_SIZE = 200
+
+# Noms normalisés plus courts ou égaux : reconnus sous leur casse, dans un mot isolé
+SHORT_NAME_LENGTH = 2
+
+# Élisions (« c'est », « l'équipe », « qu'il ») : le mot élidé n'est pas analysé
+ELISION = re.compile(r"(?<![^\W\d_])(?:[cdjlmnst]|qu|jusqu|lorsqu|puisqu)['’](?=[^\W\d_])", re.IGNORECASE)
+
+# Mots du texte : séparés par les espaces et la ponctuation de liste, un trait
+# d'union ou une esperluette lie deux mots (« go-kart », « R&D »)
+WORD = re.compile(r'[^\s,;:!?()\[\]{}<>"«»/|]+')
+EDGE_PUNCTUATION = re.compile(r'^[^\w+#]+|[^\w+#]+$')
+SINGLE_WORD = re.compile(r'[^\W_]+[+#]*')
+
+_automaton = {'fingerprint': None, 'automaton': None, 'checked_at': None}
+_automaton_lock = threading.Lock()
+
+
+class SkillAutomaton:
+    """
+    Automate d'Aho–Corasick dont l'alphabet est l'ensemble des mots.
+
+    Args:
+        patterns (iterable): (skill_id, nom normalisé[, nom]) ; le nom, sensible à
+            la casse, est exigé pour les noms normalisés courts (`SHORT_NAME_LENGTH`)
+    """
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+        # {skill_id: formes acceptées (None : toutes)} des compétences au nom court
+        self.short = {}
+        for skill_id, normalized, *name in patterns:
+            tokens = normalized.split()
+            if not tokens:
+                continue
+            if len(tokens) == 1 and len(tokens[0]) <= SHORT_NAME_LENGTH:
+                self.short[skill_id] = {name[0].strip()} if name and name[0] else None
+            node = 0
+            for token in tokens:
+                child = self.goto[node].get(token)
+                if child is None:
+                    child = self.goto[node][token] = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                node = child
+            self.output[node] += (skill_id,)
+
+        # Liens d'échec en largeur : plus long suffixe propre qui soit aussi un préfixe
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(token, 0)
+                self.output[child] += self.output[self.fail[child]]
+
+    def __len__(self):
+        return len(self.goto)
+
+    def scan(self, tokens, words=None):
+        """
+        Compétences citées dans une suite de mots normalisés.
+
+        Args:
+            tokens (list): Mots normalisés
+            words (list, optional): Pour chaque mot normalisé, (forme d'origine, mot isolé) ;
+                sans eux, les compétences au nom court ne sont pas vérifiées
+
+        Returns:
+            dict: {skill_id: nombre d'occurrences}
+        """
+        goto, fail, output, short = self.goto, self.fail, self.output, self.short
+        counts = {}
+        node = 0
+        for i, token in enumerate(tokens):
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+            for skill_id in output[node]:
+                if words is not None and skill_id in short and not self.short_match(short[skill_id], *words[i]):
+                    continue
+                counts[skill_id] = counts.get(skill_id, 0) + 1
+        return counts
+
+    @staticmethod
+    def short_match(forms, surface, isolated):
+        """Un nom court est cité par le nom lui-même ou par un mot isolé écrit sous un synonyme plus long."""
+        if forms is not None and surface in forms:
+            return True
+        return isolated and (forms is None or len(surface) > SHORT_NAME_LENGTH)
+
+    def extract(self, text, aliases=None):
+        """Compétences citées dans un texte libre : {skill_id: nombre d'occurrences}."""
+        tokens, words = tokenize_text(text, synonyms() if aliases is None else aliases)
+        return self.scan(tokens, words)
+
+
+def tokenize_text(text, aliases):
+    """
+    Mots normalisés d'un texte, élisions retirées, avec leur forme d'origine.
+
+    Returns:
+        tuple: (mots normalisés, [(forme d'origine, mot isolé)] pour chacun)
+    """
+    tokens, words = [], []
+    for match in WORD.finditer(ELISION.sub('', text)):
+        word = match.group()
+        if word.isascii() and word.isalnum():
+            # Cas courant : mot ASCII sans ponctuation, normalisé sans `normalize_skill_name`
+            lower = word.lower()
+            if lower in STOP_WORDS:
+                continue
+            surface, isolated, normalized = word, True, aliases.get(lower, lower).split()
+        else:
+            surface = EDGE_PUNCTUATION.sub('', word)
+            isolated = SINGLE_WORD.fullmatch(surface) is not None
+            normalized = normalize_skill_name(word, aliases).split()
+        for token in normalized:
+            tokens.append(token)
+            words.append((surface, isolated))
+    return tokens, words
+
+
+def catalogue_fingerprint():
+    return tuple(Skill.objects.aggregate(count=Count('id'), max_id=Max('id'), updated=Max('last_updated')).values())
+
+
+def check_interval():
+    return getattr(settings, 'SKILL_EXTRACTION_CHECK_INTERVAL', DEFAULT_CHECK_INTERVAL)
+
+
+def build_skill_automaton():
+    return SkillAutomaton(Skill.objects.values_list('id', 'normalized_name', 'name').iterator(5000))
+
+
+def skill_automaton():
+    """Automate du processus, reconstruit si le catalogue a changé."""
+    with _automaton_lock:
+        now = time.monotonic()
+        if _automaton['checked_at'] is None or now - _automaton['checked_at'] > check_interval():
+            fingerprint = catalogue_fingerprint()
+            if fingerprint != _automaton['fingerprint'] or _automaton['automaton'] is None:
+                _automaton['automaton'] = build_skill_automaton()
+                _automaton['fingerprint'] = fingerprint
+            _automaton['checked_at'] = now
+        return _automaton['automaton']
+
+
+def invalidate_skill_automaton():
+    """Force la vérification de l'empreinte au prochain appel (compétence modifiée dans ce processus)."""
+    _automaton['checked_at'] = None
+
+
+def extract_skills(text, automaton=None):
+    """Compétences citées dans un texte libre : {skill_id: nombre d'occurrences}."""
+    return (automaton if automaton is not None else skill_automaton()).extract(text, synonyms())
+
+
+def suggest_skills(counts, existing=(), names=None):
+    """
+    Suggestions à partir des compétences extraites, hors compétences déjà associées.
+
+    Args:
+        counts (dict): {skill_id: nombre d'occurrences}
+        existing (iterable): Compétences déjà associées à l'employé ou à l'emploi
+        names (dict, optional): {skill_id: nom} (lu en base par défaut)
+
+    Returns:
+        list: Dictionnaires `skill`, `name`, `occurrences`, des plus citées aux moins citées
+    """
+    existing = set(existing)
+    counts = {skill_id: count for skill_id, count in counts.items() if skill_id not in existing}
+    if names is None:
+        names = dict(Skill.objects.filter(pk__in=counts).values_list('id', 'name'))
+    return [
+        {'skill': skill_id, 'name': names[skill_id], 'occurrences': count}
+        for skill_id, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        if skill_id in names
+    ]
+
+
+def chunked(iterable, size=CHUNK_SIZE):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def scan_jobs(write):
+    """
+    Suggère des compétences requises à partir des descriptions des emplois.
+
+    Args:
+        write (callable): Reçoit une suggestion `{'job': id, 'skills': [...]}` par emploi concerné
+
+    Returns:
+        dict: Emplois analysés et suggestions émises
+    """
+    automaton, aliases = skill_automaton(), synonyms()
+    names = dict(Skill.objects.values_list('id', 'name'))
+    stats = {'jobs': 0, 'suggestions': 0}
+    for chunk in chunked(Job.objects.order_by('id').values_list('id', 'description').iterator(CHUNK_SIZE)):
+        required = {}
+        for job_id, skill_id in Job.required_skills.through.objects.filter(
+            job_id__in=[job_id for job_id, _ in chunk]
+        ).values_list('job_id', 'skill_id'):
+            required.setdefault(job_id, set()).add(skill_id)
+        for job_id, description in chunk:
+            stats['jobs'] += 1
+            skills = suggest_skills(automaton.extract(description, aliases), required.get(job_id, ()), names)
+            if skills:
+                write({'job': job_id, 'skills': skills})
+                stats['suggestions'] += len(skills)
+    return stats
+
+
+_worker = {}
+
+
+def init_worker(automaton, aliases):
+    """Initialise un processus du pool avec l'automate (transmis une seule fois)."""
+    _worker['automaton'] = automaton
+    _worker['aliases'] = aliases
+
+
+def scan_resume(path):
+    """Compétences citées dans un fichier de CV : (chemin, {skill_id: occurrences} ou None si illisible)."""
+    try:
+        with open(path, encoding='utf-8', errors='replace') as resume:
+            text = resume.read()
+    except OSError:
+        return path, None
+    return path, _worker['automaton'].extract(text, _worker['aliases'])
+
+
+def resume_files(directory):
+    """Fichiers texte d'un répertoire et de ses sous-répertoires, dans l'ordre alphabétique."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(TEXT_EXTENSIONS):
+                yield os.path.join(root, name)
+
+
+def resolve_employees(paths):
+    """Employé de chaque fichier, désigné par son nom : `<identifiant>.txt` ou `<email>.txt`."""
+    stems = {path: os.path.splitext(os.path.basename(path))[0].strip().lower() for path in paths}
+    ids = {int(stem) for stem in stems.values() if stem.isdigit()}
+    emails = {stem for stem in stems.values() if not stem.isdigit()}
+    by_key = {str(employee_id): employee_id for employee_id in Employee.objects.filter(pk__in=ids).values_list('id', flat=True)}
+    for employee_id, email in Employee.objects.filter(email__in=emails).values_list('id', 'email'):
+        by_key[email.lower()] = employee_id
+    return {path: by_key.get(stem) for path, stem in stems.items()}
+
+
+def scan_resumes(directory, write, workers=1):
+    """
+    Suggère des compétences aux employés à partir de leurs CV en texte.
+
+    Les fichiers sont lus au fil du parcours du répertoire et répartis sur
+    `workers` processus ; l'automate n'est transmis qu'une fois à chacun.
+    Les suggestions sont calculées par lots de `CHUNK_SIZE` fichiers.
+
+    Args:
+        directory (str): Répertoire des CV (`<identifiant>.txt` ou `<email>.txt`)
+        write (callable): Reçoit `{'employee': id, 'file': chemin, 'skills': [...]}` par CV concerné
+        workers (int): Nombre de processus
+
+    Returns:
+        dict: Fichiers analysés, non rattachés à un employé, illisibles, suggestions, durée et débit
+    """
+    automaton, aliases = skill_automaton(), synonyms()
+    names = dict(Skill.objects.values_list('id', 'name'))
+    stats = {'files': 0, 'unmatched': 0, 'unreadable': 0, 'suggestions': 0}
+    started = time.monotonic()
+
+    def process(results):
+        for chunk in chunked(results):
+            employees = resolve_employees([path for path, _ in chunk])
+            existing = {}
+            for employee_id, skill_id in EmployeeSkill.objects.filter(
+                employee_id__in={employee_id for employee_id in employees.values() if employee_id}
+            ).values_list('employee_id', 'skill_id'):
+                existing.setdefault(employee_id, set()).add(skill_id)
+            for path, counts in chunk:
+                stats['files'] += 1
+                if counts is None:
+                    stats['unreadable'] += 1
+                elif employees[path] is None:
+                    stats['unmatched'] += 1
+                else:
+                    skills = suggest_skills(counts, existing.get(employees[path], ()), names)
+                    if skills:
+                        write({'employee': employees[path], 'file': path, 'skills': skills})
+                        stats['suggestions'] += len(skills)
+
+    if workers > 1:
+        with Pool(workers, initializer=init_worker, initargs=(automaton, aliases)) as pool:
+            process(pool.imap(scan_resume, resume_files(directory), chunksize=16))
+    else:
+        init_worker(automaton, aliases)
+        process(map(scan_resume, resume_files(directory)))
+
+    elapsed = time.monotonic() - started
+    stats['seconds'] = round(elapsed, 3)
+    stats['files_per_second'] = round(stats['files'] / elapsed, 1) if elapsed else None
+    return stats
@@ -0,0 +1,96 @@
+"""
+Taxonomie des compétences (`Skill.parent`) et sa table de fermeture (`SkillClosure`).
+
+La table contient une ligne par couple (ancêtre, descendant), chaque compétence
+étant sa propre ancêtre à la profondeur 0. Une requête qui doit compter
+« Django » pour « Python » joint simplement la table :
+
+    EmployeeSkill.objects.filter(skill__ancestor_links__ancestor_id=python.id)
+
+La table est maintenue par les signaux de `Skill` : une création ajoute les
+liens vers les ancêtres du parent, un changement de parent détache le
+sous-arbre de ses anciens ancêtres puis le rattache aux nouveaux, une
+suppression détache le sous-arbre (les sous-compétences deviennent des
+racines). Les opérations de masse qui contournent les signaux (`bulk_create`,
+`QuerySet.update`) doivent être suivies de `rebuild_skill_closure()`.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Skill, SkillClosure
+from .tasks import register_task
+
+REBUILD_TASK = 'jobs.rebuild_skill_closure'
+
+
+def subtree(skill_id):
+    """Sous-arbre d'une compétence : [(descendant_id, profondeur)], elle-même comprise."""
+    return list(SkillClosure.objects.filter(ancestor_id=skill_id).values_list('descendant_id', 'depth'))
+
+
+def check_parent(skill_id, parent_id):
+    """
+    Vérifie qu'un rattachement ne crée pas de cycle.
+
+    Raises:
+        ValidationError: Si le parent est la compétence elle-même ou l'une de ses sous-compétences
+    """
+    if parent_id is None or skill_id is None:
+        return
+    if parent_id == skill_id or SkillClosure.objects.filter(ancestor_id=skill_id, descendant_id=parent_id).exists():
+        raise ValidationError({'parent': "Une compétence ne peut pas être rattachée à l'une de ses sous-compétences"})
+
+
+def attach(descendants, parent_id):
+    """Relie un sous-arbre [(descendant_id, profondeur)] au parent et à tous ses ancêtres."""
+    if parent_id is None:
+        return
+    ancestors = SkillClosure.objects.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth')
+    SkillClosure.objects.bulk_create([
+        SkillClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=ancestor_depth + depth + 1)
+        for ancestor_id, ancestor_depth in ancestors
+        for descendant_id, depth in descendants
+    ])
+
+
+def detach(descendants):
+    """Supprime les liens entre un sous-arbre et les ancêtres de sa racine."""
+    descendant_ids = [descendant_id for descendant_id, _ in descendants]
+    SkillClosure.objects.filter(descendant_id__in=descendant_ids).exclude(ancestor_id__in=descendant_ids).delete()
+
+
+def skill_created(skill):
+    """Ajoute une nouvelle compétence (feuille) à la table de fermeture."""
+    with transaction.atomic():
+        SkillClosure.objects.create(ancestor_id=skill.pk, descendant_id=skill.pk, depth=0)
+        attach([(skill.pk, 0)], skill.parent_id)
+
+
+def skill_moved(skill):
+    """Déplace le sous-arbre d'une compétence sous son nouveau parent."""
+    with transaction.atomic():
+        descendants = subtree(skill.pk)
+        detach(descendants)
+        attach(descendants, skill.parent_id)
+
+
+def skill_deleted(skill):
+    """Détache le sous-arbre d'une compétence supprimée : ses sous-compétences deviennent des racines."""
+    detach(subtree(skill.pk))
+
+
+@register_task(REBUILD_TASK)
+def rebuild_skill_closure():
+    """Reconstruit la table de fermeture à partir des parents. Retourne le nombre de liens."""
+    parents = dict(Skill.objects.values_list('id', 'parent_id'))
+    links = []
+    for skill_id in parents:
+        ancestor_id, depth, seen = skill_id, 0, set()
+        while ancestor_id is not None and ancestor_id not in seen:
+            seen.add(ancestor_id)
+            links.append(SkillClosure(ancestor_id=ancestor_id, descendant_id=skill_id, depth=depth))
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+    with transaction.atomic():
+        SkillClosure.objects.all().delete()
+        SkillClosure.objects.bulk_create(links, batch_size=5000)
+    return len(links)
@@ -0,0 +1,143 @@
+"""
+Maintenance incrémentale de l'inventaire des compétences (`SkillInventory`).
+
+Chaque écriture concernée (compétence d'employé, évaluation, compétence de
+position, changement de position, de site ou de famille de métiers) est
+traduite en deltas sur les cellules de l'inventaire : les signaux `pre_*`
+relèvent la contribution des lignes touchées avant l'écriture, les signaux
+`post_*` la relèvent après et appliquent la différence, dans la même
+transaction que l'écriture.
+
+Les opérations de masse qui contournent les signaux (`bulk_create`,
+`QuerySet.update`) doivent être suivies de `rebuild_skill_inventory()`
+(commande `python manage.py rebuild_skill_inventory`), qui recalcule
+entièrement la table ; `suspend_inventory()` désactive les deltas pendant
+ces opérations.
+"""
+import contextvars
+import operator
+from contextlib import contextmanager
+from functools import reduce
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import EmployeeSkill, Evaluation, PositionSkill, SkillInventory
+from .tasks import register_task
+
+# {type de ligne: (modèle source, champ du niveau, chemin vers la position, pondéré par le niveau)}
+INVENTORY_SOURCES = {
+    SkillInventory.Kind.SUPPLY: (EmployeeSkill, 'proficiency_level', 'employee__current_position', False),
+    SkillInventory.Kind.EVALUATED: (Evaluation, 'quantitative_level', 'employee__current_position', False),
+    SkillInventory.Kind.DEMAND: (PositionSkill, 'importance_level', 'position', True),
+}
+
+SOURCE_KINDS = {model: kind for kind, (model, _, _, _) in INVENTORY_SOURCES.items()}
+
+REBUILD_TASK = 'jobs.rebuild_skill_inventory'
+
+_suspended = contextvars.ContextVar('skill_inventory_suspended', default=False)
+
+
+@contextmanager
+def suspend_inventory():
+    """Désactive la maintenance par deltas (opérations de masse suivies d'une reconstruction)."""
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def inventory_enabled():
+    return not _suspended.get()
+
+
+def contributions(kind, **filters):
+    """
+    Contribution à l'inventaire des lignes sources sélectionnées.
+
+    Returns:
+        dict: {(skill_id, level, location, job_family_id): (count, weight)}
+    """
+    model, level_field, position, weighted = INVENTORY_SOURCES[kind]
+    rows = (
+        model.objects.filter(**filters)
+        .values_list('skill_id', level_field, f'{position}__location', f'{position}__job__job_family_id')
+        .annotate(count=Count('id'), weight=Sum(level_field) if weighted else Count('id'))
+        .order_by()
+    )
+    return {
+        (skill_id, level, location or '', job_family_id): (count, weight)
+        for skill_id, level, location, job_family_id, count, weight in rows
+    }
+
+
+def apply_delta(kind, before, after):
+    """Applique à l'inventaire la différence entre deux contributions."""
+    emptied = []
+    for key in before.keys() | after.keys():
+        count = after.get(key, (0, 0))[0] - before.get(key, (0, 0))[0]
+        weight = after.get(key, (0, 0))[1] - before.get(key, (0, 0))[1]
+        if not count and not weight:
+            continue
+        skill_id, level, location, job_family_id = key
+        cell = Q(kind=kind, skill_id=skill_id, level=level, location=location, job_family_id=job_family_id)
+        if SkillInventory.objects.filter(cell).update(count=F('count') + count, weight=F('weight') + weight):
+            if count < 0:
+                emptied.append(cell)
+            continue
+        if count <= 0:
+            continue
+        try:
+            with transaction.atomic():
+                SkillInventory.objects.create(
+                    kind=kind, skill_id=skill_id, level=level, location=location,
+                    job_family_id=job_family_id, count=count, weight=weight
+                )
+        except IntegrityError:
+            # Cellule créée entre-temps par une transaction concurrente
+            SkillInventory.objects.filter(cell).update(count=F('count') + count, weight=F('weight') + weight)
+    if emptied:
+        SkillInventory.objects.filter(reduce(operator.or_, emptied), count__lte=0).delete()
+
+
+def track(instance, scopes):
+    """
+    Relève, avant une écriture, la contribution des lignes concernées.
+
+    Args:
+        scopes (list): Liste de (kind, filtres) ; des filtres None désignent la ligne source `instance` elle-même
+    """
+    instance._skill_inventory_before = [
+        (kind, filters, contributions(kind, **(filters or {'pk': instance.pk})) if filters or instance.pk else {})
+        for kind, filters in scopes
+    ]
+
+
+def apply_tracked(instance, deleted=False):
+    """Applique, après une écriture, les deltas relevés par `track`."""
+    for kind, filters, before in instance.__dict__.pop('_skill_inventory_before', []):
+        if filters is None and deleted:
+            after = {}
+        else:
+            after = contributions(kind, **(filters or {'pk': instance.pk}))
+        apply_delta(kind, before, after)
+
+
+@register_task(REBUILD_TASK)
+def rebuild_skill_inventory():
+    """Reconstruit entièrement l'inventaire à partir des tables sources. Retourne le nombre de cellules par type."""
+    created = {}
+    with transaction.atomic():
+        SkillInventory.objects.all().delete()
+        for kind in INVENTORY_SOURCES:
+            cells = SkillInventory.objects.bulk_create([
+                SkillInventory(
+                    kind=kind, skill_id=skill_id, level=level, location=location,
+                    job_family_id=job_family_id, count=count, weight=weight
+                )
+                for (skill_id, level, location, job_family_id), (count, weight) in contributions(kind).items()
+            ], batch_size=5000)
+            created[kind] = len(cells)
+    return created
@@ -0,0 +1,364 @@
+"""
+Instantané binaire de la matrice des compétences, projeté en mémoire (`mmap`).
+
+Un index en mémoire sur `EmployeeSkill` / `Evaluation` / `PositionSkill`
+demande un parcours complet de la base à chaque démarrage de worker.
+`write_skill_matrix()` (commande `python manage.py snapshot_skill_matrix`,
+tâche `jobs.snapshot_skill_matrix`) écrit ces tables dans un fichier binaire
+versionné ; `load_skill_matrix()` le projette en lecture seule : les pages sont
+partagées entre processus par le cache du système et le chargement ne lit que
+l'en-tête.
+
+Format (ordre des octets natif, sections alignées sur 8 octets) :
+
+- en-tête : `MAGIC`, version du format, ordre des octets, date de création,
+  empreinte de la base (`database_fingerprint()`), nombre de sections ;
+- répertoire : (nom, code de type `array`, taille d'élément, position, longueur) par section ;
+- sections : identifiants triés (employés, compétences, positions) et
+  matrices creuses CSR (une ligne par employé ou position, colonnes = indices
+  dans `skill_ids`) des niveaux déclarés, évalués et requis.
+
+L'empreinte résume en quelques agrégats l'état des tables sources : un
+instantané dont l'empreinte diffère de celle de la base est périmé (`is_stale()`).
+L'empreinte et les sections sont lues dans une seule transaction
+(`consistent_read()`) : l'instantané décrit un seul état de la base.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, Q, Sum
+
+from .models import Employee, EmployeeSkill, Evaluation, Position, PositionSkill, Skill, Task
+from .tasks import enqueue, register_task
+
+MAGIC = b'SKMATRIX'
+FORMAT_VERSION = 1
+
+# magic, version, ordre des octets, date de création (timestamp), empreinte, nombre de sections
+HEADER = struct.Struct('<8sIB7xd32sI4x')
+# nom, code de type, taille d'élément, position, nombre d'éléments
+SECTION = struct.Struct('<16scB6xQQ')
+
+ALIGNMENT = 8
+
+# Lignes lues par requête lors de l'écriture
+READ_CHUNK_SIZE = 20000
+
+SNAPSHOT_TASK = 'jobs.snapshot_skill_matrix'
+
+# {nom de la matrice: (modèle, colonne de la ligne, colonne du niveau, ids des lignes)}
+MATRICES = {
+    'declared': (EmployeeSkill, 'employee_id', 'proficiency_level', 'employee_ids'),
+    'evaluated': (Evaluation, 'employee_id', 'quantitative_level', 'employee_ids'),
+    'required': (PositionSkill, 'position_id', 'importance_level', 'position_ids'),
+}
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+class SnapshotError(Exception):
+    """Fichier d'instantané absent, illisible ou d'une version incompatible."""
+
+
+def default_path():
+    return getattr(settings, 'SKILL_MATRIX_PATH', os.path.join(settings.BASE_DIR, 'var', 'skill_matrix.bin'))
+
+
+def database_fingerprint():
+    """
+    Empreinte de l'état des tables sources (quelques agrégats indexés).
+
+    Toute création ou suppression change le nombre de lignes ou l'identifiant
+    maximal ; toute modification d'une compétence d'employé ou d'une évaluation
+    change la date de modification maximale. `PositionSkill` n'a pas de date de
+    modification : chaque colonne lue par l'instantané y est résumée par une somme
+    pondérée par l'identifiant de la ligne, qui change dès qu'une ligne change de
+    position, de compétence, de niveau ou de caractère obligatoire (y compris un
+    échange de niveaux entre deux lignes).
+    """
+    parts = [
+        Employee.objects.aggregate(n=Count('id'), max_id=Max('id')),
+        Skill.objects.aggregate(n=Count('id'), max_id=Max('id')),
+        Position.objects.aggregate(n=Count('id'), max_id=Max('id')),
+        EmployeeSkill.objects.aggregate(n=Count('id'), max_id=Max('id'), updated=Max('last_updated')),
+        Evaluation.objects.aggregate(n=Count('id'), max_id=Max('id'), updated=Max('last_updated')),
+        PositionSkill.objects.aggregate(
+            n=Count('id'), max_id=Max('id'),
+            positions=Sum(F('id') * F('position_id')),
+            skills=Sum(F('id') * F('skill_id')),
+            levels=Sum(F('id') * F('importance_level')),
+            required=Sum('id', filter=Q(is_required=True)),
+        ),
+    ]
+    digest = hashlib.sha256(repr([sorted(part.items()) for part in parts]).encode())
+    return digest.digest()
+
+
+@contextmanager
+def consistent_read():
+    """
+    Transaction de lecture : les requêtes qu'elle contient voient un seul état de la base.
+
+    SQLite et MySQL (InnoDB) lisent un instantané jusqu'à la fin de la
+    transaction ; PostgreSQL est en `READ COMMITTED` par défaut, la transaction
+    la plus externe passe donc en `REPEATABLE READ`.
+    """
+    outermost = not connection.in_atomic_block
+    with transaction.atomic():
+        if outermost and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        yield
+
+
+def build_csr(rows, row_ids, skill_index):
+    """
+    Construit une matrice creuse CSR à partir de lignes (ligne, compétence, niveau[, obligatoire])
+    triées par ligne puis compétence.
+
+    Les lignes dont la ligne ou la compétence est absente des identifiants sont
+    ignorées (ligne créée après la lecture des identifiants).
+
+    Returns:
+        tuple: (indptr, indices, levels, flags)
+    """
+    row_position = {row_id: i for i, row_id in enumerate(row_ids)}
+    indptr = array('q', [0] * (len(row_ids) + 1))
+    indices, levels, flags = array('i'), array('B'), array('B')
+    for row_id, skill_id, level, *flag in rows:
+        position, column = row_position.get(row_id), skill_index.get(skill_id)
+        if position is None or column is None:
+            continue
+        indptr[position + 1] += 1
+        indices.append(column)
+        levels.append(level)
+        if flag:
+            flags.append(1 if flag[0] else 0)
+    for i in range(len(row_ids)):
+        indptr[i + 1] += indptr[i]
+    return indptr, indices, levels, flags
+
+
+def collect_sections():
+    """Lit les tables sources et retourne les sections de l'instantané {nom: array}."""
+    ids = {
+        'employee_ids': array('q', Employee.objects.order_by('id').values_list('id', flat=True).iterator(READ_CHUNK_SIZE)),
+        'skill_ids': array('q', Skill.objects.order_by('id').values_list('id', flat=True).iterator(READ_CHUNK_SIZE)),
+        'position_ids': array('q', Position.objects.order_by('id').values_list('id', flat=True).iterator(READ_CHUNK_SIZE)),
+    }
+    skill_index = {skill_id: i for i, skill_id in enumerate(ids['skill_ids'])}
+    sections = dict(ids)
+    for name, (model, row_column, level_column, row_ids) in MATRICES.items():
+        columns = [row_column, 'skill_id', level_column] + (['is_required'] if model is PositionSkill else [])
+        rows = model.objects.order_by(row_column, 'skill_id').values_list(*columns).iterator(READ_CHUNK_SIZE)
+        indptr, indices, levels, flags = build_csr(rows, ids[row_ids], skill_index)
+        sections[f'{name}_indptr'] = indptr
+        sections[f'{name}_skills'] = indices
+        sections[f'{name}_levels'] = levels
+        if model is PositionSkill:
+            sections[f'{name}_flags'] = flags
+    return sections
+
+
+def write_skill_matrix(path=None):
+    """
+    Écrit l'instantané de la matrice des compétences.
+
+    Le fichier est écrit à côté de la cible puis renommé : les processus qui ont
+    projeté l'ancien fichier continuent de le lire jusqu'à leur rechargement.
+
+    Returns:
+        dict: Chemin du fichier, taille en octets et nombre d'éléments par section
+    """
+    path = path or default_path()
+    with consistent_read():
+        fingerprint = database_fingerprint()
+        sections = collect_sections()
+
+    directory_size = SECTION.size * len(sections)
+    offset = align(HEADER.size + directory_size)
+    entries = []
+    for name, values in sections.items():
+        entries.append(SECTION.pack(name.encode(), values.typecode.encode(), values.itemsize, offset, len(values)))
+        offset = align(offset + len(values) * values.itemsize)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(
+                MAGIC, FORMAT_VERSION, byteorder_flag(), datetime.now(dt_timezone.utc).timestamp(),
+                fingerprint, len(sections)
+            ))
+            f.write(b''.join(entries))
+            for values in sections.values():
+                f.write(b'\0' * (align(f.tell()) - f.tell()))
+                values.tofile(f)
+            f.write(b'\0' * (align(f.tell()) - f.tell()))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return {
+        'path': str(path),
+        'size': os.path.getsize(path),
+        'sections': {name: len(values) for name, values in sections.items()},
+    }
+
+
+def align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def byteorder_flag():
+    return 1 if sys.byteorder == 'little' else 0
+
+
+class SkillMatrix:
+    """
+    Instantané projeté en mémoire, en lecture seule.
+
+    Les sections sont des `memoryview` typées sur le fichier (aucune copie) ;
+    les identifiants sont triés et recherchés par dichotomie.
+
+    Raises:
+        SnapshotError: Si le fichier est absent ou incompatible
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        try:
+            with open(self.path, 'rb') as f:
+                self.stat = os.fstat(f.fileno())
+                self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Instantané illisible : {self.path} ({e})")
+        try:
+            magic, version, byteorder, created_at, self.fingerprint, count = HEADER.unpack_from(self.mmap, 0)
+        except struct.error:
+            self.close()
+            raise SnapshotError(f"Instantané tronqué : {self.path}")
+        if magic != MAGIC or version != FORMAT_VERSION or byteorder != byteorder_flag():
+            self.close()
+            raise SnapshotError(f"Format d'instantané incompatible : {self.path}")
+        self.created_at = datetime.fromtimestamp(created_at, dt_timezone.utc)
+
+        self.sections = {}
+        try:
+            for i in range(count):
+                name, typecode, itemsize, offset, length = SECTION.unpack_from(self.mmap, HEADER.size + i * SECTION.size)
+                name, typecode = name.rstrip(b'\0').decode(), typecode.decode()
+                if array(typecode).itemsize != itemsize or offset + length * itemsize > len(self.mmap):
+                    raise ValueError(f"section {name}")
+                self.sections[name] = memoryview(self.mmap)[offset:offset + length * itemsize].cast(typecode)
+        except (struct.error, ValueError) as e:
+            self.close()
+            raise SnapshotError(f"Instantané corrompu : {self.path} ({e})")
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['sections'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def close(self):
+        """Libère la projection (les sections ne sont plus lisibles)."""
+        for section in self.__dict__.get('sections', {}).values():
+            section.release()
+        self.sections = {}
+        self.mmap.close()
+
+    def is_stale(self):
+        """Vrai si la base a changé depuis l'écriture de l'instantané."""
+        return self.fingerprint != database_fingerprint()
+
+    @staticmethod
+    def index_of(ids, value):
+        i = bisect_left(ids, value)
+        return i if i < len(ids) and ids[i] == value else None
+
+    def row(self, matrix, row_id):
+        """
+        Colonnes d'une ligne d'une matrice.
+
+        Returns:
+            dict: {skill_id: niveau}, vide si la ligne n'existe pas dans l'instantané
+        """
+        row_ids = self.sections[MATRICES[matrix][3]]
+        i = self.index_of(row_ids, row_id)
+        if i is None:
+            return {}
+        indptr = self.sections[f'{matrix}_indptr']
+        skills, levels = self.sections[f'{matrix}_skills'], self.sections[f'{matrix}_levels']
+        skill_ids = self.skill_ids
+        return {skill_ids[skills[j]]: levels[j] for j in range(indptr[i], indptr[i + 1])}
+
+    def employee_skills(self, employee_id):
+        """Niveaux déclarés d'un employé {skill_id: niveau}."""
+        return self.row('declared', employee_id)
+
+    def employee_evaluations(self, employee_id):
+        """Niveaux évalués d'un employé {skill_id: niveau}."""
+        return self.row('evaluated', employee_id)
+
+    def position_requirements(self, position_id):
+        """Compétences d'une position [(skill_id, niveau d'importance, obligatoire)]."""
+        i = self.index_of(self.position_ids, position_id)
+        if i is None:
+            return []
+        start, end = self.required_indptr[i], self.required_indptr[i + 1]
+        return [
+            (self.skill_ids[self.required_skills[j]], self.required_levels[j], bool(self.required_flags[j]))
+            for j in range(start, end)
+        ]
+
+
+def load_skill_matrix(path=None):
+    """
+    Instantané projeté du processus, rechargé si le fichier a été remplacé.
+
+    Raises:
+        SnapshotError: Si le fichier est absent ou incompatible
+    """
+    path = str(path or default_path())
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        raise SnapshotError(f"Instantané introuvable : {path} ({e})")
+    with _loaded_lock:
+        matrix = _loaded.get(path)
+        if matrix is None or (matrix.stat.st_ino, matrix.stat.st_mtime_ns) != (stat.st_ino, stat.st_mtime_ns):
+            # L'ancienne projection reste valide pour les références existantes jusqu'à leur libération
+            matrix = _loaded[path] = SkillMatrix(path)
+        return matrix
+
+
+def request_snapshot():
+    """Planifie la réécriture de l'instantané (une tâche en attente au plus)."""
+    if not Task.objects.filter(name=SNAPSHOT_TASK, status=Task.Status.PENDING).exists():
+        enqueue(SNAPSHOT_TASK)
+
+
+@register_task(SNAPSHOT_TASK)
+def snapshot_skill_matrix(path=None):
+    """Tâche de fond : réécrit l'instantané s'il est absent ou périmé."""
+    try:
+        if not load_skill_matrix(path).is_stale():
+            return {'written': False}
+    except SnapshotError:
+        pass
+    return {'written': True, **write_skill_matrix(path)}
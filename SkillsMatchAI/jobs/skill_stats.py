@@ -0,0 +1,49 @@
+"""
+Statistiques mises en cache sur la répartition des niveaux de compétences.
+
+Ces comptes servent à estimer la sélectivité d'un seuil de compétence
+(ex: "Python >= 3") afin d'ordonner les requêtes multi-compétences.
+"""
+from django.core.cache import cache
+from django.db.models import Count
+
+from SkillsMatchAI.metrics import record_cache_access
+
+from .models import EmployeeSkill
+from .recompute import register_recompute
+
+SKILL_LEVEL_COUNTS_KEY = 'skill_level_counts:{skill_id}'
+SKILL_LEVEL_COUNTS_TIMEOUT = 60 * 60
+
+
+def get_skill_level_counts(skill_id):
+    """
+    Retourne le nombre d'employés par niveau de maîtrise pour une compétence.
+
+    Returns:
+        dict: {niveau: nombre d'employés}
+    """
+    key = SKILL_LEVEL_COUNTS_KEY.format(skill_id=skill_id)
+    counts = cache.get(key)
+    record_cache_access('skill_level_counts', counts is not None)
+    if counts is None:
+        counts = dict(
+            EmployeeSkill.objects.filter(skill_id=skill_id)
+            .values_list('proficiency_level')
+            .annotate(total=Count('id'))
+            .order_by()
+        )
+        cache.set(key, counts, SKILL_LEVEL_COUNTS_TIMEOUT)
+    return counts
+
+
+def skill_level_count_at_least(skill_id, level):
+    """Nombre d'employés ayant la compétence à un niveau supérieur ou égal à `level`."""
+    counts = get_skill_level_counts(skill_id)
+    return sum(total for proficiency, total in counts.items() if proficiency >= level)
+
+
+@register_recompute('skill')
+def invalidate_skill_level_counts(skill_ids):
+    """Invalide les comptes en cache des compétences données."""
+    cache.delete_many([SKILL_LEVEL_COUNTS_KEY.format(skill_id=skill_id) for skill_id in skill_ids])
@@ -0,0 +1,15 @@
+'use strict';
+{
+    // Recharge la liste filtrée lorsqu'une valeur est choisie dans un filtre à autocomplétion
+    const $ = django.jQuery;
+    $(function() {
+        $('.autocomplete-filter select').on('change', function() {
+            const container = this.closest('.autocomplete-filter');
+            const url = new URL(container.dataset.baseUrl, window.location.href);
+            if (this.value) {
+                url.searchParams.set(container.dataset.lookup, this.value);
+            }
+            window.location.href = url.toString();
+        });
+    });
+}
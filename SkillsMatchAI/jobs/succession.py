@@ -0,0 +1,190 @@
+"""
+Plan de succession : meilleurs successeurs internes de chaque position occupée.
+
+`compute_successors()` (commande `python manage.py compute_successors`, tâche
+`jobs.compute_successors`) traite les positions occupées par lots, dans l'ordre
+des identifiants. Chaque lot remplace les successeurs de ses positions et
+avance le point de reprise (`BatchCheckpoint`) dans la même transaction : un
+traitement interrompu reprend après le dernier lot validé. À la fin, les
+successeurs des positions qui ne sont plus occupées sont supprimés.
+
+Adéquation d'un employé actif à une position (`score`, 0 à 100) : somme, sur
+les compétences de la position, du niveau de l'employé plafonné au niveau
+d'importance, rapportée à la somme des niveaux d'importance. Les successeurs
+sont classés par nombre de compétences obligatoires sous le niveau demandé,
+puis par adéquation décroissante.
+
+L'API (`/api/positions/{id}/successors/`) lit directement la table `Successor`.
+"""
+import heapq
+import time
+from array import array
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import BatchCheckpoint, Employee, EmployeeSkill, Position, PositionSkill, Successor
+from .tasks import register_task
+
+CHECKPOINT_NAME = 'compute_successors'
+SUCCESSORS_TASK = 'jobs.compute_successors'
+
+DEFAULT_TOP = 5
+DEFAULT_CHUNK_SIZE = 200
+
+# Lignes lues par requête lors du chargement des compétences
+READ_CHUNK_SIZE = 20000
+
+
+def load_skill_holders():
+    """
+    Compétences des employés actifs, indexées par compétence.
+
+    Returns:
+        dict: {skill_id: (array des employés, array des niveaux)}
+    """
+    holders = {}
+    rows = EmployeeSkill.objects.filter(
+        employee__employment_status=Employee.EmploymentStatus.ACTIVE
+    ).values_list('skill_id', 'employee_id', 'proficiency_level').iterator(READ_CHUNK_SIZE)
+    for skill_id, employee_id, level in rows:
+        employees, levels = holders.setdefault(skill_id, (array('q'), array('B')))
+        employees.append(employee_id)
+        levels.append(level)
+    return holders
+
+
+def rank_successors(requirements, holders, excluded, top):
+    """
+    Meilleurs successeurs pour un ensemble de compétences.
+
+    Args:
+        requirements (list): Triplets (skill_id, niveau d'importance, obligatoire)
+        holders (dict): Résultat de `load_skill_holders()`
+        excluded (set): Employés à écarter (titulaire)
+        top (int): Nombre de successeurs
+
+    Returns:
+        list: Triplets (employee_id, score, compétences obligatoires manquantes), du meilleur au moins bon
+    """
+    total = sum(importance for _, importance, _ in requirements)
+    required = sum(1 for _, _, is_required in requirements if is_required)
+    if not total:
+        return []
+    points, met = {}, {}
+    for skill_id, importance, is_required in requirements:
+        employees, levels = holders.get(skill_id, ((), ()))
+        for employee_id, level in zip(employees, levels):
+            points[employee_id] = points.get(employee_id, 0) + min(level, importance)
+            if is_required and level >= importance:
+                met[employee_id] = met.get(employee_id, 0) + 1
+    best = heapq.nsmallest(
+        top,
+        (employee_id for employee_id in points if employee_id not in excluded),
+        key=lambda employee_id: (required - met.get(employee_id, 0), -points[employee_id], employee_id)
+    )
+    return [
+        (employee_id, round(100 * points[employee_id] / total, 1), required - met.get(employee_id, 0))
+        for employee_id in best
+    ]
+
+
+def position_chunk(cursor, chunk_size):
+    """Positions occupées suivant le curseur : [(position_id, titulaires)]."""
+    positions = list(
+        Position.objects.filter(status=Position.Status.OCCUPIED, id__gt=cursor)
+        .order_by('id').values_list('id', 'employee_id')[:chunk_size]
+    )
+    incumbents = {position_id: {employee_id} - {None} for position_id, employee_id in positions}
+    current = Employee.objects.filter(current_position__in=incumbents).values_list('current_position_id', 'id')
+    for position_id, employee_id in current:
+        incumbents[position_id].add(employee_id)
+    return list(incumbents.items())
+
+
+def start_checkpoint(params, restart=False):
+    """Point de reprise du traitement : reprise du traitement interrompu, ou nouveau départ."""
+    checkpoint, created = BatchCheckpoint.objects.get_or_create(
+        name=CHECKPOINT_NAME, defaults={'params': params, 'started_at': timezone.now()}
+    )
+    if created or (checkpoint.completed_at is None and checkpoint.params == params and not restart):
+        return checkpoint, not created
+    checkpoint.cursor = checkpoint.processed = checkpoint.rows = 0
+    checkpoint.params = params
+    checkpoint.started_at = timezone.now()
+    checkpoint.completed_at = None
+    checkpoint.save()
+    return checkpoint, False
+
+
+@register_task(SUCCESSORS_TASK, atomic=False)
+def compute_successors(top=None, chunk_size=DEFAULT_CHUNK_SIZE, restart=False, log=None):
+    """
+    Calcule les successeurs de toutes les positions occupées, par lots avec point de reprise.
+
+    Args:
+        top (int, optional): Successeurs par position (défaut: `SUCCESSION_TOP_N`)
+        chunk_size (int): Positions par lot (une transaction par lot)
+        restart (bool): Ignore le point de reprise d'un traitement interrompu
+        log (callable, optional): Reçoit un message par lot
+
+    Returns:
+        dict: Positions traitées, lignes écrites, durée et débit (lignes/s) de cette exécution
+    """
+    top = top or getattr(settings, 'SUCCESSION_TOP_N', DEFAULT_TOP)
+    log = log or (lambda message: None)
+    checkpoint, resumed = start_checkpoint({'top': top}, restart)
+    if resumed:
+        log(f"Reprise après la position {checkpoint.cursor} ({checkpoint.processed} position(s) déjà traitée(s))")
+
+    started = time.monotonic()
+    holders = load_skill_holders()
+    processed = rows = 0
+    while True:
+        chunk = position_chunk(checkpoint.cursor, chunk_size)
+        if not chunk:
+            break
+        requirements = {}
+        for position_id, skill_id, importance, is_required in PositionSkill.objects.filter(
+            position__in=[position_id for position_id, _ in chunk]
+        ).values_list('position_id', 'skill_id', 'importance_level', 'is_required'):
+            requirements.setdefault(position_id, []).append((skill_id, importance, is_required))
+
+        computed_at = timezone.now()
+        successors = [
+            Successor(position_id=position_id, employee_id=employee_id, rank=rank, score=score,
+                      missing_required=missing, computed_at=computed_at)
+            for position_id, incumbents in chunk
+            for rank, (employee_id, score, missing) in enumerate(
+                rank_successors(requirements.get(position_id, []), holders, incumbents, top), start=1
+            )
+        ]
+        with transaction.atomic():
+            Successor.objects.filter(position__in=[position_id for position_id, _ in chunk]).delete()
+            Successor.objects.bulk_create(successors)
+            checkpoint.cursor = chunk[-1][0]
+            checkpoint.processed += len(chunk)
+            checkpoint.rows += len(successors)
+            checkpoint.save(update_fields=['cursor', 'processed', 'rows', 'updated_at'])
+
+        processed += len(chunk)
+        rows += len(successors)
+        elapsed = time.monotonic() - started
+        rate = rows / elapsed if elapsed else 0
+        log(f"{checkpoint.processed} position(s), {checkpoint.rows} successeur(s) - {rate:.0f} lignes/s")
+
+    with transaction.atomic():
+        # Positions qui ne sont plus occupées
+        Successor.objects.filter(computed_at__lt=checkpoint.started_at).delete()
+        checkpoint.completed_at = timezone.now()
+        checkpoint.save(update_fields=['completed_at', 'updated_at'])
+
+    elapsed = time.monotonic() - started
+    return {
+        'positions': processed,
+        'rows': rows,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(rows / elapsed, 1) if elapsed else None,
+        'resumed': resumed,
+    }
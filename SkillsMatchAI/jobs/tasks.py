@@ -0,0 +1,279 @@
+"""
+File de tâches de fond stockée en base de données.
+
+Les traitements sont enregistrés avec le décorateur `register_task`, mis en file
+avec `enqueue` et exécutés par la commande `python manage.py run_worker`.
+
+Plusieurs workers peuvent tourner en parallèle : une tâche est réservée par
+`SELECT ... FOR UPDATE SKIP LOCKED` lorsque la base le permet (PostgreSQL,
+MySQL 8), puis par un `UPDATE` conditionnel sur le statut, qui suffit à
+garantir qu'un seul worker l'obtient (seule option sous SQLite).
+
+Pendant l'exécution, le worker rafraîchit `locked_at` (battement) toutes les
+`TASK_HEARTBEAT_INTERVAL` secondes : seule une tâche dont le worker a disparu
+dépasse `TASK_LOCK_TIMEOUT` et est remise en file, ce qui compte comme une
+tentative. Sous SQLite, une seule connexion écrit à la fois : le battement
+d'une tâche exécutée dans une transaction serait bloqué par ses propres
+écritures. Ces tâches n'ont pas de battement et ne sont remises en file
+qu'après `TASK_SQLITE_ATOMIC_LOCK_TIMEOUT` secondes.
+
+L'état final d'une tâche n'est écrit que si le worker la détient encore : une
+exécution remise en file puis reprise par un autre worker n'est pas écrasée.
+
+Un traitement s'exécute dans une transaction : ses écritures sont annulées en
+cas d'erreur. Un traitement par lots qui valide chaque lot et enregistre sa
+reprise (`register_task(name, atomic=False)`) s'exécute sans transaction
+englobante : un échec conserve les lots validés et la tentative suivante reprend
+après le dernier.
+"""
+import logging
+import os
+import socket
+import threading
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+# Délai de base avant une nouvelle tentative (doublé à chaque échec)
+DEFAULT_RETRY_DELAY = 30
+
+# Une tâche en cours depuis plus longtemps est considérée comme abandonnée (worker arrêté)
+DEFAULT_LOCK_TIMEOUT = 600
+
+# Même délai pour une tâche exécutée dans une transaction sous SQLite (sans battement)
+DEFAULT_SQLITE_ATOMIC_LOCK_TIMEOUT = 6 * 3600
+
+# Nombre de tâches candidates examinées à chaque réservation
+CLAIM_CANDIDATES = 10
+
+# Longueur maximale du message d'erreur enregistré (la trace complète est journalisée)
+MAX_ERROR_LENGTH = 500
+
+TASK_HANDLERS = {}
+
+# Traitements exécutés sans transaction englobante (ils valident leurs propres lots)
+NON_ATOMIC_TASKS = set()
+
+
+def register_task(name, atomic=True):
+    """
+    Décorateur enregistrant un traitement exécutable par le worker.
+
+    Args:
+        name (str): Nom de la tâche
+        atomic (bool): Exécuter le traitement dans une transaction ; False pour un
+            traitement par lots qui valide chaque lot et reprend après un échec
+    """
+    def decorator(func):
+        TASK_HANDLERS[name] = func
+        if atomic:
+            NON_ATOMIC_TASKS.discard(name)
+        else:
+            NON_ATOMIC_TASKS.add(name)
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, delay=None, max_attempts=3):
+    """
+    Met une tâche en file et retourne l'objet `Task` créé.
+
+    Args:
+        name (str): Nom d'un traitement enregistré
+        payload (dict, optional): Arguments nommés du traitement (sérialisables en JSON)
+        delay (timedelta, optional): Délai avant la première exécution
+        max_attempts (int): Nombre maximal de tentatives
+    """
+    if name not in TASK_HANDLERS:
+        raise ValueError(f"Tâche inconnue : {name}")
+    return Task.objects.create(
+        name=name,
+        payload=payload or {},
+        max_attempts=max_attempts,
+        run_after=timezone.now() + (delay or timedelta())
+    )
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next_task(worker_id):
+    """Réserve la prochaine tâche prête pour ce worker, ou retourne None."""
+    now = timezone.now()
+    ready = Task.objects.filter(status=Task.Status.PENDING, run_after__lte=now).order_by('run_after', 'id')
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            ready = ready.select_for_update(skip_locked=True)
+        candidates = list(ready.values_list('id', flat=True)[:CLAIM_CANDIDATES])
+        for task_id in candidates:
+            claimed = Task.objects.filter(id=task_id, status=Task.Status.PENDING).update(
+                status=Task.Status.RUNNING,
+                locked_by=worker_id,
+                locked_at=now,
+                attempts=F('attempts') + 1
+            )
+            if claimed:
+                return Task.objects.get(id=task_id)
+    return None
+
+
+def lock_timeout():
+    return getattr(settings, 'TASK_LOCK_TIMEOUT', DEFAULT_LOCK_TIMEOUT)
+
+
+def sqlite_atomic_lock_timeout():
+    return getattr(settings, 'TASK_SQLITE_ATOMIC_LOCK_TIMEOUT', DEFAULT_SQLITE_ATOMIC_LOCK_TIMEOUT)
+
+
+def has_heartbeat(name):
+    """Faux pour une tâche atomique sous SQLite : ses écritures bloqueraient celles du battement."""
+    return connection.vendor != 'sqlite' or name in NON_ATOMIC_TASKS
+
+
+def requeue_stale_tasks():
+    """
+    Remet en file les tâches dont le worker a disparu en cours d'exécution.
+
+    L'exécution interrompue compte comme une tentative (comptée à la réservation) :
+    une tâche qui a épuisé ses tentatives est marquée en échec au lieu d'être
+    remise en file. Retourne le nombre de tâches remises en file.
+    """
+    now = timezone.now()
+    expired = Q(locked_at__lt=now - timedelta(seconds=lock_timeout()))
+    if connection.vendor == 'sqlite':
+        # Tâches atomiques sans battement (voir `has_heartbeat`) : délai plus long
+        expired = (expired & Q(name__in=NON_ATOMIC_TASKS)) | (
+            Q(locked_at__lt=now - timedelta(seconds=sqlite_atomic_lock_timeout())) & ~Q(name__in=NON_ATOMIC_TASKS)
+        )
+    stale = Task.objects.filter(expired, status=Task.Status.RUNNING)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.Status.FAILED,
+        error="Worker interrompu pendant l'exécution (tentatives épuisées)",
+        locked_by='',
+        locked_at=None,
+        finished_at=timezone.now()
+    )
+    if failed:
+        logger.error("%s tâche(s) abandonnée(s) par leur worker marquée(s) en échec", failed)
+    return stale.update(
+        status=Task.Status.PENDING,
+        error="Worker interrompu pendant l'exécution",
+        locked_by='',
+        locked_at=None
+    )
+
+
+class Heartbeat:
+    """Rafraîchit `locked_at` d'une tâche en cours depuis un thread, jusqu'à `stop()`."""
+
+    def __init__(self, task):
+        self.task = task
+        self.interval = getattr(settings, 'TASK_HEARTBEAT_INTERVAL', lock_timeout() / 4)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=f'heartbeat-{task.pk}', daemon=True)
+
+    def beat(self):
+        Task.objects.filter(pk=self.task.pk, status=Task.Status.RUNNING, locked_by=self.task.locked_by).update(
+            locked_at=timezone.now()
+        )
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    self.beat()
+                except DatabaseError:
+                    # Base verrouillée, connexion perdue... : nouvel essai au prochain battement
+                    logger.warning("Battement de la tâche %s en échec", self.task, exc_info=True)
+                    connection.close()
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+
+def error_message(exc):
+    """Message court enregistré dans `Task.error` (visible par l'API)."""
+    message = f"{type(exc).__name__}: {exc}"
+    return message if len(message) <= MAX_ERROR_LENGTH else message[:MAX_ERROR_LENGTH - 1] + '…'
+
+
+def run_task(task):
+    """
+    Exécute une tâche réservée et enregistre son résultat.
+
+    Le traitement s'exécute dans une transaction, sauf s'il a été enregistré
+    avec `atomic=False`. En cas d'erreur, la tâche est replanifiée avec un délai exponentiel tant que
+    `max_attempts` n'est pas atteint, puis marquée en échec. La trace complète
+    est journalisée ; seul un message court est enregistré dans la tâche.
+    """
+    handler = TASK_HANDLERS.get(task.name)
+    try:
+        if handler is None:
+            raise LookupError(f"Tâche inconnue : {task.name}")
+        atomic = nullcontext() if task.name in NON_ATOMIC_TASKS else transaction.atomic()
+        heartbeat = Heartbeat(task) if has_heartbeat(task.name) else nullcontext()
+        with heartbeat, atomic:
+            result = handler(**task.payload)
+    except Exception as exc:
+        values = {'error': error_message(exc), 'locked_by': '', 'locked_at': None}
+        if handler is not None and task.attempts < task.max_attempts:
+            retry_delay = getattr(settings, 'TASK_RETRY_DELAY', DEFAULT_RETRY_DELAY)
+            values['status'] = Task.Status.PENDING
+            values['run_after'] = timezone.now() + timedelta(seconds=retry_delay * 2 ** (task.attempts - 1))
+            logger.warning("Tâche %s en erreur (tentative %s/%s)", task, task.attempts, task.max_attempts,
+                           exc_info=True)
+        else:
+            values['status'] = Task.Status.FAILED
+            values['finished_at'] = timezone.now()
+            logger.error("Tâche %s en échec définitif", task, exc_info=True)
+        finish(task, **values)
+        return task
+
+    finish(task, status=Task.Status.SUCCEEDED, result=result, finished_at=timezone.now())
+    return task
+
+
+def finish(task, **values):
+    """
+    Écrit l'état final d'une tâche si ce worker la détient encore.
+
+    Une tâche remise en file (`requeue_stale_tasks`) a pu être reprise par un
+    autre worker : son exécution en cours n'est pas écrasée. Retourne vrai si
+    l'état a été écrit.
+    """
+    updated = Task.objects.filter(pk=task.pk, status=Task.Status.RUNNING, locked_by=task.locked_by).update(**values)
+    if not updated:
+        logger.error("Tâche %s n'est plus détenue par %s : état final ignoré", task, task.locked_by)
+        return False
+    for field, value in values.items():
+        setattr(task, field, value)
+    return True
+
+
+def run_pending_tasks(worker_id=None, max_tasks=None):
+    """Exécute les tâches prêtes jusqu'à ce que la file soit vide. Retourne le nombre de tâches traitées."""
+    worker_id = worker_id or default_worker_id()
+    processed = 0
+    while max_tasks is None or processed < max_tasks:
+        task = claim_next_task(worker_id)
+        if task is None:
+            break
+        run_task(task)
+        processed += 1
+    return processed
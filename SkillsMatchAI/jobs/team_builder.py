@@ -0,0 +1,121 @@
+"""
+Constitution d'équipe : couverture d'un ensemble de besoins en compétences
+par un nombre minimal d'employés actifs (problème de couverture d'ensemble).
+
+`suggest_team()` lit en une requête les compétences des candidats utiles aux
+besoins, en déduit pour chaque employé l'ensemble des besoins qu'il couvre,
+puis applique l'algorithme glouton paresseux : une file de priorité ordonnée
+par le nombre de besoins encore non couverts que chaque employé couvrirait.
+Un gain extrait de la file n'est recalculé qu'au moment où il arrive en tête
+(il ne peut que diminuer) : la plupart des candidats ne sont jamais réévalués.
+
+Avec `include_descendants`, un besoin est aussi couvert par ses
+sous-compétences (`jobs.skill_hierarchy`) : « Django » couvre « Python ».
+
+L'équipe obtenue est au plus H(n) fois plus grande que l'équipe optimale
+(n = nombre de besoins), ce qui est la meilleure garantie polynomiale connue.
+"""
+import heapq
+
+from .models import Employee, EmployeeSkill, SkillClosure
+
+
+def coverage_sets(needs, candidates, include_descendants=False):
+    """
+    Besoins couverts par chaque candidat.
+
+    Args:
+        needs (list): Couples (skill_id, niveau minimal)
+        candidates (QuerySet): Employés candidats
+        include_descendants (bool): Les sous-compétences d'une compétence demandée la couvrent
+
+    Returns:
+        dict: {employee_id: (frozenset des indices des besoins couverts, somme des niveaux utiles)}
+    """
+    needs_by_skill = {}
+    for i, (skill_id, level) in enumerate(needs):
+        needs_by_skill.setdefault(skill_id, []).append((i, level))
+    if include_descendants:
+        expanded = {}
+        links = SkillClosure.objects.filter(ancestor_id__in=needs_by_skill).values_list('ancestor_id', 'descendant_id')
+        for ancestor_id, descendant_id in links:
+            expanded.setdefault(descendant_id, []).extend(needs_by_skill[ancestor_id])
+        needs_by_skill = expanded
+
+    covered, strength = {}, {}
+    rows = EmployeeSkill.objects.filter(
+        skill_id__in=needs_by_skill, employee__in=candidates
+    ).values_list('employee_id', 'skill_id', 'proficiency_level')
+    for employee_id, skill_id, proficiency in rows:
+        for i, level in needs_by_skill[skill_id]:
+            if proficiency >= level:
+                covered.setdefault(employee_id, set()).add(i)
+                strength[employee_id] = strength.get(employee_id, 0) + proficiency
+    return {employee_id: (frozenset(needs_covered), strength[employee_id])
+            for employee_id, needs_covered in covered.items()}
+
+
+def greedy_cover(sets, universe, max_size=None):
+    """
+    Couverture gloutonne paresseuse.
+
+    Args:
+        sets (dict): {clé: (frozenset des éléments couverts, force)} ; à gain égal,
+            la plus grande force puis la plus petite clé l'emporte
+        universe (set): Éléments à couvrir
+        max_size (int, optional): Nombre maximal d'ensembles retenus
+
+    Returns:
+        tuple: (liste de (clé, éléments nouvellement couverts), éléments non couverts)
+    """
+    uncovered = set(universe)
+    heap = [(-len(elements & uncovered), -strength, key) for key, (elements, strength) in sets.items()]
+    heapq.heapify(heap)
+    chosen = []
+    while uncovered and heap and (max_size is None or len(chosen) < max_size):
+        negative_gain, negative_strength, key = heapq.heappop(heap)
+        gain = len(sets[key][0] & uncovered)
+        if not gain:
+            continue
+        if gain < -negative_gain:
+            # Gain périmé : l'employé reprend sa place avec son gain actuel
+            heapq.heappush(heap, (-gain, negative_strength, key))
+            continue
+        newly_covered = sets[key][0] & uncovered
+        uncovered -= newly_covered
+        chosen.append((key, newly_covered))
+    return chosen, uncovered
+
+
+def suggest_team(needs, location=None, available=False, exclude=(), max_size=None, include_descendants=False):
+    """
+    Propose une équipe minimale d'employés actifs couvrant tous les besoins.
+
+    Args:
+        needs (list): Couples (skill_id, niveau minimal)
+        location (str, optional): Site de la position actuelle des employés
+        available (bool): Uniquement les employés sans position actuelle
+        exclude (iterable): Employés à écarter (déjà affectés au projet...)
+        max_size (int, optional): Taille maximale de l'équipe
+        include_descendants (bool): Les sous-compétences d'une compétence demandée la couvrent
+
+    Returns:
+        dict: `team` (liste de (employé, indices des besoins qu'il couvre)),
+        `uncovered` (indices des besoins non couverts), `candidates` (nombre d'employés utiles)
+    """
+    candidates = Employee.objects.filter(employment_status=Employee.EmploymentStatus.ACTIVE)
+    if location:
+        candidates = candidates.filter(current_position__location=location)
+    if available:
+        candidates = candidates.filter(current_position__isnull=True)
+    if exclude:
+        candidates = candidates.exclude(pk__in=list(exclude))
+
+    sets = coverage_sets(needs, candidates, include_descendants)
+    chosen, uncovered = greedy_cover(sets, set(range(len(needs))), max_size)
+    employees = Employee.objects.in_bulk([employee_id for employee_id, _ in chosen])
+    return {
+        'team': [(employees[employee_id], sorted(sets[employee_id][0])) for employee_id, _ in chosen],
+        'uncovered': sorted(uncovered),
+        'candidates': len(sets),
+    }
@@ -1,9 +1,39 @@
+import json
+import os
+import tempfile
+from array import array
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.core.management import CommandError, call_command
+from django.db.models import F, Sum
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.contenttypes.models import ContentType
 from jobs.models import (
     JobFamily, Skill, Job, Position, Employee, 
-    CustomField, CustomFieldValue
+    CustomField, CustomFieldValue, EmployeeSkill, Evaluation, EvaluationHistory,
+    PositionSkill, SkillInventory, Successor, BatchCheckpoint, SkillClosure, Task
+)
+from jobs import admin as jobs_admin
+from jobs.fixtures import create_sample_data
+from jobs.skill_inventory import rebuild_skill_inventory
+from jobs.skill_hierarchy import rebuild_skill_closure
+from jobs.skill_dedupe import dedupe_skills, duplicate_groups, normalize_skill_name
+from jobs.skill_extraction import SkillAutomaton, extract_skills
+from jobs.similarity import SimilarityIndex, similarity_index, tokenize
+from jobs.skill_coverage import (
+    SkillCoverageIndex, position_requirements, required_skill_candidates, required_skill_candidates_sql
 )
+from jobs.succession import SUCCESSORS_TASK, compute_successors, rank_successors
+from jobs.skill_matrix import (
+    SNAPSHOT_TASK, SkillMatrix, SnapshotError, build_csr, load_skill_matrix, write_skill_matrix
+)
+from jobs.tasks import claim_next_task, enqueue, run_task
+from django.core.exceptions import ValidationError
+from django.utils import timezone
 from datetime import date
 
 class CustomFieldTestCase(TestCase):
@@ -161,3 +191,643 @@ class CustomFieldTestCase(TestCase):
             ).count(),
             1
         )
+
+
+class SampleDataTestCase(TestCase):
+    """Tests pour le générateur de données fictives"""
+
+    def snapshot(self):
+        return (
+            list(Employee.objects.order_by('email').values_list(
+                'email', 'phone_number', 'employment_status', 'current_position__job__title'
+            )),
+            list(EmployeeSkill.objects.order_by('employee__email', 'skill__name').values_list(
+                'employee__email', 'skill__name', 'proficiency_level'
+            )),
+            list(Position.objects.order_by('pk').values_list('job__title', 'location', 'status', 'employee__email')),
+            list(Evaluation.objects.order_by('employee__email', 'skill__name').values_list(
+                'employee__email', 'skill__name', 'quantitative_level', 'evaluated_by__email'
+            )),
+        )
+
+    def test_seed_is_deterministic(self):
+        """Une même graine produit le même jeu de données, quelle que soit la taille des lots"""
+        sizes = dict(num_job_families=2, num_skills=60, num_jobs=6, num_positions=30, num_employees=40)
+        stats = create_sample_data(seed=7, batch_size=7, log=lambda message: None, **sizes)
+        first = self.snapshot()
+        create_sample_data(seed=7, batch_size=1000, log=lambda message: None, **sizes)
+        self.assertEqual(self.snapshot(), first)
+
+        self.assertEqual(stats['skills'], 60)
+        self.assertEqual(Employee.objects.count(), 40)
+        self.assertEqual(EvaluationHistory.objects.count(), Evaluation.objects.count())
+        self.assertFalse(
+            Position.objects.filter(employee__employment_status=Employee.EmploymentStatus.TERMINATED).exists()
+        )
+
+
+class LargeTableAdminTestCase(TestCase):
+    """Tests pour l'admin des grandes tables (requêtes par page constantes)"""
+
+    def setUp(self):
+        create_sample_data(num_job_families=2, num_skills=20, num_jobs=4, num_positions=20,
+                           num_employees=30, seed=3, log=lambda message: None)
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret123')
+        self.client.force_login(self.admin)
+
+    def changelist_queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_changelists_do_not_query_per_row(self):
+        for url in ('/admin/jobs/employeeskill/', '/admin/jobs/evaluation/',
+                    '/admin/jobs/positionskill/', '/admin/jobs/position/'):
+            _, full_page = self.changelist_queries(url)
+            _, small_page = self.changelist_queries(url, {'q': 'a'})
+            self.assertLessEqual(full_page, small_page + 1, url)
+            self.assertLess(full_page, 15, url)
+
+    def test_autocomplete_filter(self):
+        skill = Skill.objects.order_by('pk').first()
+        response, _ = self.changelist_queries('/admin/jobs/employeeskill/', {'skill__id__exact': skill.pk})
+        self.assertContains(response, 'data-lookup="skill__id__exact"')
+        self.assertContains(response, f'<option value="{skill.pk}" selected>{skill.name}</option>', html=True)
+        self.assertEqual(
+            response.context['cl'].result_count,
+            EmployeeSkill.objects.filter(skill=skill).count()
+        )
+        # Le filtre ne charge pas la liste de toutes les compétences
+        self.assertNotContains(response, Skill.objects.order_by('pk').last().name)
+
+    def test_estimated_count_for_unfiltered_lists(self):
+        with mock.patch.object(jobs_admin, 'estimate_row_count', return_value=2000000):
+            response, _ = self.changelist_queries('/admin/jobs/employeeskill/')
+            self.assertEqual(response.context['cl'].result_count, 2000000)
+            self.assertIsNone(response.context['cl'].full_result_count)
+
+            response, _ = self.changelist_queries('/admin/jobs/employeeskill/', {'proficiency_level': 5})
+            self.assertEqual(
+                response.context['cl'].result_count,
+                EmployeeSkill.objects.filter(proficiency_level=5).count()
+            )
+
+
+
+class SkillInventoryTestCase(TestCase):
+    """Tests pour la maintenance par deltas de l'inventaire des compétences"""
+
+    def setUp(self):
+        self.development = JobFamily.objects.create(name="Développement", description="")
+        self.data = JobFamily.objects.create(name="Data", description="")
+        self.python = Skill.objects.create(name="Python", description="")
+        self.sql = Skill.objects.create(name="SQL", description="")
+        self.job = Job.objects.create(title="Développeur", description="", level="Senior", job_family=self.development)
+        self.paris = Position.objects.create(job=self.job, location="Paris")
+        self.lyon = Position.objects.create(job=self.job, location="Lyon")
+        self.alice = Employee.objects.create(
+            first_name="Alice", last_name="Martin", email="alice@example.com",
+            hire_date=date(2020, 1, 1), date_of_birth=date(1990, 1, 1), current_position=self.paris
+        )
+        self.bob = Employee.objects.create(
+            first_name="Bob", last_name="Durand", email="bob@example.com",
+            hire_date=date(2020, 1, 1), date_of_birth=date(1990, 1, 1)
+        )
+
+    def inventory(self):
+        return sorted(SkillInventory.objects.values_list(
+            'kind', 'skill_id', 'level', 'location', 'job_family_id', 'count', 'weight'
+        ))
+
+    def test_cell_without_job_family_is_unique(self):
+        cell = {'kind': SkillInventory.Kind.SUPPLY, 'skill': self.python, 'level': 3, 'location': '', 'job_family': None}
+        SkillInventory.objects.create(count=1, weight=1, **cell)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SkillInventory.objects.create(count=1, weight=1, **cell)
+
+    def assertInventoryConsistent(self):
+        """L'inventaire maintenu par deltas est identique à une reconstruction complète"""
+        maintained = self.inventory()
+        rebuild_skill_inventory()
+        self.assertEqual(maintained, self.inventory())
+
+    def test_deltas_match_rebuild(self):
+        alice_python = EmployeeSkill.objects.create(
+            employee=self.alice, skill=self.python, proficiency_level=4, date_acquired=date(2021, 1, 1)
+        )
+        EmployeeSkill.objects.create(employee=self.bob, skill=self.python, proficiency_level=4, date_acquired=date(2021, 1, 1))
+        Evaluation.objects.create(employee=self.alice, skill=self.sql, quantitative_level=3)
+        PositionSkill.objects.create(position=self.paris, skill=self.python, importance_level=5, is_required=True)
+        PositionSkill.objects.create(position=self.lyon, skill=self.python, importance_level=3, is_required=False)
+        self.assertInventoryConsistent()
+        self.assertEqual(
+            SkillInventory.objects.get(kind=SkillInventory.Kind.SUPPLY, location="Paris").count, 1
+        )
+        self.assertEqual(
+            SkillInventory.objects.filter(kind=SkillInventory.Kind.DEMAND).aggregate(total=Sum('weight'))['total'], 8
+        )
+
+        alice_python.proficiency_level = 5
+        alice_python.save()
+        self.assertInventoryConsistent()
+
+        self.alice.current_position = self.lyon
+        self.alice.save()
+        self.assertInventoryConsistent()
+
+        self.lyon.location = "Marseille"
+        self.lyon.save()
+        self.job.job_family = self.data
+        self.job.save()
+        self.assertInventoryConsistent()
+        self.assertFalse(SkillInventory.objects.filter(job_family=self.development).exists())
+
+        self.lyon.delete()
+        self.assertInventoryConsistent()
+        self.assertEqual(
+            SkillInventory.objects.get(kind=SkillInventory.Kind.SUPPLY, level=5).location, ''
+        )
+
+        alice_python.delete()
+        self.bob.delete()
+        self.assertInventoryConsistent()
+        self.assertFalse(SkillInventory.objects.filter(kind=SkillInventory.Kind.SUPPLY).exists())
+
+    def test_rollback_discards_deltas(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                EmployeeSkill.objects.create(
+                    employee=self.alice, skill=self.sql, proficiency_level=2, date_acquired=date(2021, 1, 1)
+                )
+                raise RuntimeError
+        self.assertFalse(SkillInventory.objects.exists())
+
+
+class SkillMatrixTestCase(TestCase):
+    """Tests pour l'instantané binaire de la matrice des compétences"""
+
+    def setUp(self):
+        create_sample_data(num_job_families=2, num_skills=12, num_jobs=4, num_positions=8, num_employees=15,
+                           seed=3, log=lambda message: None)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'skill_matrix.bin')
+
+    def test_snapshot_matches_database(self):
+        write_skill_matrix(self.path)
+        matrix = load_skill_matrix(self.path)
+        self.addCleanup(matrix.close)
+        self.assertFalse(matrix.is_stale())
+        self.assertEqual(list(matrix.employee_ids), list(Employee.objects.order_by('id').values_list('id', flat=True)))
+        for employee in Employee.objects.all():
+            self.assertEqual(matrix.employee_skills(employee.id), dict(
+                EmployeeSkill.objects.filter(employee=employee).values_list('skill_id', 'proficiency_level')
+            ))
+            self.assertEqual(matrix.employee_evaluations(employee.id), dict(
+                Evaluation.objects.filter(employee=employee).values_list('skill_id', 'quantitative_level')
+            ))
+        for position in Position.objects.all():
+            self.assertEqual(matrix.position_requirements(position.id), list(
+                PositionSkill.objects.filter(position=position).order_by('skill_id')
+                .values_list('skill_id', 'importance_level', 'is_required')
+            ))
+        self.assertEqual(matrix.employee_skills(0), {})
+
+    def test_staleness_and_reload(self):
+        write_skill_matrix(self.path)
+        matrix = load_skill_matrix(self.path)
+        self.addCleanup(matrix.close)
+        self.assertIs(load_skill_matrix(self.path), matrix)
+
+        requirement = PositionSkill.objects.first()
+        requirement.importance_level = requirement.importance_level % 5 + 1
+        requirement.save()
+        self.assertTrue(matrix.is_stale())
+        with self.assertRaises(CommandError):
+            call_command('snapshot_skill_matrix', output=self.path, check=True, stdout=StringIO())
+
+        call_command('snapshot_skill_matrix', output=self.path, stdout=StringIO())
+        reloaded = load_skill_matrix(self.path)
+        self.addCleanup(reloaded.close)
+        self.assertIsNot(reloaded, matrix)
+        self.assertFalse(reloaded.is_stale())
+        # L'ancienne projection reste lisible
+        self.assertEqual(len(matrix.employee_ids), Employee.objects.count())
+
+    def test_in_place_requirement_changes_are_stale(self):
+        write_skill_matrix(self.path)
+        matrix = load_skill_matrix(self.path)
+        self.addCleanup(matrix.close)
+
+        first, second = PositionSkill.objects.order_by('id')[:2]
+        used = set(PositionSkill.objects.filter(position=first.position).values_list('skill_id', flat=True))
+        other = Skill.objects.exclude(id__in=used).first()
+        PositionSkill.objects.filter(pk=first.pk).update(skill=other)
+        self.assertTrue(matrix.is_stale())
+        PositionSkill.objects.filter(pk=first.pk).update(skill_id=first.skill_id)
+        self.assertFalse(matrix.is_stale())
+
+        # Échange des niveaux : la somme des niveaux ne change pas
+        second.importance_level = first.importance_level % 5 + 1
+        second.save()
+        write_skill_matrix(self.path)
+        matrix = load_skill_matrix(self.path)
+        self.addCleanup(matrix.close)
+        PositionSkill.objects.filter(pk=first.pk).update(importance_level=second.importance_level)
+        PositionSkill.objects.filter(pk=second.pk).update(importance_level=first.importance_level)
+        self.assertTrue(matrix.is_stale())
+
+    def test_rows_created_during_read_are_skipped(self):
+        skill_ids = array('q', Skill.objects.order_by('id').values_list('id', flat=True))
+        skill_index = {skill_id: i for i, skill_id in enumerate(skill_ids)}
+        employee_id, skill_id = Employee.objects.order_by('id').values_list('id', flat=True)[0], skill_ids[0]
+        rows = [(employee_id, skill_id, 3), (employee_id, skill_ids[-1] + 1, 4), (employee_id + 10 ** 6, skill_id, 2)]
+        indptr, indices, levels, flags = build_csr(rows, array('q', [employee_id]), skill_index)
+        self.assertEqual((list(indptr), list(indices), list(levels)), ([0, 1], [0], [3]))
+
+    def test_incompatible_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a snapshot')
+        with self.assertRaises(SnapshotError):
+            SkillMatrix(self.path)
+        with self.assertRaises(SnapshotError):
+            load_skill_matrix(self.path + '.absent')
+
+
+class SkillCoverageTestCase(TestCase):
+    """Tests pour le filtre des compétences obligatoires par ensembles de bits"""
+
+    def setUp(self):
+        create_sample_data(num_job_families=2, num_skills=6, num_jobs=4, num_positions=10, num_employees=60,
+                           seed=5, log=lambda message: None)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'skill_matrix.bin')
+        write_skill_matrix(self.path)
+        self.matrix = load_skill_matrix(self.path)
+        self.addCleanup(self.matrix.close)
+
+    def test_bitsets_match_relational_division(self):
+        for source in ('declared', 'evaluated'):
+            index = SkillCoverageIndex.from_matrix(self.matrix, source)
+            for position in Position.objects.all():
+                requirements = position_requirements(position)
+                self.assertEqual(index.employees(requirements), required_skill_candidates_sql(requirements, source))
+
+        index = SkillCoverageIndex.from_matrix(self.matrix)
+        skill_ids = list(Skill.objects.values_list('id', flat=True)[:2])
+        for level in range(1, 6):
+            requirements = [(skill_id, level) for skill_id in skill_ids]
+            self.assertEqual(index.employees(requirements), required_skill_candidates_sql(requirements))
+        self.assertEqual(index.employees([]), list(Employee.objects.order_by('id').values_list('id', flat=True)))
+        self.assertEqual(index.employees([(0, 1)]), [])
+
+    def test_stale_snapshot_is_refreshed(self):
+        requirements = position_requirements(PositionSkill.objects.filter(is_required=True).first().position)
+        with self.settings(SKILL_MATRIX_PATH=self.path, SKILL_COVERAGE_CHECK_INTERVAL=0):
+            self.assertEqual(required_skill_candidates(requirements)[1], 'bitset')
+            self.assertFalse(Task.objects.exists())
+
+            EmployeeSkill.objects.filter(pk=EmployeeSkill.objects.first().pk).update(
+                proficiency_level=F('proficiency_level') % 5 + 1, last_updated=timezone.now()
+            )
+            self.assertEqual(required_skill_candidates(requirements)[1], 'sql')
+            self.assertEqual(required_skill_candidates(requirements)[1], 'sql')
+            task = Task.objects.get()
+            self.assertEqual(task.name, SNAPSHOT_TASK)
+
+            run_task(claim_next_task('worker-1'))
+            self.assertEqual(Task.objects.get().status, Task.Status.SUCCEEDED)
+            candidates, engine = required_skill_candidates(requirements)
+            self.assertEqual(engine, 'bitset')
+            self.assertEqual(candidates, required_skill_candidates_sql(requirements))
+
+
+class SuccessionTestCase(TestCase):
+    """Tests pour le calcul par lots des successeurs"""
+
+    def setUp(self):
+        create_sample_data(num_job_families=2, num_skills=8, num_jobs=4, num_positions=12, num_employees=40,
+                           seed=11, log=lambda message: None)
+
+    def successors(self):
+        return list(Successor.objects.order_by('position_id', 'rank').values_list(
+            'position_id', 'rank', 'employee_id', 'score', 'missing_required'
+        ))
+
+    def test_ranking_excludes_incumbent_and_inactive(self):
+        compute_successors(top=3)
+        occupied = Position.objects.filter(status=Position.Status.OCCUPIED)
+        self.assertTrue(Successor.objects.exists())
+        self.assertFalse(Successor.objects.exclude(position__in=occupied).exists())
+        self.assertFalse(Successor.objects.filter(position__employee=F('employee')).exists())
+        self.assertFalse(Successor.objects.exclude(employee__employment_status=Employee.EmploymentStatus.ACTIVE).exists())
+        for position_id in occupied.values_list('id', flat=True)[:3]:
+            ranked = list(Successor.objects.filter(position_id=position_id).values_list('missing_required', 'score'))
+            self.assertEqual(ranked, sorted(ranked, key=lambda row: (row[0], -row[1])))
+
+        holders = {1: ([10, 11, 12], [5, 2, 3]), 2: ([11, 12], [4, 4])}
+        self.assertEqual(rank_successors([(1, 3, True), (2, 4, False)], holders, {12}, top=2),
+                         [(10, 42.9, 0), (11, 85.7, 1)])
+
+    def test_resume_after_interruption(self):
+        compute_successors(top=3)
+        expected = self.successors()
+        Successor.objects.all().delete()
+        BatchCheckpoint.objects.all().delete()
+
+        bulk_create = Successor.objects.bulk_create
+        calls = []
+
+        def interrupted(objs, *args, **kwargs):
+            calls.append(len(objs))
+            if len(calls) == 3:
+                raise KeyboardInterrupt
+            return bulk_create(objs, *args, **kwargs)
+
+        with mock.patch.object(Successor.objects, 'bulk_create', side_effect=interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                compute_successors(top=3, chunk_size=2)
+        checkpoint = BatchCheckpoint.objects.get()
+        self.assertEqual(checkpoint.processed, 4)
+        self.assertIsNone(checkpoint.completed_at)
+
+        output = StringIO()
+        call_command('compute_successors', top=3, chunk_size=2, stdout=output)
+        self.assertIn('Reprise après la position', output.getvalue())
+        self.assertIn('lignes/s', output.getvalue())
+        self.assertEqual(self.successors(), expected)
+        self.assertIsNotNone(BatchCheckpoint.objects.get().completed_at)
+
+        # Une position libérée perd ses successeurs au calcul suivant
+        position = Position.objects.filter(successors__isnull=False).first()
+        Position.objects.filter(pk=position.pk).update(status=Position.Status.VACANT)
+        result = compute_successors(top=3)
+        self.assertFalse(result['resumed'])
+        self.assertFalse(Successor.objects.filter(position=position).exists())
+
+    def test_task_resumes_after_failure(self):
+        compute_successors(top=3)
+        expected = self.successors()
+        Successor.objects.all().delete()
+        BatchCheckpoint.objects.all().delete()
+
+        bulk_create = Successor.objects.bulk_create
+        calls = []
+
+        def failing(objs, *args, **kwargs):
+            calls.append(len(objs))
+            if len(calls) == 3:
+                raise RuntimeError("échec")
+            return bulk_create(objs, *args, **kwargs)
+
+        enqueue(SUCCESSORS_TASK, {'top': 3, 'chunk_size': 2})
+        with mock.patch.object(Successor.objects, 'bulk_create', side_effect=failing), \
+                self.assertLogs('jobs.tasks', 'WARNING'):
+            task = run_task(claim_next_task('worker-1'))
+        self.assertEqual(task.status, Task.Status.PENDING)
+        # Les lots validés avant l'échec sont conservés
+        self.assertEqual(BatchCheckpoint.objects.get().processed, 4)
+        self.assertTrue(Successor.objects.exists())
+
+        Task.objects.filter(pk=task.pk).update(run_after=timezone.now())
+        task = run_task(claim_next_task('worker-1'))
+        self.assertEqual(task.status, Task.Status.SUCCEEDED)
+        self.assertTrue(task.result['resumed'])
+        self.assertEqual(task.result['positions'], Position.objects.filter(status=Position.Status.OCCUPIED).count() - 4)
+        self.assertEqual(self.successors(), expected)
+
+
+class SkillHierarchyTestCase(TestCase):
+    """Tests pour la table de fermeture de la taxonomie des compétences"""
+
+    def setUp(self):
+        self.backend = Skill.objects.create(name="Backend", description="Développement serveur")
+        self.python = Skill.objects.create(name="Python", description="Langage", parent=self.backend)
+        self.django = Skill.objects.create(name="Django", description="Framework", parent=self.python)
+        self.flask = Skill.objects.create(name="Flask", description="Framework", parent=self.python)
+        self.data = Skill.objects.create(name="Data", description="Données")
+
+    def links(self):
+        return set(SkillClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+
+    def assertClosureConsistent(self):
+        """La table maintenue par les signaux est identique à une reconstruction complète."""
+        maintained = self.links()
+        rebuild_skill_closure()
+        self.assertEqual(maintained, self.links())
+
+    def test_create(self):
+        self.assertIn((self.backend.id, self.django.id, 2), self.links())
+        self.assertIn((self.django.id, self.django.id, 0), self.links())
+        self.assertClosureConsistent()
+
+    def test_move_subtree(self):
+        self.python.parent = self.data
+        self.python.save()
+        links = self.links()
+        self.assertIn((self.data.id, self.flask.id, 2), links)
+        self.assertNotIn((self.backend.id, self.django.id, 2), links)
+        self.assertClosureConsistent()
+
+        self.python.parent = None
+        self.python.save()
+        self.assertEqual(set(SkillClosure.objects.filter(descendant=self.django).values_list('ancestor_id', flat=True)),
+                         {self.python.id, self.django.id})
+        self.assertClosureConsistent()
+
+    def test_delete_detaches_children(self):
+        self.python.delete()
+        self.django.refresh_from_db()
+        self.assertIsNone(self.django.parent)
+        self.assertEqual(set(SkillClosure.objects.filter(descendant=self.django).values_list('ancestor_id', flat=True)),
+                         {self.django.id})
+        self.assertClosureConsistent()
+
+    def test_cycle_rejected(self):
+        self.backend.parent = self.django
+        with self.assertRaises(ValidationError):
+            self.backend.full_clean()
+        with self.assertRaises(ValidationError):
+            self.backend.save()
+        self.backend.refresh_from_db()
+        self.assertIsNone(self.backend.parent)
+        self.assertClosureConsistent()
+
+
+class SkillDedupeTestCase(TestCase):
+    """Tests pour la normalisation et la fusion des compétences en double"""
+
+    def setUp(self):
+        self.javascript = Skill.objects.create(name="JavaScript", description="Langage")
+        self.lower = Skill.objects.create(name="Javascript", description="Import RH")
+        self.short = Skill.objects.create(name="JS", description="Import RH")
+        self.typo = Skill.objects.create(name="Javscript", description="Import RH")
+        self.ux = Skill.objects.create(name="UX Design", description="Conception")
+        self.ui = Skill.objects.create(name="UI Design", description="Conception")
+        self.alice = Employee.objects.create(first_name="Alice", last_name="Martin", email="alice@example.com",
+                                             hire_date=date(2020, 1, 1), date_of_birth=date(1990, 1, 1))
+        self.bob = Employee.objects.create(first_name="Bob", last_name="Durand", email="bob@example.com",
+                                           hire_date=date(2020, 1, 1), date_of_birth=date(1990, 1, 1))
+        for employee, skill, level in ((self.alice, self.javascript, 3), (self.alice, self.typo, 5),
+                                       (self.bob, self.short, 2), (self.bob, self.javascript, 1)):
+            EmployeeSkill.objects.create(employee=employee, skill=skill, proficiency_level=level,
+                                         date_acquired=date(2021, 1, 1))
+        EmployeeSkill.objects.create(employee=self.bob, skill=self.lower, proficiency_level=4,
+                                     date_acquired=date(2019, 1, 1))
+        Evaluation.objects.create(employee=self.alice, skill=self.typo, quantitative_level=4)
+        job = Job.objects.create(title="Développeur Frontend", description="Interfaces", level="Senior",
+                                 job_family=JobFamily.objects.create(name="Développement", description="Dev"))
+        job.required_skills.add(self.short, self.javascript)
+        rebuild_skill_inventory()
+
+    def test_normalization(self):
+        self.assertEqual(normalize_skill_name("Node.JS avancé"), "nodejs avance")
+        self.assertEqual(normalize_skill_name("Travail d'équipe"), "travail equipe")
+        self.assertEqual(self.short.normalized_name, "javascript")
+        self.assertEqual(normalize_skill_name("C++"), "c++")
+
+    def test_groups(self):
+        names = dict(Skill.objects.values_list('id', 'normalized_name'))
+        self.assertEqual(duplicate_groups(names),
+                         [[self.javascript.id, self.lower.id, self.short.id, self.typo.id]])
+        self.assertEqual(duplicate_groups({1: "python 2", 2: "python 3", 3: "seo", 4: "sem"}), [])
+
+    def test_non_latin_and_empty_names(self):
+        self.assertEqual(normalize_skill_name("Русский язык"), "русский язык")
+        self.assertEqual(normalize_skill_name("日本語"), "日本語")
+        self.assertEqual(normalize_skill_name("+++"), "")
+        names = {1: "Русский язык", 2: "日本語", 3: "中文", 4: "Python", 5: "العربية", 6: "русский  ЯЗЫК",
+                 7: "+++", 8: "de la"}
+        self.assertEqual(duplicate_groups({skill_id: normalize_skill_name(name) for skill_id, name in names.items()}),
+                         [[1, 6]])
+        self.assertEqual(duplicate_groups({1: '', 2: '', 3: ' '}), [])
+
+    def test_sample_catalogue_has_no_duplicates(self):
+        create_sample_data(num_job_families=1, num_skills=600, num_jobs=1, num_positions=1, num_employees=1,
+                           seed=3, log=lambda message: None)
+        self.assertEqual(dedupe_skills(dry_run=True)['groups'], 0)
+
+    def test_merge(self):
+        result = dedupe_skills()
+        self.assertEqual(result['merged'], 3)
+        self.assertEqual(set(Skill.objects.values_list('name', flat=True)), {"JavaScript", "UX Design", "UI Design"})
+        self.assertEqual(
+            set(EmployeeSkill.objects.values_list('employee_id', 'skill_id', 'proficiency_level', 'date_acquired')),
+            {(self.alice.id, self.javascript.id, 5, date(2021, 1, 1)), (self.bob.id, self.javascript.id, 4, date(2019, 1, 1))}
+        )
+        self.assertEqual(list(Evaluation.objects.values_list('skill_id', flat=True)), [self.javascript.id])
+        self.assertFalse(EvaluationHistory.objects.exclude(skill=self.javascript).exists())
+        self.assertEqual(list(Job.objects.get().required_skills.all()), [self.javascript])
+        supply = SkillInventory.objects.filter(kind=SkillInventory.Kind.SUPPLY)
+        self.assertEqual(supply.aggregate(total=Sum('count'))['total'], 2)
+        self.assertEqual(set(supply.values_list('skill_id', flat=True)), {self.javascript.id})
+        self.assertEqual(dedupe_skills()['groups'], 0)
+
+
+class SkillExtractionTestCase(TestCase):
+    """Tests pour l'extraction des compétences par automate d'Aho–Corasick"""
+
+    def setUp(self):
+        self.python = Skill.objects.create(name="Python", description="Langage")
+        self.javascript = Skill.objects.create(name="JavaScript", description="Langage")
+        self.ml = Skill.objects.create(name="Machine Learning", description="Données")
+        self.alice = Employee.objects.create(first_name="Alice", last_name="Martin", email="alice@example.com",
+                                             hire_date=date(2020, 1, 1), date_of_birth=date(1990, 1, 1))
+        EmployeeSkill.objects.create(employee=self.alice, skill=self.python, proficiency_level=4,
+                                     date_acquired=date(2021, 1, 1))
+
+    def test_automaton(self):
+        automaton = SkillAutomaton([(1, "machine learning"), (2, "learning"), (3, "deep learning"), (4, "a b c"), (5, "b")])
+        self.assertEqual(automaton.scan("deep machine learning and deep learning".split()), {1: 1, 2: 2, 3: 1})
+        self.assertEqual(automaton.scan("a b a b c".split()), {4: 1, 5: 2})
+
+    def test_extract_with_synonyms(self):
+        text = "Développeur Python / JS, passionné de machine-learning. PYTHON avancé."
+        self.assertEqual(extract_skills(text), {self.python.id: 2, self.javascript.id: 1, self.ml.id: 1})
+
+    def test_short_names_need_exact_case_and_isolated_word(self):
+        c, go, r = (Skill.objects.create(name=name, description="Langage") for name in ("C", "Go", "R"))
+        rd = Skill.objects.create(name="R&D", description="Recherche")
+        self.assertEqual(extract_skills("C'est un go-kart en R&D, il faut y aller"), {rd.id: 1})
+        self.assertEqual(extract_skills("Je code en C, Go et R (et en Golang)."), {c.id: 1, go.id: 2, r.id: 1})
+        self.assertEqual(extract_skills("GO : d'abord c, ensuite r"), {})
+        self.assertEqual(extract_skills("l'équipe Python"), {self.python.id: 1})
+
+    def test_rebuilt_when_catalogue_changes(self):
+        self.assertEqual(extract_skills("Docker et Kubernetes"), {})
+        docker = Skill.objects.create(name="Docker", description="Conteneurs")
+        self.assertEqual(extract_skills("Docker et Kubernetes"), {docker.id: 1})
+        docker.name = "Kubernetes"
+        docker.save()
+        self.assertEqual(extract_skills("Docker et Kubernetes"), {docker.id: 1})
+        docker.delete()
+        self.assertEqual(extract_skills("Docker et Kubernetes"), {})
+
+    def test_extract_skills_command(self):
+        job = Job.objects.create(title="Data Scientist", description="Python et Machine Learning", level="Senior",
+                                 job_family=JobFamily.objects.create(name="Data", description="Données"))
+        job.required_skills.add(self.python)
+        with tempfile.TemporaryDirectory() as directory:
+            for name, text in ((f"{self.alice.id}.txt", "Python, JavaScript et JS"),
+                               ("alice@example.com.md", "Machine learning"),
+                               ("inconnu.txt", "Python"), ("photo.jpg", "Python")):
+                with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+                    f.write(text)
+            output = os.path.join(directory, 'suggestions.jsonl')
+            stdout = StringIO()
+            call_command('extract_skills', resumes=directory, jobs=True, workers=2, output=output, stdout=stdout)
+            with open(output, encoding='utf-8') as f:
+                suggestions = [json.loads(line) for line in f]
+        self.assertIn("3 CV analysé(s)", stdout.getvalue())
+        self.assertIn("1 sans employé", stdout.getvalue())
+        self.assertEqual(suggestions[0], {'job': job.id, 'skills': [
+            {'skill': self.ml.id, 'name': "Machine Learning", 'occurrences': 1}
+        ]})
+        self.assertEqual(
+            sorted((s['employee'], skill['skill'], skill['occurrences']) for s in suggestions[1:] for skill in s['skills']),
+            sorted([(self.alice.id, self.javascript.id, 2), (self.alice.id, self.ml.id, 1)])
+        )
+
+
+class SimilarityTestCase(TestCase):
+    """Tests pour l'index de similarité TF-IDF"""
+
+    def setUp(self):
+        family = JobFamily.objects.create(name="Data", description="Analyse et valorisation des données")
+        self.scientist = Job.objects.create(title="Data Scientist", description="Modèles de machine learning en Python",
+                                            level="Senior", job_family=family)
+        self.engineer = Job.objects.create(title="Data Engineer", description="Pipelines de données en Python et SQL",
+                                           level="Senior", job_family=family)
+        self.accountant = Job.objects.create(title="Comptable", description="Tenue de la comptabilité générale",
+                                             level="Junior", job_family=family)
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Les développeurs Python et C++ de l'équipe"), ["developpeur", "python", "c++", "equipe"])
+
+    def test_vectors_are_normalized(self):
+        index = SimilarityIndex([('job', 1, {'python': 2, 'sql': 1}), ('job', 2, {'python': 1}), ('job', 3, {'excel': 1})])
+        for vector in index.vectors:
+            self.assertAlmostEqual(sum(weight * weight for weight in vector.values()), 1.0, places=5)
+        self.assertEqual([object_id for _, object_id, _ in index.similar('job', 1)], [2])
+        self.assertEqual(index.query("excel"), [('job', 3, 1.0)])
+
+    def test_similar_and_incremental_update(self):
+        self.assertEqual([object_id for _, object_id, _ in similarity_index().similar('job', self.scientist.id, kinds=['job'])],
+                         [self.engineer.id])
+        index = similarity_index()
+
+        # Modification : surcharge de l'index existant, sans rechargement complet
+        self.accountant.description = "Machine learning et modèles en Python"
+        self.accountant.save()
+        self.assertIs(similarity_index(), index)
+        self.assertEqual(similarity_index().similar('job', self.scientist.id, kinds=['job'])[0][1], self.accountant.id)
+
+        # Création puis suppression : le nouvel objet est trouvé, le supprimé disparaît
+        job = Job.objects.create(title="Comptable fournisseurs", description="Comptabilité", level="Junior",
+                                 job_family=self.accountant.job_family)
+        self.assertIn(('job', job.id), [(kind, object_id) for kind, object_id, _ in similarity_index().query("comptabilite")])
+        job.delete()
+        self.assertEqual(similarity_index().query("comptabilite", kinds=['job']), [])
+
@@ -0,0 +1,83 @@
+"""
+Synchronisation incrémentale : traces des suppressions (`Tombstone`).
+
+Les listes de l'API acceptant `?updated_since=` (employés, compétences des
+employés, évaluations, positions) retournent les objets modifiés depuis la date
+donnée (colonne indexée `last_updated`) et les identifiants des objets
+supprimés depuis cette date, relevés ici par les signaux `post_delete`.
+
+Les traces sont conservées `DELTA_SYNC_RETENTION` secondes (tâche
+`jobs.prune_tombstones`) ; un client dont la dernière synchronisation est plus
+ancienne doit tout recharger.
+
+Les opérations de masse qui contournent les signaux (`QuerySet.update`,
+suppressions sous `suspend_tombstones()`) ne sont pas vues par les clients
+incrémentaux : ils doivent se resynchroniser entièrement.
+"""
+import contextvars
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Employee, EmployeeSkill, Evaluation, Position, Task, Tombstone
+from .tasks import enqueue, register_task
+
+# Durée de conservation des traces (secondes)
+DEFAULT_RETENTION = 30 * 24 * 60 * 60
+
+TOMBSTONE_MODELS = {
+    Employee: Tombstone.Model.EMPLOYEE,
+    EmployeeSkill: Tombstone.Model.EMPLOYEE_SKILL,
+    Evaluation: Tombstone.Model.EVALUATION,
+    Position: Tombstone.Model.POSITION,
+}
+
+PRUNE_TASK = 'jobs.prune_tombstones'
+PRUNE_INTERVAL = timedelta(days=1)
+
+_suspended = contextvars.ContextVar('tombstones_suspended', default=False)
+
+
+@contextmanager
+def suspend_tombstones():
+    """Désactive l'enregistrement des suppressions (opérations de masse)."""
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def retention():
+    return timedelta(seconds=getattr(settings, 'DELTA_SYNC_RETENTION', DEFAULT_RETENTION))
+
+
+def record_deletion(instance):
+    """Enregistre la suppression d'un objet suivi, dans la transaction de la suppression."""
+    if _suspended.get():
+        return None
+    return Tombstone.objects.create(model=TOMBSTONE_MODELS[type(instance)], object_id=instance.pk)
+
+
+def deleted_since(model, since):
+    """Identifiants des objets d'un modèle supprimés depuis `since`."""
+    return list(
+        Tombstone.objects.filter(model=TOMBSTONE_MODELS[model], deleted_at__gte=since)
+        .order_by('object_id').values_list('object_id', flat=True).distinct()
+    )
+
+
+def is_expired(since):
+    """Vrai si les traces postérieures à `since` ont pu être supprimées."""
+    return since < timezone.now() - retention()
+
+
+@register_task(PRUNE_TASK)
+def prune_tombstones():
+    """Supprime les traces plus anciennes que `DELTA_SYNC_RETENTION` puis se replanifie."""
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=timezone.now() - retention()).delete()
+    if not Task.objects.filter(name=PRUNE_TASK, status=Task.Status.PENDING).exists():
+        enqueue(PRUNE_TASK, delay=PRUNE_INTERVAL)
+    return {'deleted': deleted}